@@ -15,6 +15,7 @@ from winter_dragon.bot.core.settings import Settings
 from winter_dragon.config import Config
 from winter_dragon.database import SQLModel
 from winter_dragon.database.constants import engine
+from winter_dragon.database.migrations import MigrationRunner
 
 
 if TYPE_CHECKING:
@@ -70,7 +71,7 @@ def terminate(*args: Any, **kwargs: Any) -> None:  # noqa: ANN401 Catch all argu
 async def main() -> None:
     """Entrypoint of the program."""
     async with bot:
-        SQLModel.metadata.create_all(engine, checkfirst=True)
+        MigrationRunner(engine, metadata=SQLModel.metadata).upgrade()
         await bot.load_extensions()
         await bot.start()
 
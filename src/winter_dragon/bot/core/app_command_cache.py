@@ -85,11 +85,11 @@ class AppCommandCache:
 
         # commands.Bot has a built-in tree
         # this should be point to your tree if using discord.Client
-        if not commands:
+        if commands is None:
             commands = await bot.tree.fetch_commands(guild=_guild)
 
         if _guild:
-            self._guild_app_commands[_guild.id].update(self._unpack_app_commands(commands))
+            self._guild_app_commands.setdefault(_guild.id, {}).update(self._unpack_app_commands(commands))
         else:
             self._global_app_commands.update(self._unpack_app_commands(commands))
 
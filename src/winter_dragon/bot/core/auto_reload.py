@@ -1,14 +1,24 @@
-"""File-watcher based hot reload utilities for Discord cogs."""
+"""File-watcher based hot reload utilities for Discord cogs.
+
+Extension files are watched through inotify where the platform supports it, and by polling their mtime otherwise.
+Bursts of saves are debounced into a single reload, and extensions that import a changed extension are reloaded after it.
+"""
 
 from __future__ import annotations
 
 import asyncio
+import ctypes
+import ctypes.util
+import errno
 import inspect
-import logging
+import os
+import struct
+import sys
 from dataclasses import dataclass
 from enum import IntFlag, auto
+from graphlib import CycleError, TopologicalSorter
 from pathlib import Path
-from typing import TYPE_CHECKING, ClassVar
+from typing import TYPE_CHECKING, ClassVar, Protocol
 
 from herogold.log import LoggerMixin
 
@@ -16,10 +26,16 @@ from winter_dragon.bot.core.settings import Settings
 
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+    from types import ModuleType
+
     from winter_dragon.bot.core.bot import WinterDragon
     from winter_dragon.bot.core.cogs import Cog
 
 
+type ChangeCallback = Callable[[set[Path]], None]
+
+
 class WatcherFlags(IntFlag):
     """States for the auto-reload watcher."""
 
@@ -37,22 +53,245 @@ class WatcherFlags(IntFlag):
 default_flags = WatcherFlags.Enabled
 
 
+class FileWatcher(Protocol):
+    """Backend that reports changed files to a callback."""
+
+    def watch(self, path: Path) -> None:
+        """Start reporting changes to a file."""
+        ...
+
+    def unwatch(self, path: Path) -> None:
+        """Stop reporting changes to a file."""
+        ...
+
+    def close(self) -> None:
+        """Release all resources held by the watcher."""
+        ...
+
+
+class InotifyWatcher:
+    """Watches the directories of watched files with inotify, without any work while idle."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback: ChangeCallback) -> None:
+        """Initialize the inotify instance. Raises OSError where inotify is unavailable."""
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._loop = loop
+        self._callback = callback
+        self._directories: dict[int, Path] = {}
+        self._files: set[Path] = set()
+        self._loop.add_reader(self._fd, self._on_readable)
+
+    def watch(self, path: Path) -> None:
+        """Start reporting changes to a file, by watching its directory."""
+        self._files.add(path)
+        if path.parent in self._directories.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path.parent), self.MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path.parent))
+        self._directories[wd] = path.parent
+
+    def unwatch(self, path: Path) -> None:
+        """Stop reporting changes to a file. Directory watches are kept, they cost nothing while idle."""
+        self._files.discard(path)
+
+    def close(self) -> None:
+        """Stop watching and close the inotify instance."""
+        if self._fd < 0:
+            return
+        self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+        self._fd = -1
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        changed: set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if (directory := self._directories.get(wd)) and (path := directory / os.fsdecode(name)) in self._files:
+                changed.add(path)
+        if changed:
+            self._callback(changed)
+
+
+class PollingWatcher:
+    """Fallback watcher that compares the mtime of every watched file on an interval."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback: ChangeCallback, interval: float) -> None:
+        """Initialize the watcher and start polling."""
+        self._callback = callback
+        self._interval = interval
+        self._mtimes: dict[Path, int] = {}
+        self._task = loop.create_task(self._poll())
+
+    def watch(self, path: Path) -> None:
+        """Start reporting changes to a file."""
+        self._mtimes[path] = self._get_file_mtime(path)
+
+    def unwatch(self, path: Path) -> None:
+        """Stop reporting changes to a file."""
+        self._mtimes.pop(path, None)
+
+    def close(self) -> None:
+        """Stop polling."""
+        self._task.cancel()
+
+    @staticmethod
+    def _get_file_mtime(path: Path) -> int:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            changed: set[Path] = set()
+            for path, mtime in list(self._mtimes.items()):
+                if (current := self._get_file_mtime(path)) > mtime:
+                    self._mtimes[path] = current
+                    changed.add(path)
+            if changed:
+                self._callback(changed)
+
+
+def extension_dependencies(extensions: Mapping[str, ModuleType]) -> dict[str, set[str]]:
+    """Map every extension to the other extensions it imports from."""
+    dependencies: dict[str, set[str]] = {}
+    for name, module in extensions.items():
+        deps: set[str] = set()
+        for value in vars(module).values():
+            dep = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+            if isinstance(dep, str) and dep != name and dep in extensions:
+                deps.add(dep)
+        dependencies[name] = deps
+    return dependencies
+
+
+def reload_order(changed: Iterable[str], dependencies: Mapping[str, Iterable[str]]) -> list[str]:
+    """Order the changed extensions and everything depending on them, dependencies first."""
+    dependents: dict[str, set[str]] = {}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents.setdefault(dep, set()).add(name)
+
+    affected: set[str] = set()
+    stack = list(changed)
+    while stack:
+        if (name := stack.pop()) in affected:
+            continue
+        affected.add(name)
+        stack.extend(dependents.get(name, ()))
+
+    graph = {name: {dep for dep in dependencies.get(name, ()) if dep in affected} for name in sorted(affected)}
+    try:
+        return list(TopologicalSorter(graph).static_order())
+    except CycleError:
+        return sorted(affected)
+
+
+class ExtensionReloader(LoggerMixin):
+    """Reloads changed extensions, and the extensions depending on them, once a burst of saves settles."""
+
+    def __init__(self, bot: WinterDragon, *, debounce: float, poll_interval: float) -> None:
+        """Initialize the reloader with the best available file watcher."""
+        self.bot = bot
+        self.debounce = debounce
+        self._paths: dict[Path, str] = {}
+        self._pending: set[str] = set()
+        self._timer: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()
+        self._reloads: set[asyncio.Task[list[str]]] = set()
+        self.watcher: FileWatcher
+        try:
+            self.watcher = InotifyWatcher(bot.loop, self._on_change)
+        except OSError as exc:
+            self.logger.info(f"inotify unavailable ({exc}), polling extension files every {poll_interval}s")
+            self.watcher = PollingWatcher(bot.loop, self._on_change, poll_interval)
+
+    def watch(self, module_name: str, path: Path) -> None:
+        """Reload a module whenever its file changes."""
+        self._paths[path] = module_name
+        self.watcher.watch(path)
+
+    def unwatch(self, path: Path) -> None:
+        """Stop reloading a module on file changes."""
+        self._paths.pop(path, None)
+        self.watcher.unwatch(path)
+
+    def close(self) -> None:
+        """Stop watching files and drop pending reloads."""
+        if self._timer:
+            self._timer.cancel()
+        self._pending.clear()
+        self.watcher.close()
+
+    def _on_change(self, paths: set[Path]) -> None:
+        self._pending.update(self._paths[path] for path in paths if path in self._paths)
+        if not self._pending:
+            return
+        if self._timer:
+            self._timer.cancel()
+        self._timer = self.bot.loop.call_later(self.debounce, self._flush)
+
+    def _flush(self) -> None:
+        self._timer = None
+        changed, self._pending = self._pending, set()
+        task = self.bot.loop.create_task(self.reload(changed))
+        self._reloads.add(task)
+        task.add_done_callback(self._reloads.discard)
+
+    async def reload(self, changed: Iterable[str]) -> list[str]:
+        """Reload changed extensions and their dependents in dependency order. Returns the reloaded extensions."""
+        async with self._lock:
+            order = reload_order(changed, extension_dependencies(self.bot.extensions))
+            reloaded: list[str] = []
+            for module_name in order:
+                if module_name not in self.bot.extensions:
+                    continue
+                self.logger.info("Detected change in %s. Reloading extension.", module_name)
+                try:
+                    await self.bot.reload_extension(module_name)
+                except Exception:
+                    self.logger.exception("Failed to reload extension %s, kept the previous version", module_name)
+                else:
+                    reloaded.append(module_name)
+            return reloaded
+
+
 @dataclass(slots=True)
 class _WatchEntry:
     """Runtime data required to watch and reload an extension module."""
 
-    bot: WinterDragon
     path: Path
-    task: asyncio.Task[None]
     refs: int
-    mtime_ns: int
-    logger: logging.Logger
 
 
 class AutoReloadWatcher(LoggerMixin):
     """Monitors extension files and reloads them in-place when they change."""
 
     _entries: ClassVar[dict[str, _WatchEntry]] = {}
+    _reloader: ClassVar[ExtensionReloader | None] = None
 
     def __init__(self, *, bot: WinterDragon, cog_cls: type[Cog], flags: WatcherFlags = default_flags) -> None:
         """Initialize the auto-reload watcher for a specific cog class."""
@@ -87,15 +326,8 @@ class AutoReloadWatcher(LoggerMixin):
             entry.refs += 1
             self._registered = True
             return
-        task = self.bot.loop.create_task(self._watch_extension_file(self.module_name))
-        AutoReloadWatcher._entries[self.module_name] = _WatchEntry(
-            bot=self.bot,
-            path=path,
-            task=task,
-            refs=1,
-            mtime_ns=self._get_file_mtime(path),
-            logger=self.logger,
-        )
+        self._get_reloader().watch(self.module_name, path)
+        AutoReloadWatcher._entries[self.module_name] = _WatchEntry(path=path, refs=1)
         self._registered = True
         self.logger.debug("Enabled auto-reload watcher for %s (%s)", self.module_name, path)
 
@@ -110,14 +342,20 @@ class AutoReloadWatcher(LoggerMixin):
         entry.refs -= 1
         if entry.refs <= 0:
             AutoReloadWatcher._entries.pop(self.module_name, None)
-            try:
-                current_task = asyncio.current_task()
-            except RuntimeError:
-                current_task = None
-            if entry.task is not current_task:
-                entry.task.cancel()
+            if AutoReloadWatcher._reloader:
+                AutoReloadWatcher._reloader.unwatch(entry.path)
         self._registered = False
 
+    def _get_reloader(self) -> ExtensionReloader:
+        if AutoReloadWatcher._reloader is None:
+            interval = float(Settings.auto_reload_poll_seconds or 1.5)
+            AutoReloadWatcher._reloader = ExtensionReloader(
+                self.bot,
+                debounce=float(Settings.auto_reload_debounce_seconds),
+                poll_interval=interval if interval > 0 else 1.5,
+            )
+        return AutoReloadWatcher._reloader
+
     def _should_watch(self) -> bool:
         return (
             self.flags.is_enabled
@@ -135,51 +373,3 @@ class AutoReloadWatcher(LoggerMixin):
                 exc,
             )
             return None
-
-    @staticmethod
-    def _get_file_mtime(path: Path) -> int:
-        try:
-            return path.stat().st_mtime_ns
-        except OSError:
-            return 0
-
-    @classmethod
-    async def _watch_extension_file(cls, module_name: str) -> None:
-        interval = float(Settings.auto_reload_poll_seconds or 1.5)
-        if interval <= 0:
-            interval = 1.5
-        try:
-            while True:
-                entry = cls._entries.get(module_name)
-                if entry is None:
-                    return
-                await asyncio.sleep(interval)
-                entry = cls._entries.get(module_name)
-                if entry is None:
-                    return
-                current_mtime = cls._get_file_mtime(entry.path)
-                if current_mtime <= entry.mtime_ns:
-                    continue
-                entry.mtime_ns = current_mtime
-                await cls._reload_extension(entry.bot, module_name, entry.logger)
-        except asyncio.CancelledError:
-            cls._log_with_fallback(module_name, "debug", "Stopped watching %s for changes", module_name)
-            raise
-        except Exception:  # noqa: BLE001
-            cls._log_with_fallback(module_name, "exception", "Auto-reload watcher for %s crashed", module_name)
-
-    @classmethod
-    def _log_with_fallback(cls, module_name: str, level: str, msg: str, *args: object) -> None:
-        entry = cls._entries.get(module_name)
-        logger = entry.logger if entry else logging.getLogger(f"{__name__}.{cls.__name__}")
-        getattr(logger, level)(msg, *args)
-
-    @staticmethod
-    async def _reload_extension(bot: WinterDragon, module_name: str, logger: logging.Logger) -> None:
-        logger.info("Detected change in %s. Reloading extension.", module_name)
-        try:
-            reload_result = bot.reload_extension(module_name)
-            if inspect.isawaitable(reload_result):
-                await reload_result
-        except Exception:
-            logger.exception("Failed to reload extension %s", module_name)
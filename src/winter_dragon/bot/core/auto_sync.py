@@ -1,34 +1,164 @@
 """Track currently synced definition signatures.
 
 When the signature of any command changes, sync the command to Discord, and update the stored signature for that command.
+Signatures are tracked per scope (global, or a single guild), and only scopes whose commands changed are synced.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+from contextlib import ExitStack, nullcontext
 from inspect import signature
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Protocol
 
+import discord
 from herogold.log import LoggerMixin
-from sqlmodel import Field
+from sqlalchemy import delete
+from sqlmodel import Session, col, select
 
-from winter_dragon.database.extension.model import SQLModel
+from winter_dragon.bot.core.app_command_cache import AppCommandCache
+from winter_dragon.config import Config
+from winter_dragon.database.tables.synced_command import SyncedCommand
 
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable
+    from contextlib import AbstractContextManager
 
+    from discord.abc import Snowflake
+    from discord.app_commands import AppCommand, CommandTree
+    from discord.ext.commands.bot import BotBase
 
-class SyncedCommand(SQLModel, table=True):
-    """Table to track the signatures of commands that have been synced with Discord."""
 
-    command_name: str = Field(primary_key=True)
-    signature: str
+GLOBAL_SCOPE = "global"
+
+type SyncContext = Callable[[Snowflake | None], AbstractContextManager[object]]
+
+
+class SyncStore(Protocol):
+    """Storage for the command signatures that were last synced per scope."""
+
+    def load(self, scope: str) -> dict[str, str]:
+        """Load the synced signatures of a scope, keyed by command name."""
+        ...
+
+    def save(self, scope: str, signatures: dict[str, str]) -> None:
+        """Replace the synced signatures of a scope."""
+        ...
+
+
+class DatabaseSyncStore:
+    """SyncStore backed by the SyncedCommand table."""
+
+    def __init__(self, session: Session) -> None:
+        """Initialize the store with a database session."""
+        self.session = session
+
+    def load(self, scope: str) -> dict[str, str]:
+        """Load the synced signatures of a scope, keyed by command name."""
+        rows = self.session.exec(select(SyncedCommand).where(SyncedCommand.scope == scope)).all()
+        return {row.command_name: row.signature for row in rows}
+
+    def save(self, scope: str, signatures: dict[str, str]) -> None:
+        """Replace the synced signatures of a scope."""
+        self.session.exec(delete(SyncedCommand).where(col(SyncedCommand.scope) == scope))
+        self.session.add_all(
+            SyncedCommand(scope=scope, command_name=name, signature=value) for name, value in signatures.items()
+        )
+        self.session.commit()
+
+
+def scope_key(guild: Snowflake | None) -> str:
+    """Get the key a scope's signatures are stored under."""
+    return GLOBAL_SCOPE if guild is None else str(guild.id)
 
 
 class AutoSync(LoggerMixin):
-    """Utility class to manage automatic syncing of command signatures."""
+    """Sync the command tree to Discord, skipping scopes whose commands didn't change since the last sync."""
+
+    max_concurrency = Config(4)
+
+    def __init__(
+        self,
+        bot: BotBase,
+        store: SyncStore,
+        sync_context: SyncContext | None = None,
+    ) -> None:
+        """Initialize the syncer.
+
+        sync_context is entered for every scope before its commands are hashed and synced,
+        for example to fix command names that are too long.
+        """
+        self.bot = bot
+        self.store = store
+        self.sync_context = sync_context or (lambda _: nullcontext())
+        self.cache = AppCommandCache()
+
+    @property
+    def tree(self) -> CommandTree:
+        """The command tree that is synced."""
+        return self.bot.tree
 
     @staticmethod
     def get_signature[**P, R](func: Callable[P, R]) -> str:
         """Generate a string representation of the function's signature."""
         return str(signature(func))
+
+    def get_signatures(self, guild: Snowflake | None = None) -> dict[str, str]:
+        """Hash the payload of every command in a scope, keyed by command name."""
+        return {
+            command.name: hashlib.sha256(
+                json.dumps(command.to_dict(self.tree), sort_keys=True, default=str).encode(),
+            ).hexdigest()
+            for command in self.tree.get_commands(guild=guild)
+        }
+
+    async def sync(
+        self,
+        guilds: Iterable[Snowflake] = (),
+        *,
+        include_global: bool = True,
+        force: bool = False,
+    ) -> dict[str, list[AppCommand]]:
+        """Sync every changed scope, guild scopes concurrently, and return the synced commands per scope."""
+        scopes: list[Snowflake | None] = [None] if include_global else []
+        scopes.extend(guilds)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        # Entered once for all scopes, and exited in reverse order, so concurrent syncs never see half-restored commands.
+        with ExitStack() as stack:
+            for scope in scopes:
+                stack.enter_context(self.sync_context(scope))
+            local = [(scope, self.get_signatures(scope)) for scope in scopes]
+            changed = [
+                (scope, signatures)
+                for scope, signatures in local
+                if force or signatures != self.store.load(scope_key(scope))
+            ]
+            self.logger.info(f"Syncing {len(changed)} of {len(scopes)} command scopes")
+            results = await asyncio.gather(
+                *(self._sync_scope(scope, signatures, semaphore) for scope, signatures in changed),
+            )
+        return {scope_key(scope): synced for (scope, _), synced in zip(changed, results, strict=True) if synced is not None}
+
+    async def _sync_scope(
+        self,
+        guild: Snowflake | None,
+        signatures: dict[str, str],
+        semaphore: asyncio.Semaphore,
+    ) -> list[AppCommand] | None:
+        async with semaphore:
+            try:
+                synced = await self.tree.sync(guild=guild)
+            except discord.Forbidden:
+                self.logger.warning(f"Missing access to sync commands in scope {scope_key(guild)}")
+                return None
+            except discord.HTTPException:
+                self.logger.exception(f"Failed to sync commands in scope {scope_key(guild)}")
+                return None
+        self.store.save(scope_key(guild), signatures)
+        await self.cache.update_app_commands_cache(self.bot, synced, guild)
+        self.logger.debug(f"Synced {len(synced)} commands in scope {scope_key(guild)}")
+        return synced
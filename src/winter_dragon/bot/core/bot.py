@@ -6,28 +6,35 @@ WinterDragon has additional attributes and methods.
 
 from __future__ import annotations
 
+import asyncio
 import datetime
 import inspect
 import os
 import sys
+import time
 from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable
 from importlib.util import module_from_spec
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, override
 
 import discord
-from discord import Message, app_commands
+import sentry_sdk
+from discord import AppCommandOptionType, Message, app_commands
 from discord.ext.commands import AutoShardedBot, CommandError
 from discord.ext.commands.bot import BotBase
-from discord.ext.commands.errors import ExtensionFailed
+from discord.ext.commands.errors import ExtensionFailed, ExtensionNotLoaded
 from discord.ext.commands.help import DefaultHelpCommand, HelpCommand
 from herogold.log import LoggerMixin
 
 from winter_dragon.bot import Settings
+from winter_dragon.charts.renderer import ChartRenderer
 from winter_dragon.config import Config
+from winter_dragon.metrics.instruments import observe_command
+from winter_dragon.metrics.loop_monitor import LoopMonitor
 
 from .cogs import Cog
 from .paths import EXTENSIONS, ROOT_DIR
+from .sampling import COMMAND_OP
 
 
 if TYPE_CHECKING:
@@ -65,6 +72,37 @@ OAUTH2 = "https://discord.com/api/oauth2"
 DISCORD_AUTHORIZE = f"{OAUTH2}/authorize"
 
 
+def get_command_name(interaction: discord.Interaction) -> str:
+    """Get the full name of the command an interaction invokes, including its group and subcommand."""
+    data: dict[str, Any] = dict(interaction.data or {})
+    names = [data.get("name", "")]
+    options = data.get("options", [])
+    subcommand_types = (AppCommandOptionType.subcommand.value, AppCommandOptionType.subcommand_group.value)
+    while options and options[0].get("type") in subcommand_types:
+        names.append(options[0]["name"])
+        options = options[0].get("options", [])
+    return " ".join(names)
+
+
+class CommandTree(app_commands.CommandTree[Any]):
+    """CommandTree that traces and times every command invocation."""
+
+    @override
+    async def _call(self, interaction: discord.Interaction) -> None:
+        name = get_command_name(interaction)
+        # Name the task after the command, for the loop monitor to tell which command blocked the loop.
+        if (task := asyncio.current_task()) is not None:
+            task.set_name(f"command: {name}")
+        start = time.perf_counter()
+        failed = True
+        try:
+            with sentry_sdk.start_transaction(op=COMMAND_OP, name=name):
+                await super()._call(interaction)
+            failed = interaction.command_failed
+        finally:
+            observe_command(name, time.perf_counter() - start, failed=failed)
+
+
 class WinterDragon(AutoShardedBot, LoggerMixin):
     """WinterDragon is a subclass of AutoShardedBot.
 
@@ -74,12 +112,19 @@ class WinterDragon(AutoShardedBot, LoggerMixin):
     launch_time: datetime.datetime
     log_saver: Task[Coroutine[Any, Any, None]] | None = None
 
+    chart_workers = Config(2)
+    chart_concurrency = Config(4)
+    chart_cache_size = Config(64)
+    loop_lag_interval = Config(0.1)
+    loop_block_threshold = Config(0.25)
+    loop_stack_samples = Config(3)
+
     def __init__(
         self,
         command_prefix: PrefixType[WinterDragon],
         *,
         help_command: HelpCommand | None = None,
-        tree_cls: type[app_commands.CommandTree[Any]] = app_commands.CommandTree,
+        tree_cls: type[app_commands.CommandTree[Any]] = CommandTree,
         description: str | None = None,
         intents: discord.Intents,
         **options: Any,  # We match the type of options as defined in AutoShardedBot  # noqa: ANN401
@@ -90,6 +135,17 @@ class WinterDragon(AutoShardedBot, LoggerMixin):
         Like a global app_commands cache and per guild app_commands cache.
         """
         self.launch_time = datetime.datetime.now(datetime.UTC)
+        self.charts = ChartRenderer(
+            workers=self.chart_workers,
+            max_concurrency=self.chart_concurrency,
+            cache_size=self.chart_cache_size,
+        )
+        self.loop_monitor = LoopMonitor(
+            roots=(ROOT_DIR,),
+            interval=self.loop_lag_interval,
+            threshold=self.loop_block_threshold,
+            max_samples=self.loop_stack_samples,
+        )
 
         if help_command is None:
             help_command = DefaultHelpCommand()
@@ -103,6 +159,19 @@ class WinterDragon(AutoShardedBot, LoggerMixin):
             **options,
         )
 
+    @override
+    async def setup_hook(self) -> None:
+        """Start monitoring the event loop."""
+        self.loop_monitor.start()
+        await super().setup_hook()
+
+    @override
+    async def close(self) -> None:
+        """Stop rendering charts and monitoring the event loop, and close the bot."""
+        self.charts.close()
+        await self.loop_monitor.stop()
+        await super().close()
+
     def get_bot_invite(self) -> str:
         """Get the link to invite the bot to a server."""
         return (
@@ -117,6 +186,20 @@ class WinterDragon(AutoShardedBot, LoggerMixin):
         self.logger.exception(f"error in: {event_method}")
         return await super().on_error(event_method, *args, **kwargs)
 
+    @override
+    async def invoke(self, ctx: Context[BotT]) -> None:
+        """Time every prefix command invocation."""
+        if ctx.command is None:
+            await super().invoke(ctx)
+            return
+        start = time.perf_counter()
+        failed = True
+        try:
+            await super().invoke(ctx)
+            failed = ctx.command_failed
+        finally:
+            observe_command(ctx.command.qualified_name, time.perf_counter() - start, failed=failed)
+
     async def on_command_error(self, context: Context[BotT], exception: CommandError) -> None:
         """Log where errors occur during command execution."""
         self.logger.exception(f"error in command: {context}", exc_info=exception)
@@ -159,11 +242,40 @@ class WinterDragon(AutoShardedBot, LoggerMixin):
             # This is required, because discord.py _load_from_module_spec is internal
             # And we want to change how extensions are loaded without calling setup()
             # we use auto_load on Cogs to initialize them
-            extensions = getattr(self, "_BotBase__extensions", None)
-            if not isinstance(extensions, dict):
-                msg = "Bot extension registry is unavailable"
-                raise RuntimeError(msg)
-            extensions[key] = lib
+            self._get_extension_registry()[key] = lib
+
+    @override
+    async def reload_extension(self, name: str, *, package: str | None = None) -> None:
+        """Reload an extension, restoring the previously loaded module and its cogs if the reload fails.
+
+        discord.py rolls back by calling `setup()`, which our extensions don't define.
+        """
+        name = self._resolve_name(name, package)
+        lib = self.extensions.get(name)
+        if lib is None:
+            raise ExtensionNotLoaded(name)
+        modules = {
+            key: module
+            for key, module in sys.modules.items()
+            if key == lib.__name__ or key.startswith(f"{lib.__name__}.")
+        }
+
+        try:
+            await self.unload_extension(name)
+            await self.load_extension(name)
+        except Exception:
+            sys.modules.update(modules)
+            await self._init_cogs(lib)
+            self._get_extension_registry()[name] = lib
+            raise
+
+    def _get_extension_registry(self) -> dict[str, ModuleType]:
+        """Get the mutable registry of loaded extensions, which discord.py keeps private."""
+        extensions = getattr(self, "_BotBase__extensions", None)
+        if not isinstance(extensions, dict):
+            msg = "Bot extension registry is unavailable"
+            raise RuntimeError(msg)
+        return extensions
 
     async def _init_cogs(self, lib: ModuleType) -> None:
         """Set up a cog by calling its cog_load method if it exists."""
@@ -0,0 +1,133 @@
+"""Module for deciding which Sentry transactions to trace.
+
+Sentry samples at the start of a transaction, before its outcome is known.
+The policy makes that decision per operation type, and learns from what it sees being sent:
+- Transactions that errored or ran slow get their name boosted, so the next ones of that name are all traced.
+- The spans sent per minute are measured, and every rate is scaled to stay within the budget.
+- The first few transactions of every name in a minute are always traced, so rare commands are never lost.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from herogold.log import LoggerMixin
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+
+COMMAND_OP = "command"
+WINDOW_SECONDS = 60
+MIN_SCALE = 0.001
+OK_STATUSES = (None, "ok")
+
+
+def _timestamp(value: object) -> float | None:
+    """Get a Sentry event timestamp as seconds since the epoch."""
+    match value:
+        case datetime():
+            return value.timestamp()
+        case str():
+            return datetime.fromisoformat(value).timestamp()
+        case int() | float():
+            return float(value)
+        case _:
+            return None
+
+
+def transaction_duration(event: Mapping[str, Any]) -> float | None:
+    """Get the duration of a transaction event in seconds."""
+    start = _timestamp(event.get("start_timestamp"))
+    end = _timestamp(event.get("timestamp"))
+    if start is None or end is None:
+        return None
+    return end - start
+
+
+class SamplingPolicy(LoggerMixin):
+    """Adaptive traces_sampler, fed back by before_send and before_send_transaction."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        operation_rates: Mapping[str, float],
+        default_rate: float,
+        spans_per_minute: int,
+        rare_threshold: int,
+        slow_seconds: float,
+        boost_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the policy with its base rates and budget."""
+        self.operation_rates = dict(operation_rates)
+        self.default_rate = default_rate
+        self.spans_per_minute = spans_per_minute
+        self.rare_threshold = rare_threshold
+        self.slow_seconds = slow_seconds
+        self.boost_seconds = boost_seconds
+        self.clock = clock
+        self.scale = 1.0
+        self._window_start = clock()
+        self._window_spans = 0
+        self._seen: Counter[str] = Counter()
+        self._boosted: dict[str, float] = {}
+
+    def traces_sampler(self, sampling_context: Mapping[str, Any]) -> float:
+        """Get the sample rate of a transaction that is about to start."""
+        if (parent_sampled := sampling_context.get("parent_sampled")) is not None:
+            return float(parent_sampled)
+
+        transaction = sampling_context.get("transaction_context") or {}
+        name = transaction.get("name") or ""
+        now = self.clock()
+        self._roll_window(now)
+
+        self._seen[name] += 1
+        if self._seen[name] <= self.rare_threshold or self._boosted.get(name, 0) > now:
+            return 1.0
+        return min(1.0, self.operation_rates.get(transaction.get("op") or "", self.default_rate) * self.scale)
+
+    def before_send(self, event: dict[str, Any], _hint: dict[str, Any]) -> dict[str, Any]:
+        """Boost the transaction an error happened in."""
+        if name := event.get("transaction"):
+            self.boost(name)
+        return event
+
+    def before_send_transaction(self, event: dict[str, Any], _hint: dict[str, Any]) -> dict[str, Any]:
+        """Count the spans sent, and boost transactions that failed or ran slow."""
+        self._roll_window(self.clock())
+        self._window_spans += 1 + len(event.get("spans") or ())
+
+        status = event.get("contexts", {}).get("trace", {}).get("status")
+        duration = transaction_duration(event)
+        if (name := event.get("transaction")) and (
+            status not in OK_STATUSES or (duration is not None and duration >= self.slow_seconds)
+        ):
+            self.boost(name)
+        return event
+
+    def boost(self, name: str) -> None:
+        """Trace every transaction with this name for a while."""
+        self._boosted[name] = self.clock() + self.boost_seconds
+
+    def _roll_window(self, now: float) -> None:
+        elapsed = now - self._window_start
+        if elapsed < WINDOW_SECONDS:
+            return
+
+        spans_per_minute = self._window_spans * WINDOW_SECONDS / elapsed
+        if spans_per_minute == 0:
+            self.scale = 1.0
+        else:
+            self.scale = min(1.0, max(MIN_SCALE, self.scale * self.spans_per_minute / spans_per_minute))
+        self.logger.debug(f"Sent {spans_per_minute:.0f} spans per minute, scaling sample rates by {self.scale:.3f}")
+
+        self._window_start = now
+        self._window_spans = 0
+        self._seen.clear()
+        self._boosted = {name: until for name, until in self._boosted.items() if until > now}
@@ -8,6 +8,7 @@ from enum import auto
 import sentry_sdk
 from confkit import Enum
 
+from winter_dragon.bot.core.sampling import COMMAND_OP, SamplingPolicy
 from winter_dragon.config import Config
 
 
@@ -25,9 +26,25 @@ class Sentry:
     Telemetry = Config(default=True)
     dsn = Config("")
     environment = Config(Enum(Environments.development))
+    traces_spans_per_minute = Config(1000)
+    traces_default_rate = Config(0.1)
+    traces_command_rate = Config(1.0)
+    traces_rare_threshold = Config(5)
+    traces_slow_seconds = Config(2.0)
+    traces_boost_seconds = Config(300.0)
 
     def __init__(self) -> None:
         """Initialize Sentry."""
+        self.sampling = SamplingPolicy(
+            operation_rates={
+                COMMAND_OP: self.traces_command_rate,
+            },
+            default_rate=self.traces_default_rate,
+            spans_per_minute=self.traces_spans_per_minute,
+            rare_threshold=self.traces_rare_threshold,
+            slow_seconds=self.traces_slow_seconds,
+            boost_seconds=self.traces_boost_seconds,
+        )
         sentry_sdk.init(
             environment=self.environment.value,
             dsn=self.dsn,
@@ -37,5 +54,7 @@ class Sentry:
             _experiments={
                 "enable_logs": True,
             },
-            traces_sample_rate=1,  # 100% of error traces will be sent
+            traces_sampler=self.sampling.traces_sampler,
+            before_send=self.sampling.before_send,
+            before_send_transaction=self.sampling.before_send_transaction,
         )
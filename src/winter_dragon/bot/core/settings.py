@@ -49,6 +49,7 @@ class Settings:
     bot_invite = Config(GENERATED_MSG)
     auto_reload_extensions = Config(default=False)
     auto_reload_poll_seconds = Config(5)
+    auto_reload_debounce_seconds = Config(0.5)
 
     # Colors
     created_color = Config(Hex(0x00FF00))
@@ -0,0 +1,235 @@
+"""Tests for the event-driven extension reloader, against a fake bot that records reloads, and for rolling back reloads."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from types import ModuleType, SimpleNamespace
+from typing import TYPE_CHECKING
+
+import discord
+import pytest
+from discord.ext.commands import ExtensionFailed
+
+from winter_dragon.bot.core.auto_reload import (
+    ExtensionReloader,
+    PollingWatcher,
+    extension_dependencies,
+    reload_order,
+)
+from winter_dragon.bot.core.bot import WinterDragon
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+DEBOUNCE_SECONDS = 0.05
+RELOAD_BUDGET_SECONDS = 1
+RELOAD_TIMEOUT_SECONDS = 30
+"""Seconds to wait for a change before giving up, only to fail instead of hanging."""
+IDLE_SECONDS = 0.5
+IDLE_CPU_BUDGET_SECONDS = 0.05
+
+
+class FakeBot:
+    """Bot that records reloaded extensions instead of importing them."""
+
+    def __init__(self, *names: str) -> None:
+        """Initialize the bot with loaded extensions."""
+        self.loop = asyncio.get_running_loop()
+        self.extensions = {name: ModuleType(name) for name in names}
+        self.reloads: list[str] = []
+        self.reloaded = asyncio.Event()
+        self.failing: set[str] = set()
+
+    async def reload_extension(self, name: str) -> None:
+        """Record the reload, or fail it."""
+        if name in self.failing:
+            msg = f"broken {name}"
+            raise RuntimeError(msg)
+        self.reloads.append(name)
+        self.reloaded.set()
+
+
+def test_reload_order_includes_dependents() -> None:
+    """Dependents of a changed extension are reloaded after it, unrelated extensions are not."""
+    dependencies = {"a": set(), "b": {"a"}, "c": {"b"}, "d": set()}
+
+    assert reload_order(["a"], dependencies) == ["a", "b", "c"]
+    assert reload_order(["b"], dependencies) == ["b", "c"]
+    assert reload_order(["d"], dependencies) == ["d"]
+
+
+def test_reload_order_with_cycle() -> None:
+    """Cyclic imports still reload every affected extension."""
+    assert reload_order(["a"], {"a": {"b"}, "b": {"a"}}) == ["a", "b"]
+
+
+def test_extension_dependencies() -> None:
+    """Imported extension modules and names imported from them are dependencies."""
+    a, b, c = ModuleType("a"), ModuleType("b"), ModuleType("c")
+    b.a = a
+    helper = SimpleNamespace(__module__="a")
+    c.helper = helper
+
+    assert extension_dependencies({"a": a, "b": b, "c": c}) == {"a": set(), "b": {"a"}, "c": {"a"}}
+
+
+async def save_burst(tmp_path: Path) -> tuple[list[str], float]:
+    """Save a watched extension several times in a row, and get the reloads and how long the first one took."""
+    bot = FakeBot("ext.a", "ext.b")
+    bot.extensions["ext.b"].a = bot.extensions["ext.a"]
+    path = tmp_path / "a.py"
+    path.write_text("")
+    reloader = ExtensionReloader(bot, debounce=DEBOUNCE_SECONDS, poll_interval=DEBOUNCE_SECONDS)
+    reloader.watch("ext.a", path)
+    try:
+        await asyncio.sleep(DEBOUNCE_SECONDS)
+        for i in range(5):
+            path.write_text(f"value = {i}")
+        start = time.perf_counter()
+        await asyncio.wait_for(bot.reloaded.wait(), RELOAD_TIMEOUT_SECONDS)
+        latency = time.perf_counter() - start
+        await asyncio.sleep(DEBOUNCE_SECONDS * 2)
+    finally:
+        reloader.close()
+    return bot.reloads, latency
+
+
+def test_burst_of_saves_reloads_once(tmp_path: Path) -> None:
+    """Saving a file several times in a row reloads it, and its dependents, once."""
+    reloads, _ = asyncio.run(save_burst(tmp_path))
+    assert reloads == ["ext.a", "ext.b"]
+
+
+@pytest.mark.benchmark
+def test_reload_latency(tmp_path: Path) -> None:
+    """A burst of saves is reloaded shortly after the last save."""
+    _, latency = asyncio.run(save_burst(tmp_path))
+    assert latency < RELOAD_BUDGET_SECONDS
+
+
+def test_failed_reload_continues() -> None:
+    """A broken extension doesn't stop the other extensions from reloading."""
+
+    async def run() -> tuple[list[str], list[str]]:
+        bot = FakeBot("a", "b")
+        bot.failing.add("a")
+        reloader = ExtensionReloader(bot, debounce=DEBOUNCE_SECONDS, poll_interval=DEBOUNCE_SECONDS)
+        try:
+            reloaded = await reloader.reload(["a", "b"])
+        finally:
+            reloader.close()
+        return reloaded, bot.reloads
+
+    reloaded, reloads = asyncio.run(run())
+    assert reloaded == ["b"]
+    assert reloads == ["b"]
+
+
+def test_polling_fallback(tmp_path: Path) -> None:
+    """The polling watcher reports changed files."""
+
+    async def run() -> set[Path]:
+        changes: asyncio.Queue[set[Path]] = asyncio.Queue()
+        path = tmp_path / "a.py"
+        path.write_text("")
+        watcher = PollingWatcher(asyncio.get_running_loop(), changes.put_nowait, DEBOUNCE_SECONDS)
+        watcher.watch(path)
+        try:
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+            path.write_text("changed")
+            return await asyncio.wait_for(changes.get(), RELOAD_TIMEOUT_SECONDS)
+        finally:
+            watcher.close()
+
+    path = tmp_path / "a.py"
+    assert asyncio.run(run()) == {path}
+
+
+async def watch_idle(tmp_path: Path) -> tuple[list[str], float]:
+    """Watch many extensions while nothing changes, and get the reloads and the CPU time spent."""
+    bot = FakeBot()
+    reloader = ExtensionReloader(bot, debounce=DEBOUNCE_SECONDS, poll_interval=1.5)
+    for i in range(200):
+        path = tmp_path / f"ext_{i}.py"
+        path.write_text("")
+        reloader.watch(f"ext_{i}", path)
+    try:
+        start = time.process_time()
+        await asyncio.sleep(IDLE_SECONDS)
+        return bot.reloads, time.process_time() - start
+    finally:
+        reloader.close()
+
+
+def test_idle_watcher(tmp_path: Path) -> None:
+    """Watching many extensions reloads nothing while nothing changes."""
+    reloads, _ = asyncio.run(watch_idle(tmp_path))
+    assert reloads == []
+
+
+@pytest.mark.benchmark
+def test_idle_watcher_cpu(tmp_path: Path) -> None:
+    """Watching many extensions costs next to no CPU while nothing changes."""
+    _, cpu = asyncio.run(watch_idle(tmp_path))
+    assert cpu < IDLE_CPU_BUDGET_SECONDS
+
+
+GREETER = '''
+from winter_dragon.bot.core.cogs import Cog
+
+VERSION = {version}
+
+
+class Greeter(Cog):
+    """Cog of a temporary extension."""
+
+    async def cog_load(self) -> None:
+        """Skip the loops waiting for the bot to be ready."""
+'''
+
+
+def test_reload_extension_rollback(tmp_path: Path) -> None:
+    """A reload that fails to import restores the previous module, extension and cog."""
+    package = tmp_path / "reload_rollback_ext"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    extension = package / "greeter.py"
+    extension.write_text(GREETER.format(version=1))
+    name = "reload_rollback_ext.greeter"
+    sys.path.insert(0, str(tmp_path))
+
+    async def run() -> None:
+        async with WinterDragon(command_prefix="!", intents=discord.Intents.none()) as bot:
+            await bot.load_extension(name)
+            await asyncio.sleep(0)
+            module = sys.modules[name]
+            assert isinstance(cog := bot.get_cog("Greeter"), module.Greeter)
+
+            extension.write_text(GREETER.format(version="2 +"))
+            with pytest.raises(ExtensionFailed):
+                await bot.reload_extension(name)
+            await asyncio.sleep(0)
+
+            assert sys.modules[name] is module
+            assert bot.extensions[name] is module
+            assert module.VERSION == 1
+            restored = bot.get_cog("Greeter")
+            assert isinstance(restored, module.Greeter)
+            assert restored is not cog
+
+            extension.write_text(GREETER.format(version=2))
+            await bot.reload_extension(name)
+            await asyncio.sleep(0)
+            assert sys.modules[name].VERSION == 2
+            assert isinstance(bot.get_cog("Greeter"), sys.modules[name].Greeter)
+
+    try:
+        asyncio.run(run())
+    finally:
+        sys.path.remove(str(tmp_path))
+        for key in [key for key in sys.modules if key.startswith("reload_rollback_ext")]:
+            del sys.modules[key]
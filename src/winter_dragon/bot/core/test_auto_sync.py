@@ -0,0 +1,118 @@
+"""Tests for diff-based command tree synchronization, against a fake command tree that counts sync calls."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+from winter_dragon.bot.core.auto_sync import GLOBAL_SCOPE, AutoSync, scope_key
+
+
+class FakeCommand:
+    """Command with a fixed payload."""
+
+    def __init__(self, name: str, description: str = "") -> None:
+        """Initialize the command."""
+        self.name = name
+        self.description = description
+
+    def to_dict(self, _tree: object) -> dict[str, Any]:
+        """Build the payload that is sent to Discord."""
+        return {"name": self.name, "description": self.description}
+
+
+class FakeTree:
+    """Command tree that records sync calls instead of sending them to Discord."""
+
+    def __init__(self) -> None:
+        """Initialize an empty tree."""
+        self.commands: dict[int | None, list[FakeCommand]] = {None: []}
+        self.sync_calls: list[int | None] = []
+        self.running = 0
+        self.max_running = 0
+
+    def get_commands(self, *, guild: SimpleNamespace | None = None) -> list[FakeCommand]:
+        """Get the commands of a scope."""
+        return self.commands.get(guild.id if guild else None, [])
+
+    async def sync(self, *, guild: SimpleNamespace | None = None) -> list[SimpleNamespace]:
+        """Record the sync call and return the synced commands."""
+        self.sync_calls.append(guild.id if guild else None)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return [SimpleNamespace(name=command.name, options=[]) for command in self.get_commands(guild=guild)]
+
+
+class MemoryStore:
+    """SyncStore kept in a dict."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.scopes: dict[str, dict[str, str]] = {}
+
+    def load(self, scope: str) -> dict[str, str]:
+        """Load the synced signatures of a scope."""
+        return self.scopes.get(scope, {})
+
+    def save(self, scope: str, signatures: dict[str, str]) -> None:
+        """Replace the synced signatures of a scope."""
+        self.scopes[scope] = dict(signatures)
+
+
+def make_syncer(guild_count: int) -> tuple[AutoSync, FakeTree, list[SimpleNamespace]]:
+    """Create a syncer with a global command and one command per guild."""
+    tree = FakeTree()
+    guilds = [SimpleNamespace(id=i) for i in range(1, guild_count + 1)]
+    tree.commands[None] = [FakeCommand("ping")]
+    for guild in guilds:
+        tree.commands[guild.id] = [FakeCommand(f"guild_{guild.id}")]
+    syncer = AutoSync(SimpleNamespace(tree=tree), MemoryStore())
+    return syncer, tree, guilds
+
+
+def test_only_changed_scopes_are_synced() -> None:
+    """A restart without changes makes no sync calls, and a change only syncs its own scope."""
+    syncer, tree, guilds = make_syncer(3)
+
+    synced = asyncio.run(syncer.sync(guilds))
+    assert set(synced) == {GLOBAL_SCOPE, "1", "2", "3"}
+    assert len(tree.sync_calls) == 4
+
+    tree.sync_calls.clear()
+    assert asyncio.run(syncer.sync(guilds)) == {}
+    assert tree.sync_calls == []
+
+    tree.commands[2][0].description = "changed"
+    synced = asyncio.run(syncer.sync(guilds))
+    assert tree.sync_calls == [2]
+    assert [command.name for command in synced[scope_key(guilds[1])]] == ["guild_2"]
+
+
+def test_force_syncs_every_scope() -> None:
+    """Forced syncs ignore the stored signatures."""
+    syncer, tree, guilds = make_syncer(2)
+    asyncio.run(syncer.sync(guilds))
+    tree.sync_calls.clear()
+
+    asyncio.run(syncer.sync(guilds, force=True))
+    assert sorted(tree.sync_calls, key=str) == sorted([None, 1, 2], key=str)
+
+
+def test_guild_syncs_respect_concurrency_limit() -> None:
+    """Guild scopes sync concurrently, but never more at once than allowed."""
+    syncer, tree, guilds = make_syncer(20)
+    asyncio.run(syncer.sync(guilds))
+
+    assert len(tree.sync_calls) == 21
+    assert 1 < tree.max_running <= syncer.max_concurrency
+
+
+def test_cache_is_refreshed_from_sync_response() -> None:
+    """Synced guild commands are available from the app command cache without fetching them."""
+    syncer, _, guilds = make_syncer(1)
+    asyncio.run(syncer.sync(guilds))
+
+    assert syncer.cache.get_app_command("guild_1", guilds[0], fallback_to_global=False) is not None
@@ -0,0 +1,214 @@
+"""Tests for the Sentry sampling policy, against a local fake transport."""
+
+from __future__ import annotations
+
+import random
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import pytest
+import sentry_sdk
+from sentry_sdk.transport import Transport
+
+from winter_dragon.bot.core.sampling import COMMAND_OP, WINDOW_SECONDS, SamplingPolicy
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from sentry_sdk.envelope import Envelope
+
+
+HOT_OP = "hot"
+"""Operation of frequent transactions, sampled at a low rate."""
+RARE_THRESHOLD = 3
+SPANS_PER_MINUTE = 600
+BOOST_SECONDS = 300
+EVENTS_PER_SECOND = 100
+BENCHMARK_EVENTS = 2_000
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+class FakeTransport(Transport):
+    """Transport that keeps envelopes in memory instead of sending them."""
+
+    def __init__(self, options: dict[str, Any] | None = None) -> None:
+        """Initialize an empty transport."""
+        super().__init__(options)
+        self.envelopes: list[Envelope] = []
+
+    def capture_envelope(self, envelope: Envelope) -> None:
+        """Keep an envelope."""
+        self.envelopes.append(envelope)
+
+    def transactions(self) -> list[dict[str, Any]]:
+        """Get the transaction events that were sent."""
+        return [
+            item.payload.json
+            for envelope in self.envelopes
+            for item in envelope.items
+            if item.type == "transaction" and item.payload.json is not None
+        ]
+
+
+def make_policy(clock: FakeClock | None = None) -> SamplingPolicy:
+    """Create a policy with a low rate for hot transactions."""
+    return SamplingPolicy(
+        operation_rates={COMMAND_OP: 1.0, HOT_OP: 0.01},
+        default_rate=0.1,
+        spans_per_minute=SPANS_PER_MINUTE,
+        rare_threshold=RARE_THRESHOLD,
+        slow_seconds=2.0,
+        boost_seconds=BOOST_SECONDS,
+        clock=clock or FakeClock(),
+    )
+
+
+@contextmanager
+def init_sentry(policy: SamplingPolicy, transport: FakeTransport) -> Iterator[None]:
+    """Initialize Sentry with the policy, sending to the fake transport."""
+    sentry_sdk.init(
+        dsn="https://public@localhost/1",
+        transport=transport,
+        traces_sampler=policy.traces_sampler,
+        before_send=policy.before_send,
+        before_send_transaction=policy.before_send_transaction,
+        default_integrations=False,
+    )
+    try:
+        yield
+    finally:
+        sentry_sdk.get_client().close()
+
+
+def context(op: str, name: str) -> dict[str, Any]:
+    """Create the sampling context Sentry passes to a traces_sampler."""
+    return {"transaction_context": {"op": op, "name": name}, "parent_sampled": None}
+
+
+def test_rates_per_operation() -> None:
+    """Every name is traced a few times per window, then at the rate of its operation."""
+    policy = make_policy()
+
+    rates = [policy.traces_sampler(context(HOT_OP, "on_message")) for _ in range(RARE_THRESHOLD + 2)]
+    assert rates == [1.0] * RARE_THRESHOLD + [0.01, 0.01]
+    assert policy.traces_sampler(context("other", "other")) == 1.0
+    assert policy.traces_sampler({"transaction_context": {"op": HOT_OP}, "parent_sampled": True}) == 1.0
+    assert policy.traces_sampler({"transaction_context": {"op": COMMAND_OP}, "parent_sampled": False}) == 0.0
+
+
+def test_errors_and_slow_transactions_boost() -> None:
+    """Names that errored or ran slow are traced in full until the boost expires."""
+    clock = FakeClock()
+    policy = make_policy(clock)
+    for _ in range(RARE_THRESHOLD):
+        policy.traces_sampler(context(HOT_OP, "on_message"))
+        policy.traces_sampler(context(HOT_OP, "on_typing"))
+
+    policy.before_send({"transaction": "on_message"}, {})
+    start = datetime.now(tz=UTC)
+    policy.before_send_transaction(
+        {
+            "transaction": "on_typing",
+            "start_timestamp": start.isoformat(),
+            "timestamp": (start + timedelta(seconds=3)).isoformat(),
+            "contexts": {"trace": {"status": "ok"}},
+        },
+        {},
+    )
+    assert policy.traces_sampler(context(HOT_OP, "on_message")) == 1.0
+    assert policy.traces_sampler(context(HOT_OP, "on_typing")) == 1.0
+
+    clock.now = BOOST_SECONDS + 1
+    for _ in range(RARE_THRESHOLD):
+        policy.traces_sampler(context(HOT_OP, "on_message"))
+    assert policy.traces_sampler(context(HOT_OP, "on_message")) == 0.01
+
+
+def test_errors_boost_through_sentry() -> None:
+    """An error captured inside a transaction makes the next transactions of that name sampled."""
+    policy = make_policy()
+    transport = FakeTransport()
+    with init_sentry(policy, transport):
+        for _ in range(RARE_THRESHOLD):
+            with sentry_sdk.start_transaction(op=HOT_OP, name="on_message"):
+                pass
+        with sentry_sdk.start_transaction(op=HOT_OP, name="on_message") as transaction:
+            sentry_sdk.capture_message("failed", level="error")
+            assert not transaction.sampled
+        with sentry_sdk.start_transaction(op=HOT_OP, name="on_message") as transaction:
+            assert transaction.sampled
+
+    assert len(transport.transactions()) == RARE_THRESHOLD + 1
+
+
+def test_budget() -> None:
+    """Under a flood of transactions, the spans sent per minute converge to the budget."""
+    clock = FakeClock()
+    policy = make_policy(clock)
+    policy.operation_rates[HOT_OP] = 1.0
+    rng = random.Random(35)
+    sent_per_window: list[int] = []
+
+    for _ in range(10):
+        sent = 0
+        for _ in range(WINDOW_SECONDS * EVENTS_PER_SECOND):
+            clock.now += 1 / EVENTS_PER_SECOND
+            if rng.random() < policy.traces_sampler(context(HOT_OP, f"on_event_{rng.randrange(20)}")):
+                policy.before_send_transaction({"spans": [{}] * 4}, {})
+                sent += 5
+        sent_per_window.append(sent)
+
+    assert sent_per_window[0] > SPANS_PER_MINUTE * 10
+    assert all(sent < SPANS_PER_MINUTE * 1.5 for sent in sent_per_window[3:])
+
+    for _ in range(2):
+        clock.now += WINDOW_SECONDS
+        policy.traces_sampler(context(HOT_OP, "on_message"))
+    assert policy.scale == 1.0
+
+
+def test_sent_per_sample_rate() -> None:
+    """Without boosts or rare names, only the sampled share of transactions is sent."""
+    for rate, expected in ((0.0, 0), (1.0, BENCHMARK_EVENTS)):
+        policy = make_policy()
+        policy.rare_threshold = 0
+        policy.operation_rates[HOT_OP] = rate
+        transport = FakeTransport()
+        with init_sentry(policy, transport):
+            for _ in range(BENCHMARK_EVENTS):
+                with sentry_sdk.start_transaction(op=HOT_OP, name="on_message"), sentry_sdk.start_span(op="db"):
+                    pass
+        assert len(transport.transactions()) == expected
+
+
+@pytest.mark.benchmark
+def test_overhead_per_sample_rate() -> None:
+    """Transactions that are not sampled cost a fraction of those that are."""
+    elapsed: dict[float, float] = {}
+    for rate in (0.0, 0.01, 0.1, 1.0):
+        policy = make_policy()
+        policy.rare_threshold = 0
+        policy.operation_rates[HOT_OP] = rate
+        with init_sentry(policy, FakeTransport()):
+            start = time.perf_counter()
+            for _ in range(BENCHMARK_EVENTS):
+                with sentry_sdk.start_transaction(op=HOT_OP, name="on_message"), sentry_sdk.start_span(op="db"):
+                    pass
+            elapsed[rate] = (time.perf_counter() - start) / BENCHMARK_EVENTS
+
+    assert elapsed[0.0] < elapsed[1.0] / 2
+    assert elapsed[0.01] < elapsed[1.0] / 2
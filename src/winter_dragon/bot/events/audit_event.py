@@ -24,6 +24,8 @@ class AuditEvent(ABC):
         """Initialize the audit event."""
         super().__init__()
         self.entry = entry
+        self._category: AuditLogAction | None = None
+        self._db_entry: AuditLog | None = None
 
     @property
     def category(self) -> AuditLogAction:
@@ -34,9 +36,12 @@ class AuditEvent(ABC):
 
     @property
     def db_entry(self) -> AuditLog:
-        """Get the database entry. lazily evaluated."""
+        """Get the database entry. lazily evaluated.
+
+        Not persisted here, the AuditLogIngestor writes entries to the database in bulk.
+        """
         if not self._db_entry:
-            self._db_entry = AuditLog.from_audit_log(self.entry)  # creates the entry in the database, and returns the entry.
+            self._db_entry = AuditLog.from_entry(self.entry)
         return self._db_entry
 
     @abstractmethod
@@ -0,0 +1,127 @@
+"""Module for batched ingestion of audit log entries into the database.
+
+Entries are buffered per guild as they arrive, deduplicated against a window of recently seen
+entry ids (the gateway may replay entries after a reconnect), and written in bulk.
+Writes run in a worker thread, so delivery to the log channels never waits on the database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from herogold.log import LoggerMixin
+from sqlmodel import Session
+
+from winter_dragon.config import Config
+from winter_dragon.database.constants import engine
+from winter_dragon.database.tables.audit_log import AuditLog
+
+
+if TYPE_CHECKING:
+    from discord import AuditLogEntry
+
+
+class AuditLogBuffer[T]:
+    """Per-guild buffer of pending items keyed by snowflake id, with a bounded dedup window."""
+
+    def __init__(self, dedup_window: int) -> None:
+        """Initialize the buffer."""
+        self.dedup_window = dedup_window
+        self._pending: dict[int, dict[int, T]] = {}
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def seen(self, entry_id: int) -> bool:
+        """Check if an entry id was received within the dedup window."""
+        return entry_id in self._seen
+
+    def mark_seen(self, entry_id: int) -> bool:
+        """Record an entry id as received. Returns False if it was already received."""
+        if entry_id in self._seen:
+            self._seen.move_to_end(entry_id)
+            return False
+        self._seen[entry_id] = None
+        if len(self._seen) > self.dedup_window:
+            self._seen.popitem(last=False)
+        return True
+
+    def add(self, guild_id: int, entry_id: int, item: T) -> bool:
+        """Buffer an item for a guild. Returns False if the entry id was already received."""
+        if not self.mark_seen(entry_id):
+            return False
+        self._pending.setdefault(guild_id, {})[entry_id] = item
+        self._size += 1
+        return True
+
+    def drain(self) -> dict[int, list[T]]:
+        """Remove and return all pending items per guild, ordered by entry id."""
+        pending, self._pending = self._pending, {}
+        self._size = 0
+        return {guild_id: [items[i] for i in sorted(items)] for guild_id, items in pending.items()}
+
+    def restore(self, batches: dict[int, dict[int, T]]) -> None:
+        """Put drained items back, bypassing the dedup window. Used when a write fails."""
+        for guild_id, items in batches.items():
+            pending = self._pending.setdefault(guild_id, {})
+            for entry_id, item in items.items():
+                if entry_id not in pending:
+                    pending[entry_id] = item
+                    self._size += 1
+
+
+class AuditLogIngestor(LoggerMixin):
+    """Collects audit log entries and persists them in bulk."""
+
+    flush_size = Config(500)
+    dedup_window = Config(10_000)
+
+    def __init__(self, session: Session | None = None) -> None:
+        """Initialize the ingestor with its own session, used only by the write thread."""
+        self.buffer = AuditLogBuffer[AuditLog](self.dedup_window)
+        self._session = session or Session(engine)
+        self._lock = asyncio.Lock()
+
+    @property
+    def should_flush(self) -> bool:
+        """Indicates whether enough entries are pending to warrant an early flush."""
+        return len(self.buffer) >= self.flush_size
+
+    def submit(self, entry: AuditLogEntry) -> bool:
+        """Queue an audit log entry for persistence. Returns False if the entry is a replay."""
+        if self.buffer.seen(entry.id):
+            self.logger.debug(f"Skipping replayed audit log entry {entry.id}")
+            return False
+        try:
+            audit = AuditLog.from_entry(entry)
+        except ValueError:
+            self.logger.debug(f"Audit log entry {entry.id} can't be stored, no target or category")
+            return self.buffer.mark_seen(entry.id)
+        return self.buffer.add(entry.guild.id, entry.id, audit)
+
+    async def flush(self) -> int:
+        """Write all pending entries to the database. Returns the number of inserted rows."""
+        async with self._lock:
+            batches = self.buffer.drain()
+            audits = [audit for batch in batches.values() for audit in batch]
+            if not audits:
+                return 0
+            try:
+                inserted = await asyncio.to_thread(self._persist, audits)
+            except Exception:
+                self.logger.exception(f"Failed to persist {len(audits)} audit log entries, keeping them for the next flush")
+                self.buffer.restore({guild_id: {audit.id: audit for audit in batch} for guild_id, batch in batches.items()})
+                return 0
+        self.logger.debug(f"Persisted {inserted} audit log entries ({len(audits) - inserted} already stored)")
+        return inserted
+
+    def _persist(self, audits: list[AuditLog]) -> int:
+        try:
+            return AuditLog.bulk_insert(self._session, audits)
+        except Exception:
+            self._session.rollback()
+            raise
@@ -0,0 +1,94 @@
+"""Module for the in-memory audit event dispatch table.
+
+Maps each audit action to its registered event classes and to the log channels of a guild that
+receive it. Channel targets are resolved once per guild with a single query, and dropped again
+whenever the tag or audit links of that guild change.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from herogold.log import LoggerMixin
+from sqlmodel import col, select
+
+from winter_dragon.database.channel_types import Tags
+from winter_dragon.database.tables.associations.channel_audit import ChannelAudit
+from winter_dragon.database.tables.associations.channel_tags import ChannelTag
+from winter_dragon.database.tables.channel import Channels
+
+from .factory import AuditEventFactory
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from discord import AuditLogAction
+    from sqlmodel import Session
+
+    from .audit_event import AuditEvent
+
+
+type TargetLoader = Callable[[Session, int], Iterable[tuple[AuditLogAction, int, str]]]
+
+
+class LogTarget(NamedTuple):
+    """A log channel that receives an audit action."""
+
+    channel_id: int
+    name: str
+
+
+class DispatchRoute(NamedTuple):
+    """Everything needed to dispatch an audit action within a guild."""
+
+    events: tuple[type[AuditEvent], ...]
+    targets: tuple[LogTarget, ...]
+
+
+def load_log_targets(session: Session, guild_id: int) -> Iterable[tuple[AuditLogAction, int, str]]:
+    """Load every (action, channel id, channel name) log link of a guild in one query."""
+    return session.exec(
+        select(ChannelAudit.audit_action, Channels.id, Channels.name)
+        .join(Channels, col(ChannelAudit.channel_id) == col(Channels.id))
+        .join(ChannelTag, col(ChannelTag.channel_id) == col(Channels.id))
+        .where(Channels.guild_id == guild_id, ChannelTag.tag == Tags.LOGS),
+    ).all()
+
+
+class AuditDispatchTable(LoggerMixin):
+    """Per-guild routing table from audit actions to event classes and log channels."""
+
+    def __init__(self, loader: TargetLoader = load_log_targets) -> None:
+        """Initialize an empty dispatch table."""
+        self._loader = loader
+        self._guilds: dict[int, dict[AuditLogAction, tuple[LogTarget, ...]]] = {}
+
+    def route(self, session: Session, guild_id: int, action: AuditLogAction) -> DispatchRoute:
+        """Get the event classes and log channels for an action within a guild."""
+        return DispatchRoute(AuditEventFactory.get_event_types(action), self.targets(session, guild_id, action))
+
+    def targets(self, session: Session, guild_id: int, action: AuditLogAction) -> tuple[LogTarget, ...]:
+        """Get the log channels of a guild that receive an action."""
+        if (routes := self._guilds.get(guild_id)) is None:
+            routes = self._guilds[guild_id] = self._compile(session, guild_id)
+        return routes.get(action, ())
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        """Drop the compiled routes of a guild, or of every guild if no guild is given."""
+        self.logger.debug(f"Invalidating audit dispatch routes for {guild_id=}")
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(guild_id, None)
+
+    def _compile(self, session: Session, guild_id: int) -> dict[AuditLogAction, tuple[LogTarget, ...]]:
+        routes: dict[AuditLogAction, list[LogTarget]] = {}
+        for action, channel_id, name in self._loader(session, guild_id):
+            routes.setdefault(action, []).append(LogTarget(channel_id, name))
+        self.logger.debug(f"Compiled audit dispatch routes for {guild_id=}: {len(routes)} actions")
+        return {action: tuple(targets) for action, targets in routes.items()}
+
+
+dispatch_table = AuditDispatchTable()
+Channels.on_links_changed(dispatch_table.invalidate)
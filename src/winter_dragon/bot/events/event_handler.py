@@ -16,16 +16,18 @@ if TYPE_CHECKING:
     from sqlmodel import Session
 
     from .audit_event import AuditEvent
+    from .dispatch import LogTarget
 
 
 class AuditEventHandler(LoggerMixin):
     """Class for handling audit events."""
 
-    def __init__(self, event: AuditEvent, session: Session, bot: BotBase) -> None:
-        """Initialize the audit event handler."""
+    def __init__(self, event: AuditEvent, session: Session, bot: BotBase, targets: tuple[LogTarget, ...]) -> None:
+        """Initialize the audit event handler, with the log channels its route resolved to."""
         self.event = event
         self.session = session
         self.bot = bot
+        self.targets = targets
 
     async def handle(self) -> None:
         """Handle the audit event."""
@@ -48,12 +50,9 @@ class AuditEventHandler(LoggerMixin):
         This method now routes all logs to the aggregated log system
         via the LogChannels cog.
         """
-        from winter_dragon.database.channel_types import Tags  # noqa: PLC0415
-        from winter_dragon.database.tables import Channels  # noqa: PLC0415
-
         try:
-            if not Channels.get_by_tag(self.session, Tags.LOGS, guild.id):
-                self.logger.debug(f"No log channels configured for guild {guild.id}")
+            if not (targets := self.targets):
+                self.logger.debug(f"No log channels configured for {audit_action.name} in guild {guild.id}")
                 return
 
             # Get the LogChannels cog and dispatch through aggregation
@@ -63,6 +62,7 @@ class AuditEventHandler(LoggerMixin):
                     guild=guild,
                     embed=embed,
                     action=audit_action.name,
+                    targets=targets,
                 )
                 self.logger.debug(f"Dispatched aggregated log: {audit_action.name}")
             else:
@@ -6,9 +6,7 @@ from typing import TYPE_CHECKING, ClassVar
 
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
-
-    from discord import AuditLogAction, AuditLogEntry
+    from discord import AuditLogAction
 
     from .audit_event import AuditEvent
 
@@ -16,22 +14,20 @@ if TYPE_CHECKING:
 class AuditEventFactory:
     """Factory for creating audit events."""
 
-    events: ClassVar[dict[AuditLogAction, list[type[AuditEvent]]]] = {}
+    events: ClassVar[dict[AuditLogAction, tuple[type[AuditEvent], ...]]] = {}
 
     @classmethod
     def register(cls, action: AuditLogAction, event_type: type[AuditEvent]) -> None:
-        """Register an audit event class for a category."""
-        if action not in cls.events:
-            cls.events[action] = [event_type]
-            return
-        cls.events[action] += [event_type]
+        """Register an audit event class for a category.
+
+        A class with the same qualified name as an already registered one replaces it,
+        so reloading an extension doesn't leave stale handlers behind.
+        """
+        key = (event_type.__module__, event_type.__qualname__)
+        registered = tuple(i for i in cls.events.get(action, ()) if (i.__module__, i.__qualname__) != key)
+        cls.events[action] = (*registered, event_type)
 
     @classmethod
-    def get_events(cls, entry: AuditLogEntry) -> Generator[AuditEvent]:
-        """Get the audit event class for a category."""
-        if entry.action not in cls.events:
-            msg = f"Audit event for {entry.action} not implemented"
-            raise NotImplementedError(msg)
-
-        for event in cls.events[entry.action]:
-            yield event(entry)
+    def get_event_types(cls, action: AuditLogAction) -> tuple[type[AuditEvent], ...]:
+        """Get the audit event classes registered for a category."""
+        return cls.events.get(action, ())
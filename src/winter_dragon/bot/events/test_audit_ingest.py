@@ -0,0 +1,167 @@
+"""Tests for ordering and deduplication of buffered audit log entries, and their bulk persistence."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import discord
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.bot.events.audit_ingest import AuditLogBuffer, AuditLogIngestor
+from winter_dragon.database.tables.audit_log import AuditLog
+
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+
+STORM_SIZE = 10_000
+STORM_BUDGET_SECONDS = 60
+
+
+def test_drain_orders_entries_per_guild() -> None:
+    """Entries arriving out of order are drained in snowflake order, grouped by guild."""
+    buffer = AuditLogBuffer[str](dedup_window=100)
+    for entry_id, guild_id in [(5, 1), (3, 2), (1, 1), (4, 2), (2, 1)]:
+        buffer.add(guild_id, entry_id, f"{guild_id}:{entry_id}")
+
+    assert len(buffer) == 5
+    assert buffer.drain() == {1: ["1:1", "1:2", "1:5"], 2: ["2:3", "2:4"]}
+    assert len(buffer) == 0
+    assert buffer.drain() == {}
+
+
+def test_replayed_entries_are_dropped() -> None:
+    """Entries replayed after a reconnect are only buffered once, even after a flush."""
+    buffer = AuditLogBuffer[int](dedup_window=100)
+    assert buffer.add(1, 10, 10)
+    assert not buffer.add(1, 10, 10)
+    buffer.drain()
+    assert not buffer.add(1, 10, 10)
+    assert buffer.drain() == {}
+
+
+def test_dedup_window_is_bounded() -> None:
+    """Ids older than the dedup window are forgotten."""
+    buffer = AuditLogBuffer[int](dedup_window=2)
+    for entry_id in (1, 2, 3):
+        buffer.add(1, entry_id, entry_id)
+    assert not buffer.seen(1)
+    assert buffer.seen(3)
+
+
+def test_restore_keeps_failed_batches() -> None:
+    """Restored batches are drained again without tripping the dedup window."""
+    buffer = AuditLogBuffer[int](dedup_window=100)
+    buffer.add(1, 2, 2)
+    buffer.add(1, 1, 1)
+    drained = buffer.drain()
+    buffer.add(1, 3, 3)
+    buffer.restore({guild_id: {item: item for item in items} for guild_id, items in drained.items()})
+    assert buffer.drain() == {1: [1, 2, 3]}
+
+
+def storm() -> tuple[int, dict[int, list[int]]]:
+    """Buffer a 10k entry storm over 50 guilds, with replays, and get how many were accepted and the drained batches."""
+    guilds = range(50)
+    entry_ids = list(range(STORM_SIZE))
+    replays = random.sample(entry_ids, STORM_SIZE // 10)
+    buffer = AuditLogBuffer[int](dedup_window=STORM_SIZE)
+    accepted = sum(buffer.add(entry_id % len(guilds), entry_id, entry_id) for entry_id in entry_ids + replays)
+    return accepted, buffer.drain()
+
+
+def test_audit_storm() -> None:
+    """A 10k entry storm with replays is buffered once per entry, and drained in order."""
+    accepted, drained = storm()
+    assert accepted == STORM_SIZE
+    assert sum(len(batch) for batch in drained.values()) == STORM_SIZE
+    assert all(batch == sorted(batch) for batch in drained.values())
+
+
+@pytest.mark.benchmark
+def test_audit_storm_duration() -> None:
+    """Buffer a minute's worth of a 10k entry storm, with replays, well within its time budget."""
+    start = time.perf_counter()
+    storm()
+    assert time.perf_counter() - start < STORM_BUDGET_SECONDS / 100
+
+
+class FakeTarget:
+    """Target of a fake audit log entry."""
+
+    def __init__(self, target_id: int) -> None:
+        """Initialize the target."""
+        self.id = target_id
+
+
+class FakeGuild:
+    """Guild of a fake audit log entry."""
+
+    id = 1
+
+
+class FakeEntry:
+    """Audit log entry, with or without a target."""
+
+    def __init__(self, entry_id: int, *, target: bool = True) -> None:
+        """Initialize a ban entry."""
+        self.id = entry_id
+        self.guild = FakeGuild()
+        self.action = discord.AuditLogAction.ban
+        self.category = discord.AuditLogActionCategory.create
+        self.reason = None
+        self.created_at = datetime(2026, 1, 1, tzinfo=UTC)
+        self.target = FakeTarget(entry_id * 10) if target else None
+
+
+def make_engine() -> Engine:
+    """Create an in-memory database, shared with the write thread of the ingestor."""
+    return create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+
+def test_bulk_insert() -> None:
+    """Audit logs are inserted once, skipping ids already stored and duplicates within a batch."""
+    engine = make_engine()
+    AuditLog.__table__.create(engine)  # pyright: ignore[reportAttributeAccessIssue]
+    with Session(engine) as session:
+        first = [AuditLog.from_entry(FakeEntry(entry_id)) for entry_id in (1, 2, 2)]  # pyright: ignore[reportArgumentType]
+        assert AuditLog.bulk_insert(session, first) == 2
+        second = [AuditLog.from_entry(FakeEntry(entry_id)) for entry_id in (2, 3)]  # pyright: ignore[reportArgumentType]
+        assert AuditLog.bulk_insert(session, second) == 1
+        assert AuditLog.bulk_insert(session, []) == 0
+        assert sorted(session.exec(select(AuditLog.id)).all()) == [1, 2, 3]
+
+
+def test_flush_restores_failed_writes() -> None:
+    """Entries of a failed write are kept for the next flush, and entries without a target are only seen once."""
+    engine = make_engine()
+    ingestor = AuditLogIngestor(Session(engine))
+
+    async def ingest() -> None:
+        assert ingestor.submit(FakeEntry(1))  # pyright: ignore[reportArgumentType]
+        assert ingestor.submit(FakeEntry(2))  # pyright: ignore[reportArgumentType]
+        assert ingestor.submit(FakeEntry(3, target=False))  # pyright: ignore[reportArgumentType]
+        assert not ingestor.submit(FakeEntry(3, target=False))  # pyright: ignore[reportArgumentType]
+        assert not ingestor.submit(FakeEntry(1))  # pyright: ignore[reportArgumentType]
+
+        # The table doesn't exist yet, so the write fails.
+        assert await ingestor.flush() == 0
+        assert len(ingestor.buffer) == 2
+
+        AuditLog.__table__.create(engine)  # pyright: ignore[reportAttributeAccessIssue]
+        assert ingestor.submit(FakeEntry(4))  # pyright: ignore[reportArgumentType]
+        assert await ingestor.flush() == 3
+        assert len(ingestor.buffer) == 0
+        assert await ingestor.flush() == 0
+
+    asyncio.run(ingest())
+    with Session(engine) as session:
+        assert sorted(session.exec(select(AuditLog.id)).all()) == [1, 2, 4]
@@ -0,0 +1,142 @@
+"""Tests for the audit event dispatch table."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+from discord import AuditLogAction
+from sqlalchemy import Integer, MetaData, create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session
+
+from winter_dragon.bot.events.dispatch import AuditDispatchTable, LogTarget, dispatch_table
+from winter_dragon.database.channel_types import Tags
+from winter_dragon.database.tables.associations.channel_audit import ChannelAudit
+from winter_dragon.database.tables.associations.channel_tags import ChannelTag
+from winter_dragon.database.tables.channel import Channels
+from winter_dragon.database.tables.guild import Guilds
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+DISPATCH_ROUNDS = 100_000
+DISPATCH_BUDGET_SECONDS = 1
+
+
+class FakeLinks:
+    """In-memory stand-in for the channel audit links, counting how often they are loaded."""
+
+    def __init__(self) -> None:
+        """Initialize without any links."""
+        self.links: dict[int, list[tuple[AuditLogAction, int, str]]] = {}
+        self.loads = 0
+
+    def load(self, _session: Session, guild_id: int) -> Iterable[tuple[AuditLogAction, int, str]]:
+        """Return the links of a guild."""
+        self.loads += 1
+        return list(self.links.get(guild_id, []))
+
+
+def test_targets_are_loaded_once_per_guild() -> None:
+    """Repeated lookups within a guild are served from memory."""
+    links = FakeLinks()
+    links.links[1] = [(AuditLogAction.ban, 10, "Global"), (AuditLogAction.kick, 10, "Global")]
+    table = AuditDispatchTable(links.load)
+    session = None
+
+    assert table.targets(session, 1, AuditLogAction.ban) == (LogTarget(10, "Global"),)
+    assert table.targets(session, 1, AuditLogAction.kick) == (LogTarget(10, "Global"),)
+    assert table.targets(session, 1, AuditLogAction.unban) == ()
+    assert links.loads == 1
+
+    assert table.targets(session, 2, AuditLogAction.ban) == ()
+    assert links.loads == 2
+
+
+def test_invalidate_on_link_change() -> None:
+    """Changing the links of a guild only reloads that guild."""
+    links = FakeLinks()
+    links.links[1] = [(AuditLogAction.ban, 10, "Global")]
+    links.links[2] = [(AuditLogAction.ban, 20, "Global")]
+    table = AuditDispatchTable(links.load)
+    session = None
+    table.targets(session, 1, AuditLogAction.ban)
+    table.targets(session, 2, AuditLogAction.ban)
+
+    links.links[1].append((AuditLogAction.ban, 11, "Ban"))
+    assert table.targets(session, 1, AuditLogAction.ban) == (LogTarget(10, "Global"),)
+    table.invalidate(1)
+    assert table.targets(session, 1, AuditLogAction.ban) == (LogTarget(10, "Global"), LogTarget(11, "Ban"))
+    assert table.targets(session, 2, AuditLogAction.ban) == (LogTarget(20, "Global"),)
+    assert links.loads == 3
+
+    links.links[2].clear()
+    table.invalidate()
+    assert table.targets(session, 2, AuditLogAction.ban) == ()
+
+
+def make_session() -> Session:
+    """Create a session of an in-memory database with the channel link tables.
+
+    SQLite can't autoincrement part of a composite primary key, so the ids of association rows are left empty.
+    """
+    schema = MetaData()
+    for model in (Guilds, Channels, ChannelTag, ChannelAudit):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+        if len(table.primary_key.columns) > 1:
+            table.c.id.autoincrement = False
+            table.c.id.nullable = True
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    schema.create_all(engine)
+    return Session(engine)
+
+
+def test_channel_links_invalidate_routes() -> None:
+    """Linking a channel to a tag or an audit action reloads the routes of its guild in the shared table."""
+    with make_session() as session:
+        session.add(Guilds(id=1))
+        channel = Channels(id=10, guild_id=1, name="Global")
+        session.add(channel)
+        session.commit()
+
+        channel.link_audit_action(session, AuditLogAction.ban)
+        assert dispatch_table.route(session, 1, AuditLogAction.ban).targets == ()
+        channel.link_tag(session, Tags.LOGS)
+        assert dispatch_table.route(session, 1, AuditLogAction.ban).targets == (LogTarget(10, "Global"),)
+        channel.unlink_tag(session, Tags.LOGS)
+        assert dispatch_table.route(session, 1, AuditLogAction.ban).targets == ()
+
+
+def dispatch(table: AuditDispatchTable) -> None:
+    """Route every audit action of a guild, over and over."""
+    actions = list(AuditLogAction)
+    for i in range(DISPATCH_ROUNDS):
+        table.route(None, 1, actions[i % len(actions)])  # pyright: ignore[reportArgumentType]
+
+
+def warm_table() -> tuple[AuditDispatchTable, FakeLinks]:
+    """Get a dispatch table for a guild linking every audit action, with its links."""
+    links = FakeLinks()
+    links.links[1] = [(action, 10, "Global") for action in AuditLogAction]
+    return AuditDispatchTable(links.load), links
+
+
+def test_dispatch_loads() -> None:
+    """Warm lookups are served from memory, without a query."""
+    table, links = warm_table()
+    dispatch(table)
+    assert links.loads == 1
+
+
+@pytest.mark.benchmark
+def test_dispatch_overhead() -> None:
+    """A warm lookup costs a couple of dict lookups, not a query."""
+    table, _ = warm_table()
+    start = time.perf_counter()
+    dispatch(table)
+    assert time.perf_counter() - start < DISPATCH_BUDGET_SECONDS
@@ -10,12 +10,11 @@ import discord
 import psutil
 from discord import app_commands
 from discord.ext import commands
-from matplotlib import pyplot as plt
 
 from winter_dragon.bot.core.cogs import BotArgs, GroupCog
-from winter_dragon.bot.core.paths import METRICS_FILE
 from winter_dragon.bot.core.settings import Settings
 from winter_dragon.bot.core.tasks import loop
+from winter_dragon.charts.figures import system_metrics
 from winter_dragon.config import Config
 from winter_dragon.database.tables.user import Users
 
@@ -185,14 +184,12 @@ class BotMetrics(GroupCog, auto_load=True):
         """Show the bot's performance in a graph."""
         await interaction.response.defer(thinking=True)
         self.gather_system_metrics()
-        self.plot_system_metrics()
 
         try:
-            file = discord.File(METRICS_FILE)
-            await interaction.followup.send(file=file)  # embed=embed,
+            png = await self.bot.charts.render(system_metrics, list(self.timestamps), self.system_metrics_series())
+            await interaction.followup.send(file=discord.File(png, filename="system_metrics.png"))
         except Exception:
             self.logger.exception("Error when creating a graph.")
-            file = None
             await interaction.followup.send("Could not make a graph to show.")
 
     @staticmethod
@@ -274,60 +271,19 @@ class BotMetrics(GroupCog, auto_load=True):
         if timestamp - self.timestamps[0] > self.cleanup_interval:
             self._remove_oldest_system_metrics()
 
-    def plot_system_metrics(self) -> None:
-        """Plot the system metrics on a graph."""
-        plt.plot(
-            self.timestamps,
-            [net_io.bytes_sent for net_io in self.net_io_counters],
-            label="Bytes Sent",
-        )
-        plt.plot(
-            self.timestamps,
-            [net_io.bytes_recv for net_io in self.net_io_counters],
-            label="Bytes Received",
-        )
-        plt.plot(
-            self.timestamps,
-            [net_io.packets_sent for net_io in self.net_io_counters],
-            label="Packets Sent",
-        )
-        plt.plot(
-            self.timestamps,
-            [net_io.packets_recv for net_io in self.net_io_counters],
-            label="Packets Received",
-        )
-
+    def system_metrics_series(self) -> dict[str, list[float]]:
+        """Get the system metrics to chart, with the cpu and ram % scaled to the other metrics."""
+        series: dict[str, list[float]] = {
+            "Bytes Sent": [net_io.bytes_sent for net_io in self.net_io_counters],
+            "Bytes Received": [net_io.bytes_recv for net_io in self.net_io_counters],
+            "Packets Sent": [net_io.packets_sent for net_io in self.net_io_counters],
+            "Packets Received": [net_io.packets_recv for net_io in self.net_io_counters],
+        }
         # Make the cpu and ram % fit the full scale of the plot/graph
-        values: list[int] = []
-        for net_io in self.net_io_counters:
-            values.extend(
-                (
-                    net_io.bytes_sent,
-                    net_io.bytes_recv,
-                    net_io.packets_sent,
-                    net_io.packets_recv,
-                )
-            )
-        max_scaler = max(values)
-
-        plt.plot(
-            self.timestamps,
-            [max_scaler * (i / 100) for i in self.cpu_percentages],
-            label="CPU Usage (%)",
-        )
-        plt.plot(
-            self.timestamps,
-            [max_scaler * (i / 100) for i in self.ram_percentages],
-            label="RAM Usage (%)",
-        )
-
-        METRICS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        plt.xlabel("Time (seconds)")
-        plt.ylabel("Value")
-        plt.title("System Metrics Over Time")
-        plt.legend()
-        plt.savefig(METRICS_FILE)
-        plt.clf()
+        max_scaler = max(value for values in series.values() for value in values)
+        series["CPU Usage (%)"] = [max_scaler * (i / 100) for i in self.cpu_percentages]
+        series["RAM Usage (%)"] = [max_scaler * (i / 100) for i in self.ram_percentages]
+        return series
 
     def _remove_oldest_system_metrics(self) -> None:
         self.timestamps.pop(0)
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import datetime
-from typing import override
+from typing import TYPE_CHECKING, override
 
 import discord
 from discord import AuditLogAction, Thread, app_commands
@@ -12,10 +12,17 @@ from herogold.log import LoggerMixin
 from sqlmodel import select
 
 from winter_dragon.bot.core.cogs import Cog
+from winter_dragon.bot.core.tasks import loop
 from winter_dragon.bot.events.audit_event import AuditEvent
+from winter_dragon.config import Config
 from winter_dragon.database.constants import SessionMixin
 from winter_dragon.database.tables import AssociationUserCommand as AUC  # noqa: N817
 from winter_dragon.database.tables import Channels, Commands, Guilds, Messages, Presence, Roles, Users
+from winter_dragon.redis.counter_buffer import CounterBuffer
+
+
+if TYPE_CHECKING:
+    from winter_dragon.bot.core.bot import WinterDragon
 
 
 # For every existing action, create a generic event listener
@@ -90,16 +97,18 @@ class _EventListenerHelper(SessionMixin, LoggerMixin):
             self.session.commit()
 
     def fetch_db_command(self, command: app_commands.Command) -> Commands:
-        """Return a command if it can find one, otherwise it creates one  then returns it."""
+        """Return a command if it can find one, otherwise it creates one  then returns it.
+
+        Calls are counted separately, through `Commands.calls`.
+        """
         name = command.qualified_name if command else ""
         if db_command := self.session.exec(select(Commands).where(Commands.qual_name == name)).first():
             if command.parent:
                 self.logger.debug(f"{command.parent=}")
             self.logger.debug(f"{command}")
-            db_command.call_count += 1
-        else:
-            db_command = Commands(qual_name=command.qualified_name, call_count=1)
-            self.session.add(db_command)
+            return db_command
+        db_command = Commands(qual_name=command.qualified_name, call_count=0)
+        self.session.add(db_command)
         self.session.expire_on_commit = False
         self.session.commit()
         return db_command
@@ -309,6 +318,30 @@ class OnPresenceUpdate(AuditEvent, action=AuditLogAction.member_update):
 class CogEvents(Cog, auto_load=True):
     """Cog to register event listeners for audit log events, that are unable to be tracked via Audit Logs."""
 
+    flush_interval = Config(30)
+
+    def __init__(self, bot: WinterDragon) -> None:
+        """Initialize the cog, with a buffer for counting command calls."""
+        super().__init__(bot=bot)
+        self.counters = CounterBuffer(session=self.session)
+
+    async def cog_load(self) -> None:
+        """Start flushing buffered command calls to the database."""
+        await super().cog_load()
+        self.flush_counters.change_interval(seconds=self.flush_interval)
+        self.flush_counters.start()
+
+    async def cog_unload(self) -> None:
+        """Stop the flush loop and write whatever is still buffered."""
+        self.flush_counters.stop()
+        self.counters.flush()
+        await super().cog_unload()
+
+    @loop()
+    async def flush_counters(self) -> None:
+        """Write buffered command calls in bulk."""
+        self.counters.flush()
+
     @Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
         """When a message is sent by any user, add it to the database."""
@@ -347,4 +380,5 @@ class CogEvents(Cog, auto_load=True):
 
         helper.add_db_user(user)
         db_cmd = helper.fetch_db_command(command)
+        self.counters.add(Commands.calls, db_cmd.qual_name)
         helper.link_user_db_command(user, db_cmd)
@@ -1,27 +1,43 @@
-"""."""
+"""Cog serving the bot's metrics to Prometheus.
+
+Always on: commands, database queries and enqueued tasks are recorded wherever they happen,
+and this cog exposes them, together with the gateway latency and task queue depths, on a local endpoint.
+"""
 
 from __future__ import annotations
 
-import logging
+import asyncio
+from typing import Unpack
+
+from winter_dragon.bot.core.cogs import BotArgs, Cog
+from winter_dragon.metrics.exporter import GatewayLatencyCollector, MetricsConfig, MetricsExporter, QueueDepthCollector
+from winter_dragon.redis.queue import TaskQueue
 
-from discord.ext.prometheus import PrometheusCog
 
-from winter_dragon.bot.core.cogs import Cog
-from winter_dragon.bot.core.settings import Settings
-from winter_dragon.bot.core.tasks import loop
+QUEUES = (TaskQueue.HIGH_PRIORITY_QUEUE, TaskQueue.DEFAULT_QUEUE, TaskQueue.LOW_PRIORITY_QUEUE)
 
 
-class Prometheus(Cog, auto_load=False):
+class Prometheus(Cog, auto_load=True):
     """Prometheus integration for the bot."""
 
-    @loop(count=1)
-    async def init(self) -> None:
-        """Initialize the Prometheus cog."""
-        if Settings.log_level == logging.DEBUG:
-            await self.bot.add_cog(PrometheusCog(bot=self.bot))
-            self.logger.info("Prometheus cog loaded. Open at localhost:8000/metrics")
-
-    @init.before_loop
-    async def before_init(self) -> None:
-        """Wait until the bot is ready before starting the loops."""
-        await self.bot.wait_until_ready()
+    def __init__(self, **kwargs: Unpack[BotArgs]) -> None:
+        """Initialize the cog with its metrics endpoint."""
+        super().__init__(**kwargs)
+        self.exporter = MetricsExporter(
+            host=MetricsConfig.get_host(),
+            port=MetricsConfig.get_port(),
+            collectors=[
+                GatewayLatencyCollector(lambda: self.bot.latencies),
+                QueueDepthCollector(QUEUES, TaskQueue.get_queue_length),
+            ],
+        )
+
+    async def cog_load(self) -> None:
+        """Start serving metrics."""
+        await super().cog_load()
+        self.exporter.start()
+
+    async def cog_unload(self) -> None:
+        """Stop serving metrics."""
+        await asyncio.to_thread(self.exporter.stop)
+        await super().cog_unload()
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Protocol
+from functools import partial
+from typing import TYPE_CHECKING, Protocol, Unpack
 
 import discord
 from discord import Guild, app_commands
@@ -10,8 +11,11 @@ from discord.app_commands import ContextMenu
 from discord.ext import commands
 from herogold.log import LoggerMixin
 
-from winter_dragon.bot.core.cogs import Cog
+from winter_dragon.bot.core.auto_sync import GLOBAL_SCOPE, AutoSync, DatabaseSyncStore, scope_key
+from winter_dragon.bot.core.cogs import BotArgs, Cog
+from winter_dragon.bot.core.tasks import loop
 from winter_dragon.bot.ui.paginator import PageSource, Paginator
+from winter_dragon.config import Config
 
 
 if TYPE_CHECKING:
@@ -177,6 +181,36 @@ class LenFixer(LoggerMixin):
 class Sync(Cog, auto_load=True):
     """Sync slash commands with the Discord API."""
 
+    sync_on_startup = Config(default=True)
+
+    def __init__(self, **kwargs: Unpack[BotArgs]) -> None:
+        """Initialize the Sync cog with a syncer that skips unchanged scopes."""
+        super().__init__(**kwargs)
+        self.auto_sync = AutoSync(self.bot, DatabaseSyncStore(self.session), partial(LenFixer, self.bot.tree))
+
+    async def cog_load(self) -> None:
+        """Sync changed command scopes once the bot is ready."""
+        await super().cog_load()
+        if self.sync_on_startup:
+            self.sync_changed.start()
+
+    async def cog_unload(self) -> None:
+        """Stop the startup sync if it is still running."""
+        if self.sync_changed.is_running():
+            self.sync_changed.cancel()
+        await super().cog_unload()
+
+    @loop(count=1)
+    async def sync_changed(self) -> None:
+        """Sync the global and guild scopes whose commands changed since the last sync."""
+        synced = await self.auto_sync.sync(self.bot.guilds)
+        self.logger.info(f"Synced changed command scopes: {list(synced)}")
+
+    @sync_changed.before_loop
+    async def before_sync_changed(self) -> None:
+        """Wait until the bot is ready, so all guilds are known."""
+        await self.bot.wait_until_ready()
+
     @app_commands.command(name="sync", description="Sync all commands on this guild")
     async def slash_sync(self, interaction: discord.Interaction) -> None:
         """Sync all commands on the current guild."""
@@ -211,15 +245,15 @@ class Sync(Cog, auto_load=True):
 
     @commands.is_owner()
     @commands.hybrid_command(name="sync_ctx", description="Sync all commands on all servers (Bot dev only)")
-    async def slash_sync_hybrid(self, ctx: commands.Context) -> None:
-        """Sync all commands on all servers. This is a ctx and slash command (hybrid)."""
-        await ctx.defer(ephemeral=True)
+    async def slash_sync_hybrid(self, ctx: commands.Context, force: bool = False) -> None:  # noqa: FBT001, FBT002
+        """Sync all commands on all servers. This is a ctx and slash command (hybrid).
 
-        synced_commands: list[AppCommand] = []
-        synced_commands.extend(await self.sync_global())
+        Only scopes whose commands changed since the last sync are synced, unless force is set.
+        """
+        await ctx.defer(ephemeral=True)
 
-        for guild in self.bot.guilds:
-            synced_commands.extend(await self.sync_local(guild))
+        synced = await self.auto_sync.sync(self.bot.guilds, force=force)
+        synced_commands = [command for scope_commands in synced.values() for command in scope_commands]
 
         self.logger.warning(f"{ctx.author} Synced slash commands!")
 
@@ -239,14 +273,10 @@ class Sync(Cog, auto_load=True):
 
     async def sync_local(self, guild: Guild) -> list[AppCommand]:
         """Sync all commands on a specific guild."""
-        local_sync: list[AppCommand] = []
-        with LenFixer(self.bot.tree, guild=guild):
-            local_sync += await self.bot.tree.sync(guild=guild)
-        local_list = [command.name for command in local_sync]
-        local_list.sort()
-        return local_sync
+        synced = await self.auto_sync.sync([guild], include_global=False, force=True)
+        return synced.get(scope_key(guild), [])
 
     async def sync_global(self) -> list[AppCommand]:
         """Sync all globally available commands."""
-        with LenFixer(self.bot.tree):
-            return await self.bot.tree.sync()
+        synced = await self.auto_sync.sync(force=True)
+        return synced.get(GLOBAL_SCOPE, [])
@@ -0,0 +1,195 @@
+"""In-memory looking-for-group queues.
+
+Players queue for games, and a group is formed as soon as enough players are queued for the same game.
+Players that waited long enough may be grouped with fewer players, and entries that waited too long expire.
+The queues are loaded once at startup, and every change is written through to the database before it is applied.
+Join times are not stored, so entries loaded at startup count as having just joined.
+"""
+
+from __future__ import annotations
+
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+from herogold.log import LoggerMixin
+from sqlalchemy import delete, tuple_
+from sqlmodel import Session, col, select
+
+from winter_dragon.database.tables import LookingForGroup
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+
+class LfgStore(Protocol):
+    """Persistent storage of queued players."""
+
+    def load(self) -> Iterable[tuple[int, int]]:
+        """Load every (user id, game id) pair."""
+        ...
+
+    def add(self, user_id: int, game_id: int) -> None:
+        """Queue a player for a game."""
+        ...
+
+    def remove(self, entries: Iterable[tuple[int, int]]) -> None:
+        """Remove (user id, game id) pairs from the queues."""
+        ...
+
+
+class DatabaseLfgStore:
+    """LfgStore backed by the LookingForGroup table."""
+
+    def __init__(self, session: Session) -> None:
+        """Initialize the store with a database session."""
+        self.session = session
+
+    def load(self) -> Iterable[tuple[int, int]]:
+        """Load every (user id, game id) pair."""
+        return self.session.exec(select(LookingForGroup.user_id, LookingForGroup.game_id)).all()
+
+    def add(self, user_id: int, game_id: int) -> None:
+        """Queue a player for a game."""
+        self.session.add(LookingForGroup(user_id=user_id, game_id=game_id))
+        self.session.commit()
+
+    def remove(self, entries: Iterable[tuple[int, int]]) -> None:
+        """Remove (user id, game id) pairs from the queues."""
+        if not (entries := list(entries)):
+            return
+        self.session.exec(
+            delete(LookingForGroup).where(tuple_(col(LookingForGroup.user_id), col(LookingForGroup.game_id)).in_(entries)),
+        )
+        self.session.commit()
+
+
+class LfgMatch(NamedTuple):
+    """A group of players formed for a game."""
+
+    game_id: int
+    user_ids: tuple[int, ...]
+    """Players in the order they joined."""
+    waited: float
+    """Seconds the longest waiting player waited."""
+
+
+class LfgSweep(NamedTuple):
+    """What a sweep of the queues did."""
+
+    matches: list[LfgMatch]
+    """Groups formed from players that waited long enough to accept a smaller group."""
+    expired: list[tuple[int, int]]
+    """(user id, game id) pairs that waited too long and were removed."""
+
+
+class LfgQueues(LoggerMixin):
+    """Write-through per-game queues of players looking for a group.
+
+    A player can queue for several games, and leaves every queue once grouped for one of them.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        store: LfgStore,
+        *,
+        group_size: int = 5,
+        min_group_size: int = 2,
+        relax_after: float = 300,
+        expire_after: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize empty queues. Call load() to fill them from the store."""
+        self.store = store
+        self.group_size = group_size
+        self.min_group_size = min_group_size
+        self.relax_after = relax_after
+        self.expire_after = expire_after
+        self.clock = clock
+        self._queues: dict[int, dict[int, float]] = {}
+        """Join time of each player, by game, in the order they joined."""
+        self._games: dict[int, set[int]] = {}
+        """Games each player is queued for."""
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def load(self) -> None:
+        """Replace the queues with the contents of the store."""
+        self._queues.clear()
+        self._games.clear()
+        now = self.clock()
+        for user_id, game_id in self.store.load():
+            self._queues.setdefault(game_id, {})[user_id] = now
+            self._games.setdefault(user_id, set()).add(game_id)
+        self.logger.debug(f"Loaded {len(self)} queued players")
+
+    def queued(self, game_id: int) -> list[int]:
+        """Get the players queued for a game, in the order they joined."""
+        return list(self._queues.get(game_id, ()))
+
+    def games_of(self, user_id: int) -> set[int]:
+        """Get the games a player is queued for."""
+        return set(self._games.get(user_id, ()))
+
+    def join(self, user_id: int, game_id: int) -> LfgMatch | None:
+        """Queue a player for a game. Returns the group formed, if the queue is now full enough."""
+        queue = self._queues.setdefault(game_id, {})
+        if user_id not in queue:
+            self.store.add(user_id, game_id)
+            queue[user_id] = self.clock()
+            self._games.setdefault(user_id, set()).add(game_id)
+        if len(queue) < self.group_size:
+            return None
+        return self._form_group(game_id, self.group_size)
+
+    def leave(self, user_id: int, game_id: int | None = None) -> list[int]:
+        """Remove a player from a game's queue, or from every queue. Returns the games left."""
+        games = self._games.get(user_id, set())
+        left = sorted(games if game_id is None else games & {game_id})
+        self._remove([(user_id, game) for game in left])
+        return left
+
+    def sweep(self) -> LfgSweep:
+        """Form smaller groups for players that waited long enough, and expire players that waited too long."""
+        now = self.clock()
+        expired = [
+            (user_id, game_id)
+            for game_id, queue in self._queues.items()
+            for user_id, joined_at in queue.items()
+            if now - joined_at >= self.expire_after
+        ]
+        self._remove(expired)
+
+        matches: list[LfgMatch] = []
+        for game_id, queue in list(self._queues.items()):
+            oldest = next(iter(queue.values()), None)
+            if oldest is not None and now - oldest >= self.relax_after and len(queue) >= self.min_group_size:
+                matches.append(self._form_group(game_id, min(len(queue), self.group_size)))
+        if expired or matches:
+            self.logger.info(f"Swept queues: {len(matches)} groups formed, {len(expired)} players expired")
+        return LfgSweep(matches, expired)
+
+    def _form_group(self, game_id: int, size: int) -> LfgMatch:
+        queue = self._queues[game_id]
+        user_ids = tuple(islice(queue, size))
+        waited = self.clock() - queue[user_ids[0]]
+        # Grouped players stop looking for every game.
+        self._remove([(user_id, game) for user_id in user_ids for game in self._games[user_id]])
+        self.logger.debug(f"Formed group for game {game_id}: {user_ids}")
+        return LfgMatch(game_id, user_ids, waited)
+
+    def _remove(self, entries: list[tuple[int, int]]) -> None:
+        if not entries:
+            return
+        self.store.remove(entries)
+        for user_id, game_id in entries:
+            queue = self._queues[game_id]
+            del queue[user_id]
+            if not queue:
+                del self._queues[game_id]
+            games = self._games[user_id]
+            games.discard(game_id)
+            if not games:
+                del self._games[user_id]
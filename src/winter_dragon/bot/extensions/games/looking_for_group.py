@@ -10,9 +10,11 @@ from sqlmodel import select
 
 from winter_dragon.bot.core.cogs import BotArgs, GroupCog
 from winter_dragon.bot.core.settings import Settings
+from winter_dragon.bot.core.tasks import loop
 from winter_dragon.bot.extensions.games.games import Games
+from winter_dragon.bot.extensions.games.lfg_engine import DatabaseLfgStore, LfgMatch, LfgQueues
+from winter_dragon.config import Config
 from winter_dragon.database.tables import Games as GamesDB
-from winter_dragon.database.tables import LookingForGroup
 
 
 @app_commands.guilds(Settings.support_guild_id)
@@ -21,35 +23,73 @@ class Lfg(GroupCog, auto_load=True):
 
     slash_suggest = Games.slash_suggest
 
+    group_size = Config(5)
+    min_group_size = Config(2)
+    relax_after = Config(300)
+    expire_after = Config(3600)
+    sweep_interval = Config(30)
+
     def __init__(self, **kwargs: Unpack[BotArgs]) -> None:
-        """Initialize the LFG cog."""
+        """Initialize the LFG cog, with in-memory queues per game."""
         super().__init__(**kwargs)
         self.games = [i.name for i in self.session.exec(select(GamesDB)).all()]
+        self.queues = LfgQueues(
+            DatabaseLfgStore(self.session),
+            group_size=self.group_size,
+            min_group_size=self.min_group_size,
+            relax_after=self.relax_after,
+            expire_after=self.expire_after,
+        )
+
+    async def cog_load(self) -> None:
+        """Load the queues, and start grouping players that waited long and expiring stale ones."""
+        await super().cog_load()
+        self.queues.load()
+        self.sweep_queues.change_interval(seconds=self.sweep_interval)
+        self.sweep_queues.start()
+
+    async def cog_unload(self) -> None:
+        """Stop sweeping the queues."""
+        self.sweep_queues.stop()
+        await super().cog_unload()
+
+    @loop()
+    async def sweep_queues(self) -> None:
+        """Group players that waited long enough for a smaller group, and remove those that waited too long."""
+        sweep = self.queues.sweep()
+        for match in sweep.matches:
+            await self.notify_match(match)
+
+    @sweep_queues.before_loop
+    async def before_sweep_queues(self) -> None:
+        """Wait until the bot is ready."""
+        await self.bot.wait_until_ready()
 
-    # TODO(Herogold, #3): every time someone adds, check matches.  # noqa: FIX002
     @app_commands.command(name="join", description="Join a search queue for finding people for the same game")
     async def slash_lfg_join(self, interaction: discord.Interaction, game: str) -> None:
-        """Join a search queue for finding people for the same game."""
+        """Join a search queue for finding people for the same game, and group up once enough people joined."""
         game_db = GamesDB.fetch_game_by_name(game)
-        total = self.session.exec(select(LookingForGroup).where(LookingForGroup.game_id == game_db.id)).all()
-        self.session.add(
-            LookingForGroup(
-                user_id=interaction.user.id,
-                game_id=game_db.id,
-            ),
-        )
-        self.session.commit()
+        if game_db.id is None:
+            await interaction.response.send_message(f"Unable to find {game}.", ephemeral=True)
+            return
+        if game_db.name not in self.games:
+            self.games.append(game_db.name)
+
+        total = len(self.queues.queued(game_db.id))
+        match = self.queues.join(interaction.user.id, game_db.id)
+        if match is not None:
+            await interaction.response.send_message(f"Found a group for {game_db.name}!", ephemeral=True)
+            await self.notify_match(match)
+            return
+
         c_mention = self.get_command_mention(self.slash_lfg_leave)
-        msg = f"Adding you to the search queue for {game}, currently there are {len(total)} in the same queue. Use {c_mention} to leave all queues."  # noqa: E501
+        msg = f"Adding you to the search queue for {game}, currently there are {total} in the same queue. Use {c_mention} to leave all queues."  # noqa: E501
         await interaction.response.send_message(msg, ephemeral=True)
 
     @app_commands.command(name="leave", description="leave all joined search queue")
     async def slash_lfg_leave(self, interaction: discord.Interaction) -> None:
         """Leave all joined search queues."""
-        lfg = self.session.exec(select(LookingForGroup).where(LookingForGroup.user_id == interaction.user.id)).all()
-        for i in lfg:
-            self.session.delete(i)
-        self.session.commit()
+        self.queues.leave(interaction.user.id)
         c_mention = self.get_command_mention(self.slash_lfg_join)
         await interaction.response.send_message(
             f"Removed you from all lfg queues, use {c_mention} to join one again.",
@@ -67,9 +107,13 @@ class Lfg(GroupCog, auto_load=True):
             app_commands.Choice(name=i, value=i) for i in self.games
         ]
 
-    async def search_match(self, interaction: discord.Interaction, _game: str) -> None:
-        """Search for a match in the database."""
-        user_games = self.session.exec(select(LookingForGroup).where(LookingForGroup.user_id == interaction.user.id)).all()
-        for user_game in user_games:
-            lfg_game = self.session.exec(select(LookingForGroup).where(LookingForGroup.game_id == user_game.game_id)).all()
-            self.logger.debug(f"{user_game=}, {lfg_game=}")
+    async def notify_match(self, match: LfgMatch) -> None:
+        """Send every player of a group who they are grouped with."""
+        game = self.session.get(GamesDB, match.game_id)
+        mentions = ", ".join(f"<@{user_id}>" for user_id in match.user_ids)
+        for user_id in match.user_ids:
+            try:
+                user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+                await user.send(f"Found a group for {game.name if game else 'your game'}: {mentions}")
+            except discord.HTTPException:
+                self.logger.warning(f"Unable to notify {user_id} of their group for game {match.game_id}")
@@ -132,6 +132,36 @@ class ClashTournament:
         embed.set_footer(text=f"Tier {self.tier}")
         return embed
 
+    def event_description(self) -> str:
+        """Get the description of the Discord scheduled event for this tournament."""
+        description_parts = [
+            "🏆 Clash Tournament",
+            f"ID: {self.tournament_id}",
+            f"Tier: {self.tier}",
+        ]
+
+        if self.schedule:
+            description_parts.append("\n📅 Schedule:")
+            for phase in self.schedule[:3]:  # Limit to first 3 phases
+                time_str = phase.started_at.strftime("%H:%M")
+                status = "❌" if phase.cancelled else "✅"
+                description_parts.append(f"{status} {phase.phase.value}: {time_str}")
+
+        return "\n".join(description_parts)[:1000]  # Discord limit
+
+
+def tournament_id_from_event(event: discord.ScheduledEvent) -> int | None:
+    """Get the tournament ID of a Clash scheduled event, or None for other events."""
+    if not event.name.startswith("🏆") or not event.description:
+        return None
+    for line in event.description.split("\n"):
+        if line.startswith("ID: "):
+            try:
+                return int(line.split("ID: ")[1])
+            except (ValueError, IndexError):
+                return None
+    return None
+
 
 class RiotClashAPIError(Exception):
     """Base exception for Riot Clash API errors."""
@@ -455,25 +485,9 @@ class DiscordClashEventManager:
             if not tournament.start_time:
                 return None
 
-            # Build description with schedule phases
-            description_parts = [
-                "🏆 Clash Tournament",
-                f"ID: {tournament.tournament_id}",
-                f"Tier: {tournament.tier}",
-            ]
-
-            if tournament.schedule:
-                description_parts.append("\n📅 Schedule:")
-                for phase in tournament.schedule[:3]:  # Limit to first 3 phases
-                    time_str = phase.started_at.strftime("%H:%M")
-                    status = "❌" if phase.cancelled else "✅"
-                    description_parts.append(f"{status} {phase.phase.value}: {time_str}")
-
-            description = "\n".join(description_parts)
-
             return await guild.create_scheduled_event(
                 name=f"🏆 {tournament.name}",
-                description=description[:1000],  # Discord limit
+                description=tournament.event_description(),
                 start_time=tournament.start_time,
                 end_time=tournament.start_time,
                 location="League of Legends",
@@ -505,18 +519,9 @@ class DiscordClashEventManager:
 
         # Get existing events and their tournament IDs
         existing_events = guild.scheduled_events
-        existing_tournament_ids = set()
-
-        for event in existing_events:
-            if event.name.startswith("🏆") and event.description:
-                # Extract tournament ID from description
-                for line in event.description.split("\n"):
-                    if line.startswith("ID: "):
-                        try:
-                            tournament_id = int(line.split("ID: ")[1])
-                            existing_tournament_ids.add(tournament_id)
-                        except (ValueError, IndexError):
-                            pass
+        existing_tournament_ids = {
+            tournament_id for event in existing_events if (tournament_id := tournament_id_from_event(event)) is not None
+        }
 
         # Clean up old Clash events if requested
         if remove_old:
@@ -0,0 +1,207 @@
+"""Tests for the looking-for-group queues, by replaying streams of joins and leaves."""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from winter_dragon.bot.extensions.games.lfg_engine import LfgMatch, LfgQueues
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+GROUP_SIZE = 4
+RELAX_AFTER = 60
+EXPIRE_AFTER = 600
+PLAYERS = 300
+GAMES = 12
+EVENTS = 20_000
+QUEUED_PLAYERS = 10_000
+BENCHMARK_JOINS = 2_000
+JOIN_BUDGET_SECONDS = 0.0002
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+class MemoryStore:
+    """LfgStore kept in a set, counting writes."""
+
+    def __init__(self, entries: Iterable[tuple[int, int]] = ()) -> None:
+        """Initialize the store with (user id, game id) pairs."""
+        self.entries = set(entries)
+        self.writes = 0
+
+    def load(self) -> Iterable[tuple[int, int]]:
+        """Load every (user id, game id) pair."""
+        return sorted(self.entries)
+
+    def add(self, user_id: int, game_id: int) -> None:
+        """Queue a player for a game."""
+        self.writes += 1
+        self.entries.add((user_id, game_id))
+
+    def remove(self, entries: Iterable[tuple[int, int]]) -> None:
+        """Remove (user id, game id) pairs from the queues."""
+        self.writes += 1
+        self.entries.difference_update(entries)
+
+
+def make_queues(store: MemoryStore | None = None, clock: FakeClock | None = None) -> LfgQueues:
+    """Create queues for groups of four, relaxing after a minute and expiring after ten."""
+    return LfgQueues(
+        store or MemoryStore(),
+        group_size=GROUP_SIZE,
+        min_group_size=2,
+        relax_after=RELAX_AFTER,
+        expire_after=EXPIRE_AFTER,
+        clock=clock or FakeClock(),
+    )
+
+
+def test_group_forms_when_full() -> None:
+    """The players that joined first are grouped once the queue is full, and leave their other queues."""
+    store = MemoryStore()
+    queues = make_queues(store)
+    queues.join(5, 2)
+    assert [queues.join(user_id, 1) for user_id in range(1, GROUP_SIZE)] == [None] * (GROUP_SIZE - 1)
+    assert queues.join(1, 1) is None
+
+    match = queues.join(5, 1)
+    assert match == LfgMatch(1, (1, 2, 3, 5), 0.0)
+    assert queues.queued(1) == []
+    assert queues.games_of(5) == set()
+    assert store.entries == set()
+    assert store.writes == GROUP_SIZE + 2  # One write per join, and one for the whole group leaving.
+
+
+def test_leave() -> None:
+    """Players can leave one queue or all of them."""
+    store = MemoryStore()
+    queues = make_queues(store)
+    for game_id in (1, 2, 3):
+        queues.join(1, game_id)
+
+    assert queues.leave(1, 2) == [2]
+    assert queues.leave(1, 4) == []
+    assert queues.leave(1) == [1, 3]
+    assert len(queues) == 0
+    assert store.entries == set()
+
+
+def test_sweep() -> None:
+    """Players that waited long are grouped with fewer players, and players that waited too long expire."""
+    clock = FakeClock()
+    queues = make_queues(clock=clock)
+    queues.join(1, 1)
+    queues.join(2, 1)
+    queues.join(3, 2)
+    assert queues.sweep() == ([], [])
+
+    clock.now = RELAX_AFTER
+    sweep = queues.sweep()
+    assert sweep.matches == [LfgMatch(1, (1, 2), RELAX_AFTER)]
+    assert sweep.expired == []
+
+    clock.now = EXPIRE_AFTER
+    assert queues.sweep() == ([], [(3, 2)])
+    assert len(queues) == 0
+
+
+def test_load() -> None:
+    """Queues are loaded from the store, as if everyone just joined."""
+    queues = make_queues(MemoryStore([(1, 1), (2, 1), (2, 2)]))
+    queues.load()
+    assert queues.queued(1) == [1, 2]
+    assert queues.games_of(2) == {1, 2}
+
+
+def test_join_leave_stream() -> None:
+    """Under a random stream of joins, leaves and sweeps, every group is valid and the store matches the queues."""
+    rng = random.Random(40)
+    clock = FakeClock()
+    store = MemoryStore()
+    queues = make_queues(store, clock)
+    grouped: dict[int, set[int]] = {}
+    matches: list[LfgMatch] = []
+
+    for _ in range(EVENTS):
+        clock.now += rng.random()
+        user_id, game_id = rng.randrange(PLAYERS), rng.randrange(GAMES)
+        roll = rng.random()
+        if roll < 0.7:
+            if match := queues.join(user_id, game_id):
+                matches.append(match)
+        elif roll < 0.95:
+            queues.leave(user_id, game_id if rng.random() < 0.5 else None)
+        else:
+            matches.extend(queues.sweep().matches)
+
+        for match in matches:
+            assert 2 <= len(match.user_ids) <= GROUP_SIZE
+            assert len(set(match.user_ids)) == len(match.user_ids)
+            assert len(match.user_ids) == GROUP_SIZE or match.waited >= RELAX_AFTER
+            for grouped_user in match.user_ids:
+                assert queues.games_of(grouped_user) == set()
+                grouped.setdefault(grouped_user, set()).add(match.game_id)
+        matches.clear()
+
+    assert grouped
+    queued = {(user_id, game_id) for game_id in range(GAMES) for user_id in queues.queued(game_id)}
+    assert queued == store.entries
+
+
+def queue_players(store: MemoryStore | None = None) -> tuple[LfgQueues, random.Random]:
+    """Create queues with 10k players queued across the games, none of them grouped yet."""
+    rng = random.Random(41)
+    queues = make_queues(store)
+    queues.group_size = QUEUED_PLAYERS
+    for user_id in range(QUEUED_PLAYERS):
+        queues.join(user_id, rng.randrange(GAMES))
+    assert len(queues) == QUEUED_PLAYERS
+    queues.group_size = GROUP_SIZE
+    return queues, rng
+
+
+def test_join_with_10k_queued() -> None:
+    """With 10k players queued across the games, every join forms a group with two writes, however long the queues."""
+    store = MemoryStore()
+    queues, rng = queue_players(store)
+    writes = store.writes
+
+    groups = 0
+    for user_id in range(QUEUED_PLAYERS, QUEUED_PLAYERS + BENCHMARK_JOINS):
+        groups += queues.join(user_id, rng.randrange(GAMES)) is not None
+
+    assert groups == BENCHMARK_JOINS
+    assert store.writes - writes == BENCHMARK_JOINS * 2
+    assert len(queues) == QUEUED_PLAYERS - BENCHMARK_JOINS * (GROUP_SIZE - 1)
+
+
+@pytest.mark.benchmark
+def test_join_latency() -> None:
+    """Joining is constant time, with 10k players queued across the games."""
+    queues, rng = queue_players()
+
+    latencies: list[float] = []
+    for user_id in range(QUEUED_PLAYERS, QUEUED_PLAYERS + BENCHMARK_JOINS):
+        start = time.perf_counter()
+        queues.join(user_id, rng.randrange(GAMES))
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    assert latencies[len(latencies) // 2] < JOIN_BUDGET_SECONDS
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import TYPE_CHECKING
 
 from winter_dragon.bot.core.cogs import Cog
+from winter_dragon.bot.core.tasks import loop
+from winter_dragon.bot.events.audit_ingest import AuditLogIngestor
+from winter_dragon.bot.events.dispatch import dispatch_table
 from winter_dragon.bot.events.event_handler import AuditEventHandler
-from winter_dragon.bot.events.factory import AuditEventFactory
+from winter_dragon.config import Config
 
 
 if TYPE_CHECKING:
@@ -18,14 +22,50 @@ if TYPE_CHECKING:
 class EventListener(Cog, auto_load=True):
     """Event listener for audit log entries."""
 
+    flush_interval = Config(5)
+
     def __init__(self, bot: WinterDragon) -> None:
         """Initialize the event listener."""
         super().__init__(bot=bot)
+        self.ingestor = AuditLogIngestor()
+        self._early_flush: asyncio.Task[int] | None = None
+
+    async def cog_load(self) -> None:
+        """Start flushing buffered audit log entries to the database."""
+        await super().cog_load()
+        self.flush_audit_logs.change_interval(seconds=self.flush_interval)
+        self.flush_audit_logs.start()
+
+    async def cog_unload(self) -> None:
+        """Stop the flush loop and persist whatever is still buffered."""
+        self.flush_audit_logs.stop()
+        if self._early_flush is not None:
+            await asyncio.wait([self._early_flush])
+        await self.ingestor.flush()
+        await super().cog_unload()
+
+    @loop()
+    async def flush_audit_logs(self) -> None:
+        """Persist buffered audit log entries in bulk."""
+        await self.ingestor.flush()
 
     @Cog.listener()
     async def on_audit_log_entry_create(self, entry: AuditLogEntry) -> None:
         """Handle the audit log entry."""
         self.logger.debug(f"Received audit log entry: {entry.id} - {entry.action.name} - {entry.target}")
-        for audit_event in AuditEventFactory.get_events(entry):
-            event_handler = AuditEventHandler(audit_event, self.session, self.bot)
+        if not self.ingestor.submit(entry):
+            return
+        if self.ingestor.should_flush and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.create_task(self.ingestor.flush())
+            self._early_flush.add_done_callback(self._log_flush_error)
+        route = dispatch_table.route(self.session, entry.guild.id, entry.action)
+        if not route.events:
+            msg = f"Audit event for {entry.action} not implemented"
+            raise NotImplementedError(msg)
+        for event_type in route.events:
+            event_handler = AuditEventHandler(event_type(entry), self.session, self.bot, route.targets)
             await event_handler.handle()
+
+    def _log_flush_error(self, task: asyncio.Task[int]) -> None:
+        if not task.cancelled() and (error := task.exception()) is not None:
+            self.logger.error("Failed to flush audit log entries early", exc_info=error)
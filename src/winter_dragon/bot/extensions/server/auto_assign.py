@@ -6,8 +6,7 @@ import discord
 from discord import app_commands
 from sqlmodel import select
 
-from winter_dragon.bot.core.cogs import Cog, GroupCog
-from winter_dragon.config import Config
+from winter_dragon.bot.core.cogs import GroupCog
 from winter_dragon.database.tables import AutoAssignRole
 from winter_dragon.database.tables import Roles as DbRole
 
@@ -15,8 +14,6 @@ from winter_dragon.database.tables import Roles as DbRole
 class AutoAssign(GroupCog, auto_load=True):
     """Cog for automatically assigning roles to new members."""
 
-    auto_assign_reason = Config("Member joined. Adding auto-assign roles")
-
     @app_commands.command(name="show", description="Show the current auto assign role")
     async def slash_assign_show(self, interaction: discord.Interaction) -> None:
         """Show the current auto assign role."""
@@ -48,6 +45,7 @@ class AutoAssign(GroupCog, auto_load=True):
             self.session.flush()
         self.session.add(AutoAssignRole(role_id=role.id, guild_id=role.guild.id))
         self.session.commit()
+        self.bot.dispatch("join_config_change", role.guild.id)
 
         await interaction.response.send_message(f"Adding {role.mention} when a new member joins", ephemeral=True)
 
@@ -76,6 +74,7 @@ class AutoAssign(GroupCog, auto_load=True):
         ).first():
             self.session.delete(auto_assign)
         self.session.commit()
+        self.bot.dispatch("join_config_change", interaction.guild.id)
 
     async def remove_all_roles(self, interaction: discord.Interaction) -> None:
         """Remove all roles from the list of roles to be assigned to new members."""
@@ -88,11 +87,4 @@ class AutoAssign(GroupCog, auto_load=True):
         ).all():
             self.session.delete(auto_assign)
         self.session.commit()
-
-    @Cog.listener()
-    async def on_member_join(self, member: discord.Member) -> None:
-        """Automatically assign roles to new members."""
-        for auto_assign in self.session.exec(select(AutoAssignRole).where(AutoAssignRole.guild_id == member.guild.id)).all():
-            if role := member.guild.get_role(auto_assign.role_id):
-                await member.add_roles(role, reason=self.auto_assign_reason)
-                self.logger.debug(f"Added AutoAssign role {role} to new member {member.mention}")
+        self.bot.dispatch("join_config_change", interaction.guild.id)
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from textwrap import dedent
+from typing import TYPE_CHECKING
 
 import discord
 from discord import (
@@ -12,17 +13,65 @@ from discord import (
 from sqlmodel import select
 
 from winter_dragon.bot.core.cogs import Cog, GroupCog
+from winter_dragon.bot.core.tasks import loop
+from winter_dragon.bot.extensions.server.autochannel_cache import AutoChannelCache, DatabaseAutoChannelStore
 from winter_dragon.config import Config
-from winter_dragon.database.tables import AutoChannels as AC  # noqa: N817
 from winter_dragon.database.tables import AutoChannelSettings as ACS  # noqa: N817
 from winter_dragon.database.tables.channel import Channels
 
 
+if TYPE_CHECKING:
+    from winter_dragon.bot.core.bot import WinterDragon
+
+
 @app_commands.guild_only()
 class AutomaticChannels(GroupCog, auto_load=True):
     """Automatic channels for users to create their own (temporary) channels."""
 
     create_reason = Config("Creating AutomaticChannel")
+    reconcile_interval = Config(600)
+
+    def __init__(self, bot: WinterDragon) -> None:
+        """Initialize the cog with an in-memory index of automatic channels."""
+        super().__init__(bot=bot)
+        self.channels = AutoChannelCache(DatabaseAutoChannelStore(self.session))
+
+    async def cog_load(self) -> None:
+        """Load the automatic channels, and start cleaning up orphaned channels."""
+        await super().cog_load()
+        self.channels.load()
+        self.reconcile_channels.change_interval(seconds=self.reconcile_interval)
+        self.reconcile_channels.start()
+
+    async def cog_unload(self) -> None:
+        """Stop cleaning up orphaned channels."""
+        self.reconcile_channels.stop()
+        await super().cog_unload()
+
+    @loop()
+    async def reconcile_channels(self) -> None:
+        """Forget channels that were deleted, and delete member channels that were left empty while offline."""
+        if any(guild.unavailable for guild in self.bot.guilds):
+            return
+        self.channels.reconcile(lambda channel_id: self.bot.get_channel(channel_id) is not None)
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels:
+                owner_id = self.channels.owner_of(channel.id)
+                if owner_id is None or owner_id == guild.id or channel.members:
+                    continue
+                try:
+                    await channel.delete(reason="removing empty voice")
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException:
+                    self.logger.exception(f"Failed to delete empty channel {channel.id} of {owner_id}")
+                    continue
+                self.channels.remove(owner_id)
+
+    @reconcile_channels.before_loop
+    async def before_reconcile_channels(self) -> None:
+        """Wait until the bot is ready."""
+        await self.bot.wait_until_ready()
 
     @Cog.listener()
     async def on_voice_state_update(
@@ -32,25 +81,18 @@ class AutomaticChannels(GroupCog, auto_load=True):
         after: discord.VoiceState,
     ) -> None:
         """When a user joins a voice channel, create a new channel for them."""
-        self.logger.debug(f"{member} moved from {before} to {after}")
-        if voice_create := self.session.exec(select(AC).where(AC.id == member.guild.id)).first():
-            self.logger.debug(f"{voice_create}")
-
-            # Handle before.channel things
-            if before.channel is None:
-                pass
-            elif before.channel.id == voice_create.channel_id:
-                # ignore when already moved from "Join Me"
-                return
-            elif len(before.channel.members) == 0:  # noqa: SIM102
-                if db_channel := self.session.exec(select(AC).where(AC.channel_id == before.channel.id)).first():
-                    if dc_channel := member.guild.get_channel(db_channel.channel_id):
-                        await dc_channel.delete(reason="removing empty voice")
-                    self.session.delete(db_channel)
-
-            if after.channel is not None and after.channel.id == voice_create.channel_id:
-                await self.create_user_channel(member, after, after.channel.guild)
-            self.session.commit()
+        update = self.channels.plan_voice_update(
+            member.guild.id,
+            before.channel.id if before.channel else None,
+            after.channel.id if after.channel else None,
+            before_empty=before.channel is not None and len(before.channel.members) == 0,
+        )
+        if update.delete_owner is not None and before.channel is not None:
+            self.logger.debug(f"Deleting empty automatic channel {before.channel} of {update.delete_owner}")
+            await before.channel.delete(reason="removing empty voice")
+            self.channels.remove(update.delete_owner)
+        if update.create and after.channel is not None:
+            await self.create_user_channel(member, after, after.channel.guild)
 
     async def create_user_channel(
         self,
@@ -74,13 +116,13 @@ class AutomaticChannels(GroupCog, auto_load=True):
         if after.channel is None:
             return
 
-        if user_channel := self.session.exec(select(AC).where(AC.id == member.id)).first():  # noqa: SIM102
-            if dc_channel := member.guild.get_channel(user_channel.channel_id):
+        if (user_channel := self.channels.channel_of(member.id)) is not None:  # noqa: SIM102
+            if dc_channel := member.guild.get_channel(user_channel):
                 await member.send(f"You already have a channel at {dc_channel.mention}")
                 return
 
         # check if user that joined "Create Vc" channel is in db
-        if self.session.exec(select(AC).where(AC.channel_id == after.channel.id)).first():
+        if self.channels.owner_of(after.channel.id) is not None:
             name, limit = self.get_final_settings(
                 member,
                 self.session.exec(select(ACS).where(ACS.user_id == member.id)).first(),
@@ -90,11 +132,10 @@ class AutomaticChannels(GroupCog, auto_load=True):
             # Set a default name if no custom one is set in settings
             name = member.activity.name if member.activity and member.activity.name else f"{member.name}'s channel"
 
-            db_auto_channel = self.session.exec(select(AC).where(AC.id == guild.id)).first()
-            if db_auto_channel is None:
+            channel_id = self.channels.channel_of(guild.id)
+            if channel_id is None:
                 await member.send("You are not setup yet, please use `/setup` to create your channel")
                 return
-            channel_id = db_auto_channel.channel_id
             voice_channel = guild.get_channel(channel_id)
             if voice_channel is None:
                 await member.send("The category for your channel does not exist, please use `/setup` to create your channel")
@@ -116,13 +157,7 @@ class AutomaticChannels(GroupCog, auto_load=True):
             await voice_channel.set_permissions(bot_member, connect=True, read_messages=True)
             await voice_channel.set_permissions(member, connect=True, read_messages=True)
             await voice_channel.edit(name=name, user_limit=limit)
-            self.session.add(
-                AC(
-                    id=member.id,
-                    channel_id=voice_channel.id,
-                ),
-            )
-            self.session.commit()
+            self.channels.set(member.id, voice_channel.id)
 
     def get_final_settings(
         self,
@@ -150,7 +185,7 @@ class AutomaticChannels(GroupCog, auto_load=True):
             msg = "Guild is None when setting up AutoChannel"
             raise TypeError(msg)
 
-        if self.session.exec(select(AC).where(AC.id == guild.id)).first() is not None:
+        if self.channels.channel_of(guild.id) is not None:
             await interaction.response.send_message("You are already set up", ephemeral=True)
             return
 
@@ -160,20 +195,14 @@ class AutomaticChannels(GroupCog, auto_load=True):
             reason=self.create_reason,
         )
 
-        self.session.add_all(
-            [
-                Channels(
-                    id=channel.id,
-                    name=channel.name,
-                    guild_id=guild.id,
-                ),
-                AC(
-                    id=guild.id,
-                    channel_id=channel.id,
-                ),
-            ],
+        self.session.add(
+            Channels(
+                id=channel.id,
+                name=channel.name,
+                guild_id=guild.id,
+            ),
         )
-        self.session.commit()
+        self.channels.set(guild.id, channel.id)
         await interaction.response.send_message("**You are all setup and ready to go!**", ephemeral=True)
 
     @app_commands.checks.has_permissions(manage_guild=True)
@@ -198,13 +227,7 @@ class AutomaticChannels(GroupCog, auto_load=True):
             )
             return
 
-        self.session.add(
-            AC(
-                id=interaction.guild.id,
-                channel_id=channel.id,
-            ),
-        )
-        self.session.commit()
+        self.channels.set(interaction.guild.id, channel.id)
         await interaction.response.send_message(f"Successfully set {channel.mention} as this guild's creation channel")
 
     @app_commands.checks.has_permissions(manage_guild=True)
@@ -241,8 +264,8 @@ class AutomaticChannels(GroupCog, auto_load=True):
                 ),
             )
 
-        if autochannel := self.session.exec(select(AC).where(AC.id == interaction.user.id)).first():
-            channel = self.bot.get_channel(autochannel.channel_id)
+        if (autochannel := self.channels.channel_of(interaction.user.id)) is not None:
+            channel = self.bot.get_channel(autochannel)
             if channel is not None and isinstance(channel, discord.VoiceChannel):
                 await channel.edit(user_limit=limit)
 
@@ -269,8 +292,8 @@ class AutomaticChannels(GroupCog, auto_load=True):
     @app_commands.command(name="name", description="Change the name of your channels")
     async def slash_name(self, interaction: discord.Interaction, *, name: str) -> None:
         """Change the name of a users channels."""
-        if autochannel := self.session.exec(select(AC).where(AC.id == interaction.user.id)).first():
-            channel = self.bot.get_channel(autochannel.channel_id)
+        if (autochannel := self.channels.channel_of(interaction.user.id)) is not None:
+            channel = self.bot.get_channel(autochannel)
             if channel is not None and isinstance(channel, VoiceChannel):
                 await channel.edit(name=name)
 
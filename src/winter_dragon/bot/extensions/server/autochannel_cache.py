@@ -0,0 +1,145 @@
+"""In-memory index of automatic channels.
+
+Voice state updates are decided from memory, without a database round-trip.
+The index is loaded once at startup, and every change is written through to the database before it is applied.
+Rows in the AutoChannels table are owned either by a guild, pointing at its creation channel,
+or by a member, pointing at the channel created for them.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+from herogold.log import LoggerMixin
+from sqlalchemy import delete
+from sqlmodel import Session, col, select
+
+from winter_dragon.database.tables.autochannel import AutoChannels
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+
+class AutoChannelStore(Protocol):
+    """Persistent storage of automatic channel ownership."""
+
+    def load(self) -> Iterable[tuple[int, int]]:
+        """Load every (owner id, channel id) pair."""
+        ...
+
+    def save(self, owner_id: int, channel_id: int) -> None:
+        """Set the channel of an owner."""
+        ...
+
+    def delete(self, owner_id: int) -> None:
+        """Remove the channel of an owner."""
+        ...
+
+
+class DatabaseAutoChannelStore:
+    """AutoChannelStore backed by the AutoChannels table."""
+
+    def __init__(self, session: Session) -> None:
+        """Initialize the store with a database session."""
+        self.session = session
+
+    def load(self) -> Iterable[tuple[int, int]]:
+        """Load every (owner id, channel id) pair."""
+        return self.session.exec(select(AutoChannels.id, AutoChannels.channel_id)).all()
+
+    def save(self, owner_id: int, channel_id: int) -> None:
+        """Set the channel of an owner."""
+        self.session.exec(delete(AutoChannels).where(col(AutoChannels.id) == owner_id))
+        self.session.add(AutoChannels(id=owner_id, channel_id=channel_id))
+        self.session.commit()
+
+    def delete(self, owner_id: int) -> None:
+        """Remove the channel of an owner."""
+        self.session.exec(delete(AutoChannels).where(col(AutoChannels.id) == owner_id))
+        self.session.commit()
+
+
+class VoiceUpdate(NamedTuple):
+    """What to do in response to a voice state update."""
+
+    create: bool = False
+    """Create a channel for the member."""
+    delete_owner: int | None = None
+    """Owner of an emptied channel that should be deleted."""
+
+
+class AutoChannelCache(LoggerMixin):
+    """Write-through index of automatic channel ownership."""
+
+    def __init__(self, store: AutoChannelStore) -> None:
+        """Initialize an empty cache. Call load() to fill it from the store."""
+        self.store = store
+        self._channels: dict[int, int] = {}
+        self._owners: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def load(self) -> None:
+        """Replace the cache with the contents of the store."""
+        self._channels.clear()
+        self._owners.clear()
+        for owner_id, channel_id in self.store.load():
+            self._channels[owner_id] = channel_id
+            self._owners[channel_id] = owner_id
+        self.logger.debug(f"Loaded {len(self)} automatic channels")
+
+    def channel_of(self, owner_id: int) -> int | None:
+        """Get the channel of a guild or member."""
+        return self._channels.get(owner_id)
+
+    def owner_of(self, channel_id: int) -> int | None:
+        """Get the guild or member owning a channel."""
+        return self._owners.get(channel_id)
+
+    def set(self, owner_id: int, channel_id: int) -> None:
+        """Set the channel of a guild or member."""
+        self.store.save(owner_id, channel_id)
+        if (previous := self._channels.get(owner_id)) is not None:
+            self._owners.pop(previous, None)
+        self._channels[owner_id] = channel_id
+        self._owners[channel_id] = owner_id
+
+    def remove(self, owner_id: int) -> None:
+        """Remove the channel of a guild or member."""
+        if (channel_id := self._channels.get(owner_id)) is None:
+            return
+        self.store.delete(owner_id)
+        del self._channels[owner_id]
+        self._owners.pop(channel_id, None)
+
+    def plan_voice_update(
+        self,
+        guild_id: int,
+        before: int | None,
+        after: int | None,
+        *,
+        before_empty: bool,
+    ) -> VoiceUpdate:
+        """Decide what a member moving from the before channel to the after channel requires."""
+        creation_channel = self._channels.get(guild_id)
+        # Mute, deafen and stream toggles don't move the member.
+        if creation_channel is None or before == after:
+            return VoiceUpdate()
+        # Members moved out of the creation channel are moved into their new channel.
+        if before == creation_channel:
+            return VoiceUpdate()
+        delete_owner = None
+        if before is not None and before_empty and (owner := self._owners.get(before)) is not None and owner != guild_id:
+            delete_owner = owner
+        return VoiceUpdate(create=after == creation_channel, delete_owner=delete_owner)
+
+    def reconcile(self, exists: Callable[[int], bool]) -> list[int]:
+        """Remove owners whose channel no longer exists. Returns the removed owners."""
+        orphans = [owner_id for owner_id, channel_id in self._channels.items() if not exists(channel_id)]
+        for owner_id in orphans:
+            self.remove(owner_id)
+        if orphans:
+            self.logger.info(f"Removed {len(orphans)} automatic channels that no longer exist")
+        return orphans
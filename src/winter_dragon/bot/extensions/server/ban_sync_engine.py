@@ -0,0 +1,191 @@
+"""Cross-guild ban synchronization.
+
+Keeps the canonical set of synced bans, and converges every synced guild towards it.
+Each guild is diffed against the canonical set, and only the missing bans and stale unbans are applied.
+Calls run concurrently across guilds, limited per guild to stay within Discord's per-guild rate limits,
+and failed calls are retried with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+import discord
+from herogold.log import LoggerMixin
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+
+class BanBackend(Protocol):
+    """Applies bans to guilds."""
+
+    async def fetch_bans(self, guild_id: int) -> set[int] | None:
+        """Get the banned user ids of a guild, or None if the guild is unavailable."""
+        ...
+
+    async def ban(self, guild_id: int, user_id: int, reason: str | None) -> None:
+        """Ban a user from a guild."""
+        ...
+
+    async def unban(self, guild_id: int, user_id: int, reason: str | None) -> None:
+        """Unban a user from a guild."""
+        ...
+
+
+class DiscordBanBackend:
+    """BanBackend that applies bans through the Discord API."""
+
+    def __init__(self, client: discord.Client) -> None:
+        """Initialize the backend with a client."""
+        self.client = client
+
+    async def fetch_bans(self, guild_id: int) -> set[int] | None:
+        """Get the banned user ids of a guild, or None if the guild is unavailable."""
+        if (guild := self.client.get_guild(guild_id)) is None:
+            return None
+        return {entry.user.id async for entry in guild.bans(limit=None)}
+
+    async def ban(self, guild_id: int, user_id: int, reason: str | None) -> None:
+        """Ban a user from a guild, keeping their messages."""
+        if guild := self.client.get_guild(guild_id):
+            await guild.ban(discord.Object(user_id), reason=reason, delete_message_seconds=0)
+
+    async def unban(self, guild_id: int, user_id: int, reason: str | None) -> None:
+        """Unban a user from a guild."""
+        if guild := self.client.get_guild(guild_id):
+            await guild.unban(discord.Object(user_id), reason=reason)
+
+
+class BanDiff(NamedTuple):
+    """Changes needed for a guild to match the canonical ban set."""
+
+    to_ban: set[int]
+    to_unban: set[int]
+
+
+class BanOperation(NamedTuple):
+    """A single ban or unban of a user in a guild."""
+
+    guild_id: int
+    user_id: int
+    ban: bool
+    reason: str | None
+
+
+class SyncResult(NamedTuple):
+    """Outcome of applying ban operations."""
+
+    applied: int
+    failed: int
+
+
+class BanSyncEngine(LoggerMixin):
+    """Converges synced guilds towards a canonical set of bans."""
+
+    def __init__(
+        self,
+        backend: BanBackend,
+        *,
+        max_concurrency: int = 10,
+        per_guild_concurrency: int = 2,
+        max_retries: int = 3,
+        retry_delay: float = 1,
+    ) -> None:
+        """Initialize the engine without any guilds or bans."""
+        self.backend = backend
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.per_guild_concurrency = per_guild_concurrency
+        self.guilds: set[int] = set()
+        self.bans: dict[int, str | None] = {}
+        self.revoked: set[int] = set()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._guild_semaphores: dict[int, asyncio.Semaphore] = {}
+
+    def load(self, bans: Mapping[int, str | None], guilds: Iterable[int]) -> None:
+        """Replace the canonical bans and synced guilds."""
+        self.bans = dict(bans)
+        self.guilds = set(guilds)
+
+    def diff(self, current: set[int]) -> BanDiff:
+        """Compare the bans of a guild with the canonical ban set."""
+        return BanDiff(self.bans.keys() - current, self.revoked & current)
+
+    async def ban(self, user_id: int, reason: str | None = None, *, origin: int | None = None) -> SyncResult:
+        """Add a ban to the canonical set, and apply it to every synced guild except its origin."""
+        self.bans[user_id] = reason
+        self.revoked.discard(user_id)
+        return await self.apply(
+            BanOperation(guild_id, user_id, ban=True, reason=reason) for guild_id in self.guilds if guild_id != origin
+        )
+
+    async def unban(self, user_id: int, reason: str | None = None, *, origin: int | None = None) -> SyncResult:
+        """Remove a ban from the canonical set, and lift it in every synced guild except its origin."""
+        self.bans.pop(user_id, None)
+        self.revoked.add(user_id)
+        return await self.apply(
+            BanOperation(guild_id, user_id, ban=False, reason=reason) for guild_id in self.guilds if guild_id != origin
+        )
+
+    async def reconcile(self, guild_ids: Iterable[int] | None = None) -> SyncResult:
+        """Fetch the bans of guilds, all synced guilds by default, and apply whatever differs from the canonical set."""
+        guild_ids = list(self.guilds if guild_ids is None else guild_ids)
+        current = await asyncio.gather(*(self._fetch_bans(guild_id) for guild_id in guild_ids))
+        operations: list[BanOperation] = []
+        for guild_id, bans in zip(guild_ids, current, strict=True):
+            if bans is None:
+                continue
+            to_ban, to_unban = self.diff(bans)
+            operations.extend(BanOperation(guild_id, user_id, ban=True, reason=self.bans[user_id]) for user_id in to_ban)
+            operations.extend(BanOperation(guild_id, user_id, ban=False, reason=None) for user_id in to_unban)
+        if all(bans is not None for bans in current):
+            # Revoked bans that no guild has anymore have fully converged.
+            banned: set[int] = set().union(*(bans for bans in current if bans is not None))
+            self.revoked &= banned
+        self.logger.info(f"Reconciling {len(operations)} ban changes across {len(guild_ids)} guilds")
+        return await self.apply(operations)
+
+    async def apply(self, operations: Iterable[BanOperation]) -> SyncResult:
+        """Apply ban operations concurrently. Returns how many succeeded and failed."""
+        results = await asyncio.gather(*(self._run(operation) for operation in operations))
+        applied = sum(results)
+        return SyncResult(applied, len(results) - applied)
+
+    async def _fetch_bans(self, guild_id: int) -> set[int] | None:
+        async with self._semaphore, self._guild_semaphore(guild_id):
+            try:
+                return await self.backend.fetch_bans(guild_id)
+            except discord.HTTPException:
+                self.logger.exception(f"Failed to fetch bans of {guild_id=}")
+                return None
+
+    async def _run(self, operation: BanOperation) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore, self._guild_semaphore(operation.guild_id):
+                    if operation.ban:
+                        await self.backend.ban(operation.guild_id, operation.user_id, operation.reason)
+                    else:
+                        await self.backend.unban(operation.guild_id, operation.user_id, operation.reason)
+            except discord.NotFound:
+                # Unbanning someone who isn't banned is already done, banning an unknown user never will be.
+                return not operation.ban
+            except discord.Forbidden:
+                self.logger.warning(f"Missing permissions to apply {operation}")
+                return False
+            except discord.HTTPException:
+                if attempt == self.max_retries:
+                    self.logger.exception(f"Giving up on {operation} after {attempt + 1} attempts")
+                    return False
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+            else:
+                return True
+        return False
+
+    def _guild_semaphore(self, guild_id: int) -> asyncio.Semaphore:
+        if (semaphore := self._guild_semaphores.get(guild_id)) is None:
+            semaphore = self._guild_semaphores[guild_id] = asyncio.Semaphore(max(1, self.per_guild_concurrency))
+        return semaphore
@@ -8,6 +8,7 @@ import discord
 from discord import DMChannel, GroupChannel, PermissionOverwrite, Permissions, Thread, app_commands
 
 from winter_dragon.bot.core.cogs import GroupCog
+from winter_dragon.database.tables import Channels
 
 
 @app_commands.guild_only()
@@ -16,6 +17,12 @@ class ChannelUtils(GroupCog, auto_load=True):
 
     categories = app_commands.Group(name="categories", description="Manage your categories")
 
+    @GroupCog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        """Unlink the tags of deleted channels, so they are no longer resolved from the tag cache."""
+        if (db_channel := self.session.get(Channels, channel.id)) and db_channel.get_tags(self.session):
+            db_channel.unlink_tag(self.session)
+
     @app_commands.checks.has_permissions(manage_channels=True)
     @categories.command(name="delete", description="Delete a category and ALL channels inside.")
     async def slash_cat_delete(self, interaction: discord.Interaction, category: discord.CategoryChannel) -> None:
@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
-from difflib import SequenceMatcher
 from typing import TYPE_CHECKING
 
+import discord
+from sqlmodel import select
+
 from winter_dragon.bot.core.cogs import GroupCog
+from winter_dragon.bot.extensions.server.forum_index import ForumPostIndex, Match
+from winter_dragon.config import Config
+from winter_dragon.database.tables.forum_post import ForumPosts
 
 
 if TYPE_CHECKING:
@@ -15,18 +20,63 @@ if TYPE_CHECKING:
 class ForumDupeFinder(GroupCog, auto_load=True):
     """A class to find duplicate forum posts based on their content."""
 
+    similarity_threshold = Config(0.5)
+    max_suggestions = Config(3)
+
     def __init__(self, bot: WinterDragon) -> None:
         """Initialize the ForumDupeFinder with the bot instance."""
         super().__init__(bot=bot)
-        self.forum_posts: list[str] = []
-        # TODO(Herogold, #4): Replace this list with forum post titles from the database.  # noqa: FIX002
-
-    def get_ratio(self, a: str, b: str) -> float:
-        """Calculate the similarity ratio between two strings."""
-        return SequenceMatcher(None, a, b).ratio()
-
-    def find_duplicates(self, post_title: str, *, ratio: float = 0.8) -> list[str]:
-        """Find duplicate forum posts based on their content."""
-        duplicates: list[str] = []
-        duplicates.extend(post for post in self.forum_posts if self.get_ratio(post_title, post) > ratio)
-        return duplicates
+        self.indexes: dict[int, ForumPostIndex] = {}
+
+    async def cog_load(self) -> None:
+        """Build the similarity index of every forum from the stored posts."""
+        await super().cog_load()
+        for post in self.session.exec(select(ForumPosts)).all():
+            self.get_index(post.forum_id).add(post.id, post.title)
+        self.logger.info(f"Indexed {sum(map(len, self.indexes.values()))} posts in {len(self.indexes)} forums")
+
+    def get_index(self, forum_id: int) -> ForumPostIndex:
+        """Get the similarity index of a forum."""
+        if (index := self.indexes.get(forum_id)) is None:
+            index = self.indexes[forum_id] = ForumPostIndex()
+        return index
+
+    def find_duplicates(self, post_title: str, forum_id: int, *, exclude: int | None = None) -> list[Match]:
+        """Find forum posts similar to a title, most similar first."""
+        return self.get_index(forum_id).query(
+            post_title,
+            limit=self.max_suggestions,
+            threshold=self.similarity_threshold,
+            exclude=exclude,
+        )
+
+    @GroupCog.listener()
+    async def on_thread_create(self, thread: discord.Thread) -> None:
+        """Point new forum posts to similar existing posts, and index them."""
+        if not isinstance(thread.parent, discord.ForumChannel):
+            return
+        if duplicates := self.find_duplicates(thread.name, thread.parent.id, exclude=thread.id):
+            links = "\n".join(f"- <#{post_id}> ({similarity:.0%} similar)" for post_id, similarity in duplicates)
+            await thread.send(f"This post looks similar to:\n{links}")
+        self.get_index(thread.parent.id).add(thread.id, thread.name)
+        self.session.merge(ForumPosts(id=thread.id, guild_id=thread.guild.id, forum_id=thread.parent.id, title=thread.name))
+        self.session.commit()
+
+    @GroupCog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread) -> None:
+        """Re-index renamed forum posts."""
+        if before.name == after.name or not isinstance(after.parent, discord.ForumChannel):
+            return
+        self.get_index(after.parent.id).add(after.id, after.name)
+        self.session.merge(ForumPosts(id=after.id, guild_id=after.guild.id, forum_id=after.parent.id, title=after.name))
+        self.session.commit()
+
+    @GroupCog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent) -> None:
+        """Remove deleted forum posts from the index."""
+        if (index := self.indexes.get(payload.parent_id)) is None or payload.thread_id not in index:
+            return
+        index.remove(payload.thread_id)
+        if post := self.session.get(ForumPosts, payload.thread_id):
+            self.session.delete(post)
+            self.session.commit()
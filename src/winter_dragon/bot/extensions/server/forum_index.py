@@ -0,0 +1,117 @@
+"""Similarity index for finding near-duplicate forum posts.
+
+Titles are broken into character trigrams of their words, so typos and reordered words still match,
+and similarity is the Jaccard index of those trigram sets.
+An inverted index maps every trigram to the posts containing it. A query only scans the posting lists of
+its rarest trigrams: any post at or above the similarity threshold must share at least one of them
+(prefix filtering), so candidates are found without comparing against every post.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from typing import TYPE_CHECKING, NamedTuple
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+WORD_PATTERN = re.compile(r"\w+")
+# Guards ceil() against float error, like 0.7 * 10 == 7.000000000000001
+EPSILON = 1e-9
+
+
+def title_features(title: str) -> frozenset[str]:
+    """Get the character trigrams of every word in a title, ignoring case and punctuation."""
+    features: set[str] = set()
+    for word in WORD_PATTERN.findall(title.casefold()):
+        padded = f"#{word}#"
+        features.update(padded[i : i + 3] for i in range(max(1, len(padded) - 2)))
+    return frozenset(features)
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    """Get the Jaccard index of two sets."""
+    if not a or not b:
+        return 0.0
+    overlap = len(a & b)
+    return overlap / (len(a) + len(b) - overlap)
+
+
+class Match(NamedTuple):
+    """A post similar to a query."""
+
+    post_id: int
+    similarity: float
+
+
+class ForumPostIndex:
+    """Incrementally updated inverted index of forum post titles."""
+
+    def __init__(self, posts: Iterable[tuple[int, str]] = ()) -> None:
+        """Initialize the index with (post id, title) pairs."""
+        self._features: dict[int, frozenset[str]] = {}
+        self._postings: dict[str, list[int]] = {}
+        for post_id, title in posts:
+            self.add(post_id, title)
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def __contains__(self, post_id: int) -> bool:
+        return post_id in self._features
+
+    def add(self, post_id: int, title: str) -> None:
+        """Add a post, replacing its previous title if it was already indexed."""
+        self.remove(post_id)
+        features = title_features(title)
+        self._features[post_id] = features
+        for feature in features:
+            self._postings.setdefault(feature, []).append(post_id)
+
+    def remove(self, post_id: int) -> None:
+        """Remove a post from the index, if it is indexed."""
+        for feature in self._features.pop(post_id, ()):
+            postings = self._postings[feature]
+            postings.remove(post_id)
+            if not postings:
+                del self._postings[feature]
+
+    def query(
+        self,
+        title: str,
+        *,
+        limit: int = 5,
+        threshold: float = 0.5,
+        exclude: int | None = None,
+    ) -> list[Match]:
+        """Find the posts most similar to a title, with a similarity of at least the threshold."""
+        features = title_features(title)
+        if not features:
+            return []
+        # A post with similarity >= threshold shares at least ceil(threshold * n) of the n features,
+        # so it must contain one of any n - ceil(threshold * n) + 1 features. Pick the rarest ones.
+        prefix_length = len(features) - math.ceil(threshold * len(features) - EPSILON) + 1
+        prefix = sorted(features, key=lambda feature: len(self._postings.get(feature, ())))[:prefix_length]
+
+        candidates: set[int] = set()
+        for feature in prefix:
+            candidates.update(self._postings.get(feature, ()))
+        if exclude is not None:
+            candidates.discard(exclude)
+
+        min_size = threshold * len(features) - EPSILON
+        max_size = len(features) / threshold + EPSILON if threshold > 0 else math.inf
+        matches = (
+            Match(post_id, jaccard(features, other))
+            for post_id in candidates
+            if min_size <= len(other := self._features[post_id]) <= max_size
+        )
+        return heapq.nlargest(
+            limit,
+            (match for match in matches if match.similarity >= threshold),
+            key=lambda match: match.similarity,
+        )
@@ -0,0 +1,219 @@
+"""Pipeline for members joining guilds.
+
+Joins are queued up to a limit and handled by a few workers. discord.py runs each join listener in its own task,
+so waiting for room in the queue would only park more tasks; joins arriving while the queue is full are dropped
+and counted instead, which bounds the work and memory a join raid can pile up.
+The join configuration of a guild, its auto-assign roles and welcome message, is read once and cached.
+Every role a member gets on joining is added in a single edit,
+and welcomes are collected per guild and sent in batches, one message per burst of joins.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import NamedTuple, Protocol
+
+import discord
+from herogold.log import LoggerMixin
+from sqlmodel import Session, select
+
+from winter_dragon.database.tables import AutoAssignRole
+from winter_dragon.database.tables import Welcome as WelcomeDb
+
+
+type RoleSource = Callable[[discord.Member], Iterable[int]]
+"""Gets the ids of extra roles to give a joining member."""
+type WelcomeSender = Callable[[discord.Guild, list[discord.Member], str | None], Awaitable[None]]
+"""Welcomes members that joined a guild, with the guild's welcome message, if it has one."""
+
+
+class GuildJoinConfig(NamedTuple):
+    """How a guild handles members joining."""
+
+    role_ids: tuple[int, ...] = ()
+    """Roles given to every member that joins."""
+    welcome_message: str | None = None
+
+
+class JoinConfigStore(Protocol):
+    """Storage of the join configuration of guilds."""
+
+    def load(self, guild_id: int) -> GuildJoinConfig:
+        """Get the join configuration of a guild."""
+        ...
+
+
+class DatabaseJoinConfigStore:
+    """JoinConfigStore backed by the AutoAssignRole and Welcome tables."""
+
+    def __init__(self, session: Session) -> None:
+        """Initialize the store with a database session."""
+        self.session = session
+
+    def load(self, guild_id: int) -> GuildJoinConfig:
+        """Get the join configuration of a guild."""
+        role_ids = self.session.exec(select(AutoAssignRole.role_id).where(AutoAssignRole.guild_id == guild_id)).all()
+        message = self.session.exec(select(WelcomeDb.message).where(WelcomeDb.guild_id == guild_id)).first()
+        return GuildJoinConfig(tuple(role_ids), message)
+
+
+class JoinConfigCache:
+    """Read-through cache of the join configuration of guilds, expiring after a while."""
+
+    def __init__(self, store: JoinConfigStore, *, ttl: float = 300, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize an empty cache."""
+        self.store = store
+        self.ttl = ttl
+        self.clock = clock
+        self._configs: dict[int, tuple[float, GuildJoinConfig]] = {}
+
+    def get(self, guild_id: int) -> GuildJoinConfig:
+        """Get the join configuration of a guild, loading it if it isn't cached or expired."""
+        now = self.clock()
+        cached = self._configs.get(guild_id)
+        if cached is not None and now < cached[0]:
+            return cached[1]
+        config = self.store.load(guild_id)
+        self._configs[guild_id] = (now + self.ttl, config)
+        return config
+
+    def invalidate(self, guild_id: int) -> None:
+        """Forget the configuration of a guild, after it changed."""
+        self._configs.pop(guild_id, None)
+
+
+class JoinPipeline(LoggerMixin):
+    """Gives joining members their roles and welcomes them, in bulk during bursts."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        configs: JoinConfigCache,
+        welcome: WelcomeSender,
+        *,
+        role_sources: Iterable[RoleSource] = (),
+        reason: str | None = None,
+        workers: int = 4,
+        max_pending: int = 1000,
+        welcome_window: float = 2.0,
+        welcome_batch: int = 50,
+    ) -> None:
+        """Initialize the pipeline. Call start() to handle the joins submitted."""
+        self.configs = configs
+        self.welcome = welcome
+        self.role_sources = list(role_sources)
+        self.reason = reason
+        self.workers = max(1, workers)
+        self.welcome_window = welcome_window
+        """Seconds welcomes are collected for, before they are sent together."""
+        self.welcome_batch = welcome_batch
+        """Most members welcomed at once."""
+        self.dropped = 0
+        """Joins dropped because the queue was full."""
+        self._queue: asyncio.Queue[discord.Member] = asyncio.Queue(max(1, max_pending))
+        self._overflowing = False
+        self._welcomes: dict[int, tuple[discord.Guild, list[discord.Member]]] = {}
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @property
+    def pending(self) -> int:
+        """Number of joins waiting to be handled."""
+        return self._queue.qsize()
+
+    def submit(self, member: discord.Member) -> bool:
+        """Queue a join, unless the queue is full. Returns whether the join was queued."""
+        try:
+            self._queue.put_nowait(member)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if not self._overflowing:
+                self._overflowing = True
+                self.logger.warning(f"Join queue full with {self._queue.maxsize} joins, dropping joins until it drains")
+            return False
+        if self._overflowing:
+            self._overflowing = False
+            self.logger.warning(f"Join queue draining, {self.dropped} joins dropped so far")
+        return True
+
+    async def join(self) -> None:
+        """Wait until every queued join is handled."""
+        await self._queue.join()
+
+    async def process(self, member: discord.Member) -> list[discord.Role]:
+        """Give a member their roles in a single edit, and queue their welcome. Returns the roles added."""
+        guild = member.guild
+        role_ids = dict.fromkeys(self.configs.get(guild.id).role_ids)
+        for source in self.role_sources:
+            role_ids.update(dict.fromkeys(source(member)))
+        roles = [
+            role
+            for role_id in role_ids
+            if (role := guild.get_role(role_id)) is not None and role.is_assignable() and role not in member.roles
+        ]
+        if roles:
+            try:
+                await member.add_roles(*roles, reason=self.reason, atomic=False)
+            except discord.DiscordException:
+                self.logger.exception(f"Failed to add roles {roles} to new member {member.mention} in {guild}")
+                roles = []
+            else:
+                self.logger.debug(f"Added roles {roles} to new member {member.mention} in {guild}")
+
+        _, members = self._welcomes.setdefault(guild.id, (guild, []))
+        members.append(member)
+        if len(members) >= self.welcome_batch:
+            await self._send_welcomes(guild.id)
+        return roles
+
+    async def flush_welcomes(self) -> int:
+        """Send every queued welcome. Returns the number of members welcomed."""
+        return sum([await self._send_welcomes(guild_id) for guild_id in list(self._welcomes)])
+
+    def start(self) -> None:
+        """Start handling submitted joins."""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._flush_welcomes_loop()))
+
+    async def stop(self) -> None:
+        """Handle the joins still queued, send their welcomes, and stop."""
+        if self._tasks:
+            await self.join()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        await self.flush_welcomes()
+
+    async def _send_welcomes(self, guild_id: int) -> int:
+        if (pending := self._welcomes.pop(guild_id, None)) is None:
+            return 0
+        guild, members = pending
+        try:
+            await self.welcome(guild, members, self.configs.get(guild_id).welcome_message)
+        except discord.DiscordException:
+            self.logger.exception(f"Failed to welcome {len(members)} new members in {guild}")
+        return len(members)
+
+    async def _work(self) -> None:
+        while True:
+            member = await self._queue.get()
+            try:
+                await self.process(member)
+            except Exception:
+                self.logger.exception(f"Failed to handle new member {member} in {member.guild}")
+            finally:
+                self._queue.task_done()
+
+    async def _flush_welcomes_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.welcome_window)
+            try:
+                await self.flush_welcomes()
+            except Exception:
+                self.logger.exception("Failed to send welcomes")
@@ -52,6 +52,7 @@ if TYPE_CHECKING:
     from collections.abc import AsyncGenerator, Sequence
 
     from winter_dragon.bot.core.permissions import PermissionsOverwrites
+    from winter_dragon.bot.events.dispatch import LogTarget
 
 
 MAX_CATEGORY_SIZE = 50
@@ -98,6 +99,7 @@ class LogChannels(GroupCog, auto_load=True):
         guild: discord.Guild,
         embed: discord.Embed,
         action: str,
+        targets: Sequence[LogTarget] | None = None,
     ) -> None:
         """Dispatch a log to the global aggregated channel.
 
@@ -114,22 +116,27 @@ class LogChannels(GroupCog, auto_load=True):
             The embed representing the audit event.
         action : str
             The audit action name for the log entry.
+        targets : Sequence[LogTarget] | None
+            Log channels already resolved by the audit dispatch table.
+            Looked up in the database when not provided.
 
         """
         aggregator = self.get_or_create_aggregator(guild.id)
         aggregator.add_log(embed, action)
 
         # Get the global log channel
-        channels = Channels.get_by_tag(self.session, Tags.LOGS, guild.id)
-        global_channels = [c for c in channels if c.name == GLOBAL.title()]
+        if targets is None:
+            global_ids = [c.id for c in Channels.get_tagged(self.session, guild.id, Tags.LOGS) if c.name == GLOBAL.title()]
+        else:
+            global_ids = [t.channel_id for t in targets if t.name == GLOBAL.title()]
 
-        if not global_channels:
+        if not global_ids:
             self.logger.debug(f"No global log channel found for guild {guild.id}")
             return
 
-        global_channel = discord.utils.get(guild.text_channels, id=global_channels[0].id)
+        global_channel = discord.utils.get(guild.text_channels, id=global_ids[0])
         if not global_channel:
-            self.logger.warning(f"Could not find global log channel {global_channels[0].id} in guild {guild.id}")
+            self.logger.warning(f"Could not find global log channel {global_ids[0]} in guild {guild.id}")
             return
 
         # Create paginator and update the message
@@ -387,6 +394,7 @@ class LogChannels(GroupCog, auto_load=True):
             await dc_channel.delete()
             self.session.delete(channel)
         self.session.commit()
+        Channels.notify_links_changed(guild.id)
 
         await interaction.followup.send("Removed LogChannels")
         self.logger.info(f"Removed Log for {interaction.guild}")
@@ -410,7 +418,7 @@ class LogChannels(GroupCog, auto_load=True):
     async def update_log(self, guild: discord.Guild) -> None:
         """Update log channels for a guild."""
         self.logger.debug(f"Updating Log for {guild=}")
-        channels = Channels.get_by_tag(self.session, Tags.LOGS, guild.id)
+        channels = Channels.get_tagged(self.session, guild.id, Tags.LOGS)
         div, mod = divmod(len(AuditLogAction), MAX_CATEGORY_SIZE)
         required_category_count = div + (1 if mod > 0 else 0)
         category_channels = await self.update_required_category_count(guild, required_category_count)
@@ -436,7 +444,7 @@ class LogChannels(GroupCog, auto_load=True):
 
     async def update_required_category_count(self, guild: discord.Guild, required_category_count: int) -> list[CategoryChannel]:
         """Update the required category count for the guild."""
-        all_log_channels = Channels.get_by_tag(self.session, Tags.LOGS, guild.id)
+        all_log_channels = Channels.get_tagged(self.session, guild.id, Tags.LOGS)
         categories = [c for c in all_log_channels if c.name == self.log_category_name]
         category_channels = [discord.utils.get(guild.categories, id=category.id) for category in categories]
         current_category_count = len(category_channels) or len(categories)
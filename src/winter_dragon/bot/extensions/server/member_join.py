@@ -0,0 +1,72 @@
+"""Cog handling members joining, for auto-assign roles, restored roles and welcomes at once."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Unpack
+
+from winter_dragon.bot.core.cogs import BotArgs, Cog
+from winter_dragon.bot.extensions.server.join_pipeline import DatabaseJoinConfigStore, JoinConfigCache, JoinPipeline
+from winter_dragon.bot.extensions.server.role_reminder import AutoReAssign
+from winter_dragon.bot.extensions.server.welcome import Welcome
+from winter_dragon.config import Config
+
+
+if TYPE_CHECKING:
+    import discord
+
+
+class MemberJoin(Cog, auto_load=True):
+    """Gives joining members their roles in one edit, and welcomes them in batches."""
+
+    join_roles_reason = Config("Member joined, adding auto-assign roles and roles the user had previously")
+    join_workers = Config(4)
+    max_pending_joins = Config(1000)
+    config_ttl = Config(300)
+    welcome_window = Config(2.0)
+    welcome_batch = Config(50)
+
+    def __init__(self, **kwargs: Unpack[BotArgs]) -> None:
+        """Initialize the cog with its join pipeline."""
+        super().__init__(**kwargs)
+        self.pipeline = JoinPipeline(
+            JoinConfigCache(DatabaseJoinConfigStore(self.session), ttl=self.config_ttl),
+            self.send_welcome,
+            role_sources=[self.restored_roles],
+            reason=self.join_roles_reason,
+            workers=self.join_workers,
+            max_pending=self.max_pending_joins,
+            welcome_window=self.welcome_window,
+            welcome_batch=self.welcome_batch,
+        )
+
+    async def cog_load(self) -> None:
+        """Start handling joins."""
+        await super().cog_load()
+        self.pipeline.start()
+
+    async def cog_unload(self) -> None:
+        """Handle the joins still queued, and stop."""
+        await self.pipeline.stop()
+        await super().cog_unload()
+
+    @Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        """Queue a new member, unless a join raid filled the queue."""
+        self.logger.debug(f"{member} joined {member.guild}")
+        self.pipeline.submit(member)
+
+    @Cog.listener()
+    async def on_join_config_change(self, guild_id: int) -> None:
+        """Reload the join configuration of a guild the next time a member joins it."""
+        self.pipeline.configs.invalidate(guild_id)
+
+    def restored_roles(self, member: discord.Member) -> list[int]:
+        """Get the ids of the roles a member had when they were kicked or banned."""
+        if isinstance(cog := self.bot.get_cog("AutoReAssign"), AutoReAssign):
+            return cog.snapshots.role_ids(member.guild.id, member.id)
+        return []
+
+    async def send_welcome(self, guild: discord.Guild, members: list[discord.Member], message: str | None) -> None:
+        """Welcome new members through the Welcome cog."""
+        if isinstance(cog := self.bot.get_cog("Welcome"), Welcome):
+            await cog.send_welcome(guild, members, message)
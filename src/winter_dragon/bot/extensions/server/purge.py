@@ -2,62 +2,19 @@
 
 from __future__ import annotations
 
-import contextlib
-from typing import TYPE_CHECKING, Protocol, runtime_checkable
+from typing import TYPE_CHECKING
 
 import discord
-from discord import Interaction, Message, app_commands
-from herogold.sentinel import MISSING
+from discord import ButtonStyle, Interaction, app_commands
 
 from winter_dragon.bot.core.cogs import Cog
+from winter_dragon.bot.extensions.server.purge_engine import PurgeChannel, PurgeEngine
+from winter_dragon.bot.ui import Button, View
 from winter_dragon.config import Config
 
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncIterator, Callable
-
-    from discord.abc import SnowflakeTime
-
-
-@runtime_checkable
-class Prunable(Protocol):
-    """A protocol that defines a prunable object.
-
-    This protocol is used to define objects that can be purged from memory or storage.
-    """
-
-    async def purge(  # noqa: D102, PLR0913
-        self,
-        *,
-        limit: int | None = 100,
-        check: Callable[[Message], bool] = MISSING,
-        before: SnowflakeTime | None = None,
-        after: SnowflakeTime | None = None,
-        around: SnowflakeTime | None = None,
-        oldest_first: bool | None = None,
-        bulk: bool = True,
-        reason: str | None = None,
-    ) -> list[Message]: ...
-
-
-@runtime_checkable
-class History(Protocol):
-    """A protocol that defines a object with history."""
-
-    def history(  # noqa: D102
-        self,
-        *,
-        limit: int | None = 100,
-        before: SnowflakeTime | None = None,
-        after: SnowflakeTime | None = None,
-        around: SnowflakeTime | None = None,
-        oldest_first: bool | None = None,
-    ) -> AsyncIterator[Message]: ...
-
-
-@runtime_checkable
-class PrunableHistory(Prunable, History, Protocol):
-    """A protocol that defines a prunable channel with history."""
+    from winter_dragon.bot.extensions.server.purge_engine import PurgeProgress
 
 
 @app_commands.guild_only()
@@ -67,6 +24,8 @@ class Purge(Cog, auto_load=True):
 
     limit = Config(100)
     allow_history = Config(default=False)
+    single_delete_interval = Config(1.0)
+    progress_interval = Config(2.0)
 
     @app_commands.command(name="purge", description="Purge X amount of messages, use history to delete older messages.")
     @app_commands.checks.has_permissions(manage_messages=True)
@@ -91,45 +50,68 @@ class Purge(Cog, auto_load=True):
         await self._purge(interaction, count, use_history=use_history)
 
     async def _purge(self, interaction: Interaction, count: int, *, use_history: bool) -> None:
-        # NoteL Using history will be lots slower, and will cause rate limit (aka, it'll slow down.)
+        # Note: Messages older than 14 days are deleted one by one, which is a lot slower than bulk deleting.
         await interaction.response.defer(ephemeral=True)
-        history_messages_count = 0
-        purged_count = 0
+        channel = interaction.channel
 
-        if not isinstance(interaction.channel, Prunable):
+        if not isinstance(channel, PurgeChannel):
             await interaction.followup.send(
                 "This channel cannot be purged.",
                 ephemeral=True,
             )
             return
 
-        purged = await interaction.channel.purge(limit=count)
-        purged_count = len(purged)
-        self.logger.debug(f"Purged: {purged_count}")
-        # fmt: off
-        if (
-            purged_count < count
-            and self.allow_history
-            and use_history
-            and isinstance(interaction.channel, PrunableHistory)
-        ):
-        # fmt: on
-            history_messages = await self.history_delete(interaction, count=(count - purged_count))
-            history_messages_count = len(history_messages)
-            self.logger.debug(f"History killed: {history_messages_count}")
-        await interaction.followup.send(f"{interaction.user.mention} Killed {history_messages_count + purged_count} Messages")
+        engine = self._create_engine(channel, interaction)
+        view = self._create_cancel_view(interaction, engine)
+        progress_message = await interaction.followup.send(
+            f"Purging up to {count} messages...",
+            view=view,
+            ephemeral=True,
+            wait=True,
+        )
+
+        async def report(progress: PurgeProgress) -> None:
+            await progress_message.edit(content=f"Deleted {progress.deleted}/{progress.total} messages...")
+
+        engine.on_progress = report
+        purged = await engine.run(
+            count,
+            check=lambda message: message != interaction.message,
+            include_old=self.allow_history and use_history,
+        )
+        view.stop()
+        progress = engine.progress
+        self.logger.debug(f"Purged: {progress}")
+        status = "Cancelled after deleting" if progress.cancelled else "Deleted"
+        await progress_message.edit(content=f"{status} {progress.deleted}/{progress.total} messages.", view=None)
+        await interaction.followup.send(f"{interaction.user.mention} Killed {len(purged)} Messages")
 
     async def history_delete(self, interaction: Interaction, count: int) -> list[discord.Message]:
-        """Delete messages from the channel history. Rather than messages in cache. (Older messages)."""
-        messages = []
-
-        if not isinstance(interaction.channel, History):
-            return messages
-
-        async for message in interaction.channel.history(limit=count):
-            if message == interaction.message:
-                continue  # required to allow bot to update the interaction after the command finished.
-            with contextlib.suppress(discord.NotFound):
-                await message.delete()
-            messages.append(message)
-        return messages
+        """Delete messages from the channel history, including messages older than 14 days."""
+        if not isinstance(interaction.channel, PurgeChannel):
+            return []
+        engine = self._create_engine(interaction.channel, interaction)
+        return await engine.run(count, check=lambda message: message != interaction.message)
+
+    def _create_engine(self, channel: PurgeChannel, interaction: Interaction) -> PurgeEngine:
+        return PurgeEngine(
+            channel,
+            single_delete_interval=self.single_delete_interval,
+            progress_interval=self.progress_interval,
+            reason=f"Purged by {interaction.user}",
+        )
+
+    def _create_cancel_view(self, interaction: Interaction, engine: PurgeEngine) -> View:
+        view = View()
+        cancel_button = Button[View](label="Cancel", style=ButtonStyle.red)
+        view.add_item(cancel_button)
+
+        async def button_callback(button_interaction: Interaction) -> None:
+            if button_interaction.user != interaction.user:
+                await button_interaction.response.send_message("Only the purging user can cancel it.", ephemeral=True)
+                return
+            engine.cancel()
+            await button_interaction.response.edit_message(content="Cancelling purge...", view=None)
+
+        cancel_button.callback = button_callback
+        return view
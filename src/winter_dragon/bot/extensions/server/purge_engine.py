@@ -0,0 +1,188 @@
+"""Bulk-aware message purging.
+
+Messages younger than 14 days are removed with bulk delete calls of up to 100 messages each.
+A bulk call failing on a message that is already gone is retried in halves, until the missing message is left alone.
+Older messages can only be deleted one at a time, so those deletes are paced to stay within the route's rate limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from datetime import UTC, datetime, timedelta
+from itertools import batched
+from typing import TYPE_CHECKING, NamedTuple, Protocol, runtime_checkable
+
+import discord
+from herogold.log import LoggerMixin
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+
+    from discord import Message
+    from discord.abc import Snowflake
+
+
+BULK_DELETE_LIMIT = 100
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+# Messages close to the age limit may expire between collecting and deleting them.
+BULK_DELETE_MARGIN = timedelta(minutes=5)
+
+
+@runtime_checkable
+class PurgeChannel(Protocol):
+    """A channel with history that supports bulk deletes."""
+
+    def history(self, *, limit: int | None = 100) -> AsyncIterator[Message]:  # noqa: D102
+        ...
+
+    async def delete_messages(self, messages: Iterable[Snowflake], *, reason: str | None = None) -> None:  # noqa: D102
+        ...
+
+
+class PurgeProgress(NamedTuple):
+    """Progress of a running purge."""
+
+    deleted: int
+    total: int
+    bulk_calls: int
+    single_calls: int
+    cancelled: bool
+
+
+type ProgressCallback = Callable[[PurgeProgress], Awaitable[None]]
+
+
+def bulk_cutoff(now: datetime | None = None) -> int:
+    """Get the lowest message id that can still be bulk deleted."""
+    now = now or datetime.now(UTC)
+    return discord.utils.time_snowflake(now - BULK_DELETE_MAX_AGE + BULK_DELETE_MARGIN)
+
+
+def partition(messages: Sequence[Message], cutoff: int) -> tuple[list[Message], list[Message]]:
+    """Split messages into bulk deletable and individually deletable messages."""
+    bulk: list[Message] = []
+    single: list[Message] = []
+    for message in messages:
+        (bulk if message.id >= cutoff else single).append(message)
+    return bulk, single
+
+
+class PurgeEngine(LoggerMixin):
+    """Deletes messages from a channel with as few API calls as possible."""
+
+    def __init__(
+        self,
+        channel: PurgeChannel,
+        *,
+        single_delete_interval: float = 1,
+        progress_interval: float = 2,
+        on_progress: ProgressCallback | None = None,
+        reason: str | None = None,
+    ) -> None:
+        """Initialize the engine for a channel."""
+        self.channel = channel
+        self.single_delete_interval = single_delete_interval
+        self.progress_interval = progress_interval
+        self.on_progress = on_progress
+        self.reason = reason
+        self.deleted: list[Message] = []
+        self.total = 0
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self._cancelled = asyncio.Event()
+        self._last_report = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the purge was cancelled."""
+        return self._cancelled.is_set()
+
+    @property
+    def progress(self) -> PurgeProgress:
+        """The current progress of the purge."""
+        return PurgeProgress(len(self.deleted), self.total, self.bulk_calls, self.single_calls, self.cancelled)
+
+    def cancel(self) -> None:
+        """Stop the purge before its next API call."""
+        self._cancelled.set()
+
+    async def collect(self, count: int, check: Callable[[Message], bool] | None = None) -> list[Message]:
+        """Collect up to count messages from the channel history, newest first."""
+        messages: list[Message] = []
+        async for message in self.channel.history(limit=None):
+            if len(messages) >= count or self.cancelled:
+                break
+            if check is None or check(message):
+                messages.append(message)
+        return messages
+
+    async def run(
+        self,
+        count: int,
+        *,
+        check: Callable[[Message], bool] | None = None,
+        include_old: bool = True,
+    ) -> list[Message]:
+        """Delete up to count messages, bulk deleting where possible. Returns the deleted messages.
+
+        Messages older than 14 days are only deleted when include_old is set.
+        """
+        bulk, single = partition(await self.collect(count, check), bulk_cutoff())
+        if not include_old:
+            single = []
+        self.total = len(bulk) + len(single)
+        self.logger.debug(f"Purging {len(bulk)} messages in bulk and {len(single)} individually")
+
+        chunks = deque(batched(bulk, BULK_DELETE_LIMIT, strict=False))
+        leftovers: list[Message] = []
+        while chunks and not self.cancelled:
+            chunk = chunks.popleft()
+            if len(chunk) == 1:
+                leftovers.append(chunk[0])
+                continue
+            self.bulk_calls += 1
+            try:
+                await self.channel.delete_messages(chunk, reason=self.reason)
+            except discord.NotFound:
+                # A message that is already gone fails the whole call. Retry both halves in bulk,
+                # narrowing down to the missing messages in a few calls.
+                half = len(chunk) // 2
+                chunks.extendleft((chunk[half:], chunk[:half]))
+                continue
+            self.deleted.extend(chunk)
+            await self._report()
+        single[:0] = leftovers
+
+        for i, message in enumerate(single):
+            if self.cancelled:
+                break
+            if i:
+                await self._pace()
+            with contextlib.suppress(discord.NotFound):
+                await message.delete()
+            self.single_calls += 1
+            self.deleted.append(message)
+            await self._report()
+
+        await self._report(force=True)
+        return self.deleted
+
+    async def _pace(self) -> None:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._cancelled.wait(), self.single_delete_interval)
+
+    async def _report(self, *, force: bool = False) -> None:
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        try:
+            await self.on_progress(self.progress)
+        except discord.HTTPException:
+            self.logger.warning("Failed to report purge progress")
@@ -2,63 +2,62 @@
 
 from __future__ import annotations
 
+from typing import Unpack
+
 import discord
 from discord import app_commands
 from sqlmodel import select
 
-from winter_dragon.bot.core.cogs import Cog, GroupCog
+from winter_dragon.bot.core.cogs import BotArgs, Cog, GroupCog
+from winter_dragon.bot.core.tasks import loop
+from winter_dragon.bot.extensions.server.role_snapshot import (
+    REMOVAL_ACTIONS,
+    DatabaseRoleSnapshotStore,
+    RoleSnapshots,
+    snapshot_roles,
+)
 from winter_dragon.config import Config
 from winter_dragon.database.tables import AutoReAssign as AutoReAssignDb
-from winter_dragon.database.tables import UserRoles
-from winter_dragon.database.tables.associations.guild_roles import GuildRoles
-from winter_dragon.database.tables.role import Roles
 
 
 class AutoReAssign(GroupCog, auto_load=True):
     """Cog to help re-assigning user roles when they leave and rejoin the server."""
 
-    auto_reassign_reason = Config("Member joined again, AutoAssigned roles the user had previously")
+    match_window = Config(60)
+    flush_interval = Config(5)
+
+    def __init__(self, **kwargs: Unpack[BotArgs]) -> None:
+        """Initialize the cog with its role snapshots."""
+        super().__init__(**kwargs)
+        self.snapshots = RoleSnapshots(DatabaseRoleSnapshotStore(self.session), match_window=self.match_window)
+
+    async def cog_load(self) -> None:
+        """Start storing role snapshots in bulk."""
+        await super().cog_load()
+        self.flush_snapshots.change_interval(seconds=self.flush_interval)
+        self.flush_snapshots.start()
+
+    async def cog_unload(self) -> None:
+        """Stop the flush loop and store the pending role snapshots."""
+        self.flush_snapshots.stop()
+        self.snapshots.flush()
+        await super().cog_unload()
+
+    @loop()
+    async def flush_snapshots(self) -> None:
+        """Store the pending role snapshots in bulk."""
+        self.snapshots.flush()
 
     @Cog.listener()
     async def on_member_remove(self, member: discord.Member) -> None:
-        """When a member is kicked or banned, remember their roles for auto-assignment later."""
-        async for entry in member.guild.audit_logs(limit=1):
-            self.remember_roles(member, entry)
-
-    def remember_roles(self, member: discord.Member, entry: discord.AuditLogEntry) -> None:
-        """When a member is kicked or banned, remember their roles for auto-assignment later."""
-        if entry.action in [
-            discord.AuditLogAction.ban,
-            discord.AuditLogAction.kick,
-        ]:
-            for role in member.roles:
-                user_role = UserRoles(role_id=role.id, user_id=member.id)
-                guild_role = GuildRoles(guild_id=member.guild.id, role_id=role.id)
-                self.session.add(user_role)
-                self.session.add(guild_role)
-            self.session.commit()
+        """When a member leaves, keep their roles until it's known whether they were kicked or banned."""
+        self.snapshots.member_left(member.guild.id, member.id, snapshot_roles(member))
 
     @Cog.listener()
-    async def on_member_join(self, member: discord.Member) -> None:
-        """When a member joins, check if they have any roles to be auto-assigned."""
-        guild = member.guild
-        for role in self.session.exec(
-            select(Roles)
-            .join(UserRoles)
-            .join(GuildRoles)
-            .where(
-                UserRoles.user_id == member.id,
-                GuildRoles.guild_id == guild.id,
-            ),
-        ).all():
-            if role.id is None:
-                self.logger.critical(f"on_member_join: Role ID is none for role {role=}, {guild=}")
-                continue
-            if role := guild.get_role(role.id):
-                await member.add_roles(role, reason=self.auto_reassign_reason)
-                self.logger.debug(
-                    f"Added AutoAssign remembered role {role} to new member {member.mention} in {guild}",
-                )
+    async def on_audit_log_entry_create(self, entry: discord.AuditLogEntry) -> None:
+        """When a member is kicked or banned, remember their roles for auto-assignment later."""
+        if entry.action in REMOVAL_ACTIONS and entry.target is not None:
+            self.snapshots.member_removed(entry.guild.id, entry.target.id)
 
     @app_commands.command(name="enable", description="Enable the AutoReAssign feature")
     async def slash_enable(self, interaction: discord.Interaction) -> None:
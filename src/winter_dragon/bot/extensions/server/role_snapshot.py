@@ -0,0 +1,194 @@
+"""Snapshots of the roles of kicked and banned members, restored when they rejoin.
+
+Members leaving are paired with the kick and ban entries of the audit log stream the bot already receives,
+by guild and user, whichever of the two arrives first, instead of fetching the audit log on every leave.
+Leaves without a matching entry within the match window were voluntary, and are forgotten.
+Snapshots are buffered and written in bulk, and restored by the join pipeline when the member rejoins.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+import discord
+from herogold.log import LoggerMixin
+from sqlalchemy import delete, insert
+from sqlmodel import Session, col, select
+
+from winter_dragon.database.tables import GuildRoles, Guilds, Roles, UserRoles, Users
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+
+REMOVAL_ACTIONS = frozenset({discord.AuditLogAction.kick, discord.AuditLogAction.ban})
+
+
+class RoleSnapshot(NamedTuple):
+    """The roles a member had when they were removed from a guild."""
+
+    guild_id: int
+    user_id: int
+    roles: dict[int, str]
+    """Role names, by role id."""
+
+
+class RoleSnapshotStore(Protocol):
+    """Durable storage of role snapshots."""
+
+    def save(self, snapshots: Iterable[RoleSnapshot]) -> None:
+        """Store snapshots, replacing earlier snapshots of the same members."""
+        ...
+
+    def load(self, guild_id: int, user_id: int) -> list[int]:
+        """Get the role ids of the snapshot of a member."""
+        ...
+
+
+class DatabaseRoleSnapshotStore:
+    """RoleSnapshotStore backed by the UserRoles and GuildRoles tables."""
+
+    def __init__(self, session: Session) -> None:
+        """Initialize the store with a database session."""
+        self.session = session
+
+    def save(self, snapshots: Iterable[RoleSnapshot]) -> None:
+        """Store snapshots, replacing earlier snapshots of the same members, in a single transaction."""
+        snapshots = list(snapshots)
+        if not snapshots:
+            return
+        try:
+            self._save(snapshots)
+        except Exception:
+            self.session.rollback()
+            raise
+        self.session.commit()
+
+    def _save(self, snapshots: list[RoleSnapshot]) -> None:
+        roles = {role_id: name for snapshot in snapshots for role_id, name in snapshot.roles.items()}
+        self._ensure(Users, {snapshot.user_id: {} for snapshot in snapshots})
+        self._ensure(Guilds, {snapshot.guild_id: {} for snapshot in snapshots})
+        self._ensure(Roles, {role_id: {"name": name} for role_id, name in roles.items()})
+
+        guild_roles = {(snapshot.guild_id, role_id) for snapshot in snapshots for role_id in snapshot.roles}
+        known = set(
+            self.session.exec(
+                select(GuildRoles.guild_id, GuildRoles.role_id).where(col(GuildRoles.role_id).in_(roles)),
+            ).all(),
+        )
+        connection = self.session.connection()
+        if new := [{"guild_id": guild_id, "role_id": role_id} for guild_id, role_id in guild_roles - known]:
+            connection.execute(insert(GuildRoles.__table__), new)  # pyright: ignore[reportAttributeAccessIssue]
+
+        members: dict[int, set[int]] = {}
+        for snapshot in snapshots:
+            members.setdefault(snapshot.guild_id, set()).add(snapshot.user_id)
+        for guild_id, user_ids in members.items():
+            connection.execute(
+                delete(UserRoles).where(
+                    col(UserRoles.user_id).in_(user_ids),
+                    col(UserRoles.role_id).in_(select(GuildRoles.role_id).where(GuildRoles.guild_id == guild_id)),
+                ),
+            )
+        if user_roles := [
+            {"user_id": snapshot.user_id, "role_id": role_id} for snapshot in snapshots for role_id in snapshot.roles
+        ]:
+            connection.execute(insert(UserRoles.__table__), user_roles)  # pyright: ignore[reportAttributeAccessIssue]
+
+    def load(self, guild_id: int, user_id: int) -> list[int]:
+        """Get the role ids of the snapshot of a member."""
+        return list(
+            self.session.exec(
+                select(UserRoles.role_id)
+                .join(GuildRoles, col(GuildRoles.role_id) == UserRoles.role_id)
+                .where(UserRoles.user_id == user_id, GuildRoles.guild_id == guild_id),
+            ).all(),
+        )
+
+    def _ensure(self, model: type[Users | Guilds | Roles], rows: dict[int, dict[str, str]]) -> None:
+        """Insert the rows whose ids are not stored yet."""
+        if not rows:
+            return
+        known = set(self.session.exec(select(model.id).where(col(model.id).in_(rows))).all())
+        if new := [{"id": id_, **values} for id_, values in rows.items() if id_ not in known]:
+            self.session.connection().execute(insert(model.__table__), new)  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def snapshot_roles(member: discord.Member) -> dict[int, str]:
+    """Get the roles of a member that can be restored, by id."""
+    return {role.id: role.name for role in member.roles if not role.is_default() and not role.managed}
+
+
+class RoleSnapshots(LoggerMixin):
+    """Pairs leaves with removals from the audit log, and keeps snapshots of the roles of removed members."""
+
+    def __init__(
+        self,
+        store: RoleSnapshotStore,
+        *,
+        match_window: float = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize without pending leaves or removals."""
+        self.store = store
+        self.match_window = match_window
+        """Longest time between a leave and its audit log entry, in seconds."""
+        self.clock = clock
+        self.pending: dict[tuple[int, int], RoleSnapshot] = {}
+        """Snapshots not stored yet, by guild and user id."""
+        self._leaves: OrderedDict[tuple[int, int], tuple[float, dict[int, str]]] = OrderedDict()
+        self._removals: OrderedDict[tuple[int, int], float] = OrderedDict()
+
+    def member_left(self, guild_id: int, user_id: int, roles: dict[int, str]) -> RoleSnapshot | None:
+        """Record a member leaving. Returns their snapshot if their removal was already seen."""
+        self._expire()
+        key = (guild_id, user_id)
+        if self._removals.pop(key, None) is not None:
+            return self._snapshot(key, roles)
+        self._leaves.pop(key, None)
+        self._leaves[key] = (self.clock(), roles)
+        return None
+
+    def member_removed(self, guild_id: int, user_id: int) -> RoleSnapshot | None:
+        """Record a kick or ban from the audit log. Returns the snapshot of the member if they already left."""
+        self._expire()
+        key = (guild_id, user_id)
+        if (leave := self._leaves.pop(key, None)) is not None:
+            return self._snapshot(key, leave[1])
+        self._removals.pop(key, None)
+        self._removals[key] = self.clock()
+        return None
+
+    def flush(self) -> int:
+        """Store the pending snapshots in bulk. Returns how many were stored."""
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        try:
+            self.store.save(pending.values())
+        except Exception:
+            self.logger.exception(f"Failed to store {len(pending)} role snapshots, keeping them for the next flush")
+            self.pending = pending | self.pending
+            return 0
+        return len(pending)
+
+    def role_ids(self, guild_id: int, user_id: int) -> list[int]:
+        """Get the role ids of the latest snapshot of a member, stored or not."""
+        if (snapshot := self.pending.get((guild_id, user_id))) is not None:
+            return list(snapshot.roles)
+        return self.store.load(guild_id, user_id)
+
+    def _snapshot(self, key: tuple[int, int], roles: dict[int, str]) -> RoleSnapshot:
+        snapshot = RoleSnapshot(*key, roles)
+        self.pending[key] = snapshot
+        return snapshot
+
+    def _expire(self) -> None:
+        cutoff = self.clock() - self.match_window
+        while self._leaves and next(iter(self._leaves.values()))[0] < cutoff:
+            self._leaves.popitem(last=False)
+        while self._removals and next(iter(self._removals.values())) < cutoff:
+            self._removals.popitem(last=False)
@@ -292,6 +292,7 @@ class Stats(GroupCog, auto_load=True):
             finally:
                 self.session.delete(db_channel)
         self.session.commit()
+        Channels.notify_links_changed(guild.id)
 
     async def cog_load(self) -> None:
         """Load the cog."""
@@ -308,7 +309,7 @@ class Stats(GroupCog, auto_load=True):
         self.logger.info("Updating all stat channels")
         guilds = self.bot.guilds
         for guild in guilds:
-            if not Channels.get_by_tag(self.session, Tags.STATS, guild.id):
+            if not Channels.get_tagged(self.session, guild.id, Tags.STATS):
                 continue
             self.logger.info(f"Updating stat channels: guild='{guild}'")
             channels = self.get_guild_stats_channels(guild)
@@ -339,7 +340,7 @@ class Stats(GroupCog, auto_load=True):
         bot_channel = None
         peak_channel = None
         guild_channel = None
-        channels = Channels.get_by_tag(self.session, Tags.STATS, guild.id)
+        channels = Channels.get_tagged(self.session, guild.id, Tags.STATS)
 
         for channel in channels:
             self.logger.debug(f"check if stats channel: {channel=}")
@@ -428,7 +429,7 @@ class Stats(GroupCog, auto_load=True):
             msg = "Expected Guild"
             raise TypeError(msg)
 
-        if Channels.get_by_tag(self.session, Tags.STATS, interaction.guild.id):
+        if Channels.get_tagged(self.session, interaction.guild.id, Tags.STATS):
             rem_mention = self.get_command_mention(self.slash_stats_category_remove)
             await interaction.response.send_message(
                 f"Stats channels already set up use {rem_mention} to remove them",
@@ -457,8 +458,7 @@ class Stats(GroupCog, auto_load=True):
             msg = "Expected Guild"
             raise TypeError(msg)
 
-        channels = Channels.get_by_tag(self.session, Tags.STATS, interaction.guild.id)
-        if not channels:
+        if not Channels.get_tagged(self.session, interaction.guild.id, Tags.STATS):
             add_mention = self.get_command_mention(self.slash_stats_category_add)
             await interaction.response.send_message(
                 f"No stats channels found to remove, use {add_mention} to add them",
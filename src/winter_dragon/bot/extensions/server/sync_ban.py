@@ -1,14 +1,18 @@
-"""Logger mixin for database classes."""
+"""Sync bans across all guilds that subscribe to this feature."""
 
 from __future__ import annotations
 
+from typing import Unpack
+
 import discord
 from discord import app_commands
-from sqlmodel import select
+from sqlmodel import col, select
 
-from winter_dragon.bot.core.cogs import GroupCog
+from winter_dragon.bot.core.cogs import BotArgs, GroupCog
+from winter_dragon.bot.core.tasks import loop
+from winter_dragon.bot.extensions.server.ban_sync_engine import BanSyncEngine, DiscordBanBackend
+from winter_dragon.config import Config
 from winter_dragon.database.tables import SyncBanGuild, SyncBanUser
-from winter_dragon.database.tables.guild import Guilds
 from winter_dragon.database.tables.sync_ban.sync_ban_banned_by import SyncBanBannedBy
 from winter_dragon.database.tables.user import Users
 
@@ -16,6 +20,88 @@ from winter_dragon.database.tables.user import Users
 class SyncedBans(GroupCog, auto_load=True):
     """Sync bans across all guilds that subscribe to this feature."""
 
+    max_concurrency = Config(10)
+    per_guild_concurrency = Config(2)
+    max_retries = Config(3)
+    reconcile_interval = Config(3600)
+
+    def __init__(self, **kwargs: Unpack[BotArgs]) -> None:
+        """Initialize the cog with a ban sync engine."""
+        super().__init__(**kwargs)
+        self.engine = BanSyncEngine(
+            DiscordBanBackend(self.bot),
+            max_concurrency=self.max_concurrency,
+            per_guild_concurrency=self.per_guild_concurrency,
+            max_retries=self.max_retries,
+        )
+
+    async def cog_load(self) -> None:
+        """Load the canonical ban set, and start reconciling synced guilds."""
+        await super().cog_load()
+        self.load_bans()
+        self.reconcile_bans.change_interval(seconds=self.reconcile_interval)
+        self.reconcile_bans.start()
+
+    async def cog_unload(self) -> None:
+        """Stop reconciling synced guilds."""
+        self.reconcile_bans.stop()
+        await super().cog_unload()
+
+    def load_bans(self) -> None:
+        """Load the synced guilds and the canonical ban set from the database."""
+        guilds = self.session.exec(select(SyncBanGuild.guild_id)).all()
+        bans = self.session.exec(
+            select(SyncBanUser.user_id, SyncBanBannedBy.reason).join(
+                SyncBanBannedBy,
+                col(SyncBanBannedBy.user_id) == col(SyncBanUser.user_id),
+                isouter=True,
+            ),
+        ).all()
+        # A user banned by several guilds keeps the first reason.
+        self.engine.load(dict(reversed(bans)), guilds)
+
+    @loop()
+    async def reconcile_bans(self) -> None:
+        """Apply bans and unbans that synced guilds are missing."""
+        result = await self.engine.reconcile()
+        self.logger.info(f"Reconciled synced bans: {result}")
+
+    @reconcile_bans.before_loop
+    async def before_reconcile_bans(self) -> None:
+        """Wait until the bot is ready."""
+        await self.bot.wait_until_ready()
+
+    @GroupCog.listener()
+    async def on_member_ban(self, guild: discord.Guild, user: discord.User | discord.Member) -> None:
+        """Sync a ban made in a synced guild to the other synced guilds."""
+        if guild.id not in self.engine.guilds or user.id in self.engine.bans:
+            return
+        # Claim the ban before awaiting, so the same ban arriving from another synced guild is skipped.
+        self.engine.bans[user.id] = None
+        try:
+            reason = (await guild.fetch_ban(user)).reason
+        except discord.HTTPException:
+            reason = None
+        Users.fetch(user.id)
+        self.session.add(SyncBanUser(user_id=user.id))
+        self.session.add(SyncBanBannedBy(guild_id=guild.id, user_id=user.id, reason=reason))
+        self.session.commit()
+        sync_reason = f"Syncing bans: {reason or 'No reason provided'} from {guild.name}"
+        result = await self.engine.ban(user.id, sync_reason, origin=guild.id)
+        self.logger.info(f"Synced ban of {user.id} from {guild.id}: {result}")
+
+    @GroupCog.listener()
+    async def on_member_unban(self, guild: discord.Guild, user: discord.User) -> None:
+        """Lift a synced ban in every synced guild when a synced guild lifts it."""
+        if guild.id not in self.engine.guilds or user.id not in self.engine.bans:
+            return
+        for model in (SyncBanBannedBy, SyncBanUser):
+            for row in self.session.exec(select(model).where(model.user_id == user.id)).all():
+                self.session.delete(row)
+        self.session.commit()
+        result = await self.engine.unban(user.id, f"Syncing unbans from {guild.name}", origin=guild.id)
+        self.logger.info(f"Synced unban of {user.id} from {guild.id}: {result}")
+
     async def create_banned_role(self, guild: discord.Guild) -> discord.Role:
         """Create a role for banned users."""
         return await guild.create_role(
@@ -45,6 +131,7 @@ class SyncedBans(GroupCog, auto_load=True):
             ),
         )
         self.session.commit()
+        self.engine.guilds.add(guild.id)
 
         await interaction.response.send_message(
             "This guild will have ban's synced across this bot.",
@@ -66,6 +153,7 @@ class SyncedBans(GroupCog, auto_load=True):
             self.session.exec(select(SyncBanGuild).where(SyncBanGuild.guild_id == guild.id)).first(),
         )
         self.session.commit()
+        self.engine.guilds.discard(guild.id)
 
         await interaction.response.send_message(
             "This guild will no longer have ban's synced across other guilds.",
@@ -74,29 +162,11 @@ class SyncedBans(GroupCog, auto_load=True):
 
     @sync.command(name="sync", description="Ban members banned from other synced guilds.")
     async def slash_synced_ban_sync(self, interaction: discord.Interaction) -> None:
-        """Ban all members from all guilds that are synced."""
-        query = (
-            select(SyncBanBannedBy, Users, Guilds)
-            .join(SyncBanUser)
-            .join(Users)
-            .join(SyncBanGuild)
-            .join(Guilds)
-            .where(SyncBanUser.user_id == Users.id, SyncBanGuild.guild_id == Guilds.id)
+        """Apply every synced ban to all synced guilds."""
+        await interaction.response.defer(ephemeral=True)
+        self.load_bans()
+        applied, failed = await self.engine.reconcile()
+        await interaction.followup.send(
+            f"Synced bans across {len(self.engine.guilds)} guilds: {applied} changes applied, {failed} failed.",
+            ephemeral=True,
         )
-        for result in self.session.exec(query).all():
-            reason, user, db_guild = result
-            target_guild = self.bot.get_guild(db_guild.id)
-            if target_guild is None:
-                self.logger.warning(f"Guild with ID {db_guild.id} not found in bot guilds.")
-                continue
-            member = target_guild.get_member(user.id)
-            if member is None:
-                self.logger.warning(f"Member with ID {user.id} not found in guild {target_guild.name}.")
-                continue
-            await target_guild.ban(
-                member,
-                reason=(
-                    f"Syncing bans: {reason or 'No reason provided'} "
-                    f"from {interaction.guild.name if interaction.guild else 'Unknown Guild'}"
-                ),
-            )
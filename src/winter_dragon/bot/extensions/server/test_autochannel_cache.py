@@ -0,0 +1,175 @@
+"""Tests for the automatic channel cache, by replaying streams of voice events."""
+
+from __future__ import annotations
+
+import random
+import time
+from itertools import count
+from typing import TYPE_CHECKING
+
+import pytest
+
+from winter_dragon.bot.extensions.server.autochannel_cache import AutoChannelCache, VoiceUpdate
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+GUILD_ID = 1
+CREATION_CHANNEL_ID = 2
+MEMBERS = 200
+EVENTS = 50_000
+HANDLER_BUDGET_SECONDS = 0.0001
+
+
+class MemoryStore:
+    """AutoChannelStore kept in a dict, counting reads and writes."""
+
+    def __init__(self, channels: dict[int, int] | None = None) -> None:
+        """Initialize the store with (owner id, channel id) pairs."""
+        self.channels = dict(channels or {})
+        self.loads = 0
+        self.writes = 0
+
+    def load(self) -> Iterable[tuple[int, int]]:
+        """Load every (owner id, channel id) pair."""
+        self.loads += 1
+        return list(self.channels.items())
+
+    def save(self, owner_id: int, channel_id: int) -> None:
+        """Set the channel of an owner."""
+        self.writes += 1
+        self.channels[owner_id] = channel_id
+
+    def delete(self, owner_id: int) -> None:
+        """Remove the channel of an owner."""
+        self.writes += 1
+        del self.channels[owner_id]
+
+
+class VoiceGuild:
+    """A guild's voice channels, driven by the cache the way the cog drives Discord."""
+
+    def __init__(self, cache: AutoChannelCache) -> None:
+        """Initialize a guild with only its creation channel."""
+        self.cache = cache
+        self.members: dict[int, set[int]] = {CREATION_CHANNEL_ID: set()}
+        self.location: dict[int, int] = {}
+        self.channel_ids = count(1_000)
+        self.handler_time = 0.0
+        self.events = 0
+
+    def move(self, member_id: int, after: int | None) -> None:
+        """Move a member to a channel, or out of voice, and handle the voice state update."""
+        before = self.location.pop(member_id, None)
+        if before is not None:
+            self.members[before].discard(member_id)
+        if after is not None:
+            self.members[after].add(member_id)
+            self.location[member_id] = after
+
+        start = time.perf_counter()
+        update = self.cache.plan_voice_update(
+            GUILD_ID,
+            before,
+            after,
+            before_empty=before is not None and not self.members[before],
+        )
+        self.handler_time += time.perf_counter() - start
+        self.events += 1
+        self.apply(member_id, before, update)
+
+    def apply(self, member_id: int, before: int | None, update: VoiceUpdate) -> None:
+        """Create and delete channels like the cog does."""
+        if update.delete_owner is not None and before is not None:
+            del self.members[before]
+            self.cache.remove(update.delete_owner)
+        if update.create:
+            if (existing := self.cache.channel_of(member_id)) is not None and existing in self.members:
+                return
+            channel_id = next(self.channel_ids)
+            self.members[channel_id] = set()
+            self.cache.set(member_id, channel_id)
+            self.move(member_id, channel_id)
+
+
+def make_cache(channels: dict[int, int] | None = None) -> tuple[AutoChannelCache, MemoryStore]:
+    """Create a loaded cache for a guild with a creation channel."""
+    store = MemoryStore({GUILD_ID: CREATION_CHANNEL_ID, **(channels or {})})
+    cache = AutoChannelCache(store)
+    cache.load()
+    return cache, store
+
+
+def test_join_creates_and_leave_deletes() -> None:
+    """Joining the creation channel creates a channel, leaving it empty deletes it."""
+    cache, store = make_cache()
+    guild = VoiceGuild(cache)
+
+    guild.move(10, CREATION_CHANNEL_ID)
+    channel_id = cache.channel_of(10)
+    assert channel_id is not None
+    assert guild.location[10] == channel_id
+    assert store.channels[10] == channel_id
+
+    assert cache.plan_voice_update(GUILD_ID, channel_id, channel_id, before_empty=False) == VoiceUpdate()
+    guild.move(10, None)
+    assert cache.channel_of(10) is None
+    assert 10 not in store.channels
+    assert channel_id not in guild.members
+
+
+def replay(guild: VoiceGuild) -> None:
+    """Replay a long, seeded stream of joins, moves, mute toggles and leaves."""
+    rng = random.Random(33)
+    for _ in range(EVENTS):
+        member_id = rng.randrange(MEMBERS)
+        current = guild.location.get(member_id)
+        match rng.randrange(4):
+            case 0:
+                guild.move(member_id, CREATION_CHANNEL_ID)
+            case 1:
+                guild.move(member_id, current)  # Mute toggle.
+            case 2:
+                guild.move(member_id, rng.choice(list(guild.members)))
+            case _:
+                guild.move(member_id, None)
+
+
+def test_replayed_event_stream() -> None:
+    """A long stream of joins, moves, toggles and leaves never leaves orphans, and never reads the store."""
+    cache, store = make_cache()
+    guild = VoiceGuild(cache)
+
+    replay(guild)
+
+    assert guild.events >= EVENTS
+    assert store.loads == 1
+    assert store.writes > 0
+    assert store.channels[GUILD_ID] == CREATION_CHANNEL_ID
+    for owner_id, channel_id in store.channels.items():
+        assert cache.channel_of(owner_id) == channel_id
+        assert channel_id in guild.members
+        assert owner_id == GUILD_ID or guild.members[channel_id]
+
+
+@pytest.mark.benchmark
+def test_handler_time() -> None:
+    """Planning a voice update stays well under a millisecond."""
+    cache, _ = make_cache()
+    guild = VoiceGuild(cache)
+
+    replay(guild)
+
+    assert guild.handler_time / guild.events < HANDLER_BUDGET_SECONDS
+
+
+def test_reconcile_removes_orphans() -> None:
+    """Channels deleted while the bot was offline are forgotten."""
+    cache, store = make_cache({10: 100, 11: 101})
+
+    assert cache.reconcile(lambda channel_id: channel_id != 100) == [10]
+    assert cache.channel_of(10) is None
+    assert cache.owner_of(100) is None
+    assert store.channels == {GUILD_ID: CREATION_CHANNEL_ID, 11: 101}
@@ -0,0 +1,142 @@
+"""Tests for cross-guild ban synchronization, against a fake multi-guild backend."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import discord
+import pytest
+
+from winter_dragon.bot.extensions.server.ban_sync_engine import BanSyncEngine, SyncResult
+
+
+GUILD_COUNT = 50
+BAN_COUNT = 1_000
+CONVERGENCE_BUDGET_SECONDS = 30
+
+
+class FakeResponse:
+    """HTTP response for building discord exceptions."""
+
+    status = 500
+    reason = "Internal Server Error"
+
+
+class FakeBackend:
+    """BanBackend that keeps bans in memory, and tracks concurrency per guild."""
+
+    def __init__(self, guild_count: int) -> None:
+        """Initialize guilds without bans."""
+        self.bans: dict[int, set[int]] = {guild_id: set() for guild_id in range(guild_count)}
+        self.calls = 0
+        self.failures: dict[tuple[int, int], int] = {}
+        self.running: dict[int, int] = {}
+        self.max_running = 0
+
+    async def fetch_bans(self, guild_id: int) -> set[int] | None:
+        """Get the bans of a guild."""
+        return set(self.bans[guild_id])
+
+    async def ban(self, guild_id: int, user_id: int, _reason: str | None) -> None:
+        """Ban a user, unless a failure is scheduled."""
+        await self._call(guild_id, user_id)
+        self.bans[guild_id].add(user_id)
+
+    async def unban(self, guild_id: int, user_id: int, _reason: str | None) -> None:
+        """Unban a user, unless a failure is scheduled."""
+        await self._call(guild_id, user_id)
+        self.bans[guild_id].discard(user_id)
+
+    async def _call(self, guild_id: int, user_id: int) -> None:
+        self.calls += 1
+        self.running[guild_id] = self.running.get(guild_id, 0) + 1
+        self.max_running = max(self.max_running, self.running[guild_id])
+        try:
+            await asyncio.sleep(0)
+            if self.failures.get((guild_id, user_id), 0) > 0:
+                self.failures[guild_id, user_id] -= 1
+                raise discord.HTTPException(FakeResponse(), "Try again later")
+        finally:
+            self.running[guild_id] -= 1
+
+
+def make_engine(guild_count: int) -> tuple[BanSyncEngine, FakeBackend]:
+    """Create an engine syncing every guild of a fake backend."""
+    backend = FakeBackend(guild_count)
+    engine = BanSyncEngine(backend, max_concurrency=50, per_guild_concurrency=2, retry_delay=0)
+    engine.load({}, backend.bans)
+    return engine, backend
+
+
+def make_spread_engine() -> tuple[BanSyncEngine, FakeBackend]:
+    """Create an engine syncing 50 guilds with 1,000 bans spread over them."""
+    engine, backend = make_engine(GUILD_COUNT)
+    for user_id in range(BAN_COUNT):
+        backend.bans[user_id % GUILD_COUNT].add(user_id)
+    engine.load(dict.fromkeys(range(BAN_COUNT)), backend.bans)
+    return engine, backend
+
+
+def test_reconcile_converges() -> None:
+    """50 guilds with 1,000 bans spread over them converge on the same ban set, with one call per missing ban."""
+    engine, backend = make_spread_engine()
+
+    result = asyncio.run(engine.reconcile())
+
+    expected = BAN_COUNT * (GUILD_COUNT - 1)
+    assert result == SyncResult(expected, 0)
+    assert backend.calls == expected
+    assert all(bans == set(range(BAN_COUNT)) for bans in backend.bans.values())
+    assert backend.max_running <= engine.per_guild_concurrency
+
+    assert asyncio.run(engine.reconcile()) == SyncResult(0, 0)
+
+
+@pytest.mark.benchmark
+def test_reconcile_duration() -> None:
+    """50 guilds with 1,000 bans spread over them converge well within their time budget."""
+    engine, _ = make_spread_engine()
+    start = time.perf_counter()
+    asyncio.run(engine.reconcile())
+    assert time.perf_counter() - start < CONVERGENCE_BUDGET_SECONDS
+
+
+def test_ban_and_unban_fan_out() -> None:
+    """A ban reaches every guild but its origin, and an unban lifts it everywhere."""
+    engine, backend = make_engine(3)
+    backend.bans[0].add(7)
+
+    assert asyncio.run(engine.ban(7, origin=0)) == SyncResult(2, 0)
+    assert all(7 in bans for bans in backend.bans.values())
+
+    backend.bans[0].discard(7)
+    assert asyncio.run(engine.unban(7, origin=0)) == SyncResult(2, 0)
+    assert all(7 not in bans for bans in backend.bans.values())
+
+
+def test_reconcile_lifts_revoked_bans() -> None:
+    """Guilds that missed an unban have it lifted on the next reconcile."""
+    engine, backend = make_engine(2)
+    asyncio.run(engine.unban(7))
+    backend.bans[1].add(7)  # Banned again by a stale sync.
+
+    assert asyncio.run(engine.reconcile()) == SyncResult(1, 0)
+    assert backend.bans[1] == set()
+    asyncio.run(engine.reconcile())
+    assert engine.revoked == set()
+
+
+def test_failures_are_retried() -> None:
+    """Failed calls are retried, until the retries run out."""
+    engine, backend = make_engine(3)
+    backend.bans[0].add(7)
+    backend.failures[1, 7] = engine.max_retries
+    backend.failures[2, 7] = engine.max_retries + 1
+
+    assert asyncio.run(engine.ban(7, origin=0)) == SyncResult(1, 1)
+    assert 7 in backend.bans[1]
+    assert 7 not in backend.bans[2]
+
+    assert asyncio.run(engine.reconcile()) == SyncResult(1, 0)
+    assert 7 in backend.bans[2]
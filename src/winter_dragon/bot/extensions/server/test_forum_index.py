@@ -0,0 +1,133 @@
+"""Tests for the forum post similarity index, on a labelled synthetic corpus."""
+
+from __future__ import annotations
+
+import random
+import string
+import time
+
+import pytest
+
+from winter_dragon.bot.extensions.server import forum_index
+from winter_dragon.bot.extensions.server.forum_index import ForumPostIndex, jaccard, title_features
+
+
+CORPUS_SIZE = 1_000
+QUERIES = 500
+THRESHOLD = 0.5
+MIN_PRECISION = 0.95
+MIN_RECALL = 0.9
+LARGE_CORPUS_SIZE = 100_000
+QUERY_BUDGET_SECONDS = 0.05
+MAX_SCANNED = 0.05
+"""Largest fraction of the large index a query may compare its title against."""
+
+
+def make_vocabulary(rng: random.Random, size: int = 5_000) -> list[str]:
+    """Create random words."""
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(size)]
+
+
+def make_title(rng: random.Random, vocabulary: list[str]) -> str:
+    """Create a random title of a few words."""
+    return " ".join(rng.sample(vocabulary, rng.randint(5, 8)))
+
+
+def make_near_duplicate(rng: random.Random, title: str) -> str:
+    """Rewrite a title the way someone posting the same question would."""
+    words = title.split()
+    match rng.randrange(4):
+        case 0:
+            return f"{title.upper()}?!"
+        case 1:
+            i, j = rng.sample(range(len(words)), 2)
+            words[i], words[j] = words[j], words[i]
+        case 2:
+            i = rng.randrange(len(words))
+            k = rng.randrange(len(words[i]))
+            words[i] = words[i][:k] + rng.choice(string.ascii_lowercase) + words[i][k + 1 :]
+        case _:
+            words.pop(rng.randrange(len(words)))
+    return " ".join(words)
+
+
+def test_features_ignore_case_and_punctuation() -> None:
+    """Titles that only differ in case and punctuation are identical."""
+    assert title_features("How do I sync bans?") == title_features("how do i SYNC bans")
+    assert jaccard(title_features("sync bans"), title_features("bans sync")) == 1
+
+
+def test_incremental_updates() -> None:
+    """Added, renamed and removed posts are reflected in queries."""
+    index = ForumPostIndex([(1, "bot crashes on startup"), (2, "feature request dark mode")])
+    assert [match.post_id for match in index.query("Bot crashes at startup")] == [1]
+
+    index.add(1, "question about permissions")
+    assert index.query("Bot crashes at startup") == []
+    assert [match.post_id for match in index.query("question about permission", exclude=2)] == [1]
+
+    index.remove(1)
+    assert 1 not in index
+    assert index.query("question about permissions") == []
+    assert len(index) == 1
+
+
+def test_precision_and_recall() -> None:
+    """Near-duplicates are found, and unrelated posts are not."""
+    rng = random.Random(4)
+    vocabulary = make_vocabulary(rng)
+    corpus = [make_title(rng, vocabulary) for _ in range(CORPUS_SIZE)]
+    index = ForumPostIndex(enumerate(corpus))
+
+    true_positives = false_positives = 0
+    for _ in range(QUERIES):
+        original = rng.randrange(CORPUS_SIZE)
+        matches = index.query(make_near_duplicate(rng, corpus[original]), limit=1, threshold=THRESHOLD)
+        if matches and matches[0].post_id == original:
+            true_positives += 1
+        elif matches:
+            false_positives += 1
+    for _ in range(QUERIES):
+        if index.query(make_title(rng, vocabulary), limit=1, threshold=THRESHOLD):
+            false_positives += 1
+
+    assert true_positives / (true_positives + false_positives) >= MIN_PRECISION
+    assert true_positives / QUERIES >= MIN_RECALL
+
+
+def large_index() -> tuple[ForumPostIndex, list[str]]:
+    """Get an index of 100k posts, with near-duplicates of some of them to query for."""
+    rng = random.Random(4)
+    vocabulary = make_vocabulary(rng)
+    corpus = [make_title(rng, vocabulary) for _ in range(LARGE_CORPUS_SIZE)]
+    return ForumPostIndex(enumerate(corpus)), [make_near_duplicate(rng, rng.choice(corpus)) for _ in range(QUERIES)]
+
+
+def test_query_comparisons_at_scale(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Queries against 100k posts only compare against a fraction of the index."""
+    index, queries = large_index()
+    comparisons = 0
+
+    def counting_jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+        nonlocal comparisons
+        comparisons += 1
+        return jaccard(a, b)
+
+    monkeypatch.setattr(forum_index, "jaccard", counting_jaccard)
+    for query in queries:
+        index.query(query, threshold=THRESHOLD)
+
+    assert comparisons / len(queries) < LARGE_CORPUS_SIZE * MAX_SCANNED
+
+
+@pytest.mark.benchmark
+def test_query_latency_at_scale() -> None:
+    """Queries against 100k posts take milliseconds."""
+    index, queries = large_index()
+
+    start = time.perf_counter()
+    for query in queries:
+        index.query(query, threshold=THRESHOLD)
+    elapsed = (time.perf_counter() - start) / len(queries)
+
+    assert elapsed < QUERY_BUDGET_SECONDS
@@ -0,0 +1,256 @@
+"""Tests for the join pipeline, against fake guilds and a simulated join raid."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+
+import discord
+import pytest
+
+from winter_dragon.bot.extensions.server.join_pipeline import GuildJoinConfig, JoinConfigCache, JoinPipeline
+
+
+GUILD_ID = 1
+RAID_JOINS = 5_000
+RAID_BUDGET_SECONDS = 60
+AUTO_ROLES = (10, 11)
+WORKERS = 8
+MAX_PENDING = 100
+OVERFLOW_JOINS = 25
+WELCOME_BATCH = 50
+CALL_DELAY = 0.001
+
+
+class FakeResponse:
+    """HTTP response for building discord exceptions."""
+
+    status = 500
+    reason = "Internal Server Error"
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+class FakeStore:
+    """JoinConfigStore with fixed configurations, counting loads."""
+
+    def __init__(self, configs: dict[int, GuildJoinConfig]) -> None:
+        """Initialize the store."""
+        self.configs = configs
+        self.loads = 0
+
+    def load(self, guild_id: int) -> GuildJoinConfig:
+        """Get the join configuration of a guild."""
+        self.loads += 1
+        return self.configs.get(guild_id, GuildJoinConfig())
+
+
+class FakeRole:
+    """Role of a fake guild."""
+
+    def __init__(self, role_id: int, *, assignable: bool = True) -> None:
+        """Initialize the role."""
+        self.id = role_id
+        self.assignable = assignable
+
+    def is_assignable(self) -> bool:
+        """Check if the bot can give the role."""
+        return self.assignable
+
+
+class FakeGuild:
+    """Guild with fixed roles."""
+
+    def __init__(self, guild_id: int, roles: list[FakeRole]) -> None:
+        """Initialize the guild."""
+        self.id = guild_id
+        self.roles = {role.id: role for role in roles}
+
+    def get_role(self, role_id: int) -> FakeRole | None:
+        """Get a role by id."""
+        return self.roles.get(role_id)
+
+
+class FakeMember:
+    """Member that counts the API calls made to change their roles."""
+
+    def __init__(self, user_id: int, guild: FakeGuild, *, failing: bool = False) -> None:
+        """Initialize a member without roles."""
+        self.id = user_id
+        self.guild = guild
+        self.mention = f"<@{user_id}>"
+        self.roles: list[FakeRole] = []
+        self.calls = 0
+        self.failing = failing
+
+    async def add_roles(self, *roles: FakeRole, reason: str | None = None, atomic: bool = True) -> None:
+        """Add roles, in one call unless atomic."""
+        assert reason
+        self.calls += len(roles) if atomic else 1
+        await asyncio.sleep(CALL_DELAY)
+        if self.failing:
+            raise discord.HTTPException(FakeResponse(), "Try again later")  # pyright: ignore[reportArgumentType]
+        self.roles.extend(roles)
+
+
+class Welcomes:
+    """WelcomeSender recording the members of each welcome."""
+
+    def __init__(self) -> None:
+        """Initialize without welcomes."""
+        self.sent: list[tuple[int, list[int], str | None]] = []
+
+    async def __call__(self, guild: FakeGuild, members: list[FakeMember], message: str | None) -> None:
+        """Record a welcome."""
+        await asyncio.sleep(CALL_DELAY)
+        self.sent.append((guild.id, [member.id for member in members], message))
+
+
+def test_config_cache() -> None:
+    """Configurations are loaded once, until they expire or are invalidated."""
+    clock = FakeClock()
+    store = FakeStore({GUILD_ID: GuildJoinConfig(AUTO_ROLES, "Hi")})
+    cache = JoinConfigCache(store, ttl=60, clock=clock)
+
+    assert cache.get(GUILD_ID) == cache.get(GUILD_ID) == GuildJoinConfig(AUTO_ROLES, "Hi")
+    assert cache.get(2) == GuildJoinConfig()
+    assert store.loads == 2
+    clock.now += 59
+    cache.get(GUILD_ID)
+    assert store.loads == 2
+    clock.now += 1
+    cache.get(GUILD_ID)
+    cache.invalidate(GUILD_ID)
+    cache.get(GUILD_ID)
+    assert store.loads == 4
+
+
+def test_process() -> None:
+    """Auto-assign and restored roles are added in a single edit, and welcomes are sent together."""
+    guild = FakeGuild(GUILD_ID, [FakeRole(10), FakeRole(11), FakeRole(12, assignable=False), FakeRole(13)])
+    welcomes = Welcomes()
+    restored = {1: [11, 12, 13, 14]}
+    pipeline = JoinPipeline(
+        JoinConfigCache(FakeStore({GUILD_ID: GuildJoinConfig(AUTO_ROLES, "Hi")})),
+        welcomes,  # pyright: ignore[reportArgumentType]
+        role_sources=[lambda member: restored.get(member.id, [])],
+        reason="Joined",
+        welcome_batch=3,
+    )
+
+    async def join() -> None:
+        members = [FakeMember(1, guild), FakeMember(2, guild, failing=True)]
+        added = [await pipeline.process(member) for member in members]  # pyright: ignore[reportArgumentType]
+        assert [[role.id for role in roles] for roles in added] == [[10, 11, 13], []]
+        assert [member.calls for member in members] == [1, 1]
+        assert welcomes.sent == []
+        assert await pipeline.flush_welcomes() == 2
+        assert welcomes.sent == [(GUILD_ID, [1, 2], "Hi")]
+
+        for user_id in range(3, 6):
+            await pipeline.process(FakeMember(user_id, guild))  # pyright: ignore[reportArgumentType]
+        assert welcomes.sent[1:] == [(GUILD_ID, [3, 4, 5], "Hi")]
+        assert await pipeline.flush_welcomes() == 0
+
+    asyncio.run(join())
+
+
+class Raid:
+    """A raid of 5,000 joins, all at once, through a pipeline."""
+
+    def __init__(self) -> None:
+        """Initialize the guild, the pipeline and the members joining."""
+        guild = FakeGuild(GUILD_ID, [FakeRole(role_id) for role_id in (*AUTO_ROLES, 20)])
+        self.store = FakeStore({GUILD_ID: GuildJoinConfig(AUTO_ROLES, None)})
+        self.welcomes = Welcomes()
+        self.pipeline = JoinPipeline(
+            JoinConfigCache(self.store),
+            self.welcomes,  # pyright: ignore[reportArgumentType]
+            role_sources=[lambda member: [20] if member.id % 2 else []],
+            reason="Joined",
+            workers=WORKERS,
+            max_pending=MAX_PENDING,
+            welcome_batch=WELCOME_BATCH,
+        )
+        self.members = [FakeMember(user_id, guild) for user_id in range(RAID_JOINS)]
+        self.max_pending = 0
+
+    async def run(self) -> None:
+        """Submit the joins in bursts filling the queue, each at once, and wait for the pipeline to process them."""
+        self.pipeline.start()
+        for start in range(0, RAID_JOINS, MAX_PENDING):
+            for member in self.members[start : start + MAX_PENDING]:
+                self.pipeline.submit(member)  # pyright: ignore[reportArgumentType]
+            self.max_pending = max(self.max_pending, self.pipeline.pending)
+            await self.pipeline.join()
+        await self.pipeline.stop()
+
+
+def test_raid() -> None:
+    """A raid of 5,000 joins makes one configuration read, one edit per member and a welcome per batch.
+
+    Previously each join read the configuration three times, added roles one call at a time and sent its own welcome.
+    Bursts that fit in the queue are handled without dropping a join.
+    """
+    raid = Raid()
+    asyncio.run(raid.run())
+
+    members = raid.members
+    assert raid.max_pending == MAX_PENDING
+    assert raid.pipeline.dropped == 0
+    assert raid.store.loads == 1
+    assert all(len(member.roles) == len(AUTO_ROLES) + member.id % 2 for member in members)
+    calls = sum(member.calls for member in members)
+    legacy_calls = sum(len(member.roles) for member in members)
+    assert calls == RAID_JOINS < legacy_calls
+    sent = raid.welcomes.sent
+    assert sorted(user_id for _, user_ids, _ in sent for user_id in user_ids) == list(range(RAID_JOINS))
+    assert len(sent) <= math.ceil(RAID_JOINS / WELCOME_BATCH) + 1
+
+
+def test_full_queue_drops_joins() -> None:
+    """Joins arriving while the queue is full are dropped and counted, without waiting, until it drains."""
+    guild = FakeGuild(GUILD_ID, [FakeRole(role_id) for role_id in AUTO_ROLES])
+    pipeline = JoinPipeline(
+        JoinConfigCache(FakeStore({GUILD_ID: GuildJoinConfig(AUTO_ROLES, None)})),
+        Welcomes(),  # pyright: ignore[reportArgumentType]
+        reason="Joined",
+        workers=WORKERS,
+        max_pending=MAX_PENDING,
+    )
+    members = [FakeMember(user_id, guild) for user_id in range(MAX_PENDING + OVERFLOW_JOINS)]
+
+    async def overflow() -> None:
+        admitted = [pipeline.submit(member) for member in members]  # pyright: ignore[reportArgumentType]
+        assert admitted == [True] * MAX_PENDING + [False] * OVERFLOW_JOINS
+        assert pipeline.pending == MAX_PENDING
+        assert pipeline.dropped == OVERFLOW_JOINS
+
+        pipeline.start()
+        await pipeline.join()
+        assert pipeline.submit(members[-1])  # pyright: ignore[reportArgumentType]
+        await pipeline.stop()
+
+    asyncio.run(overflow())
+    assert [member.calls for member in members] == [1] * MAX_PENDING + [0] * (OVERFLOW_JOINS - 1) + [1]
+    assert pipeline.dropped == OVERFLOW_JOINS
+
+
+@pytest.mark.benchmark
+def test_raid_duration() -> None:
+    """The raid arrives faster than 5,000 joins in a minute."""
+    raid = Raid()
+    start = time.perf_counter()
+    asyncio.run(raid.run())
+    assert time.perf_counter() - start < RAID_BUDGET_SECONDS
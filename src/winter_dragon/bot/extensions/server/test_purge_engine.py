@@ -0,0 +1,160 @@
+"""Tests for the bulk-aware purge engine, against a fake channel that counts API calls."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import discord
+import pytest
+
+from winter_dragon.bot.extensions.server.purge_engine import (
+    BULK_DELETE_LIMIT,
+    PurgeEngine,
+    PurgeProgress,
+    bulk_cutoff,
+)
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+
+HISTORY_SIZE = 10_000
+OLD_MESSAGES = 500
+PURGE_BUDGET_SECONDS = 5
+
+
+class FakeMessage:
+    """Message that deletes itself from its channel."""
+
+    def __init__(self, channel: FakeChannel, created_at: datetime) -> None:
+        """Initialize a message created at a point in time."""
+        self.channel = channel
+        self.id = discord.utils.time_snowflake(created_at)
+
+    async def delete(self) -> None:
+        """Delete the message with a single API call."""
+        self.channel.single_calls += 1
+        if self not in self.channel.messages:
+            raise discord.NotFound(FakeResponse(), "Unknown Message")
+        self.channel.messages.remove(self)
+
+
+class FakeChannel:
+    """Channel that keeps its history in memory and enforces the bulk delete rules."""
+
+    def __init__(self, young: int, old: int) -> None:
+        """Initialize a history of young and old messages, newest first."""
+        now = datetime.now(UTC)
+        self.messages = [FakeMessage(self, now - timedelta(seconds=i)) for i in range(young)]
+        self.messages += [FakeMessage(self, now - timedelta(days=30, seconds=i)) for i in range(old)]
+        self.bulk_calls = 0
+        self.single_calls = 0
+
+    @property
+    def api_calls(self) -> int:
+        """Total delete calls made."""
+        return self.bulk_calls + self.single_calls
+
+    async def history(self, *, limit: int | None = 100) -> AsyncIterator[FakeMessage]:
+        """Iterate over the history, newest first."""
+        for message in self.messages[:limit]:
+            yield message
+
+    async def delete_messages(self, messages: Iterable[FakeMessage], *, reason: str | None = None) -> None:  # noqa: ARG002
+        """Bulk delete messages, failing the same way Discord does."""
+        messages = list(messages)
+        self.bulk_calls += 1
+        if not 2 <= len(messages) <= BULK_DELETE_LIMIT:
+            msg = "Bulk delete takes between 2 and 100 messages"
+            raise ValueError(msg)
+        if any(message.id < bulk_cutoff() for message in messages):
+            msg = "Bulk delete can't delete messages older than 14 days"
+            raise ValueError(msg)
+        if any(message not in self.messages for message in messages):
+            raise discord.NotFound(FakeResponse(), "Unknown Message")
+        for message in messages:
+            self.messages.remove(message)
+
+
+class FakeResponse:
+    """HTTP response for building discord exceptions."""
+
+    status = 404
+    reason = "Not Found"
+
+
+def test_large_purge() -> None:
+    """A 10k message purge bulk deletes young messages, and only deletes old ones individually."""
+    channel = FakeChannel(HISTORY_SIZE - OLD_MESSAGES, OLD_MESSAGES)
+    engine = PurgeEngine(channel, single_delete_interval=0)
+
+    deleted = asyncio.run(engine.run(HISTORY_SIZE))
+
+    assert len(deleted) == HISTORY_SIZE
+    assert channel.messages == []
+    assert channel.bulk_calls == (HISTORY_SIZE - OLD_MESSAGES) // BULK_DELETE_LIMIT
+    assert channel.single_calls == OLD_MESSAGES
+    assert channel.api_calls < HISTORY_SIZE // 10
+
+
+@pytest.mark.benchmark
+def test_large_purge_duration() -> None:
+    """A 10k message purge, without the rate limit of single deletes, finishes within seconds."""
+    channel = FakeChannel(HISTORY_SIZE - OLD_MESSAGES, OLD_MESSAGES)
+    engine = PurgeEngine(channel, single_delete_interval=0)
+    start = time.perf_counter()
+    asyncio.run(engine.run(HISTORY_SIZE))
+    assert time.perf_counter() - start < PURGE_BUDGET_SECONDS
+
+
+def test_old_messages_are_skipped_without_history() -> None:
+    """Without include_old, only bulk deletable messages are removed."""
+    channel = FakeChannel(150, 50)
+    deleted = asyncio.run(PurgeEngine(channel, single_delete_interval=0).run(200, include_old=False))
+
+    assert len(deleted) == 150
+    assert channel.bulk_calls == 2
+    assert channel.single_calls == 0
+    assert len(channel.messages) == 50
+
+
+def test_leftover_and_missing_messages() -> None:
+    """A chunk of one message is deleted individually, and a chunk with an already deleted message is split in bulk."""
+    channel = FakeChannel(101, 0)
+    victim = channel.messages[0]
+
+    def check(message: FakeMessage) -> bool:
+        if message is victim:
+            channel.messages.remove(victim)  # Deleted by someone else during the purge.
+        return True
+
+    deleted = asyncio.run(PurgeEngine(channel, single_delete_interval=0).run(101, check=check))
+
+    assert len(deleted) == 101
+    assert channel.messages == []
+    assert channel.bulk_calls <= 2 * math.ceil(math.log2(BULK_DELETE_LIMIT)) + 1
+    assert channel.single_calls == 2
+
+
+def test_cancel_stops_purge() -> None:
+    """Cancelling stops before the next delete, and is reported."""
+    channel = FakeChannel(0, 10)
+    reports: list[PurgeProgress] = []
+
+    async def report(progress: PurgeProgress) -> None:
+        reports.append(progress)
+        if progress.deleted == 3:
+            engine.cancel()
+
+    engine = PurgeEngine(channel, single_delete_interval=0, progress_interval=0, on_progress=report)
+    deleted = asyncio.run(engine.run(10))
+
+    assert len(deleted) == 3
+    assert len(channel.messages) == 7
+    assert reports[-1].cancelled
+    assert reports[-1].deleted == 3
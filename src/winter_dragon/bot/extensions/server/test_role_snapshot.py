@@ -0,0 +1,159 @@
+"""Tests for role snapshots, against interleaved fake leave and audit log streams."""
+
+from __future__ import annotations
+
+import random
+
+from sqlalchemy import Integer, MetaData, create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session
+
+from winter_dragon.bot.extensions.server.role_snapshot import (
+    DatabaseRoleSnapshotStore,
+    RoleSnapshot,
+    RoleSnapshots,
+)
+from winter_dragon.database.tables import GuildRoles, Guilds, Roles, UserRoles, Users
+
+
+GUILD_ID = 1
+ROLE_COUNT = 20
+MEMBER_COUNT = 1_000
+ROLES_PER_MEMBER = 4
+MAX_AUDIT_DELAY = 5
+"""Most events between a leave and its audit log entry, in either direction."""
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+def make_schema() -> MetaData:
+    """Copy the role snapshot tables, with ids SQLite accepts.
+
+    SQLite can't autoincrement part of a composite primary key, so the ids of association rows are left empty.
+    """
+    schema = MetaData()
+    for model in (Users, Guilds, Roles, UserRoles, GuildRoles):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+        if len(table.primary_key.columns) > 1:
+            table.c.id.autoincrement = False
+            table.c.id.nullable = True
+    return schema
+
+
+def make_session() -> Session:
+    """Create a session of an in-memory database with the role snapshot tables."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    make_schema().create_all(engine)
+    return Session(engine)
+
+
+def make_store(session: Session) -> DatabaseRoleSnapshotStore:
+    """Create a store over a session."""
+    return DatabaseRoleSnapshotStore(session)
+
+
+def test_pairing() -> None:
+    """Leaves are paired with removals of the same member in either order, within the match window."""
+    clock = FakeClock()
+    snapshots = RoleSnapshots(make_store(make_session()), match_window=60, clock=clock)
+
+    assert snapshots.member_left(GUILD_ID, 1, {10: "a"}) is None
+    assert snapshots.member_removed(GUILD_ID, 2) is None
+    assert snapshots.member_removed(GUILD_ID, 1) == RoleSnapshot(GUILD_ID, 1, {10: "a"})
+    assert snapshots.member_left(GUILD_ID, 3, {11: "b"}) is None
+    assert snapshots.member_left(GUILD_ID, 2, {12: "c"}) == RoleSnapshot(GUILD_ID, 2, {12: "c"})
+    assert snapshots.member_removed(2, 3) is None
+
+    clock.now += 61
+    assert snapshots.member_removed(GUILD_ID, 3) is None
+    assert snapshots.member_left(2, 3, {13: "d"}) is None
+    assert set(snapshots.pending) == {(GUILD_ID, 1), (GUILD_ID, 2)}
+
+
+def test_store() -> None:
+    """Snapshots are stored in bulk, replacing earlier snapshots of the same member in the same guild only."""
+    with make_session() as session:
+        store = make_store(session)
+        store.save([RoleSnapshot(1, 1, {10: "a", 11: "b"}), RoleSnapshot(2, 1, {20: "c"}), RoleSnapshot(1, 2, {10: "a"})])
+        assert sorted(store.load(1, 1)) == [10, 11]
+        assert store.load(2, 1) == [20]
+
+        store.save([RoleSnapshot(1, 1, {12: "d"}), RoleSnapshot(1, 2, {})])
+        assert store.load(1, 1) == [12]
+        assert store.load(1, 2) == []
+        assert store.load(2, 1) == [20]
+
+
+def test_role_ids() -> None:
+    """The roles of a member come from their pending snapshot, or the stored one once flushed."""
+    with make_session() as session:
+        snapshots = RoleSnapshots(make_store(session), clock=FakeClock())
+        snapshots.member_left(GUILD_ID, 1, {10: "a", 12: "c"})
+        snapshots.member_removed(GUILD_ID, 1)
+        assert snapshots.role_ids(GUILD_ID, 1) == [10, 12]
+
+        assert snapshots.flush() == 1
+        assert snapshots.flush() == 0
+        assert sorted(snapshots.role_ids(GUILD_ID, 1)) == [10, 12]
+        assert snapshots.role_ids(GUILD_ID, 2) == []
+
+
+def test_interleaved_streams() -> None:
+    """Under a mass leave, exactly the removed members get snapshots, with far fewer API calls than before.
+
+    Previously, every leave fetched the latest audit log entry, and snapshotted the member's roles if it was any kick or ban,
+    then a rejoin added the roles one call at a time. Now the join pipeline adds them in a single edit.
+    """
+    rng = random.Random(46)
+    roles = {
+        user_id: dict.fromkeys(rng.sample(range(1, ROLE_COUNT + 1), ROLES_PER_MEMBER), "") for user_id in range(MEMBER_COUNT)
+    }
+    removed = set(rng.sample(range(MEMBER_COUNT), MEMBER_COUNT // 2))
+
+    # Each leave and audit log entry is placed at its member's position, shifted by up to a few events either way.
+    stream = sorted(
+        [(user_id + rng.uniform(-MAX_AUDIT_DELAY, MAX_AUDIT_DELAY), "leave", user_id) for user_id in range(MEMBER_COUNT)]
+        + [(user_id + rng.uniform(-MAX_AUDIT_DELAY, MAX_AUDIT_DELAY), "removal", user_id) for user_id in removed],
+    )
+
+    clock = FakeClock()
+    legacy_snapshots: set[int] = set()
+    legacy_calls = 0
+    removal_seen = False
+    with make_session() as session:
+        snapshots = RoleSnapshots(make_store(session), match_window=60, clock=clock)
+        for moment, kind, user_id in stream:
+            clock.now = moment
+            if kind == "removal":
+                snapshots.member_removed(GUILD_ID, user_id)
+                removal_seen = True
+                continue
+            snapshots.member_left(GUILD_ID, user_id, roles[user_id])
+            legacy_calls += 1
+            if removal_seen:
+                legacy_snapshots.add(user_id)
+        snapshots.flush()
+
+        assert all(snapshots.store.load(GUILD_ID, user_id) for user_id in removed)
+        calls = 0
+        for user_id in range(MEMBER_COUNT):
+            role_ids = snapshots.role_ids(GUILD_ID, user_id)
+            calls += bool(role_ids)
+            assert set(role_ids) == (set(roles[user_id]) if user_id in removed else set())
+            if user_id in legacy_snapshots:
+                legacy_calls += ROLES_PER_MEMBER
+
+    assert legacy_snapshots != removed
+    assert calls == len(removed)
+    assert calls * ROLES_PER_MEMBER < legacy_calls
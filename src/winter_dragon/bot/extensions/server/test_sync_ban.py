@@ -0,0 +1,100 @@
+"""Tests for the synced bans cog, against fake guilds and an in-memory database."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import discord
+from sqlalchemy import Integer, MetaData, create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.bot.core.bot import WinterDragon
+from winter_dragon.bot.extensions.server.ban_sync_engine import BanSyncEngine
+from winter_dragon.bot.extensions.server.sync_ban import SyncedBans
+from winter_dragon.database.tables import SyncBanGuild, SyncBanUser
+from winter_dragon.database.tables.guild import Guilds
+from winter_dragon.database.tables.sync_ban.sync_ban_banned_by import SyncBanBannedBy
+from winter_dragon.database.tables.user import Users
+
+
+if TYPE_CHECKING:
+    import pytest
+
+
+USER_ID = 100
+
+
+class FakeBackend:
+    """BanBackend recording the bans applied."""
+
+    def __init__(self) -> None:
+        """Initialize without bans."""
+        self.bans: list[tuple[int, int]] = []
+
+    async def fetch_bans(self, _guild_id: int) -> set[int] | None:
+        """Get the bans of a guild."""
+        return set()
+
+    async def ban(self, guild_id: int, user_id: int, _reason: str | None) -> None:
+        """Record a ban."""
+        self.bans.append((guild_id, user_id))
+
+    async def unban(self, guild_id: int, user_id: int, _reason: str | None) -> None:
+        """Unbans are not expected."""
+        raise NotImplementedError
+
+
+class FakeGuild:
+    """Synced guild that takes a while to fetch a ban."""
+
+    def __init__(self, guild_id: int) -> None:
+        """Initialize the guild."""
+        self.id = guild_id
+        self.name = f"guild {guild_id}"
+
+    async def fetch_ban(self, _user: object) -> SimpleNamespace:
+        """Get the ban of a user, after other events had a chance to run."""
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(reason="spam")
+
+
+def make_session() -> Session:
+    """Create a session of an in-memory database with the synced ban tables."""
+    schema = MetaData()
+    for model in (Users, Guilds, SyncBanGuild, SyncBanUser, SyncBanBannedBy):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+        if len(table.primary_key.columns) > 1:
+            table.c.id.autoincrement = False
+            table.c.id.nullable = True
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    schema.create_all(engine)
+    return Session(engine)
+
+
+def test_concurrent_bans_of_a_user(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The same user banned in two synced guilds at once is stored and synced once, leaving the session usable."""
+    monkeypatch.setattr(Users, "fetch", classmethod(lambda _cls, _id: None))
+    session = make_session()
+    session.add_all(SyncBanGuild(guild_id=guild_id) for guild_id in (1, 2, 3))
+    session.commit()
+    guilds = [FakeGuild(1), FakeGuild(2), FakeGuild(3)]
+    user = SimpleNamespace(id=USER_ID)
+
+    async def run() -> list[tuple[int, int]]:
+        async with WinterDragon(command_prefix="!", intents=discord.Intents.none()) as bot:
+            cog = SyncedBans(bot=bot, db_session=session)
+            backend = FakeBackend()
+            cog.engine = BanSyncEngine(backend, retry_delay=0)
+            await bot.add_cog(cog)
+            await asyncio.gather(*(cog.on_member_ban(guild, user) for guild in guilds[:2]))  # pyright: ignore[reportArgumentType]
+            return backend.bans
+
+    bans = asyncio.run(run())
+
+    assert session.exec(select(SyncBanUser.user_id)).all() == [USER_ID]
+    assert len(session.exec(select(SyncBanBannedBy)).all()) == 1
+    assert sorted(guild_id for guild_id, _ in bans) == [2, 3]
@@ -0,0 +1,25 @@
+"""Tests for the welcome messages."""
+
+from __future__ import annotations
+
+from winter_dragon.bot.extensions.server.welcome import MAX_MESSAGE_LENGTH, mention_chunks
+
+
+class FakeMember:
+    """Member with a mention."""
+
+    def __init__(self, user_id: int) -> None:
+        """Initialize the member."""
+        self.mention = f"<@{user_id}>"
+
+
+def test_mention_chunks() -> None:
+    """Mentions of a large batch are split over messages within the length limit, in order."""
+    members = [FakeMember(user_id) for user_id in range(10**17, 10**17 + 500)]
+
+    chunks = mention_chunks(members)  # pyright: ignore[reportArgumentType]
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= MAX_MESSAGE_LENGTH for chunk in chunks)
+    assert ", ".join(chunks) == ", ".join(member.mention for member in members)
+    assert mention_chunks([]) == []
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 import discord
 from discord import Interaction, app_commands
 from sqlmodel import Session, col, select
@@ -14,6 +16,24 @@ from winter_dragon.database.constants import SessionMixin
 from winter_dragon.database.tables import Welcome as WelcomeDb
 
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+MAX_MESSAGE_LENGTH = 2000
+
+
+def mention_chunks(members: Iterable[discord.abc.User], limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Join the mentions of members into as few messages as fit within the limit."""
+    chunks: list[str] = []
+    for mention in (member.mention for member in members):
+        if chunks and len(chunks[-1]) + len(", ") + len(mention) <= limit:
+            chunks[-1] += f", {mention}"
+        else:
+            chunks.append(mention)
+    return chunks
+
+
 class WelcomeMenu(Menu, SessionMixin):
     """Menu for configuring welcome settings."""
 
@@ -89,7 +109,7 @@ class WelcomeMessageModal(Modal):
         label="Welcome Message",
         placeholder="Enter the welcome message",
         style=discord.TextStyle.long,
-        max_length=2000,
+        max_length=MAX_MESSAGE_LENGTH,
     )
 
     def __init__(self, entry: WelcomeDb, interaction: Interaction, session: Session) -> None:
@@ -112,6 +132,7 @@ class WelcomeMessageModal(Modal):
         if data := self.session.exec(select(WelcomeDb).where(WelcomeDb.guild_id == self.guild.id)).first():
             data.message = self.message_input.value
             self.session.commit()
+            interaction.client.dispatch("join_config_change", self.guild.id)
             self.logger.info(f"Welcome message updated for {self.guild=} by {interaction.user=})")
         else:
             msg = f"No welcome data found for guild {self.guild.id}"
@@ -127,34 +148,45 @@ class Welcome(Cog, auto_load=True):
 
     allowed_welcome_dm = Config(default=True)
 
-    @Cog.listener()
-    async def on_member_join(self, member: discord.Member) -> None:
-        """Send a welcome message to the user when they join the server."""
-        self.logger.debug(f"{member} joined {member.guild}")
-        welcome = self.session.exec(select(WelcomeDb).where(WelcomeDb.guild_id == member.guild.id)).first()
-        message = welcome.message if welcome else None
-        channel = member.guild.system_channel
-        cmd = self.get_app_command("help")
-        mention = cmd.mention if cmd else "the help command"
-        default_message = f"Welcome {member.mention} to {member.guild},\nyou may use {mention} to see what commands I have!"
+    async def send_welcome(self, guild: discord.Guild, members: list[discord.Member], message: str | None) -> None:
+        """Welcome members that joined a guild, in a single channel message, or a DM each."""
+        channel = guild.system_channel
         if channel is not None and self.allowed_welcome_dm is False:
-            self.logger.warning(f"Sending welcome message to channel {channel.id} for {member} in guild {member.guild.id}")
-            if message:
-                await channel.send(message)
-                self.logger.info(f"Sent custom welcome message to {channel.id} for new member {member}")
+            self.logger.warning(f"Sending welcome message to channel {channel.id} for {len(members)} members in {guild.id}")
+            content = self.welcome_content(guild, members, message)
+            if len(content) <= MAX_MESSAGE_LENGTH:
+                await channel.send(content)
             else:
-                await channel.send(default_message)
-                self.logger.info(f"Sent default welcome message to {channel.id} for new member {member}")
-        elif channel is not None and self.allowed_welcome_dm is True and member.bot is False:
-            self.logger.warning(f"Sending welcome message to DM for {member} (ID: {member.id})")
-            if message:
-                await member.send(message)
-                self.logger.info(f"Sent custom welcome message via DM to new member {member}")
-            else:
-                await member.send(default_message)
-                self.logger.info(f"Sent default welcome message via DM to new member {member}")
+                await channel.send(message or self.default_welcome(guild, "everyone"))
+                for mentions in mention_chunks(members):
+                    await channel.send(mentions)
+            self.logger.info(f"Sent welcome message to {channel.id} for new members {members}")
+        elif channel is not None and self.allowed_welcome_dm is True:
+            for member in members:
+                if member.bot:
+                    continue
+                self.logger.warning(f"Sending welcome message to DM for {member} (ID: {member.id})")
+                try:
+                    await member.send(self.welcome_content(guild, [member], message))
+                except discord.Forbidden:
+                    self.logger.warning(f"Welcome DM to {member} was refused")
+                    continue
+                self.logger.info(f"Sent welcome message via DM to new member {member}")
         else:
-            self.logger.warning(f"Welcome failed for {member=}: {channel=}, {self.allowed_welcome_dm=}, {member.bot=}")
+            self.logger.warning(f"Welcome failed for {members=}: {channel=}, {self.allowed_welcome_dm=}")
+
+    def welcome_content(self, guild: discord.Guild, members: list[discord.Member], message: str | None) -> str:
+        """Get the welcome message for members, the custom message of the guild if it has one."""
+        mentions = ", ".join(member.mention for member in members)
+        if message:
+            return message if len(members) == 1 else f"{message}\n{mentions}"
+        return self.default_welcome(guild, mentions)
+
+    def default_welcome(self, guild: discord.Guild, welcomed: str) -> str:
+        """Get the welcome message of guilds without a custom one."""
+        cmd = self.get_app_command("help")
+        mention = cmd.mention if cmd else "the help command"
+        return f"Welcome {welcomed} to {guild},\nyou may use {mention} to see what commands I have!"
 
     @app_commands.command(name="welcome", description="Configure welcome messages")
     async def slash_welcome(self, interaction: discord.Interaction) -> None:
@@ -182,6 +214,7 @@ class Welcome(Cog, auto_load=True):
             )
             self.session.add(welcome)
             self.session.commit()
+            self.bot.dispatch("join_config_change", interaction.guild.id)
 
         menu = WelcomeMenu(interaction)
 
@@ -0,0 +1,127 @@
+"""Index of team compositions, keyed by the hash of their roster.
+
+Each roster is stored once per game, under the hash of its sorted player IDs,
+so finding whether a team played before is a single indexed lookup instead of a scan of every composition.
+Aggregate results are kept on the composition and incremented in SQL, so recording a match doesn't read them first.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from herogold.log import LoggerMixin
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, col, select
+
+from winter_dragon.database.constants import session as db_session
+from winter_dragon.database.tables.matchmaking.team_composition import TeamComposition, roster_hash
+from winter_dragon.database.tables.matchmaking.team_composition_player import TeamCompositionPlayer
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from sqlalchemy import Table
+
+
+class CompositionIndex(LoggerMixin):
+    """Finds and updates TeamComposition rows by roster."""
+
+    def __init__(self, session: Session | None = None) -> None:
+        """Initialize the composition index.
+
+        Args:
+        ----
+            session: Database session. Uses default if None.
+
+        """
+        self.session = session or db_session
+
+    def lookup(self, game_id: int, user_ids: Iterable[int]) -> TeamComposition | None:
+        """Get the composition of a roster, or None when it never played the game.
+
+        Args:
+        ----
+            game_id: Game ID
+            user_ids: Player user IDs, in any order
+
+        """
+        return self.session.exec(
+            select(TeamComposition)
+            .where(col(TeamComposition.game_id) == game_id)
+            .where(col(TeamComposition.roster_hash) == roster_hash(user_ids)),
+        ).first()
+
+    def record(
+        self,
+        game_id: int,
+        teams: Sequence[Sequence[int]],
+        winning_team_idx: int,
+        team_scores: Sequence[int] = (),
+    ) -> None:
+        """Count a match towards the composition of each team, creating those that never played.
+
+        Args:
+        ----
+            game_id: Game ID
+            teams: List of teams (user IDs)
+            winning_team_idx: Index of winning team
+            team_scores: Team scores, 0 for teams without one
+
+        """
+        rosters = {roster_hash(team): team for team in teams}
+        try:
+            ids = self._ensure(game_id, rosters)
+            table: Table = TeamComposition.__table__  # pyright: ignore[reportAttributeAccessIssue]
+            self.session.connection().execute(
+                update(table)
+                .where(table.c.id == bindparam("key_id"))
+                .values(
+                    times_played=table.c.times_played + 1,
+                    wins=table.c.wins + bindparam("won"),
+                    losses=table.c.losses + 1 - bindparam("won"),
+                    win_rate=(table.c.wins + bindparam("won")) * 1.0 / (table.c.times_played + 1),
+                    avg_team_score=(table.c.avg_team_score * table.c.times_played + bindparam("score"))
+                    / (table.c.times_played + 1),
+                ),
+                [
+                    {
+                        "key_id": ids[roster_hash(team)],
+                        "won": int(team_idx == winning_team_idx),
+                        "score": team_scores[team_idx] if team_idx < len(team_scores) else 0,
+                    }
+                    for team_idx, team in enumerate(teams)
+                ],
+            )
+            self.session.commit()
+        except SQLAlchemyError:
+            self.session.rollback()
+            self.logger.exception(f"Failed to record team compositions of game {game_id}")
+            raise
+
+    def _ensure(self, game_id: int, rosters: dict[str, Sequence[int]]) -> dict[str, int]:
+        """Get the composition ids of rosters by hash, inserting the missing compositions and their players."""
+        ids = self._find(game_id, rosters)
+        if missing := [key for key in rosters if key not in ids]:
+            self.logger.debug(f"Creating {len(missing)} team compositions for game {game_id}")
+            connection = self.session.connection()
+            connection.execute(
+                insert(TeamComposition.__table__),  # pyright: ignore[reportAttributeAccessIssue]
+                [{"game_id": game_id, "roster_hash": key} for key in missing],
+            )
+            ids |= self._find(game_id, missing)
+            connection.execute(
+                insert(TeamCompositionPlayer.__table__),  # pyright: ignore[reportAttributeAccessIssue]
+                [{"composition_id": ids[key], "user_id": user_id} for key in missing for user_id in rosters[key]],
+            )
+        return ids
+
+    def _find(self, game_id: int, keys: Iterable[str]) -> dict[str, int]:
+        """Get the composition ids of roster hashes that are stored."""
+        rows = self.session.exec(
+            select(TeamComposition.roster_hash, TeamComposition.id)
+            .where(col(TeamComposition.game_id) == game_id)
+            .where(col(TeamComposition.roster_hash).in_(list(keys))),
+        )
+        return {key: id_ for key, id_ in rows if key is not None and id_ is not None}
@@ -22,6 +22,8 @@ from winter_dragon.bot.extensions.games.riot_clash_api import (
     RiotClashAPIError,
     RiotClashClient,
 )
+from winter_dragon.bot.extensions.tournament.event_sync import DiscordEventBackend, EventSyncEngine
+from winter_dragon.config import Config
 
 
 if TYPE_CHECKING:
@@ -38,6 +40,9 @@ class TournamentEventManager(Cog, LoggerMixin):
     and provides commands to manually manage tournament events.
     """
 
+    sync_concurrency = Config(5)
+    """Number of guilds synced at the same time."""
+
     def __init__(self, **kwargs: Unpack[BotArgs]) -> None:
         """Initialize the tournament event manager.
 
@@ -53,10 +58,16 @@ class TournamentEventManager(Cog, LoggerMixin):
         if api_key:
             self.clash_client = RiotClashClient(api_key)
             self.event_manager = DiscordClashEventManager(self.bot)
+            self.sync_engine = EventSyncEngine(
+                self.clash_client,
+                DiscordEventBackend(self.bot),
+                max_concurrency=self.sync_concurrency,
+            )
             self.logger.info("TournamentEventManager initialized with Riot API")
         else:
             self.clash_client = None
             self.event_manager = None
+            self.sync_engine = None
             self.logger.warning("RIOT_API_KEY not configured. Tournament event features will be unavailable.")
 
         # Track guilds with auto-sync enabled
@@ -88,45 +99,18 @@ class TournamentEventManager(Cog, LoggerMixin):
     @tasks.loop(hours=1)
     async def auto_sync_task(self) -> None:
         """Background task to automatically sync tournaments to events every hour."""
-        if not self.clash_client or not self.event_manager:
+        if not self.sync_engine:
             return
 
         self.logger.debug(f"Running auto-sync for {len(self.auto_sync_guilds)} guild(s)")
 
-        guilds_to_remove = []
-
-        for guild_id, platform in list(self.auto_sync_guilds.items()):
-            try:
-                guild = self.bot.get_guild(guild_id)
-                if not guild:
-                    self.logger.warning(f"Guild {guild_id} not found, removing from auto-sync")
-                    guilds_to_remove.append(guild_id)
-                    continue
-
-                tournaments = await self.clash_client.get_tournaments(platform)
-
-                if not tournaments:
-                    self.logger.debug(f"No tournaments found for guild {guild.name} (region: {platform})")
-                    continue
-
-                # Sync with duplicate detection (remove_old=False to preserve existing events)
-                created, failed = await self.event_manager.sync_tournaments_to_events(guild, tournaments, remove_old=False)
-
-                if created or failed:
-                    self.logger.info(
-                        f"Auto-sync for guild {guild.name}: "
-                        f"{len(created)} created, {len(failed)} failed, "
-                        f"{len(tournaments)} total tournaments"
-                    )
-
-            except RiotClashAPIError:
-                self.logger.exception(f"Auto-sync failed for guild {guild_id}")
-            except Exception:
-                self.logger.exception(f"Unexpected error in auto-sync for guild {guild_id}")
-
         # Remove guilds that no longer exist
-        for guild_id in guilds_to_remove:
-            del self.auto_sync_guilds[guild_id]
+        for guild_id in list(self.auto_sync_guilds):
+            if not self.bot.get_guild(guild_id):
+                self.logger.warning(f"Guild {guild_id} not found, removing from auto-sync")
+                del self.auto_sync_guilds[guild_id]
+
+        await self.sync_engine.sync(self.auto_sync_guilds)
 
     @auto_sync_task.before_loop
     async def before_auto_sync(self) -> None:
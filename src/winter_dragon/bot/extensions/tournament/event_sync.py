@@ -0,0 +1,267 @@
+"""Sync of Clash tournaments to the scheduled events of many guilds.
+
+Tournaments are fetched once per region, and shared by every guild in it.
+Guilds sync concurrently, up to a limit, so a slow guild doesn't hold back the others.
+Each guild's Clash events are diffed against the tournaments first, and only missing, changed,
+duplicate and cancelled events are created, edited or deleted. The outcome of the last sync of each guild is kept.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+import discord
+from herogold.log import LoggerMixin
+
+from winter_dragon.bot.extensions.games.riot_clash_api import tournament_id_from_event
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable, Mapping
+
+    from winter_dragon.bot.extensions.games.riot_clash_api import ClashTournament, Platform
+
+
+class TournamentSource(Protocol):
+    """Fetches the Clash tournaments of a region."""
+
+    async def get_tournaments(self, platform: Platform) -> list[ClashTournament]:
+        """Get the upcoming tournaments of a region."""
+        ...
+
+
+class ClashEvent(NamedTuple):
+    """A scheduled event of a guild, made for a Clash tournament."""
+
+    event_id: int
+    tournament_id: int
+    name: str
+    start_time: datetime
+    description: str
+
+
+class EventBackend(Protocol):
+    """Manages the scheduled events of guilds."""
+
+    async def fetch_events(self, guild_id: int) -> list[ClashEvent] | None:
+        """Get the Clash events of a guild, or None if the guild is unavailable."""
+        ...
+
+    async def create_event(self, guild_id: int, tournament: ClashTournament) -> None:
+        """Create the event of a tournament."""
+        ...
+
+    async def edit_event(self, guild_id: int, event_id: int, tournament: ClashTournament) -> None:
+        """Change an event to match its tournament."""
+        ...
+
+    async def delete_event(self, guild_id: int, event_id: int) -> None:
+        """Delete an event."""
+        ...
+
+
+def event_name(tournament: ClashTournament) -> str:
+    """Get the name of the scheduled event of a tournament."""
+    return f"🏆 {tournament.name}"
+
+
+class DiscordEventBackend:
+    """EventBackend that manages scheduled events through the Discord API."""
+
+    def __init__(self, client: discord.Client) -> None:
+        """Initialize the backend with a client."""
+        self.client = client
+
+    async def fetch_events(self, guild_id: int) -> list[ClashEvent] | None:
+        """Get the Clash events of a guild, or None if the guild is unavailable."""
+        if (guild := self.client.get_guild(guild_id)) is None:
+            return None
+        return [
+            ClashEvent(event.id, tournament_id, event.name, event.start_time, event.description or "")
+            for event in guild.scheduled_events
+            if (tournament_id := tournament_id_from_event(event)) is not None
+        ]
+
+    async def create_event(self, guild_id: int, tournament: ClashTournament) -> None:
+        """Create the event of a tournament."""
+        if (guild := self.client.get_guild(guild_id)) and tournament.start_time:
+            await guild.create_scheduled_event(
+                name=event_name(tournament),
+                description=tournament.event_description(),
+                start_time=tournament.start_time,
+                end_time=tournament.start_time,
+                location="League of Legends",
+                privacy_level=discord.PrivacyLevel.guild_only,
+            )
+
+    async def edit_event(self, guild_id: int, event_id: int, tournament: ClashTournament) -> None:
+        """Change an event to match its tournament."""
+        if (guild := self.client.get_guild(guild_id)) and (event := guild.get_scheduled_event(event_id)):
+            await event.edit(
+                name=event_name(tournament),
+                description=tournament.event_description(),
+                start_time=tournament.start_time or event.start_time,
+                end_time=tournament.start_time or event.start_time,
+            )
+
+    async def delete_event(self, guild_id: int, event_id: int) -> None:
+        """Delete an event."""
+        if (guild := self.client.get_guild(guild_id)) and (event := guild.get_scheduled_event(event_id)):
+            await event.delete()
+
+
+class EventDiff(NamedTuple):
+    """Changes needed for the Clash events of a guild to match the tournaments."""
+
+    to_create: list[ClashTournament]
+    to_edit: list[tuple[int, ClashTournament]]
+    """Event ids, with the tournament to match."""
+    to_delete: list[int]
+    """Event ids of duplicate events, and of upcoming events whose tournament was cancelled."""
+
+
+def diff_events(tournaments: Iterable[ClashTournament], events: Iterable[ClashEvent], now: datetime) -> EventDiff:
+    """Compare the Clash events of a guild with the upcoming tournaments of its region.
+
+    The API answers with no tournaments when it has none to tell, as well as on some errors,
+    so without any tournaments no event is taken as cancelled.
+    """
+    tournaments = list(tournaments)
+    upcoming = {
+        tournament.tournament_id: tournament
+        for tournament in tournaments
+        if tournament.start_time is not None and tournament.start_time > now
+    }
+    to_edit: list[tuple[int, ClashTournament]] = []
+    to_delete: list[int] = []
+    found: set[int] = set()
+    for event in events:
+        if (tournament := upcoming.get(event.tournament_id)) is None:
+            if tournaments and event.start_time > now:
+                to_delete.append(event.event_id)
+            continue
+        if event.tournament_id in found:
+            to_delete.append(event.event_id)
+            continue
+        found.add(event.tournament_id)
+        if (event.name, event.start_time, event.description) != (
+            event_name(tournament),
+            tournament.start_time,
+            tournament.event_description(),
+        ):
+            to_edit.append((event.event_id, tournament))
+    to_create = [tournament for tournament_id, tournament in upcoming.items() if tournament_id not in found]
+    return EventDiff(to_create, to_edit, to_delete)
+
+
+class GuildSyncState(NamedTuple):
+    """Outcome of the last sync of a guild."""
+
+    platform: Platform
+    synced_at: datetime
+    created: int = 0
+    edited: int = 0
+    deleted: int = 0
+    failed: int = 0
+    error: str | None = None
+    """Why the guild couldn't be synced at all, if it couldn't."""
+
+
+class EventSyncEngine(LoggerMixin):
+    """Syncs the Clash tournaments of each guild's region to its scheduled events."""
+
+    def __init__(
+        self,
+        source: TournamentSource,
+        backend: EventBackend,
+        *,
+        max_concurrency: int = 5,
+        clock: Callable[[], datetime] = lambda: datetime.now(UTC),
+    ) -> None:
+        """Initialize the engine without any sync state."""
+        self.source = source
+        self.backend = backend
+        self.clock = clock
+        self.states: dict[int, GuildSyncState] = {}
+        """Outcome of the last sync of each guild."""
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def sync(self, guilds: Mapping[int, Platform]) -> dict[int, GuildSyncState]:
+        """Sync guilds to the tournaments of their region, fetching each region once. Returns the state of each guild."""
+        platforms = list(dict.fromkeys(guilds.values()))
+        fetched = await asyncio.gather(*(self._fetch(platform) for platform in platforms))
+        tournaments = dict(zip(platforms, fetched, strict=True))
+        states = await asyncio.gather(
+            *(self._sync_guild(guild_id, platform, tournaments[platform]) for guild_id, platform in guilds.items()),
+        )
+        synced = dict(zip(guilds, states, strict=True))
+        self.states.update(synced)
+        self.logger.info(
+            f"Synced Clash events of {len(guilds)} guilds across {len(platforms)} regions: "
+            f"{sum(state.created for state in states)} created, {sum(state.edited for state in states)} edited, "
+            f"{sum(state.deleted for state in states)} deleted, {sum(state.failed for state in states)} failed, "
+            f"{sum(state.error is not None for state in states)} not synced",
+        )
+        return synced
+
+    async def _fetch(self, platform: Platform) -> list[ClashTournament] | None:
+        async with self._semaphore:
+            try:
+                tournaments = await self.source.get_tournaments(platform)
+            except Exception:
+                self.logger.exception(f"Failed to fetch Clash tournaments of {platform}")
+                return None
+        if not tournaments:
+            self.logger.warning(f"No Clash tournaments fetched for {platform}, keeping its events")
+        return tournaments
+
+    async def _sync_guild(
+        self,
+        guild_id: int,
+        platform: Platform,
+        tournaments: list[ClashTournament] | None,
+    ) -> GuildSyncState:
+        try:
+            return await self._sync_events(guild_id, platform, tournaments)
+        except Exception as e:
+            self.logger.exception(f"Failed to sync Clash events of {guild_id=}")
+            return GuildSyncState(platform, self.clock(), error=f"Sync failed: {e!r}")
+
+    async def _sync_events(
+        self,
+        guild_id: int,
+        platform: Platform,
+        tournaments: list[ClashTournament] | None,
+    ) -> GuildSyncState:
+        if tournaments is None:
+            return GuildSyncState(platform, self.clock(), error="Unable to fetch tournaments")
+        async with self._semaphore:
+            try:
+                events = await self.backend.fetch_events(guild_id)
+            except discord.HTTPException:
+                self.logger.exception(f"Failed to fetch scheduled events of {guild_id=}")
+                return GuildSyncState(platform, self.clock(), error="Unable to fetch scheduled events")
+            if events is None:
+                return GuildSyncState(platform, self.clock(), error="Guild unavailable")
+
+            now = self.clock()
+            diff = diff_events(tournaments, events, now)
+            created = edited = deleted = 0
+            for tournament in diff.to_create:
+                created += await self._run(guild_id, self.backend.create_event(guild_id, tournament))
+            for event_id, tournament in diff.to_edit:
+                edited += await self._run(guild_id, self.backend.edit_event(guild_id, event_id, tournament))
+            for event_id in diff.to_delete:
+                deleted += await self._run(guild_id, self.backend.delete_event(guild_id, event_id))
+        failed = len(diff.to_create) + len(diff.to_edit) + len(diff.to_delete) - created - edited - deleted
+        return GuildSyncState(platform, now, created, edited, deleted, failed)
+
+    async def _run(self, guild_id: int, call: Awaitable[None]) -> bool:
+        try:
+            await call
+        except discord.HTTPException:
+            self.logger.exception(f"Failed to change scheduled events of {guild_id=}")
+            return False
+        return True
@@ -0,0 +1,228 @@
+"""Ranked per-game standings kept in Redis.
+
+Skill ratings are kept in a sorted set per game, and the rest of each player's statistics in a hash,
+so top-N and rank-of-player queries take O(log n) in Redis instead of sorting PlayerGameStats.
+Standings are updated as matches are recorded, and rebuilt from PlayerGameStats when missing.
+When Redis is unavailable, the database is queried instead.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from herogold.log import LoggerMixin
+from redis.exceptions import RedisError
+from sqlalchemy import func
+from sqlmodel import Session, col, select
+
+from winter_dragon.database.constants import session as db_session
+from winter_dragon.database.extension.model import BULK_CHUNK_SIZE
+from winter_dragon.database.tables.matchmaking.player_game_stats import PlayerGameStats
+from winter_dragon.redis.connection import RedisConnection
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping, Sequence
+
+    from redis import Redis
+    from redis.client import Pipeline
+
+
+RECORD_FIELDS: dict[str, type[int | float]] = {
+    "total_matches": int,
+    "total_wins": int,
+    "total_losses": int,
+    "win_rate": float,
+    "avg_score": float,
+}
+"""Statistics kept for each player besides their rating, comma separated in the order listed."""
+ENTRY_FIELDS = ("user_id", "skill_rating", *RECORD_FIELDS)
+
+
+class Standing(NamedTuple):
+    """A player's position on the leaderboard of a game, with their statistics."""
+
+    user_id: int
+    rank: int
+    """Position by skill rating, starting at 1."""
+    skill_rating: float
+    total_matches: int = 0
+    total_wins: int = 0
+    total_losses: int = 0
+    win_rate: float = 0.0
+    avg_score: float = 0.0
+
+
+class Leaderboard(LoggerMixin):
+    """Leaderboards of every game, backed by Redis sorted sets."""
+
+    prefix = "leaderboard"
+
+    def __init__(self, redis: Redis | None = None, session: Session | None = None) -> None:
+        """Initialize the leaderboards on a Redis connection, defaulting to the shared one."""
+        self._redis = redis
+        self.session = session or db_session
+        self._stale: set[int] = set()
+        """Games whose updates couldn't be written to Redis, and are rebuilt on their next read."""
+
+    @property
+    def redis(self) -> Redis:
+        """Get the Redis connection."""
+        if self._redis is None:
+            self._redis = RedisConnection.get_connection()
+        return self._redis
+
+    def update(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Update the standings of players from their PlayerGameStats column values."""
+        games: dict[int, list[tuple[Any, ...]]] = {}
+        for row in rows:
+            games.setdefault(row["game_id"], []).append(tuple(row[field] for field in ENTRY_FIELDS))
+        if not games:
+            return
+        try:
+            pipeline = self.redis.pipeline(transaction=True)
+            for game_id, game_rows in games.items():
+                self._queue_rows(pipeline, self._ratings(game_id), self._records(game_id), game_rows)
+            pipeline.execute()
+        except RedisError:
+            self.logger.warning(f"Unable to update the leaderboards of games {sorted(games)}, rebuilding them later")
+            self._stale.update(games)
+
+    def top(self, game_id: int, limit: int = 10) -> list[Standing]:
+        """Get the highest rated players of a game."""
+        try:
+            ratings = self._read(
+                game_id,
+                lambda pipeline: pipeline.zrevrange(self._ratings(game_id), 0, limit - 1, withscores=True),
+            )
+            records = self.redis.hmget(self._records(game_id), [member for member, _ in ratings]) if ratings else []
+        except RedisError:
+            self.logger.warning(f"Unable to read the leaderboard of game {game_id}, querying the database")
+            return self._top_from_database(game_id, limit)
+        return [
+            self._standing(member, rank, rating, record)
+            for rank, ((member, rating), record) in enumerate(zip(ratings, records, strict=True), 1)
+        ]
+
+    def standing(self, game_id: int, user_id: int) -> Standing | None:
+        """Get the standing of a player in a game, or None when they haven't played it."""
+        member = str(user_id)
+        try:
+            rank, rating, record = self._read(
+                game_id,
+                lambda pipeline: (
+                    pipeline.zrevrank(self._ratings(game_id), member)
+                    .zscore(self._ratings(game_id), member)
+                    .hget(self._records(game_id), member)
+                ),
+            )
+        except RedisError:
+            self.logger.warning(f"Unable to read the leaderboard of game {game_id}, querying the database")
+            return self._standing_from_database(game_id, user_id)
+        if rank is None:
+            return None
+        return self._standing(member, rank + 1, rating, record)
+
+    def invalidate(self, game_id: int) -> None:
+        """Rebuild the leaderboard of a game from PlayerGameStats on its next read."""
+        self._stale.add(game_id)
+
+    def rebuild(self, game_id: int) -> int:
+        """Replace the leaderboard of a game with the stored PlayerGameStats. Returns the number of players."""
+        ratings, records = self._ratings(game_id), self._records(game_id)
+        building_ratings, building_records = f"{ratings}:rebuild", f"{records}:rebuild"
+        table = PlayerGameStats.__table__  # pyright: ignore[reportAttributeAccessIssue]
+        result = self.session.connection().execute(
+            select(*(table.c[field] for field in ENTRY_FIELDS)).where(table.c.game_id == game_id),
+            execution_options={"yield_per": BULK_CHUNK_SIZE},
+        )
+
+        self.redis.delete(building_ratings, building_records)
+        players = 0
+        for chunk in result.partitions():
+            pipeline = self.redis.pipeline(transaction=False)
+            self._queue_rows(pipeline, building_ratings, building_records, chunk)
+            pipeline.execute()
+            players += len(chunk)
+
+        pipeline = self.redis.pipeline(transaction=True)
+        if players:
+            pipeline.rename(building_ratings, ratings).rename(building_records, records)
+        else:
+            pipeline.delete(ratings, records)
+        pipeline.set(self._loaded(game_id), 1)
+        pipeline.execute()
+        self._stale.discard(game_id)
+        self.logger.info(f"Rebuilt the leaderboard of game {game_id} with {players} players")
+        return players
+
+    def _read(self, game_id: int, queue: Callable[[Pipeline], object]) -> Any:  # noqa: ANN401
+        """Run the commands queued on a pipeline, rebuilding the leaderboard first when it's missing or stale."""
+        if game_id in self._stale:
+            self.rebuild(game_id)
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.exists(self._loaded(game_id))
+        queue(pipeline)
+        loaded, *results = pipeline.execute()
+        if not loaded:
+            self.rebuild(game_id)
+            pipeline = self.redis.pipeline(transaction=False)
+            queue(pipeline)
+            results = pipeline.execute()
+        return results[0] if len(results) == 1 else results
+
+    def _top_from_database(self, game_id: int, limit: int) -> list[Standing]:
+        stats = self.session.exec(
+            select(PlayerGameStats)
+            .where(col(PlayerGameStats.game_id) == game_id)
+            .order_by(col(PlayerGameStats.skill_rating).desc(), col(PlayerGameStats.user_id).desc())
+            .limit(limit),
+        ).all()
+        return [self._standing_of(row, rank) for rank, row in enumerate(stats, 1)]
+
+    def _standing_from_database(self, game_id: int, user_id: int) -> Standing | None:
+        stats = self.session.exec(
+            select(PlayerGameStats)
+            .where(col(PlayerGameStats.game_id) == game_id)
+            .where(col(PlayerGameStats.user_id) == user_id),
+        ).first()
+        if stats is None:
+            return None
+        higher = self.session.exec(
+            select(func.count())
+            .select_from(PlayerGameStats)
+            .where(col(PlayerGameStats.game_id) == game_id)
+            .where(col(PlayerGameStats.skill_rating) > stats.skill_rating),
+        ).one()
+        return self._standing_of(stats, higher + 1)
+
+    @staticmethod
+    def _standing_of(stats: PlayerGameStats, rank: int) -> Standing:
+        return Standing(stats.user_id, rank, stats.skill_rating, *(getattr(stats, field) for field in RECORD_FIELDS))
+
+    @staticmethod
+    def _standing(member: bytes | str, rank: int, rating: float, record: bytes | str | None) -> Standing:
+        if not record:
+            return Standing(int(member), rank, float(rating))
+        values = record.split(b"," if isinstance(record, bytes) else ",")
+        return Standing(
+            int(member),
+            rank,
+            float(rating),
+            *(kind(value) for kind, value in zip(RECORD_FIELDS.values(), values, strict=True)),
+        )
+
+    @staticmethod
+    def _queue_rows(pipeline: Pipeline, ratings: str, records: str, entries: Sequence[Sequence[Any]]) -> None:
+        """Queue writing entries with the values of ENTRY_FIELDS."""
+        pipeline.zadd(ratings, {str(entry[0]): entry[1] for entry in entries})
+        pipeline.hset(records, mapping={str(entry[0]): ",".join(map(str, entry[2:])) for entry in entries})
+
+    def _ratings(self, game_id: int) -> str:
+        return f"{self.prefix}:{game_id}:ratings"
+
+    def _records(self, game_id: int) -> str:
+        return f"{self.prefix}:{game_id}:records"
+
+    def _loaded(self, game_id: int) -> str:
+        return f"{self.prefix}:{game_id}:loaded"
@@ -15,10 +15,13 @@ import random
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from herogold.log import LoggerMixin
 from sqlmodel import Session, select
 
+from winter_dragon.bot.extensions.tournament.compositions import CompositionIndex
+from winter_dragon.bot.extensions.tournament.ratings import MatchResult, RatingEngine
 from winter_dragon.database.constants import session as db_session
 from winter_dragon.database.tables.game import Games
 from winter_dragon.database.tables.matchmaking.game_match import GameMatch
@@ -27,10 +30,13 @@ from winter_dragon.database.tables.matchmaking.match_team import MatchTeam
 from winter_dragon.database.tables.matchmaking.player_game_stats import PlayerGameStats
 from winter_dragon.database.tables.matchmaking.player_synergy import PlayerSynergy
 from winter_dragon.database.tables.matchmaking.team_composition import TeamComposition
-from winter_dragon.database.tables.matchmaking.team_composition_player import TeamCompositionPlayer
 from winter_dragon.database.tables.user import Users
 
 
+if TYPE_CHECKING:
+    from winter_dragon.bot.extensions.tournament.leaderboard import Leaderboard
+
+
 @dataclass
 class PlayerProfile:
     """Player profile for matchmaking calculations."""
@@ -60,15 +66,18 @@ class TeamCandidate:
 class MatchmakingSystem(LoggerMixin):
     """Main matchmaking system for balanced team generation."""
 
-    def __init__(self, session: Session | None = None) -> None:
+    def __init__(self, session: Session | None = None, leaderboard: Leaderboard | None = None) -> None:
         """Initialize matchmaking system.
 
         Args:
         ----
             session: Database session. Uses default if None.
+            leaderboard: Leaderboard to update as matches are recorded, if any.
 
         """
         self.session = session or db_session
+        self.ratings = RatingEngine(self.session, leaderboard)
+        self.compositions = CompositionIndex(self.session)
         self.logger.info("MatchmakingSystem initialized")
 
     def create_balanced_teams(
@@ -204,9 +213,8 @@ class MatchmakingSystem(LoggerMixin):
         self.session.commit()
 
         # Update aggregated statistics
-        self._update_player_stats(game.id, teams, winning_team_idx, individual_scores)
-        self._update_synergy_stats(game.id, teams, winning_team_idx)
-        self._update_team_composition_stats(game.id, teams, winning_team_idx, team_scores)
+        self.ratings.record(MatchResult(game.id, teams, winning_team_idx, individual_scores))
+        self.compositions.record(game.id, teams, winning_team_idx, team_scores)
 
         return match
 
@@ -495,227 +503,6 @@ class MatchmakingSystem(LoggerMixin):
         # Combined score
         return (skill_weight * skill_variance) + (synergy_weight * total_synergy_penalty)
 
-    def _update_player_stats(
-        self,
-        game_id: int,
-        teams: list[list[int]],
-        winning_team_idx: int,
-        individual_scores: dict[int, int],
-    ) -> None:
-        """Update player statistics after a match.
-
-        Args:
-        ----
-            game_id: Game ID
-            teams: List of teams (user IDs)
-            winning_team_idx: Index of winning team
-            individual_scores: Individual player scores
-
-        """
-        for team_idx, team_players in enumerate(teams):
-            team_won = team_idx == winning_team_idx
-
-            for user_id in team_players:
-                # Get or create stats
-                stats = self.session.exec(
-                    select(PlayerGameStats).where(PlayerGameStats.user_id == user_id).where(PlayerGameStats.game_id == game_id)
-                ).first()
-
-                if not stats:
-                    stats = PlayerGameStats(user_id=user_id, game_id=game_id)
-                    stats.add(self.session)
-
-                # Update counts
-                stats.total_matches += 1
-                if team_won:
-                    stats.total_wins += 1
-                else:
-                    stats.total_losses += 1
-
-                # Update win rate
-                stats.win_rate = stats.total_wins / stats.total_matches if stats.total_matches > 0 else 0.0
-
-                # Update average score
-                if user_id in individual_scores:
-                    old_total = stats.avg_score * (stats.total_matches - 1)
-                    stats.avg_score = (old_total + individual_scores[user_id]) / stats.total_matches
-
-                # Update skill rating (simple ELO-like adjustment)
-                k_factor = 32
-                expected_score = 0.5  # Could be refined with opponent ratings
-                actual_score = 1.0 if team_won else 0.0
-                stats.skill_rating += k_factor * (actual_score - expected_score)
-
-                stats.update(self.session)
-
-        self.session.commit()
-
-    def _update_synergy_stats(
-        self,
-        game_id: int,
-        teams: list[list[int]],
-        winning_team_idx: int,
-    ) -> None:
-        """Update player synergy statistics.
-
-        Args:
-        ----
-            game_id: Game ID
-            teams: List of teams (user IDs)
-            winning_team_idx: Index of winning team
-
-        """
-        # Update teammate synergies
-        for team_idx, team_players in enumerate(teams):
-            team_won = team_idx == winning_team_idx
-
-            # Update all pairs within the team
-            for i, player1_id in enumerate(team_players):
-                for player2_id in team_players[i + 1 :]:
-                    # Ensure consistent ordering
-                    p1, p2 = sorted([player1_id, player2_id])
-
-                    synergy = self.session.exec(
-                        select(PlayerSynergy)
-                        .where(PlayerSynergy.player1_id == p1)
-                        .where(PlayerSynergy.player2_id == p2)
-                        .where(PlayerSynergy.game_id == game_id)
-                    ).first()
-
-                    if not synergy:
-                        synergy = PlayerSynergy(
-                            player1_id=p1,
-                            player2_id=p2,
-                            game_id=game_id,
-                        )
-                        synergy.add(self.session)
-
-                    synergy.matches_as_teammates += 1
-                    if team_won:
-                        synergy.wins_as_teammates += 1
-
-                    synergy.teammate_synergy = (
-                        synergy.wins_as_teammates / synergy.matches_as_teammates if synergy.matches_as_teammates > 0 else 0.0
-                    )
-
-                    synergy.update(self.session)
-
-        # Update opponent rivalries (cross-team)
-        for team1_idx, team1_players in enumerate(teams):
-            for team2_idx, team2_players in enumerate(teams):
-                if team1_idx >= team2_idx:
-                    continue  # Skip same team and avoid duplicates
-
-                team1_won = team1_idx == winning_team_idx
-
-                for player1_id in team1_players:
-                    for player2_id in team2_players:
-                        # Ensure consistent ordering
-                        p1, p2 = sorted([player1_id, player2_id])
-
-                        synergy = self.session.exec(
-                            select(PlayerSynergy)
-                            .where(PlayerSynergy.player1_id == p1)
-                            .where(PlayerSynergy.player2_id == p2)
-                            .where(PlayerSynergy.game_id == game_id)
-                        ).first()
-
-                        if not synergy:
-                            synergy = PlayerSynergy(
-                                player1_id=p1,
-                                player2_id=p2,
-                                game_id=game_id,
-                            )
-                            synergy.add(self.session)
-
-                        synergy.matches_as_opponents += 1
-
-                        # Track wins (considering ordered IDs)
-                        if (player1_id == p1 and team1_won) or (player2_id == p1 and not team1_won):
-                            synergy.player1_wins_vs_player2 += 1
-
-                        synergy.rivalry_factor = (
-                            synergy.player1_wins_vs_player2 / synergy.matches_as_opponents
-                            if synergy.matches_as_opponents > 0
-                            else 0.0
-                        )
-
-                        synergy.update(self.session)
-
-        self.session.commit()
-
-    def _update_team_composition_stats(
-        self,
-        game_id: int,
-        teams: list[list[int]],
-        winning_team_idx: int,
-        team_scores: list[int],
-    ) -> None:
-        """Update team composition statistics.
-
-        Args:
-        ----
-            game_id: Game ID
-            teams: List of teams (user IDs)
-            winning_team_idx: Index of winning team
-            team_scores: Team scores
-
-        """
-        for team_idx, team_players in enumerate(teams):
-            team_won = team_idx == winning_team_idx
-            team_score = team_scores[team_idx] if team_idx < len(team_scores) else 0
-
-            # Create composition key (sorted player IDs)
-            sorted_player_ids = sorted(team_players)
-
-            # Try to find existing composition with these exact players
-            # Query by joining with TeamCompositionPlayer
-            existing_compositions = self.session.exec(select(TeamComposition).where(TeamComposition.game_id == game_id)).all()
-
-            composition = None
-            for comp in existing_compositions:
-                # Get players for this composition
-                comp_players = self.session.exec(
-                    select(TeamCompositionPlayer.user_id).where(TeamCompositionPlayer.composition_id == comp.id)
-                ).all()
-
-                if sorted(comp_players) == sorted_player_ids:
-                    composition = comp
-                    break
-
-            if not composition:
-                # Create new composition
-                composition = TeamComposition(
-                    game_id=game_id,
-                )
-                composition.add(self.session)
-                self.session.commit()
-
-                # Add players to composition
-                for user_id in team_players:
-                    comp_player = TeamCompositionPlayer(
-                        composition_id=composition.id,
-                        user_id=user_id,
-                    )
-                    comp_player.add(self.session)
-                self.session.commit()
-
-            composition.times_played += 1
-            if team_won:
-                composition.wins += 1
-            else:
-                composition.losses += 1
-
-            composition.win_rate = composition.wins / composition.times_played if composition.times_played > 0 else 0.0
-
-            # Update average score
-            old_total = composition.avg_team_score * (composition.times_played - 1)
-            composition.avg_team_score = (old_total + team_score) / composition.times_played
-
-            composition.update(self.session)
-
-        self.session.commit()
-
     # ========== Example Data & Debugging Methods ==========
 
     def generate_example_data(self, num_players: int = 10, num_matches: int = 50) -> None:
@@ -0,0 +1,265 @@
+"""Rating engine that updates player statistics and synergies from match results.
+
+All statistics touched by a batch of matches are loaded in a few queries, updated in memory,
+and written back in a single transaction, instead of a select and write per player and per pair.
+The same updates replayed over the stored match history rebuild the statistics from scratch.
+Rows are handled as plain column dicts, as building a model instance per pair costs more than the queries.
+"""
+
+from __future__ import annotations
+
+from itertools import batched, combinations, groupby
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from herogold.log import LoggerMixin
+from sqlalchemy import bindparam, delete, insert, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, col, select
+
+from winter_dragon.database.constants import session as db_session
+from winter_dragon.database.extension.model import BULK_CHUNK_SIZE
+from winter_dragon.database.tables.matchmaking.game_match import GameMatch
+from winter_dragon.database.tables.matchmaking.match_player import MatchPlayer
+from winter_dragon.database.tables.matchmaking.player_game_stats import PlayerGameStats
+from winter_dragon.database.tables.matchmaking.player_synergy import PlayerSynergy
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+    from sqlalchemy import Table
+
+    from winter_dragon.bot.extensions.tournament.leaderboard import Leaderboard
+    from winter_dragon.database.extension.model import BaseModel
+
+
+K_FACTOR = 32
+EXPECTED_SCORE = 0.5  # Could be refined with opponent ratings
+STATS_KEYS = ("user_id", "game_id")
+SYNERGY_KEYS = ("player1_id", "player2_id", "game_id")
+
+type StatsKey = tuple[int, int]
+type SynergyKey = tuple[int, int, int]
+type Row = dict[str, Any]
+
+
+class MatchResult(NamedTuple):
+    """Outcome of a single match, as needed to update statistics."""
+
+    game_id: int
+    teams: Sequence[Sequence[int]]
+    winning_team_idx: int
+    """Index of the winning team, or -1 when no team won."""
+    individual_scores: Mapping[int, int] | None = None
+
+    def player_keys(self) -> Iterator[StatsKey]:
+        """Get the statistics keys of every player."""
+        for team in self.teams:
+            for user_id in team:
+                yield user_id, self.game_id
+
+    def pair_keys(self) -> Iterator[SynergyKey]:
+        """Get the synergy keys of every pair of players, teammates and opponents alike."""
+        for team in self.teams:
+            for player1_id, player2_id in combinations(team, 2):
+                yield pair_key(player1_id, player2_id, self.game_id)
+        for team1, team2 in combinations(self.teams, 2):
+            for player1_id in team1:
+                for player2_id in team2:
+                    yield pair_key(player1_id, player2_id, self.game_id)
+
+
+class RatingEngine(LoggerMixin):
+    """Updates PlayerGameStats and PlayerSynergy from match results."""
+
+    def __init__(self, session: Session | None = None, leaderboard: Leaderboard | None = None) -> None:
+        """Initialize the rating engine.
+
+        Args:
+        ----
+            session: Database session. Uses default if None.
+            leaderboard: Leaderboard to update with the new statistics, if any.
+
+        """
+        self.session = session or db_session
+        self.leaderboard = leaderboard
+
+    def record(self, *results: MatchResult) -> None:
+        """Apply match results to the stored statistics, in one transaction.
+
+        Args:
+        ----
+            results: Match results, in the order they were played
+
+        """
+        stats = self._load(PlayerGameStats, STATS_KEYS, (key for result in results for key in result.player_keys()))
+        synergies = self._load(PlayerSynergy, SYNERGY_KEYS, (key for result in results for key in result.pair_keys()))
+        for result in results:
+            self._apply(result, stats, synergies)
+        self.logger.debug(f"Recording {len(results)} matches: {len(stats)} player stats, {len(synergies)} synergies")
+        self._write(stats, synergies)
+        if self.leaderboard is not None:
+            self.leaderboard.update(stats.values())
+
+    def rebuild(self, game_id: int | None = None) -> int:
+        """Replace the statistics of a game, or of every game, with ones replayed from the match history.
+
+        Args:
+        ----
+            game_id: Game ID, or None for every game
+
+        Returns:
+        -------
+            Number of matches replayed
+
+        """
+        history = list(self.load_history(game_id))
+        stats: dict[StatsKey, Row] = {}
+        synergies: dict[SynergyKey, Row] = {}
+        for result in history:
+            self._apply(result, stats, synergies)
+
+        stats_query, synergy_query = delete(PlayerGameStats), delete(PlayerSynergy)
+        if game_id is not None:
+            stats_query = stats_query.where(col(PlayerGameStats.game_id) == game_id)
+            synergy_query = synergy_query.where(col(PlayerSynergy.game_id) == game_id)
+        self.session.exec(stats_query)
+        self.session.exec(synergy_query)
+        self._write(stats, synergies)
+        if self.leaderboard is not None:
+            for game in {game_id} if game_id is not None else {key[1] for key in stats}:
+                self.leaderboard.invalidate(game)
+        self.logger.info(f"Rebuilt statistics of {game_id or 'every game'} from {len(history)} matches")
+        return len(history)
+
+    def load_history(self, game_id: int | None = None) -> Iterator[MatchResult]:
+        """Load the stored match results of a game, or of every game, in the order they were played."""
+        query = (
+            select(
+                GameMatch.id,
+                GameMatch.game_id,
+                GameMatch.winning_team_id,
+                MatchPlayer.user_id,
+                MatchPlayer.team_number,
+                MatchPlayer.individual_score,
+            )
+            .join(MatchPlayer, col(MatchPlayer.match_id) == GameMatch.id)
+            .order_by(col(GameMatch.match_date), col(GameMatch.id), col(MatchPlayer.id))
+        )
+        if game_id is not None:
+            query = query.where(col(GameMatch.game_id) == game_id)
+
+        for _, match_rows in groupby(self.session.exec(query), key=lambda row: row[0]):
+            rows = list(match_rows)
+            teams: list[list[int]] = [[] for _ in range(max(row.team_number for row in rows))]
+            for row in rows:
+                teams[row.team_number - 1].append(row.user_id)
+            scores = {row.user_id: row.individual_score for row in rows if row.individual_score is not None}
+            yield MatchResult(rows[0].game_id, teams, (rows[0].winning_team_id or 0) - 1, scores)
+
+    def _load(self, model: type[BaseModel], keys: Sequence[str], values: Iterable[tuple[int, ...]]) -> dict[Any, Row]:
+        """Get the stored rows for the key values, loading them in chunks."""
+        table: Table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+        columns = tuple_(*(table.c[key] for key in keys))
+        found: dict[Any, Row] = {}
+        for chunk in batched(dict.fromkeys(values), BULK_CHUNK_SIZE, strict=False):
+            for row in self.session.connection().execute(select(table).where(columns.in_(chunk))).mappings():
+                found[tuple(row[key] for key in keys)] = dict(row)
+        return found
+
+    def _write(self, stats: Mapping[StatsKey, Row], synergies: Mapping[SynergyKey, Row]) -> None:
+        """Write new and changed rows in a single commit, with one INSERT and one UPDATE per table."""
+        try:
+            self._write_rows(PlayerGameStats, stats.values())
+            self._write_rows(PlayerSynergy, synergies.values())
+            self.session.commit()
+        except SQLAlchemyError:
+            self.session.rollback()
+            self.logger.exception("Failed to write match statistics")
+            raise
+
+    def _write_rows(self, model: type[BaseModel], rows: Iterable[Row]) -> None:
+        """Insert the new rows and update the stored ones, without returning their ids."""
+        table: Table = model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+        new: list[Row] = []
+        changed: list[Row] = []
+        for row in rows:
+            values = dict(row)
+            if (id_ := values.pop("id")) is None:
+                new.append(values)
+            else:
+                changed.append(values | {"key_id": id_})
+
+        connection = self.session.connection()
+        if new:
+            connection.execute(insert(table), new)
+        if changed:
+            connection.execute(update(table).where(table.c.id == bindparam("key_id")), changed)
+
+    @staticmethod
+    def _apply(result: MatchResult, stats: dict[StatsKey, Row], synergies: dict[SynergyKey, Row]) -> None:
+        """Apply a match result to player statistics and synergies, creating those missing."""
+        scores = result.individual_scores or {}
+        for team_idx, team_players in enumerate(result.teams):
+            team_won = team_idx == result.winning_team_idx
+            for user_id in team_players:
+                key = (user_id, result.game_id)
+                if (player := stats.get(key)) is None:
+                    player = stats[key] = new_row(PlayerGameStats, user_id=user_id, game_id=result.game_id)
+                _apply_player_stats(player, won=team_won, score=scores.get(user_id))
+
+            for player1_id, player2_id in combinations(team_players, 2):
+                synergy = _get_synergy(synergies, pair_key(player1_id, player2_id, result.game_id))
+                synergy["matches_as_teammates"] += 1
+                if team_won:
+                    synergy["wins_as_teammates"] += 1
+                synergy["teammate_synergy"] = synergy["wins_as_teammates"] / synergy["matches_as_teammates"]
+
+        for (team1_idx, team1_players), (_, team2_players) in combinations(enumerate(result.teams), 2):
+            team1_won = team1_idx == result.winning_team_idx
+            for player1_id in team1_players:
+                for player2_id in team2_players:
+                    synergy = _get_synergy(synergies, pair_key(player1_id, player2_id, result.game_id))
+                    synergy["matches_as_opponents"] += 1
+                    # Track wins of the lower id, as pairs are stored ordered.
+                    if (player1_id == synergy["player1_id"]) == team1_won:
+                        synergy["player1_wins_vs_player2"] += 1
+                    synergy["rivalry_factor"] = synergy["player1_wins_vs_player2"] / synergy["matches_as_opponents"]
+
+
+def _apply_player_stats(stats: Row, *, won: bool, score: int | None) -> None:
+    """Count a match towards a player's statistics."""
+    stats["total_matches"] += 1
+    if won:
+        stats["total_wins"] += 1
+    else:
+        stats["total_losses"] += 1
+    stats["win_rate"] = stats["total_wins"] / stats["total_matches"]
+
+    if score is not None:
+        old_total = stats["avg_score"] * (stats["total_matches"] - 1)
+        stats["avg_score"] = (old_total + score) / stats["total_matches"]
+
+    # Simple ELO-like adjustment
+    actual_score = 1.0 if won else 0.0
+    stats["skill_rating"] += K_FACTOR * (actual_score - EXPECTED_SCORE)
+
+
+def _get_synergy(synergies: dict[SynergyKey, Row], key: SynergyKey) -> Row:
+    """Get the synergy row of a pair of players, creating it when missing."""
+    if (synergy := synergies.get(key)) is None:
+        player1_id, player2_id, game_id = key
+        synergy = synergies[key] = new_row(PlayerSynergy, player1_id=player1_id, player2_id=player2_id, game_id=game_id)
+    return synergy
+
+
+def new_row(model: type[BaseModel], **values: Any) -> Row:  # noqa: ANN401
+    """Get the column values of a new row, with the defaults of the model."""
+    defaults = {name: field.get_default(call_default_factory=True) for name, field in model.model_fields.items()}
+    return defaults | values
+
+
+def pair_key(player1_id: int, player2_id: int, game_id: int) -> SynergyKey:
+    """Get the synergy key of a pair of players, which stores the lower id first."""
+    p1, p2 = sorted((player1_id, player2_id))
+    return p1, p2, game_id
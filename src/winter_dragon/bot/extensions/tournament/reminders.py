@@ -0,0 +1,231 @@
+"""Scheduler for tournament signup reminders.
+
+Each reminder window gets an exact fire time when a signup is created, stored in TournamentSignupReminder,
+and the scheduler sleeps until the next one is due instead of polling.
+A reminder is claimed in the database before it is sent, so a restart never sends it twice.
+Windows that already passed when a signup is scheduled get no reminder.
+Reminders missed while the bot was down are only sent within a grace period of their fire time,
+so a reminder never says a tournament starts in a day when it starts in a few hours.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, NamedTuple, Protocol
+
+import discord
+from herogold.log import LoggerMixin
+from sqlalchemy import delete, func, update
+from sqlmodel import Session, col, select
+
+from winter_dragon.database.tables import TournamentSignupReminder
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+
+REMINDER_WINDOWS = {
+    timedelta(days=1): "1 day",
+    timedelta(hours=2): "2 hours",
+}
+"""Label of each reminder, by how long before the tournament it fires."""
+
+
+def as_utc(moment: datetime) -> datetime:
+    """Get a datetime in UTC, treating naive ones as UTC already, as the database returns them."""
+    return moment.replace(tzinfo=UTC) if moment.tzinfo is None else moment.astimezone(UTC)
+
+
+class Reminder(NamedTuple):
+    """A reminder that is due to be sent."""
+
+    reminder_id: int
+    event_id: int
+    lead: timedelta
+    fire_at: datetime
+
+    @property
+    def start_time(self) -> datetime:
+        """Get when the tournament starts."""
+        return self.fire_at + self.lead
+
+
+class ReminderStore(Protocol):
+    """Durable storage of reminder fire times."""
+
+    def schedule(self, event_id: int, fire_times: dict[timedelta, datetime]) -> None:
+        """Replace the pending reminders of a signup. Reminders that already fired are kept."""
+        ...
+
+    def cancel(self, event_id: int) -> None:
+        """Remove every reminder of a signup."""
+        ...
+
+    def due(self, now: datetime) -> list[Reminder]:
+        """Get the pending reminders whose fire time passed, earliest first."""
+        ...
+
+    def next_fire_time(self) -> datetime | None:
+        """Get the earliest fire time of the pending reminders."""
+        ...
+
+    def claim(self, reminder_id: int, now: datetime) -> bool:
+        """Mark a pending reminder as fired. Returns False if it already fired."""
+        ...
+
+
+class DatabaseReminderStore:
+    """ReminderStore backed by the TournamentSignupReminder table."""
+
+    def __init__(self, session: Session) -> None:
+        """Initialize the store with a database session."""
+        self.session = session
+
+    def schedule(self, event_id: int, fire_times: dict[timedelta, datetime]) -> None:
+        """Replace the pending reminders of a signup. Reminders that already fired are kept."""
+        self.session.exec(
+            delete(TournamentSignupReminder).where(
+                col(TournamentSignupReminder.event_id) == event_id,
+                col(TournamentSignupReminder.fired_at).is_(None),
+            ),
+        )
+        fired = set(
+            self.session.exec(
+                select(TournamentSignupReminder.lead_seconds).where(TournamentSignupReminder.event_id == event_id),
+            ).all(),
+        )
+        self.session.add_all(
+            TournamentSignupReminder(event_id=event_id, lead_seconds=int(lead.total_seconds()), fire_at=fire_at)
+            for lead, fire_at in fire_times.items()
+            if int(lead.total_seconds()) not in fired
+        )
+        self.session.commit()
+
+    def cancel(self, event_id: int) -> None:
+        """Remove every reminder of a signup."""
+        self.session.exec(delete(TournamentSignupReminder).where(col(TournamentSignupReminder.event_id) == event_id))
+        self.session.commit()
+
+    def due(self, now: datetime) -> list[Reminder]:
+        """Get the pending reminders whose fire time passed, earliest first."""
+        rows = self.session.exec(
+            select(TournamentSignupReminder)
+            .where(col(TournamentSignupReminder.fired_at).is_(None))
+            .where(col(TournamentSignupReminder.fire_at) <= now)
+            .order_by(col(TournamentSignupReminder.fire_at)),
+        ).all()
+        return [
+            Reminder(row.id, row.event_id, timedelta(seconds=row.lead_seconds), as_utc(row.fire_at))  # pyright: ignore[reportArgumentType]
+            for row in rows
+        ]
+
+    def next_fire_time(self) -> datetime | None:
+        """Get the earliest fire time of the pending reminders."""
+        fire_at = self.session.exec(
+            select(func.min(TournamentSignupReminder.fire_at)).where(col(TournamentSignupReminder.fired_at).is_(None)),
+        ).one()
+        return as_utc(fire_at) if fire_at is not None else None
+
+    def claim(self, reminder_id: int, now: datetime) -> bool:
+        """Mark a pending reminder as fired. Returns False if it already fired."""
+        result = self.session.exec(
+            update(TournamentSignupReminder)
+            .where(col(TournamentSignupReminder.id) == reminder_id, col(TournamentSignupReminder.fired_at).is_(None))
+            .values(fired_at=now),
+        )
+        self.session.commit()
+        return result.rowcount == 1
+
+
+class ReminderScheduler(LoggerMixin):
+    """Sends signup reminders at their fire times."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        store: ReminderStore,
+        send: Callable[[Reminder], Awaitable[None]],
+        *,
+        windows: Iterable[timedelta] = REMINDER_WINDOWS,
+        clock: Callable[[], datetime] = lambda: datetime.now(UTC),
+        max_sleep: float = 3600,
+        grace: timedelta = timedelta(minutes=15),
+    ) -> None:
+        """Initialize the scheduler. Call start() to send reminders as they are due."""
+        self.store = store
+        self.send = send
+        self.windows = list(windows)
+        self.clock = clock
+        self.max_sleep = max_sleep
+        """Longest time to sleep before checking the store again, in case it was changed elsewhere."""
+        self.grace = grace
+        """Longest a reminder may be late, after which it is skipped."""
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def schedule(self, event_id: int, start_time: datetime) -> None:
+        """Schedule the reminders of a signup, replacing those pending. Windows that already passed are left out."""
+        start_time = as_utc(start_time)
+        now = self.clock()
+        self.store.schedule(event_id, {lead: start_time - lead for lead in self.windows if start_time - lead >= now})
+        self._wake.set()
+
+    def cancel(self, event_id: int) -> None:
+        """Cancel the reminders of a signup."""
+        self.store.cancel(event_id)
+        self._wake.set()
+
+    async def run_due(self) -> list[Reminder]:
+        """Send the reminders that are due. Returns those sent."""
+        now = self.clock()
+        due = self.store.due(now)
+        shortest: dict[int, timedelta] = {}
+        for reminder in due:
+            shortest[reminder.event_id] = min(shortest.get(reminder.event_id, reminder.lead), reminder.lead)
+
+        sent: list[Reminder] = []
+        for reminder in due:
+            if not self.store.claim(reminder.reminder_id, now):
+                continue
+            if reminder.lead > shortest[reminder.event_id] or now - reminder.fire_at > self.grace:
+                self.logger.info(f"Skipping missed reminder {reminder}")
+                continue
+            try:
+                await self.send(reminder)
+            except discord.DiscordException:
+                self.logger.exception(f"Failed to send reminder {reminder}")
+                continue
+            sent.append(reminder)
+        return sent
+
+    def next_delay(self) -> float | None:
+        """Get the seconds until the next reminder is due, or None when none is pending."""
+        if (fire_at := self.store.next_fire_time()) is None:
+            return None
+        return max((fire_at - self.clock()).total_seconds(), 0)
+
+    def start(self) -> None:
+        """Start sending reminders as they are due."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop sending reminders."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await self.run_due()
+                delay = self.next_delay()
+            except Exception:
+                self.logger.exception("Failed to send due reminders")
+                delay = None
+            timeout = self.max_sleep if delay is None else min(delay, self.max_sleep)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout)
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
 
 import discord
 from discord import app_commands
@@ -10,7 +10,11 @@ from discord.ui import Button, View
 from sqlmodel import select
 
 from winter_dragon.bot.core.cogs import Cog, GroupCog
-from winter_dragon.bot.core.tasks import loop
+from winter_dragon.bot.extensions.tournament.reminders import (
+    REMINDER_WINDOWS,
+    DatabaseReminderStore,
+    ReminderScheduler,
+)
 from winter_dragon.database.tables import (
     TournamentSignupConfig,
     TournamentSignupEvent,
@@ -18,6 +22,12 @@ from winter_dragon.database.tables import (
 )
 
 
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from winter_dragon.bot.extensions.tournament.reminders import Reminder
+
+
 class TournamentJoinButton(Button):
     """Button that allows users to join a tournament signup."""
 
@@ -79,16 +89,16 @@ class TournamentSignup(GroupCog, auto_load=True):
 
     def __init__(self, **kwargs: dict) -> None:
         super().__init__(**kwargs)
+        self.reminders = ReminderScheduler(DatabaseReminderStore(self.session), self.send_due_reminder)
         self.logger.info("TournamentSignup cog initialized")
 
     async def cog_load(self) -> None:
         await super().cog_load()
         self.restore_signup_views()
-        self.signup_reminder_loop.start()
+        self.reminders.start()
 
     async def cog_unload(self) -> None:
-        if self.signup_reminder_loop.is_running():
-            self.signup_reminder_loop.stop()
+        self.reminders.stop()
         await super().cog_unload()
 
     def restore_signup_views(self) -> None:
@@ -133,6 +143,8 @@ class TournamentSignup(GroupCog, auto_load=True):
         )
         self.session.add(event_record)
         self.session.commit()
+        if event_record.start_time is not None:
+            self.reminders.schedule(event_record.id, event_record.start_time)
 
         embed = self.build_signup_embed(event_record, guild)
         view = TournamentJoinView(self, event_record.id)
@@ -146,6 +158,22 @@ class TournamentSignup(GroupCog, auto_load=True):
         except discord.DiscordException:
             self.logger.exception("Failed to send tournament signup announcement for %s", event.name)
 
+    @Cog.listener()
+    async def on_guild_scheduled_event_update(self, before: discord.ScheduledEvent, after: discord.ScheduledEvent) -> None:
+        """Reschedule the reminders of a signup when its scheduled event is moved."""
+        start_time = self.get_event_start_time(after)
+        if start_time is None or start_time == self.get_event_start_time(before):
+            return
+        signup_event = self.session.exec(
+            select(TournamentSignupEvent).where(TournamentSignupEvent.scheduled_event_id == after.id)
+        ).first()
+        if signup_event is None:
+            return
+        signup_event.start_time = start_time
+        self.session.add(signup_event)
+        self.session.commit()
+        self.reminders.schedule(signup_event.id, start_time)
+
     @Cog.listener()
     async def on_guild_scheduled_event_delete(self, event: discord.ScheduledEvent) -> None:
         """Remove signup records when a scheduled event is deleted."""
@@ -153,6 +181,7 @@ class TournamentSignup(GroupCog, auto_load=True):
             select(TournamentSignupEvent).where(TournamentSignupEvent.scheduled_event_id == event.id)
         ).first()
         if signup_event is not None:
+            self.reminders.cancel(signup_event.id)
             self.session.delete(signup_event)
             self.session.commit()
 
@@ -339,29 +368,11 @@ class TournamentSignup(GroupCog, auto_load=True):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    @loop(hours=1)
-    async def signup_reminder_loop(self) -> None:
-        """Send reminders for upcoming tournament signups."""
-        now = datetime.now(UTC)
-        signup_events = self.session.exec(
-            select(TournamentSignupEvent).where(TournamentSignupEvent.start_time is not None)
-        ).all()
-
-        for signup_event in signup_events:
-            if signup_event.start_time is None:
-                continue
-
-            lead_time = signup_event.start_time - now
-            if signup_event.reminder_one_day_sent is False and timedelta(hours=23) < lead_time <= timedelta(days=1):
-                await self.send_reminder(signup_event, "1 day")
-                signup_event.reminder_one_day_sent = True
-                self.session.add(signup_event)
-            elif signup_event.reminder_two_hour_sent is False and timedelta(hours=1) < lead_time <= timedelta(hours=2):
-                await self.send_reminder(signup_event, "2 hours")
-                signup_event.reminder_two_hour_sent = True
-                self.session.add(signup_event)
-
-        self.session.commit()
+    async def send_due_reminder(self, reminder: Reminder) -> None:
+        """Send a reminder that is due, if its signup still exists."""
+        signup_event = self.get_signup_event(reminder.event_id)
+        if signup_event is not None:
+            await self.send_reminder(signup_event, REMINDER_WINDOWS.get(reminder.lead, str(reminder.lead)))
 
     async def send_reminder(self, signup_event: TournamentSignupEvent, window_label: str) -> None:
         """Send a reminder message for an upcoming tournament."""
@@ -0,0 +1,238 @@
+"""Tests for the team composition index, checking it against aggregates recomputed from the recorded matches."""
+
+from __future__ import annotations
+
+import random
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from sqlalchemy import Engine, Integer, MetaData, create_engine, event, text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.bot.extensions.tournament.compositions import CompositionIndex
+from winter_dragon.database.migrations.runner import Operations
+from winter_dragon.database.tables import Games, Users
+from winter_dragon.database.tables.matchmaking import TeamComposition, TeamCompositionPlayer
+from winter_dragon.database.tables.matchmaking.team_composition import roster_hash
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+PLAYERS = 12
+GAMES = 2
+MATCHES = 300
+HASHED_ROSTERS = 100_000
+TEAM_SIZE = 5
+STATEMENT_COMPOSITIONS = 10_000
+BENCHMARK_COMPOSITIONS = 1_000_000
+BENCHMARK_QUERIES = 1_000
+MAX_STATEMENTS = 2
+QUERY_BUDGET_SECONDS = 0.005
+
+
+def make_schema() -> MetaData:
+    """Copy the composition tables, with ids SQLite autoincrements.
+
+    SQLite can't autoincrement part of a composite primary key, so the ids of composition players are left empty.
+    """
+    schema = MetaData()
+    for model in (Users, Games, TeamComposition, TeamCompositionPlayer):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+        if len(table.primary_key.columns) > 1:
+            table.c.id.autoincrement = False
+            table.c.id.nullable = True
+    return schema
+
+
+def make_engine(schema: MetaData | None = None) -> Engine:
+    """Create an in-memory database with the composition tables."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    (schema or make_schema()).create_all(engine)
+    return engine
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[list[str]]:
+    """Capture the SQL of the statements executed within the block."""
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:  # noqa: ANN401
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def snapshot(session: Session) -> dict[tuple[int, frozenset[int]], tuple[int, int, int, float, float]]:
+    """Get the results of every composition, by game and players."""
+    players: dict[int, set[int]] = {}
+    for composition_id, user_id in session.exec(select(TeamCompositionPlayer.composition_id, TeamCompositionPlayer.user_id)):
+        players.setdefault(composition_id, set()).add(user_id)
+    return {
+        (row.game_id, frozenset(players[row.id])): (  # pyright: ignore[reportArgumentType]
+            row.times_played,
+            row.wins,
+            row.losses,
+            round(row.win_rate, 9),
+            round(row.avg_team_score, 9),
+        )
+        for row in session.exec(select(TeamComposition))
+    }
+
+
+def test_roster_hash() -> None:
+    """Rosters hash the same in any order, and different rosters never share a hash."""
+    assert roster_hash([3, 1, 2]) == roster_hash([1, 2, 3]) == roster_hash((2, 3, 1))
+    assert roster_hash([1, 23]) != roster_hash([12, 3])
+    assert roster_hash([1, 2]) != roster_hash([1, 2, 3])
+    assert len(roster_hash([])) == len(roster_hash([2**63 - 1] * 10))
+
+    rng = random.Random(43)
+    rosters = {frozenset(rng.sample(range(1, 1000), rng.randint(1, 5))) for _ in range(HASHED_ROSTERS)}
+    assert len({roster_hash(roster) for roster in rosters}) == len(rosters)
+
+
+def test_record() -> None:
+    """Matches count towards one composition per roster and game, however the players are ordered."""
+    with Session(make_engine()) as session:
+        index = CompositionIndex(session)
+        index.record(1, [[1, 2], [3, 4]], 0, [10, 4])
+        index.record(1, [[4, 3], [2, 1]], 0, [6])
+        index.record(2, [[2, 1], [3, 4]], -1)
+
+        assert snapshot(session) == {
+            (1, frozenset({1, 2})): (2, 1, 1, 0.5, 5.0),
+            (1, frozenset({3, 4})): (2, 1, 1, 0.5, 5.0),
+            (2, frozenset({1, 2})): (1, 0, 1, 0.0, 0.0),
+            (2, frozenset({3, 4})): (1, 0, 1, 0.0, 0.0),
+        }
+        composition = index.lookup(1, [2, 1])
+        assert composition is not None
+        assert (composition.times_played, composition.wins) == (2, 1)
+        assert index.lookup(1, [1, 3]) is None
+        assert index.lookup(1, [1, 2, 3]) is None
+
+
+def test_record_matches_recomputation() -> None:
+    """Aggregates recorded match by match equal ones recomputed from every match."""
+    rng = random.Random(44)
+    expected: dict[tuple[int, frozenset[int]], list[Any]] = {}
+    with Session(make_engine()) as session:
+        index = CompositionIndex(session)
+        for _ in range(MATCHES):
+            team_size = rng.randint(1, 3)
+            players = rng.sample(range(1, PLAYERS + 1), team_size * 2)
+            teams = [players[:team_size], players[team_size:]]
+            game_id, winner, scores = rng.randint(1, GAMES), rng.randrange(-1, 2), [rng.randint(0, 50) for _ in teams]
+            index.record(game_id, teams, winner, scores)
+            for team_idx, team in enumerate(teams):
+                expected.setdefault((game_id, frozenset(team)), []).append((team_idx == winner, scores[team_idx]))
+
+        assert snapshot(session) == {
+            key: (
+                len(results),
+                sum(won for won, _ in results),
+                sum(not won for won, _ in results),
+                round(sum(won for won, _ in results) / len(results), 9),
+                round(sum(score for _, score in results) / len(results), 9),
+            )
+            for key, results in expected.items()
+        }
+
+
+def test_migration() -> None:
+    """Existing compositions are hashed, and compositions of the same roster are merged."""
+    schema = make_schema()
+    engine = make_engine(schema)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_teamcomposition_game_id_roster_hash"))
+        connection.execute(text("ALTER TABLE teamcomposition DROP COLUMN roster_hash"))
+        connection.execute(
+            text(
+                "INSERT INTO teamcomposition (id, game_id, times_played, wins, losses, win_rate, avg_team_score) VALUES"
+                " (1, 1, 2, 2, 0, 1.0, 10.0), (2, 1, 1, 0, 1, 0.0, 4.0), (3, 2, 1, 1, 0, 1.0, 1.0), (4, 1, 1, 0, 1, 0.0, 0.0)",
+            ),
+        )
+        connection.execute(
+            text(
+                "INSERT INTO teamcompositionplayer (composition_id, user_id) VALUES"
+                " (1, 1), (1, 2), (2, 2), (2, 1), (3, 1), (3, 2), (4, 3)",
+            ),
+        )
+
+    merge = import_module("winter_dragon.database.migrations.versions.rev_0005_team_composition_roster_hash")
+    with engine.begin() as connection:
+        merge.upgrade(Operations(connection, schema))
+    index = import_module("winter_dragon.database.migrations.versions.rev_0006_unique_team_composition_rosters")
+    with engine.connect() as connection:
+        index.upgrade(Operations(connection.execution_options(isolation_level="AUTOCOMMIT"), schema))
+
+    with Session(engine) as session:
+        assert snapshot(session) == {
+            (1, frozenset({1, 2})): (3, 2, 1, round(2 / 3, 9), 8.0),
+            (2, frozenset({1, 2})): (1, 1, 0, 1.0, 1.0),
+            (1, frozenset({3})): (1, 0, 1, 0.0, 0.0),
+        }
+        assert CompositionIndex(session).lookup(1, [2, 1]).id == 1  # pyright: ignore[reportOptionalMemberAccess]
+
+
+def record_compositions(db: Engine, compositions: int) -> list[range]:
+    """Record compositions of distinct rosters in the first game. Returns their rosters."""
+    rosters = [range(i * TEAM_SIZE, (i + 1) * TEAM_SIZE) for i in range(compositions)]
+    with db.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO teamcomposition (game_id, roster_hash, times_played, wins, losses, win_rate, avg_team_score)"
+            " VALUES (1, ?, 1, 1, 0, 1.0, 0.0)",
+            [(roster_hash(roster),) for roster in rosters],
+        )
+    return rosters
+
+
+def test_statements_per_match() -> None:
+    """Lookups and recording a match take a constant number of statements, however many compositions are recorded."""
+    rng = random.Random(45)
+    db = make_engine()
+    rosters = record_compositions(db, STATEMENT_COMPOSITIONS)
+
+    with Session(db) as session:
+        index = CompositionIndex(session)
+        for _ in range(BENCHMARK_QUERIES):
+            team1, team2 = (rng.sample(rosters[rng.randrange(STATEMENT_COMPOSITIONS)], TEAM_SIZE) for _ in range(2))
+            with count_statements(db) as statements:
+                composition = index.lookup(1, team1)
+                index.record(1, [team1, team2], 0)
+            assert len(statements) <= 1 + MAX_STATEMENTS
+            assert composition is not None
+            assert composition.roster_hash == roster_hash(team1)
+
+        assert session.exec(select(TeamCompositionPlayer)).first() is None
+
+
+@pytest.mark.benchmark
+def test_1m_compositions() -> None:
+    """With a million recorded compositions, a lookup and recording a match stay within a few milliseconds."""
+    rng = random.Random(45)
+    db = make_engine()
+    rosters = record_compositions(db, BENCHMARK_COMPOSITIONS)
+
+    with Session(db) as session:
+        index = CompositionIndex(session)
+        durations: list[float] = []
+        for _ in range(BENCHMARK_QUERIES):
+            team1, team2 = (rng.sample(rosters[rng.randrange(BENCHMARK_COMPOSITIONS)], TEAM_SIZE) for _ in range(2))
+            start = time.perf_counter()
+            index.lookup(1, team1)
+            index.record(1, [team1, team2], 0)
+            durations.append(time.perf_counter() - start)
+    durations.sort()
+    assert durations[len(durations) // 2] < QUERY_BUDGET_SECONDS
@@ -0,0 +1,278 @@
+"""Tests for syncing Clash tournaments to scheduled events, against a fake Riot API and fake guilds."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+
+import discord
+import pytest
+
+from winter_dragon.bot.extensions.games.riot_clash_api import (
+    ClashPhase,
+    ClashPhaseTiming,
+    ClashTournament,
+    Platform,
+    RiotClashAPIError,
+)
+from winter_dragon.bot.extensions.tournament.event_sync import (
+    ClashEvent,
+    EventSyncEngine,
+    GuildSyncState,
+    diff_events,
+    event_name,
+)
+
+
+NOW = datetime(2025, 6, 1, tzinfo=UTC)
+GUILD_COUNT = 30
+MAX_CONCURRENCY = 4
+CALL_DELAY = 0.01
+SLOW_GUILD_DELAY = 0.5
+
+
+class FakeResponse:
+    """HTTP response for building discord exceptions."""
+
+    status = 500
+    reason = "Internal Server Error"
+
+
+def tournament(tournament_id: int, days: float, name: str = "Clash") -> ClashTournament:
+    """Create a tournament whose registration starts some days from now."""
+    start = NOW + timedelta(days=days)
+    return ClashTournament(tournament_id, f"{name} {tournament_id}", [ClashPhaseTiming(ClashPhase.REGISTRATION, start)])
+
+
+def event_of(event_id: int, clash: ClashTournament) -> ClashEvent:
+    """Create the event a sync would create for a tournament."""
+    assert clash.start_time is not None
+    return ClashEvent(event_id, clash.tournament_id, event_name(clash), clash.start_time, clash.event_description())
+
+
+class FakeRiot:
+    """TournamentSource with fixed tournaments per region, counting fetches."""
+
+    def __init__(self, tournaments: dict[Platform, list[ClashTournament]]) -> None:
+        """Initialize the source with the tournaments of each region."""
+        self.tournaments = tournaments
+        self.fetches: dict[Platform, int] = {}
+        self.failing: set[Platform] = set()
+        self.broken: set[Platform] = set()
+        """Regions answering with tournaments that can't be parsed."""
+
+    async def get_tournaments(self, platform: Platform) -> list[ClashTournament]:
+        """Get the tournaments of a region, after a delay."""
+        self.fetches[platform] = self.fetches.get(platform, 0) + 1
+        await asyncio.sleep(CALL_DELAY)
+        if platform in self.failing:
+            msg = "Rate limited"
+            raise RiotClashAPIError(msg)
+        if platform in self.broken:
+            msg = "'UNKNOWN' is not a valid ClashPhase"
+            raise ValueError(msg)
+        return self.tournaments.get(platform, [])
+
+
+class FakeGuilds:
+    """EventBackend that keeps the events of guilds in memory, tracking how many guilds are handled at once."""
+
+    def __init__(self, guild_ids: range) -> None:
+        """Initialize guilds without events."""
+        self.events: dict[int, dict[int, ClashEvent]] = {guild_id: {} for guild_id in guild_ids}
+        self.delays: dict[int, float] = {}
+        self.failing: set[tuple[int, int]] = set()
+        """(guild id, tournament id) pairs whose events can't be created."""
+        self.timing_out: set[int] = set()
+        """Guild ids whose events can't be fetched in time."""
+        self.fetched: list[int] = []
+        """Guild ids, in the order their events were fetched."""
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self._next_id = 1
+
+    async def fetch_events(self, guild_id: int) -> list[ClashEvent] | None:
+        """Get the events of a guild."""
+        if guild_id not in self.events:
+            return None
+        if guild_id in self.timing_out:
+            raise TimeoutError
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(guild_id, CALL_DELAY))
+        finally:
+            self.running -= 1
+        self.fetched.append(guild_id)
+        return list(self.events[guild_id].values())
+
+    async def create_event(self, guild_id: int, clash: ClashTournament) -> None:
+        """Create the event of a tournament."""
+        await self._call()
+        if (guild_id, clash.tournament_id) in self.failing:
+            raise discord.HTTPException(FakeResponse(), "Try again later")
+        self.events[guild_id][self._next_id] = event_of(self._next_id, clash)
+        self._next_id += 1
+
+    async def edit_event(self, guild_id: int, event_id: int, clash: ClashTournament) -> None:
+        """Change an event to match its tournament."""
+        await self._call()
+        self.events[guild_id][event_id] = event_of(event_id, clash)
+
+    async def delete_event(self, guild_id: int, event_id: int) -> None:
+        """Delete an event."""
+        await self._call()
+        del self.events[guild_id][event_id]
+
+    async def _call(self) -> None:
+        self.calls += 1
+        await asyncio.sleep(0)
+
+
+def test_diff_events() -> None:
+    """Missing events are created, changed ones edited, and duplicate or cancelled upcoming ones deleted."""
+    kept, moved, missing, cancelled, past = (
+        tournament(1, 1),
+        tournament(2, 2),
+        tournament(3, 3),
+        tournament(4, 4),
+        tournament(5, -1),
+    )
+    events = [
+        event_of(10, kept),
+        event_of(11, kept),
+        event_of(12, tournament(2, 5)),
+        event_of(13, cancelled),
+        event_of(14, past),
+        event_of(15, tournament(6, -2)),
+    ]
+
+    diff = diff_events([kept, moved, missing, past], events, NOW)
+    assert diff.to_create == [missing]
+    assert diff.to_edit == [(12, moved)]
+    assert diff.to_delete == [11, 13]
+    assert diff_events([kept], [event_of(10, kept)], NOW) == ([], [], [])
+    assert diff_events([], events, NOW) == ([], [], [])
+
+
+def test_empty_region_keeps_events() -> None:
+    """A region answering without tournaments leaves the events of its guilds alone."""
+    clash = tournament(1, 1)
+    riot = FakeRiot({Platform.EUW1: [clash]})
+    guilds = FakeGuilds(range(2))
+    engine = EventSyncEngine(riot, guilds, max_concurrency=MAX_CONCURRENCY, clock=lambda: NOW)
+    platforms = dict.fromkeys(range(2), Platform.EUW1)
+
+    async def sync_twice() -> None:
+        await engine.sync(platforms)
+        riot.tournaments[Platform.EUW1] = []
+        states = await engine.sync(platforms)
+        assert states == dict.fromkeys(platforms, GuildSyncState(Platform.EUW1, NOW))
+        assert all([event.tournament_id for event in events.values()] == [1] for events in guilds.events.values())
+
+    asyncio.run(sync_twice())
+
+
+def test_sync_converges() -> None:
+    """Every guild ends up with one event per upcoming tournament of its region, fetched once per region."""
+    regions = [Platform.EUW1, Platform.NA1, Platform.KR]
+    riot = FakeRiot(
+        {
+            region: [tournament(index * 10 + offset, offset + 1, region) for offset in range(3)]
+            for index, region in enumerate(regions)
+        }
+    )
+    guilds = FakeGuilds(range(GUILD_COUNT))
+    guilds.events[0][100] = event_of(100, tournament(99, 2))
+    engine = EventSyncEngine(riot, guilds, max_concurrency=MAX_CONCURRENCY, clock=lambda: NOW)
+    platforms = {guild_id: regions[guild_id % len(regions)] for guild_id in range(GUILD_COUNT)}
+
+    async def sync_twice() -> None:
+        states = await engine.sync(platforms)
+        assert riot.fetches == dict.fromkeys(regions, 1)
+        for guild_id, platform in platforms.items():
+            expected = {clash.tournament_id for clash in riot.tournaments[platform]}
+            assert {event.tournament_id for event in guilds.events[guild_id].values()} == expected
+            assert states[guild_id] == GuildSyncState(platform, NOW, created=3, deleted=int(guild_id == 0))
+        assert engine.states == states
+
+        calls = guilds.calls
+        riot.tournaments[Platform.KR][0] = tournament(20, 5, "Rescheduled")
+        states = await engine.sync(platforms)
+        assert guilds.calls - calls == GUILD_COUNT // len(regions)
+        assert {state.edited for state in states.values()} == {0, 1}
+        assert sum(state.created + state.deleted for state in states.values()) == 0
+
+    asyncio.run(sync_twice())
+
+
+def test_failures_are_isolated() -> None:
+    """A failing region, guild or event only affects the guilds involved, and is recorded in their state."""
+    riot = FakeRiot({Platform.EUW1: [tournament(1, 1), tournament(2, 2)], Platform.NA1: [tournament(3, 1)]})
+    riot.failing.add(Platform.NA1)
+    guilds = FakeGuilds(range(3))
+    guilds.failing.add((1, 2))
+    engine = EventSyncEngine(riot, guilds, max_concurrency=MAX_CONCURRENCY, clock=lambda: NOW)
+
+    async def sync_twice() -> None:
+        states = await engine.sync({0: Platform.EUW1, 1: Platform.EUW1, 2: Platform.NA1, 3: Platform.EUW1})
+        assert states == {
+            0: GuildSyncState(Platform.EUW1, NOW, created=2),
+            1: GuildSyncState(Platform.EUW1, NOW, created=1, failed=1),
+            2: GuildSyncState(Platform.NA1, NOW, error="Unable to fetch tournaments"),
+            3: GuildSyncState(Platform.EUW1, NOW, error="Guild unavailable"),
+        }
+
+        guilds.failing.clear()
+        assert (await engine.sync({1: Platform.EUW1}))[1].created == 1
+        assert engine.states[1].failed == 0
+        assert engine.states[2].error is not None
+
+    asyncio.run(sync_twice())
+
+
+def test_unexpected_errors_are_isolated() -> None:
+    """Errors other than API errors, of a region or a guild, are recorded in the state of the guilds involved."""
+    riot = FakeRiot({Platform.EUW1: [tournament(1, 1)], Platform.NA1: [tournament(2, 1)]})
+    riot.broken.add(Platform.NA1)
+    guilds = FakeGuilds(range(3))
+    guilds.timing_out.add(1)
+    engine = EventSyncEngine(riot, guilds, max_concurrency=MAX_CONCURRENCY, clock=lambda: NOW)
+
+    states = asyncio.run(engine.sync({0: Platform.EUW1, 1: Platform.EUW1, 2: Platform.NA1}))
+
+    assert states[0] == GuildSyncState(Platform.EUW1, NOW, created=1)
+    assert states[1] == GuildSyncState(Platform.EUW1, NOW, error="Sync failed: TimeoutError()")
+    assert states[2] == GuildSyncState(Platform.NA1, NOW, error="Unable to fetch tournaments")
+
+
+def test_slow_guild() -> None:
+    """Guilds sync concurrently up to the limit, so a slow guild doesn't delay the others."""
+    riot = FakeRiot({Platform.EUW1: [tournament(1, 1)]})
+    guilds = FakeGuilds(range(GUILD_COUNT))
+    guilds.delays[0] = SLOW_GUILD_DELAY
+    engine = EventSyncEngine(riot, guilds, max_concurrency=MAX_CONCURRENCY, clock=lambda: NOW)
+
+    asyncio.run(engine.sync(dict.fromkeys(range(GUILD_COUNT), Platform.EUW1)))
+
+    assert guilds.max_running == MAX_CONCURRENCY
+    assert all(len(events) == 1 for events in guilds.events.values())
+    assert guilds.fetched[-1] == 0
+
+
+@pytest.mark.benchmark
+def test_slow_guild_duration() -> None:
+    """A sync with a slow guild takes about as long as that guild, not as long as every guild after it."""
+    riot = FakeRiot({Platform.EUW1: [tournament(1, 1)]})
+    guilds = FakeGuilds(range(GUILD_COUNT))
+    guilds.delays[0] = SLOW_GUILD_DELAY
+    engine = EventSyncEngine(riot, guilds, max_concurrency=MAX_CONCURRENCY, clock=lambda: NOW)
+
+    start = time.perf_counter()
+    asyncio.run(engine.sync(dict.fromkeys(range(GUILD_COUNT), Platform.EUW1)))
+    elapsed = time.perf_counter() - start
+
+    # One slot is taken by the slow guild, the others sync every other guild in the meantime.
+    assert elapsed < SLOW_GUILD_DELAY + CALL_DELAY * GUILD_COUNT / (MAX_CONCURRENCY - 1)
@@ -0,0 +1,311 @@
+"""Tests for the leaderboards, checking them against rankings recomputed from PlayerGameStats."""
+
+from __future__ import annotations
+
+import random
+import time
+from bisect import bisect_left
+from typing import Any
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import Engine, Integer, MetaData, create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.bot.extensions.tournament.leaderboard import Leaderboard, Standing
+from winter_dragon.bot.extensions.tournament.ratings import MatchResult, RatingEngine
+from winter_dragon.database.tables import Games, Users
+from winter_dragon.database.tables.matchmaking import PlayerGameStats, PlayerSynergy
+
+
+PLAYERS = 200
+GAMES = 2
+MATCHES = 300
+ROUND_TRIP_PLAYERS = 10_000
+BENCHMARK_PLAYERS = 1_000_000
+BENCHMARK_QUERIES = 1_000
+DATABASE_QUERIES = 20
+MIN_SPEEDUP = 5
+
+
+def make_engine() -> Engine:
+    """Create an in-memory database with the player statistics tables.
+
+    SQLite only autoincrements a lone INTEGER primary key, so the tables are created from copies with one.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    schema = MetaData()
+    for model in (Users, Games, PlayerGameStats, PlayerSynergy):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+    schema.create_all(engine)
+    return engine
+
+
+class SortedSet:
+    """Members ordered by score then member, like a Redis sorted set, sorted again on the first read after a write."""
+
+    def __init__(self) -> None:
+        """Initialize an empty set."""
+        self.scores: dict[bytes, float] = {}
+        self._order: list[tuple[float, bytes]] | None = []
+
+    @property
+    def order(self) -> list[tuple[float, bytes]]:
+        """Get the (score, member) pairs, lowest first."""
+        if self._order is None:
+            self._order = sorted((score, member) for member, score in self.scores.items())
+        return self._order
+
+    def add(self, mapping: dict[bytes, float]) -> None:
+        """Add members or change their scores."""
+        self.scores.update(mapping)
+        self._order = None
+
+    def reverse_rank(self, member: bytes) -> int | None:
+        """Get the position of a member, highest score first."""
+        if (score := self.scores.get(member)) is None:
+            return None
+        return len(self.order) - 1 - bisect_left(self.order, (score, member))
+
+
+class FakePipeline:
+    """Pipeline that queues commands for a fake Redis, and runs them on execute."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        """Initialize an empty pipeline."""
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Queue a command."""
+
+        def queue(*args: Any, **kwargs: Any) -> FakePipeline:  # noqa: ANN401
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> list[Any]:
+        """Run the queued commands."""
+        self.redis.round_trips += 1
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Redis that keeps sorted sets, hashes and strings in memory, optionally failing every command."""
+
+    def __init__(self) -> None:
+        """Initialize an empty Redis."""
+        self.keys: dict[str, Any] = {}
+        self.available = True
+        self.round_trips = 0
+
+    def __getattribute__(self, name: str) -> Any:  # noqa: ANN401
+        """Fail commands while unavailable."""
+        if not name.startswith("_") and name not in {"keys", "available", "round_trips"} and not self.available:
+            raise RedisConnectionError
+        return super().__getattribute__(name)
+
+    def pipeline(self, *, transaction: bool = True) -> FakePipeline:  # noqa: ARG002
+        """Create a pipeline."""
+        return FakePipeline(self)
+
+    def zadd(self, name: str, mapping: dict[str, float]) -> int:
+        """Add members to a sorted set."""
+        self.keys.setdefault(name, SortedSet()).add({member.encode(): score for member, score in mapping.items()})
+        return len(mapping)
+
+    def zrevrange(self, name: str, start: int, end: int, *, withscores: bool = False) -> list[Any]:
+        """Get members of a sorted set by position, highest score first."""
+        order = self.keys[name].order if name in self.keys else []
+        stop = len(order) - start
+        members = order[max(stop - (end - start + 1), 0) : stop][::-1]
+        return [(member, score) for score, member in members] if withscores else [member for _, member in members]
+
+    def zrevrank(self, name: str, member: str) -> int | None:
+        """Get the position of a member of a sorted set, highest score first."""
+        return self.keys[name].reverse_rank(member.encode()) if name in self.keys else None
+
+    def zscore(self, name: str, member: str) -> float | None:
+        """Get the score of a member of a sorted set."""
+        return self.keys[name].scores.get(member.encode()) if name in self.keys else None
+
+    def hset(self, name: str, *, mapping: dict[str, str]) -> int:
+        """Set fields of a hash."""
+        self.keys.setdefault(name, {}).update({key.encode(): value.encode() for key, value in mapping.items()})
+        return len(mapping)
+
+    def hget(self, name: str, key: str) -> bytes | None:
+        """Get a field of a hash."""
+        return self.keys.get(name, {}).get(key.encode())
+
+    def hmget(self, name: str, keys: list[bytes]) -> list[bytes | None]:
+        """Get fields of a hash."""
+        self.round_trips += 1
+        return [self.keys.get(name, {}).get(key) for key in keys]
+
+    def exists(self, *names: str) -> int:
+        """Count the keys that exist."""
+        return sum(name in self.keys for name in names)
+
+    def set(self, name: str, value: Any) -> bool:  # noqa: ANN401
+        """Set a string."""
+        self.keys[name] = value
+        return True
+
+    def delete(self, *names: str) -> int:
+        """Delete keys."""
+        return sum(self.keys.pop(name, None) is not None for name in names)
+
+    def rename(self, src: str, dst: str) -> bool:
+        """Rename a key."""
+        self.keys[dst] = self.keys.pop(src)
+        return True
+
+
+def recompute(session: Session, game_id: int) -> list[Standing]:
+    """Rank the players of a game from their PlayerGameStats, ordering equal ratings like Redis does."""
+    stats = sorted(
+        session.exec(select(PlayerGameStats).where(PlayerGameStats.game_id == game_id)),
+        key=lambda row: (row.skill_rating, str(row.user_id)),
+        reverse=True,
+    )
+    return [
+        Standing(
+            row.user_id,
+            rank,
+            row.skill_rating,
+            row.total_matches,
+            row.total_wins,
+            row.total_losses,
+            row.win_rate,
+            row.avg_score,
+        )
+        for rank, row in enumerate(stats, 1)
+    ]
+
+
+def record_matches(engine: RatingEngine, rng: random.Random, matches: int) -> None:
+    """Record random 1v1 up to 5v5 matches."""
+    for _ in range(matches):
+        team_size = rng.randint(1, 5)
+        players = rng.sample(range(1, PLAYERS + 1), team_size * 2)
+        scores = {user_id: rng.randint(0, 500) for user_id in players}
+        engine.record(
+            MatchResult(rng.randint(1, GAMES), [players[:team_size], players[team_size:]], rng.randrange(2), scores),
+        )
+
+
+def test_updates_match_recomputation() -> None:
+    """Standings updated as matches are recorded equal rankings recomputed from the stored statistics."""
+    rng = random.Random(42)
+    with Session(make_engine()) as session:
+        leaderboard = Leaderboard(FakeRedis(), session)  # pyright: ignore[reportArgumentType]
+        engine = RatingEngine(session, leaderboard)
+        for game_id in range(1, GAMES + 1):
+            assert leaderboard.top(game_id) == []
+        record_matches(engine, rng, MATCHES)
+
+        for game_id in range(1, GAMES + 1):
+            expected = recompute(session, game_id)
+            assert leaderboard.top(game_id, PLAYERS) == expected
+            assert leaderboard.top(game_id, 3) == expected[:3]
+            for standing in expected:
+                assert leaderboard.standing(game_id, standing.user_id) == standing
+        assert leaderboard.standing(1, PLAYERS + 1) is None
+
+
+def test_rebuild() -> None:
+    """Missing leaderboards are rebuilt from the stored statistics, and updates Redis missed are rebuilt later."""
+    rng = random.Random(43)
+    redis = FakeRedis()
+    with Session(make_engine()) as session:
+        record_matches(RatingEngine(session), rng, MATCHES)
+        leaderboard = Leaderboard(redis, session)  # pyright: ignore[reportArgumentType]
+        engine = RatingEngine(session, leaderboard)
+        assert leaderboard.top(1, PLAYERS) == recompute(session, 1)
+
+        redis.available = False
+        record_matches(engine, rng, 10)
+        top = leaderboard.top(1, 5)
+        assert [standing.skill_rating for standing in top] == [standing.skill_rating for standing in recompute(session, 1)[:5]]
+        standing = recompute(session, 1)[-1]
+        assert leaderboard.standing(1, standing.user_id) == standing._replace(
+            rank=1 + sum(other.skill_rating > standing.skill_rating for other in recompute(session, 1)),
+        )
+
+        redis.available = True
+        assert leaderboard.top(1, PLAYERS) == recompute(session, 1)
+        assert leaderboard.top(2, PLAYERS) == recompute(session, 2)
+
+        redis.delete(*redis.keys)
+        assert leaderboard.top(2, PLAYERS) == recompute(session, 2)
+
+
+def rate_players(db: Engine, players: int, rng: random.Random) -> None:
+    """Give players normally distributed ratings in the first game."""
+    with db.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO playergamestats (user_id, game_id, total_matches, total_wins, total_losses, win_rate, avg_score,"
+            " skill_rating) VALUES (?, 1, 1, 1, 0, 1.0, 0.0, ?)",
+            [(user_id, rng.gauss(1000, 200)) for user_id in range(players)],
+        )
+
+
+def test_round_trips() -> None:
+    """Top-N and rank queries take a constant number of round trips, and match the database queries used without Redis."""
+    rng = random.Random(44)
+    db = make_engine()
+    rate_players(db, ROUND_TRIP_PLAYERS, rng)
+    redis = FakeRedis()
+    with Session(db) as session:
+        leaderboard = Leaderboard(redis, session)  # pyright: ignore[reportArgumentType]
+        assert leaderboard.rebuild(1) == ROUND_TRIP_PLAYERS
+
+        redis.round_trips = 0
+        for _ in range(BENCHMARK_QUERIES):
+            top = leaderboard.top(1)
+            standing = leaderboard.standing(1, rng.randrange(ROUND_TRIP_PLAYERS))
+        assert redis.round_trips == BENCHMARK_QUERIES * 3
+
+        ratings = redis.keys["leaderboard:1:ratings"].scores
+        assert [entry.rank for entry in top] == list(range(1, 11))
+        assert top[0].skill_rating == max(ratings.values())
+        assert standing is not None
+        assert standing.rank == 1 + sum(rating > standing.skill_rating for rating in ratings.values())
+
+        redis.available = False
+        assert leaderboard.top(1) == top
+        assert leaderboard.standing(1, standing.user_id) == standing
+
+
+@pytest.mark.benchmark
+def test_1m_players() -> None:
+    """With a million players, top-N and rank queries are far faster than the database queries used without Redis.
+
+    Those count every higher rated player for a rank.
+    """
+    rng = random.Random(44)
+    db = make_engine()
+    rate_players(db, BENCHMARK_PLAYERS, rng)
+    redis = FakeRedis()
+    with Session(db) as session:
+        leaderboard = Leaderboard(redis, session)  # pyright: ignore[reportArgumentType]
+        leaderboard.rebuild(1)
+
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_QUERIES):
+            leaderboard.top(1)
+            standing = leaderboard.standing(1, rng.randrange(BENCHMARK_PLAYERS))
+        cached = (time.perf_counter() - start) / BENCHMARK_QUERIES
+        assert standing is not None
+
+        redis.available = False
+        start = time.perf_counter()
+        for _ in range(DATABASE_QUERIES):
+            leaderboard.top(1)
+            leaderboard.standing(1, standing.user_id)
+        database = (time.perf_counter() - start) / DATABASE_QUERIES
+    assert cached * MIN_SPEEDUP < database
@@ -0,0 +1,207 @@
+"""Tests for the rating engine, checking that recording matches one by one equals rebuilding from history."""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from sqlalchemy import Engine, Integer, MetaData, create_engine, event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.bot.extensions.tournament.ratings import MatchResult, RatingEngine
+from winter_dragon.database.tables import Games, Users
+from winter_dragon.database.tables.matchmaking import GameMatch, MatchPlayer, PlayerGameStats, PlayerSynergy
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+PLAYERS = 40
+GAMES = 2
+MATCHES = 300
+LOBBY_SIZE = 10
+BENCHMARK_MATCHES = 50
+MAX_STATEMENTS = 10
+RECORD_BUDGET_SECONDS = 0.1
+START = datetime(2025, 1, 1)  # noqa: DTZ001
+
+
+def make_engine() -> Engine:
+    """Create an in-memory database with the users, games and matchmaking tables.
+
+    SQLite only autoincrements a lone INTEGER primary key, so the tables are created from copies with one.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    schema = MetaData()
+    for model in (Users, Games, GameMatch, MatchPlayer, PlayerGameStats, PlayerSynergy):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+    schema.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Users(id=user_id) for user_id in range(1, PLAYERS + 1))
+        session.add_all(Games(id=game_id, name=f"game {game_id}") for game_id in range(1, GAMES + 1))
+        session.commit()
+    return engine
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[list[str]]:
+    """Capture the SQL of the statements executed within the block."""
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:  # noqa: ANN401
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def random_match(rng: random.Random) -> MatchResult:
+    """Create a random 1v1 up to 5v5, or a free for all, with scores for most players."""
+    if rng.random() < 0.2:
+        teams = [[user_id] for user_id in rng.sample(range(1, PLAYERS + 1), rng.randint(3, 6))]
+    else:
+        team_size = rng.randint(1, 5)
+        players = rng.sample(range(1, PLAYERS + 1), team_size * 2)
+        teams = [players[:team_size], players[team_size:]]
+    scores = {user_id: rng.randint(0, 500) for team in teams for user_id in team if rng.random() < 0.8}
+    return MatchResult(rng.randint(1, GAMES), teams, rng.randrange(len(teams)), scores)
+
+
+def store_match(session: Session, result: MatchResult, played: datetime) -> None:
+    """Store a match and its players, like recording a match result does."""
+    match = GameMatch(game_id=result.game_id, match_date=played, winning_team_id=result.winning_team_idx + 1)
+    session.add(match)
+    session.flush()
+    for team_idx, team in enumerate(result.teams):
+        session.add_all(
+            MatchPlayer(
+                match_id=match.id,  # pyright: ignore[reportArgumentType]
+                user_id=user_id,
+                team_number=team_idx + 1,
+                individual_score=(result.individual_scores or {}).get(user_id),
+                won=team_idx == result.winning_team_idx,
+            )
+            for user_id in team
+        )
+    session.commit()
+
+
+def snapshot(session: Session) -> tuple[dict[tuple[int, ...], tuple[Any, ...]], dict[tuple[int, ...], tuple[Any, ...]]]:
+    """Get every statistic and synergy, by key."""
+    stats = {
+        (row.user_id, row.game_id): (
+            row.total_matches,
+            row.total_wins,
+            row.total_losses,
+            row.win_rate,
+            row.avg_score,
+            row.skill_rating,
+        )
+        for row in session.exec(select(PlayerGameStats))
+    }
+    synergies = {
+        (row.player1_id, row.player2_id, row.game_id): (
+            row.matches_as_teammates,
+            row.wins_as_teammates,
+            row.teammate_synergy,
+            row.matches_as_opponents,
+            row.player1_wins_vs_player2,
+            row.rivalry_factor,
+        )
+        for row in session.exec(select(PlayerSynergy))
+    }
+    return stats, synergies
+
+
+def test_record() -> None:
+    """A 2v2 updates the stats of each player, and the synergy of each teammate and opponent pair."""
+    with Session(make_engine()) as session:
+        RatingEngine(session).record(MatchResult(1, [[3, 1], [2, 4]], 0, {1: 100, 2: 50}))
+        stats, synergies = snapshot(session)
+
+    assert stats == {
+        (1, 1): (1, 1, 0, 1.0, 100.0, 1016.0),
+        (3, 1): (1, 1, 0, 1.0, 0.0, 1016.0),
+        (2, 1): (1, 0, 1, 0.0, 50.0, 984.0),
+        (4, 1): (1, 0, 1, 0.0, 0.0, 984.0),
+    }
+    assert synergies == {
+        (1, 3, 1): (1, 1, 1.0, 0, 0, 0.0),
+        (2, 4, 1): (1, 0, 0.0, 0, 0, 0.0),
+        (2, 3, 1): (0, 0, 0.0, 1, 0, 0.0),
+        (3, 4, 1): (0, 0, 0.0, 1, 1, 1.0),
+        (1, 2, 1): (0, 0, 0.0, 1, 1, 1.0),
+        (1, 4, 1): (0, 0, 0.0, 1, 1, 1.0),
+    }
+
+
+def test_incremental_matches_rebuild() -> None:
+    """Recording matches one at a time or in batches gives the same statistics as replaying the history."""
+    rng = random.Random(41)
+    with Session(make_engine()) as session:
+        engine = RatingEngine(session)
+        pending: list[MatchResult] = []
+        for played in range(MATCHES):
+            result = random_match(rng)
+            store_match(session, result, START + timedelta(minutes=played))
+            pending.append(result)
+            if rng.random() < 0.5:
+                engine.record(*pending)
+                pending.clear()
+        engine.record(*pending)
+        incremental = snapshot(session)
+
+        assert engine.rebuild() == MATCHES
+        assert snapshot(session) == incremental
+
+        engine.rebuild(1)
+        assert snapshot(session) == incremental
+
+
+def random_10v10(rng: random.Random) -> MatchResult:
+    """Create a 10v10 of random players."""
+    players = rng.sample(range(1, PLAYERS + 1), LOBBY_SIZE * 2)
+    return MatchResult(1, [players[:LOBBY_SIZE], players[LOBBY_SIZE:]], rng.randrange(2))
+
+
+def test_record_10v10() -> None:
+    """A 10v10 is loaded and written in a handful of statements, regardless of its 190 pairs."""
+    rng = random.Random(42)
+    db = make_engine()
+    with Session(db) as session:
+        engine = RatingEngine(session)
+        for _ in range(BENCHMARK_MATCHES):
+            with count_statements(db) as statements:
+                engine.record(random_10v10(rng))
+            assert len(statements) <= MAX_STATEMENTS
+
+        stats, synergies = snapshot(session)
+    assert sum(row[0] for row in stats.values()) == BENCHMARK_MATCHES * LOBBY_SIZE * 2
+    assert sum(row[0] + row[3] for row in synergies.values()) == BENCHMARK_MATCHES * math.comb(LOBBY_SIZE * 2, 2)
+
+
+@pytest.mark.benchmark
+def test_record_10v10_duration() -> None:
+    """Recording a 10v10 takes well under the time of a command."""
+    rng = random.Random(42)
+    with Session(make_engine()) as session:
+        engine = RatingEngine(session)
+        durations: list[float] = []
+        for _ in range(BENCHMARK_MATCHES):
+            result = random_10v10(rng)
+            start = time.perf_counter()
+            engine.record(result)
+            durations.append(time.perf_counter() - start)
+    durations.sort()
+    assert durations[len(durations) // 2] < RECORD_BUDGET_SECONDS
@@ -0,0 +1,221 @@
+"""Tests for the tournament signup reminder scheduler, against a database and a fake clock."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from importlib import import_module
+
+import discord
+from sqlalchemy import Engine, Integer, MetaData, create_engine, text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.bot.extensions.tournament.reminders import (
+    DatabaseReminderStore,
+    Reminder,
+    ReminderScheduler,
+)
+from winter_dragon.database.migrations.runner import Operations
+from winter_dragon.database.tables import TournamentSignupEvent, TournamentSignupReminder
+
+
+NOW = datetime(2025, 6, 1, tzinfo=UTC)
+DAY = timedelta(days=1)
+TWO_HOURS = timedelta(hours=2)
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at NOW."""
+        self.now = NOW
+
+    def __call__(self) -> datetime:
+        """Get the current time."""
+        return self.now
+
+
+class FakeResponse:
+    """HTTP response for building discord exceptions."""
+
+    status = 500
+    reason = "Internal Server Error"
+
+
+def make_schema() -> MetaData:
+    """Copy the signup tables, with ids SQLite autoincrements."""
+    schema = MetaData()
+    for model in (TournamentSignupEvent, TournamentSignupReminder):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+    return schema
+
+
+def make_engine(schema: MetaData | None = None) -> Engine:
+    """Create an in-memory database with the signup tables."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    (schema or make_schema()).create_all(engine)
+    return engine
+
+
+def make_scheduler(session: Session, clock: FakeClock, sent: list[Reminder]) -> ReminderScheduler:
+    """Create a scheduler that records the reminders it sends."""
+
+    async def send(reminder: Reminder) -> None:
+        sent.append(reminder)
+
+    return ReminderScheduler(DatabaseReminderStore(session), send, windows=[DAY, TWO_HOURS], clock=clock)
+
+
+def test_exact_fire_times() -> None:
+    """Each reminder is sent once, when its fire time comes, and the scheduler sleeps until the next one."""
+    clock, sent = FakeClock(), []
+    with Session(make_engine()) as session:
+        scheduler = make_scheduler(session, clock, sent)
+        assert scheduler.next_delay() is None
+        scheduler.schedule(1, NOW + timedelta(days=2))
+
+        assert scheduler.next_delay() == DAY.total_seconds()
+        clock.now += DAY - timedelta(seconds=1)
+        assert asyncio.run(scheduler.run_due()) == []
+        assert scheduler.next_delay() == 1
+
+        clock.now += timedelta(seconds=1)
+        assert [reminder.lead for reminder in asyncio.run(scheduler.run_due())] == [DAY]
+        assert asyncio.run(scheduler.run_due()) == []
+        assert scheduler.next_delay() == (DAY - TWO_HOURS).total_seconds()
+
+        clock.now = NOW + timedelta(days=2) - TWO_HOURS
+        assert [reminder.lead for reminder in asyncio.run(scheduler.run_due())] == [TWO_HOURS]
+        assert scheduler.next_delay() is None
+        assert [(reminder.event_id, reminder.start_time) for reminder in sent] == [(1, NOW + timedelta(days=2))] * 2
+
+
+def test_restart_sends_no_duplicates() -> None:
+    """A new scheduler over the same database doesn't send reminders again, even if it crashed while sending."""
+    clock, sent = FakeClock(), []
+    with Session(make_engine()) as session:
+        make_scheduler(session, clock, sent).schedule(1, NOW + DAY)
+        asyncio.run(make_scheduler(session, clock, sent).run_due())
+        assert len(sent) == 1
+
+        clock.now += DAY - TWO_HOURS
+        store = DatabaseReminderStore(session)
+        claimed = store.due(clock.now)
+        assert [store.claim(reminder.reminder_id, clock.now) for reminder in claimed] == [True]
+        assert asyncio.run(make_scheduler(session, clock, sent).run_due()) == []
+        assert not store.claim(claimed[0].reminder_id, clock.now)
+        assert len(sent) == 1
+
+
+def test_missed_reminders() -> None:
+    """After downtime, reminders are only sent within the grace period of their fire time."""
+    clock, sent = FakeClock(), []
+    with Session(make_engine()) as session:
+        scheduler = make_scheduler(session, clock, sent)
+        scheduler.schedule(1, NOW + timedelta(hours=25))
+        scheduler.schedule(2, NOW + timedelta(hours=30))
+
+        clock.now += timedelta(hours=23) + scheduler.grace
+        assert [(reminder.event_id, reminder.lead) for reminder in asyncio.run(scheduler.run_due())] == [(1, TWO_HOURS)]
+        clock.now += timedelta(hours=10)
+        assert asyncio.run(scheduler.run_due()) == []
+        assert scheduler.next_delay() is None
+        assert len(sent) == 1
+
+
+def test_late_signup() -> None:
+    """A signup created after a reminder window passed gets only the reminders still ahead."""
+    clock, sent = FakeClock(), []
+    with Session(make_engine()) as session:
+        scheduler = make_scheduler(session, clock, sent)
+        scheduler.schedule(1, NOW + timedelta(hours=20))
+
+        assert asyncio.run(scheduler.run_due()) == []
+        assert scheduler.next_delay() == timedelta(hours=18).total_seconds()
+        clock.now += timedelta(hours=18)
+        assert [reminder.lead for reminder in asyncio.run(scheduler.run_due())] == [TWO_HOURS]
+
+
+def test_failed_send() -> None:
+    """A reminder that fails to send isn't retried, and doesn't stop the others."""
+    clock, sent = FakeClock(), []
+    with Session(make_engine()) as session:
+        scheduler = make_scheduler(session, clock, sent)
+
+        async def send(reminder: Reminder) -> None:
+            if reminder.event_id == 1:
+                raise discord.HTTPException(FakeResponse(), "Try again later")  # pyright: ignore[reportArgumentType]
+            sent.append(reminder)
+
+        scheduler.send = send
+        scheduler.schedule(1, NOW + DAY)
+        scheduler.schedule(2, NOW + DAY)
+        assert [reminder.event_id for reminder in asyncio.run(scheduler.run_due())] == [2]
+        assert asyncio.run(scheduler.run_due()) == []
+
+
+def test_reschedule_and_cancel() -> None:
+    """Moving a tournament moves its pending reminders, and cancelling it removes them."""
+    clock, sent = FakeClock(), []
+    with Session(make_engine()) as session:
+        scheduler = make_scheduler(session, clock, sent)
+        scheduler.schedule(1, NOW + DAY)
+        asyncio.run(scheduler.run_due())
+
+        scheduler.schedule(1, NOW + timedelta(days=3))
+        assert scheduler.next_delay() == (timedelta(days=3) - TWO_HOURS).total_seconds()
+        scheduler.cancel(1)
+        assert scheduler.next_delay() is None
+        assert session.exec(select(TournamentSignupReminder)).first() is None
+        assert len(sent) == 1
+
+
+def test_run_loop() -> None:
+    """The running scheduler wakes up for newly scheduled reminders, and sleeps until they are due."""
+    clock, sent = FakeClock(), []
+    with Session(make_engine()) as session:
+        scheduler = make_scheduler(session, clock, sent)
+
+        async def run() -> None:
+            scheduler.start()
+            await asyncio.sleep(0.01)
+            clock.now += DAY
+            scheduler.schedule(1, NOW + timedelta(days=2, milliseconds=50))
+            await asyncio.sleep(0.01)
+            assert sent == []
+            clock.now += timedelta(milliseconds=50)
+            await asyncio.sleep(0.1)
+            scheduler.stop()
+
+        asyncio.run(run())
+        assert [reminder.lead for reminder in sent] == [DAY]
+
+
+def test_migration() -> None:
+    """Existing signups get their reminders, with those already sent marked as fired."""
+    schema = make_schema()
+    engine = make_engine(schema)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE tournamentsignupreminder"))
+        connection.execute(
+            text(
+                "INSERT INTO tournamentsignupevent"
+                " (id, guild_id, scheduled_event_id, start_time, reminder_one_day_sent, reminder_two_hour_sent, created_at)"
+                " VALUES (1, 1, 1, '2025-06-03 00:00:00', 1, 0, '2025-05-01 00:00:00'),"
+                " (2, 1, 2, NULL, 0, 0, '2025-05-01 00:00:00')",
+            ),
+        )
+
+    migration = import_module("winter_dragon.database.migrations.versions.rev_0007_tournament_signup_reminders")
+    with engine.begin() as connection:
+        migration.upgrade(Operations(connection, schema))
+
+    clock, sent = FakeClock(), []
+    clock.now = datetime(2025, 6, 2, 22, tzinfo=UTC)
+    with Session(engine) as session:
+        scheduler = make_scheduler(session, clock, sent)
+        assert [reminder.lead for reminder in asyncio.run(scheduler.run_due())] == [TWO_HOURS]
+        assert len(session.exec(select(TournamentSignupReminder)).all()) == 2
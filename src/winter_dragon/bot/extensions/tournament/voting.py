@@ -22,6 +22,7 @@ from discord import Interaction, app_commands
 from herogold.log import LoggerMixin
 
 from winter_dragon.bot.core.cogs import Cog
+from winter_dragon.bot.extensions.tournament.leaderboard import Leaderboard
 from winter_dragon.bot.extensions.tournament.matchmaking import MatchmakingSystem
 from winter_dragon.bot.extensions.tournament.models import TournamentVote
 from winter_dragon.bot.extensions.tournament.views import TournamentVotingView
@@ -46,7 +47,8 @@ class TournamentVoting(Cog, LoggerMixin):
 
         """
         super().__init__(bot=bot, **kwargs)
-        self.matchmaking = MatchmakingSystem()
+        self.leaderboard = Leaderboard()
+        self.matchmaking = MatchmakingSystem(leaderboard=self.leaderboard)
         self.active_votes: dict[int, TournamentVote] = {}  # message_id -> TournamentVote
 
         self.logger.info("TournamentVoting cog initialized")
@@ -394,16 +396,7 @@ class TournamentVoting(Cog, LoggerMixin):
 
         try:
             game_obj = Games.fetch_game_by_name(game)
-
-            from sqlmodel import select
-
-            from winter_dragon.database.tables.matchmaking.player_game_stats import PlayerGameStats
-
-            stats = self.matchmaking.session.exec(
-                select(PlayerGameStats)
-                .where(PlayerGameStats.user_id == target_user.id)
-                .where(PlayerGameStats.game_id == game_obj.id)
-            ).first()
+            stats = self.leaderboard.standing(game_obj.id, target_user.id)
 
             if not stats:
                 await interaction.followup.send(
@@ -421,6 +414,11 @@ class TournamentVoting(Cog, LoggerMixin):
 
             embed.set_thumbnail(url=target_user.display_avatar.url)
 
+            embed.add_field(
+                name="Rank",
+                value=f"#{stats.rank}",
+                inline=True,
+            )
             embed.add_field(
                 name="Matches Played",
                 value=str(stats.total_matches),
@@ -487,17 +485,7 @@ class TournamentVoting(Cog, LoggerMixin):
 
         try:
             game_obj = Games.fetch_game_by_name(game)
-
-            from sqlmodel import select
-
-            from winter_dragon.database.tables.matchmaking.player_game_stats import PlayerGameStats
-
-            top_players = self.matchmaking.session.exec(
-                select(PlayerGameStats)
-                .where(PlayerGameStats.game_id == game_obj.id)
-                .order_by(PlayerGameStats.skill_rating.desc())
-                .limit(limit)
-            ).all()
+            top_players = self.leaderboard.top(game_obj.id, limit)
 
             if not top_players:
                 await interaction.followup.send(
@@ -514,7 +502,8 @@ class TournamentVoting(Cog, LoggerMixin):
             )
 
             leaderboard_text = ""
-            for rank, stats in enumerate(top_players, 1):
+            for stats in top_players:
+                rank = stats.rank
                 medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
                 leaderboard_text += (
                     f"{medal} <@{stats.user_id}> - **{stats.skill_rating:.0f}** ({stats.total_wins}W-{stats.total_losses}L)\n"
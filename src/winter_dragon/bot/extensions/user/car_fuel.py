@@ -3,13 +3,11 @@
 from __future__ import annotations
 
 import discord
-import matplotlib.dates as mdates
 from discord import app_commands
-from matplotlib import pyplot as plt
 from sqlmodel import select
 
 from winter_dragon.bot.core.cogs import GroupCog
-from winter_dragon.bot.core.paths import IMG_DIR
+from winter_dragon.charts.figures import fuel_efficiency
 from winter_dragon.database.tables import CarFuels as DbFuel
 
 
@@ -52,32 +50,9 @@ class Fuel(GroupCog, auto_load=True):
         timestamps = [x.timestamp for x in fuels]
         efficiencies = [x.distance / x.amount for x in fuels]
 
-        # Create the plot
-        plt.figure(figsize=(10, 6))
-        plt.plot(timestamps, efficiencies, marker="o", linestyle="-", linewidth=2, markersize=6)
-        plt.xlabel("Date")
-        plt.ylabel("Efficiency (distance per unit)")
-        plt.title("Fuel Efficiency Over Time")
-        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.grid(visible=True, alpha=0.3)
-
-        # Save the plot
-        IMG_DIR.mkdir(parents=True, exist_ok=True)
-        efficiency_file = IMG_DIR / f"fuel_efficiency_{interaction.user.id}.png"
-        plt.savefig(efficiency_file)
-        plt.clf()
-        plt.close()
-
-        # Send the graph as a file attachment
         try:
-            file = discord.File(efficiency_file)
-            await interaction.followup.send(file=file, ephemeral=True)
+            png = await self.bot.charts.render(fuel_efficiency, timestamps, efficiencies)
+            await interaction.followup.send(file=discord.File(png, filename="fuel_efficiency.png"), ephemeral=True)
         except Exception:
             self.logger.exception("Error when creating fuel efficiency graph.")
             await interaction.followup.send("Could not create the efficiency graph.", ephemeral=True)
-        finally:
-            # Clean up the temporary file
-            if efficiency_file.exists():
-                efficiency_file.unlink()
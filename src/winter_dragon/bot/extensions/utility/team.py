@@ -129,7 +129,7 @@ class Team(GroupCog, auto_load=True):
 
     def get_teams_category(self, guild: Guild) -> CategoryChannel | None:
         """Find a category channel."""
-        channels = Channels.get_by_tag(self.session, Tags.TEAM_CATEGORY, guild.id)
+        channels = Channels.get_tagged(self.session, guild.id, Tags.TEAM_CATEGORY)
         if channels:
             channel = channels[0]
             return cast("CategoryChannel", self.bot.get_channel(channel.id))
@@ -156,7 +156,7 @@ class Team(GroupCog, auto_load=True):
 
     def get_teams_lobby(self, guild: Guild) -> VoiceChannel | None:
         """Find a lobby channel."""
-        if channels := Channels.get_by_tag(self.session, Tags.TEAM_LOBBY, guild.id):
+        if channels := Channels.get_tagged(self.session, guild.id, Tags.TEAM_LOBBY):
             channel = channels[0]
             return cast("VoiceChannel", self.bot.get_channel(channel.id))
         return None
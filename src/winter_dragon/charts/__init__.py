@@ -0,0 +1 @@
+"""Chart rendering, off the event loop."""
@@ -0,0 +1,54 @@
+"""Figure builders for the charts of commands.
+
+Builders take plain data and return a figure drawn with matplotlib's object-oriented API, never pyplot,
+whose global state would be shared by every chart drawn in the process.
+This module only imports matplotlib, so the worker processes rendering charts start quickly.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING, Any
+
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping, Sequence
+    from datetime import datetime
+
+
+def render_png(builder: Callable[..., Figure], *args: Any) -> bytes:  # noqa: ANN401
+    """Build a figure and render it as a PNG image."""
+    buffer = io.BytesIO()
+    builder(*args).savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def fuel_efficiency(timestamps: Sequence[datetime], efficiencies: Sequence[float]) -> Figure:
+    """Chart the distance traveled per unit of fuel over time."""
+    figure = Figure(figsize=(10, 6))
+    axes = figure.add_subplot()
+    axes.plot(timestamps, efficiencies, marker="o", linestyle="-", linewidth=2, markersize=6)
+    axes.set_xlabel("Date")
+    axes.set_ylabel("Efficiency (distance per unit)")
+    axes.set_title("Fuel Efficiency Over Time")
+    axes.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
+    axes.tick_params(axis="x", labelrotation=45)
+    figure.tight_layout()
+    axes.grid(visible=True, alpha=0.3)
+    return figure
+
+
+def system_metrics(timestamps: Sequence[float], series: Mapping[str, Sequence[float]]) -> Figure:
+    """Chart system metrics over time, one line per metric."""
+    figure = Figure()
+    axes = figure.add_subplot()
+    for label, values in series.items():
+        axes.plot(timestamps, values, label=label)
+    axes.set_xlabel("Time (seconds)")
+    axes.set_ylabel("Value")
+    axes.set_title("System Metrics Over Time")
+    axes.legend()
+    return figure
@@ -0,0 +1,92 @@
+"""Service rendering charts in worker processes.
+
+Figures are built and rendered to PNG in a process pool, so drawing never blocks the event loop,
+and concurrent charts never share matplotlib state. Renders are limited to a few at a time,
+identical requests in flight share one render, and recent images are cached by a hash of their builder and data.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from herogold.log import LoggerMixin
+
+from winter_dragon.charts.figures import render_png
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from concurrent.futures import Executor
+
+    from matplotlib.figure import Figure
+
+
+def dataset_hash(builder: Callable[..., Figure], args: tuple[Any, ...]) -> str:
+    """Get a key identifying the chart a builder draws from some data."""
+    return hashlib.sha256(pickle.dumps((builder.__module__, builder.__qualname__, args))).hexdigest()
+
+
+class ChartRenderer(LoggerMixin):
+    """Renders charts to PNG images in worker processes."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_concurrency: int = 4,
+        cache_size: int = 64,
+        executor: Executor | None = None,
+    ) -> None:
+        """Initialize the renderer. The worker processes are started on the first render, unless an executor is given."""
+        self.workers = max(1, workers)
+        self.cache_size = cache_size
+        self._executor = executor
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[bytes]] = {}
+        self.renders = 0
+        """Number of charts rendered, not served from the cache or another request."""
+
+    @property
+    def executor(self) -> Executor:
+        """Get the pool rendering charts, starting it if needed."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def render(self, builder: Callable[..., Figure], *args: Any) -> io.BytesIO:  # noqa: ANN401
+        """Render a chart, built by a module level function from picklable data, to an in-memory PNG image."""
+        key = dataset_hash(builder, args)
+        if (png := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            return io.BytesIO(png)
+        if (future := self._inflight.get(key)) is None:
+            future = asyncio.ensure_future(self._render(key, builder, args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return io.BytesIO(await asyncio.shield(future))
+
+    def close(self) -> None:
+        """Stop the worker processes, cancelling pending renders."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _render(self, key: str, builder: Callable[..., Figure], args: tuple[Any, ...]) -> bytes:
+        async with self._semaphore:
+            png = await asyncio.get_running_loop().run_in_executor(self.executor, render_png, builder, *args)
+        self.renders += 1
+        self._cache[key] = png
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return png
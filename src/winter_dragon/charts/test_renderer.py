@@ -0,0 +1,107 @@
+"""Tests for the chart renderer, rendering in real worker processes while the event loop is watched."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from winter_dragon.charts.figures import render_png, system_metrics
+from winter_dragon.charts.renderer import ChartRenderer
+
+
+CHARTS = 8
+POINTS = 2_000
+TICK = 0.005
+"""Seconds between ticks of the loop watcher."""
+
+
+def dataset(seed: int) -> tuple[list[float], dict[str, list[float]]]:
+    """Get the data of a metrics chart, distinct per seed."""
+    timestamps = [float(i) for i in range(POINTS)]
+    return timestamps, {"cpu": [(i * seed) % 100 for i in range(POINTS)], "memory": [(i + seed) % 50 for i in range(POINTS)]}
+
+
+async def max_lag(work: asyncio.Future[object]) -> float:
+    """Get the longest the event loop was late to tick while some work ran."""
+    lag = 0.0
+    while not work.done():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lag = max(lag, time.perf_counter() - start - TICK)
+    await work
+    return lag
+
+
+def test_cache() -> None:
+    """Identical requests share a render, and the least recently used images are evicted."""
+    renderer = ChartRenderer(cache_size=2, executor=ThreadPoolExecutor(2))
+
+    async def render() -> None:
+        first, second, third = (dataset(seed) for seed in range(1, 4))
+        images = await asyncio.gather(*(renderer.render(system_metrics, *first) for _ in range(CHARTS)))
+        assert len({image.getvalue() for image in images}) == 1
+        assert renderer.renders == 1
+
+        await renderer.render(system_metrics, *second)
+        await renderer.render(system_metrics, *first)
+        await renderer.render(system_metrics, *third)
+        assert renderer.renders == 3
+        await renderer.render(system_metrics, *first)
+        assert renderer.renders == 3
+        await renderer.render(system_metrics, *second)
+        assert renderer.renders == 4
+
+    try:
+        asyncio.run(render())
+    finally:
+        renderer.close()
+
+
+def test_concurrent_renders() -> None:
+    """Charts rendered concurrently in worker processes match charts rendered alone, once per request."""
+    renderer = ChartRenderer(workers=2, max_concurrency=4)
+    datasets = [dataset(seed) for seed in range(1, CHARTS + 1)]
+    expected = [render_png(system_metrics, *data) for data in datasets]
+
+    async def render() -> list[bytes]:
+        images = await asyncio.gather(*(renderer.render(system_metrics, *data) for data in datasets))
+        return [image.getvalue() for image in images]
+
+    try:
+        assert asyncio.run(render()) == expected
+    finally:
+        renderer.close()
+    assert renderer.renders == CHARTS
+
+
+@pytest.mark.benchmark
+def test_event_loop_lag() -> None:
+    """Charts rendered in worker processes barely delay the event loop.
+
+    Previously charts were drawn with pyplot on the event loop, blocking it for the whole render
+    and sharing one global figure between concurrent commands.
+    """
+    renderer = ChartRenderer(workers=2, max_concurrency=4)
+    datasets = [dataset(seed) for seed in range(1, CHARTS + 1)]
+
+    async def render() -> tuple[float, float]:
+        # Start the workers, which import matplotlib once.
+        await renderer.render(system_metrics, *dataset(0))
+        pooled_lag = await max_lag(asyncio.gather(*(renderer.render(system_metrics, *data) for data in datasets)))
+
+        async def on_loop() -> None:
+            for data in datasets:
+                render_png(system_metrics, *data)
+                await asyncio.sleep(0)
+
+        legacy_lag = await max_lag(asyncio.ensure_future(on_loop()))
+        return pooled_lag, legacy_lag
+
+    try:
+        pooled_lag, legacy_lag = asyncio.run(render())
+    finally:
+        renderer.close()
+    assert pooled_lag * 5 < legacy_lag
@@ -6,6 +6,7 @@ from winter_dragon.bot.extensions.server.infractions import Infractions
 from winter_dragon.bot.extensions.server.welcome import Welcome
 from winter_dragon.bot.extensions.user.reminder import Reminder
 from winter_dragon.database.tables import (
+    ForumPosts,
     GuildAuditLog,
     GuildCommands,
     GuildRoles,
@@ -23,6 +24,7 @@ from winter_dragon.database.tables import (
     Suggestions,
     SyncBanGuild,
     SyncBanUser,
+    SyncedCommand,
     UserRoles,
     Users,
     WyrQuestion,
@@ -83,6 +85,7 @@ __all__ = [
     "CommandGroups",
     "Commands",
     "DisabledCommands",
+    "ForumPosts",
     "GameMatch",
     "Games",
     "GeneratorRates",
@@ -115,6 +118,7 @@ __all__ = [
     "SyncBanBannedBy",
     "SyncBanGuild",
     "SyncBanUser",
+    "SyncedCommand",
     "TeamComposition",
     "TeamCompositionPlayer",
     "TimedReminder",
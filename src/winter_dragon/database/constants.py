@@ -1,11 +1,10 @@
 """Module for containing constants and configuration for the database package."""
 
-
-
 from sqlalchemy import URL
 from sqlmodel import Session, create_engine
 
 from winter_dragon.config import Config
+from winter_dragon.metrics.instruments import instrument_engine
 
 
 class DbUrl:
@@ -29,6 +28,7 @@ DATABASE_URL = URL.create(
     database=DbUrl.database,
 )
 engine = create_engine(DATABASE_URL, echo=False)
+instrument_engine(engine)
 session = Session(engine)
 
 
@@ -0,0 +1,98 @@
+"""Module for counter columns that are incremented atomically in SQL.
+
+A counter is incremented with `UPDATE ... SET count = count + n`, or with an upsert when missing rows are created,
+so increments from concurrent processes are never lost, and each costs a single statement.
+Frequent increments can be buffered with `winter_dragon.redis.counter_buffer.CounterBuffer`,
+and written to the database in batches.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from sqlalchemy import Executable, Table
+    from sqlmodel import Session
+
+    from winter_dragon.database.extension.model import BaseModel
+
+
+type Key = tuple[Any, ...]
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class Counter(NamedTuple):
+    """A counter column of a table, with the columns that identify its rows.
+
+    With `create`, increments for missing rows create them, which requires a unique index on the key columns.
+    """
+
+    model: type[BaseModel]
+    column: str
+    keys: tuple[str, ...]
+    create: bool = False
+
+    @property
+    def table(self) -> Table:
+        """Get the table of the counter."""
+        return self.model.__table__  # pyright: ignore[reportAttributeAccessIssue]
+
+    @property
+    def name(self) -> str:
+        """Get the name of the counter."""
+        return f"{self.table.name}.{self.column}"
+
+    def increment(self, *key: Any, amount: int = 1, session: Session | None = None) -> int:  # noqa: ANN401
+        """Increment the counter of a row. Returns the number of rows incremented."""
+        return self.increment_many({key: amount}, session)
+
+    def increment_many(self, amounts: Mapping[Key, int], session: Session | None = None) -> int:
+        """Increment the counters of many rows in a single statement. Returns the number of rows incremented."""
+        session = session or self.model.session
+        if not amounts:
+            return 0
+        self.model.logger.debug(f"Incrementing {len(amounts)} counters: {self.name}")
+        statement = counter_statement(self, session.get_bind().dialect.name)
+        if self.create:
+            parameters = [dict(zip(self.keys, key, strict=True)) | {self.column: amount} for key, amount in amounts.items()]
+        else:
+            parameters = [
+                {f"key_{name}": value for name, value in zip(self.keys, key, strict=True)} | {"counter_amount": amount}
+                for key, amount in amounts.items()
+            ]
+        try:
+            incremented = session.connection().execute(statement, parameters).rowcount
+            session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        return incremented
+
+
+@cache
+def counter_statement(counter: Counter, dialect: str) -> Executable:
+    """Get the statement incrementing a counter, built once so its compiled form is cached."""
+    table = counter.table
+    if not counter.create:
+        return (
+            update(table)
+            .where(*(table.c[key] == bindparam(f"key_{key}") for key in counter.keys))
+            .values({counter.column: table.c[counter.column] + bindparam("counter_amount")})
+        )
+    if (insert := UPSERT_DIALECTS.get(dialect)) is None:
+        msg = f"Creating counters is not supported on {dialect}"
+        raise NotImplementedError(msg)
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[key] for key in counter.keys],
+        set_={counter.column: table.c[counter.column] + statement.excluded[counter.column]},
+    )
@@ -3,17 +3,19 @@
 This module should make the SQLModel classes more like a `Repository` pattern.
 """
 import logging
-from collections.abc import Sequence
+from collections.abc import Iterable, Mapping, Sequence
 from enum import Enum
 from inspect import get_annotations
+from itertools import batched
 from types import NoneType
 from typing import TYPE_CHECKING, Any, ClassVar, Self, Unpack
 
 from herogold.log import LoggerMixin
 from herogold.typing.check import contains_sub_type
 from pydantic import ConfigDict, GetCoreSchemaHandler
-from sqlalchemy import BigInteger, Column, ScalarResult
+from sqlalchemy import BigInteger, Column, ScalarResult, bindparam, tuple_, update
 from sqlalchemy import Enum as SQEnum
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Mapped
 from sqlmodel import Field, Session, select
 from sqlmodel import SQLModel as BaseSQLModel
@@ -23,6 +25,7 @@ from winter_dragon.database.errors import AlreadyExistsError, NotFoundError
 
 
 models: set[type["BaseModel"]] = set()
+BULK_CHUNK_SIZE = 1000
 
 
 class ModelLogger(LoggerMixin):
@@ -129,6 +132,110 @@ class BaseModel(BaseSQLModel):
         session.add(known)
         session.commit()
 
+    @classmethod
+    def bulk_upsert(
+        cls,
+        records: Iterable[Self],
+        keys: Sequence[str] = ("id",),
+        session: Session | None = None,
+    ) -> list[Self]:
+        """Create or update many records by their natural keys, in one transaction.
+
+        Existing rows are loaded in chunks instead of one by one, without locking them.
+        Only the fields set on a record that differ from its row are written, and records repeating a key are merged.
+        Returns the persisted records, in order.
+        """
+        session = cls._get_session(session)
+        records = list(records)
+        cls.logger.debug(f"Bulk upserting {len(records)} records: {cls.__name__} by {keys}")
+        known = cls._get_by_keys([tuple(getattr(record, key) for key in keys) for record in records], keys, session)
+
+        persisted: list[Self] = []
+        for record in records:
+            key = tuple(getattr(record, name) for name in keys)
+            if (target := known.get(key)) is None:
+                session.add(record)
+                target = record
+                if None not in key:
+                    known[key] = record
+            elif target is not record:
+                cls._copy_changes(record, target)
+            persisted.append(target)
+        cls._commit_bulk(session)
+        return persisted
+
+    @classmethod
+    def bulk_update(
+        cls,
+        changes: Iterable[Mapping[str, Any]],
+        keys: Sequence[str] = ("id",),
+        session: Session | None = None,
+    ) -> int:
+        """Update many existing rows by their natural keys, in one transaction, without loading them.
+
+        Each change holds the key values and the new values of only the columns to write.
+        Changes writing the same columns are sent as a single executemany.
+        Returns the number of updated rows.
+        """
+        session = cls._get_session(session)
+        table = cls.__table__  # pyright: ignore[reportAttributeAccessIssue]
+        batches: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for change in changes:
+            columns = tuple(sorted(set(change).difference(keys)))
+            parameters = {f"key_{key}": change[key] for key in keys} | {column: change[column] for column in columns}
+            batches.setdefault(columns, []).append(parameters)
+
+        statement = update(table).where(*(table.c[key] == bindparam(f"key_{key}") for key in keys))
+        updated = 0
+        try:
+            for columns, parameters in batches.items():
+                if not columns:
+                    continue
+                cls.logger.debug(f"Bulk updating {len(parameters)} records: {cls.__name__}.{columns} by {keys}")
+                for chunk in batched(parameters, BULK_CHUNK_SIZE, strict=False):
+                    updated += session.connection().execute(statement, list(chunk)).rowcount
+        except IntegrityError as e:
+            raise cls._rollback_conflict(session, e) from e
+        cls._commit_bulk(session)
+        return updated
+
+    @classmethod
+    def _get_by_keys(
+        cls,
+        values: Sequence[tuple[Any, ...]],
+        keys: Sequence[str],
+        session: Session,
+    ) -> dict[tuple[Any, ...], Self]:
+        """Get the existing records for natural key values, loading them in chunks."""
+        columns = [getattr(cls, key) for key in keys]
+        found: dict[tuple[Any, ...], Self] = {}
+        for chunk in batched(dict.fromkeys(value for value in values if None not in value), BULK_CHUNK_SIZE, strict=False):
+            clause = columns[0].in_([value[0] for value in chunk]) if len(columns) == 1 else tuple_(*columns).in_(chunk)
+            for record in session.exec(select(cls).where(clause)):
+                found[tuple(getattr(record, key) for key in keys)] = record
+        return found
+
+    @staticmethod
+    def _copy_changes(record: BaseSQLModel, known: BaseSQLModel) -> None:
+        """Copy the fields set on record that differ onto known, so only those are written."""
+        for name in record.model_fields_set - {"id"}:
+            if getattr(known, name) != (value := getattr(record, name)):
+                setattr(known, name, value)
+
+    @classmethod
+    def _commit_bulk(cls, session: Session) -> None:
+        try:
+            session.commit()
+        except IntegrityError as e:
+            raise cls._rollback_conflict(session, e) from e
+
+    @classmethod
+    def _rollback_conflict(cls, session: Session, error: IntegrityError) -> AlreadyExistsError:
+        """Roll back every write of a bulk operation, and get the error reporting its conflict."""
+        session.rollback()
+        msg = f"Bulk write to {cls.__name__} conflicts with existing records: {error.orig}"
+        return AlreadyExistsError(msg)
+
     @classmethod
     def from_[T](cls, column: Mapped[T], value: T, session: Session | None = None) -> ScalarResult[Self]:
         """Get a record from Database by field and value."""
@@ -0,0 +1,222 @@
+"""Tests for the bulk persistence of models, against in-memory SQLite databases."""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from sqlalchemy import Engine, Integer, MetaData, create_engine, event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.database.errors import AlreadyExistsError
+from winter_dragon.database.tables import Commands, Users
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+BENCHMARK_RECORDS = 10_000
+PER_RECORD_SAMPLE = 500
+
+
+def make_engine() -> Engine:
+    """Create an in-memory database with the commands and users tables.
+
+    SQLite only autoincrements INTEGER primary keys, so the tables are created from copies with one.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    schema = MetaData()
+    for model in (Commands, Users):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+    schema.create_all(engine)
+    return engine
+
+
+def seed_commands(session: Session, count: int) -> None:
+    """Create commands that were never called."""
+    session.add_all(Commands(qual_name=f"command {i}", call_count=0) for i in range(count))
+    session.commit()
+
+
+@contextmanager
+def capture_statements(engine: Engine) -> Iterator[list[str]]:
+    """Capture the SQL of the statements executed within the block."""
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:  # noqa: ANN401
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_bulk_upsert() -> None:
+    """Records are created or updated by their natural key, and records repeating a key are merged."""
+    engine = make_engine()
+    with Session(engine) as session:
+        seed_commands(session, 2)
+
+        persisted = Commands.bulk_upsert(
+            [
+                Commands(qual_name="command 0", call_count=5),
+                Commands(qual_name="command 2", call_count=1),
+                Commands(qual_name="command 2", call_count=2),
+            ],
+            keys=("qual_name",),
+            session=session,
+        )
+        assert [command.id for command in persisted] == [1, 3, 3]
+        counts = {command.qual_name: command.call_count for command in session.exec(select(Commands))}
+        assert counts == {"command 0": 5, "command 1": 0, "command 2": 2}
+
+
+def test_bulk_upsert_writes_changed_columns() -> None:
+    """Only the columns set on a record that differ from its row are written."""
+    engine = make_engine()
+    with Session(engine) as session:
+        seed_commands(session, 3)
+
+        with capture_statements(engine) as statements:
+            Commands.bulk_upsert(
+                [Commands(id=1, call_count=4), Commands(id=2, call_count=0), Commands(id=3, qual_name="renamed")],
+                session=session,
+            )
+        updates = [statement for statement in statements if statement.startswith("UPDATE")]
+        assert updates == [
+            "UPDATE commands SET call_count=? WHERE commands.id = ?",
+            "UPDATE commands SET qual_name=? WHERE commands.id = ?",
+        ]
+        assert session.get(Commands, 3).call_count == 0  # pyright: ignore[reportOptionalMemberAccess]
+
+
+def test_bulk_update() -> None:
+    """Rows are updated by their natural key without being loaded, and missing keys are not counted."""
+    engine = make_engine()
+    with Session(engine) as session:
+        seed_commands(session, 3)
+
+        with capture_statements(engine) as statements:
+            updated = Commands.bulk_update(
+                [
+                    {"qual_name": "command 0", "call_count": 7},
+                    {"qual_name": "command 1", "call_count": 8},
+                    {"qual_name": "missing", "call_count": 9},
+                ],
+                keys=("qual_name",),
+                session=session,
+            )
+        assert updated == 2
+        assert not any(statement.startswith("SELECT") for statement in statements)
+        counts = {command.qual_name: command.call_count for command in session.exec(select(Commands))}
+        assert counts == {"command 0": 7, "command 1": 8, "command 2": 0}
+
+
+def test_bulk_upsert_conflict() -> None:
+    """A key created by another writer after the records were looked up is reported, and nothing is written."""
+    engine = make_engine()
+    with Session(engine) as session:
+
+        @event.listens_for(session, "before_flush", once=True)
+        def create_concurrently(*_args: object) -> None:
+            with engine.begin() as connection:
+                connection.execute(Users.__table__.insert().values(id=2))  # pyright: ignore[reportAttributeAccessIssue]
+
+        with pytest.raises(AlreadyExistsError):
+            Users.bulk_upsert([Users(id=1), Users(id=2)], session=session)
+        assert session.exec(select(Users.id)).all() == [2]
+
+        Users.bulk_upsert([Users(id=1), Users(id=2)], session=session)
+        assert session.exec(select(Users.id).order_by(Users.id)).all() == [1, 2]
+
+
+def test_bulk_update_conflict(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A chunk conflicting with existing rows is reported, and no chunk of the batch is written."""
+    monkeypatch.setattr("winter_dragon.database.extension.model.BULK_CHUNK_SIZE", 1)
+    engine = make_engine()
+    with Session(engine) as session:
+        seed_commands(session, 3)
+        ids = {command.qual_name: command.id for command in session.exec(select(Commands))}
+
+        with pytest.raises(AlreadyExistsError):
+            Commands.bulk_update(
+                [
+                    {"qual_name": "command 2", "call_count": 1, "id": 100},
+                    {"qual_name": "command 1", "call_count": 1, "id": ids["command 0"]},
+                ],
+                keys=("qual_name",),
+                session=session,
+            )
+        session.commit()
+        assert {command.qual_name: (command.id, command.call_count) for command in session.exec(select(Commands))} == {
+            name: (command_id, 0) for name, command_id in ids.items()
+        }
+
+
+def test_bulk_statement_count() -> None:
+    """Writing 10k records in bulk runs a handful of statements, not one per record."""
+    engine = make_engine()
+    with Session(engine) as session:
+        seed_commands(session, BENCHMARK_RECORDS)
+
+        with capture_statements(engine) as statements:
+            Commands.bulk_upsert(
+                (Commands(qual_name=f"command {i}", call_count=2) for i in range(BENCHMARK_RECORDS)),
+                keys=("qual_name",),
+                session=session,
+            )
+        assert len(statements) < BENCHMARK_RECORDS / 100
+
+        with capture_statements(engine) as statements:
+            Commands.bulk_update(
+                ({"qual_name": f"command {i}", "call_count": 3} for i in range(BENCHMARK_RECORDS)),
+                keys=("qual_name",),
+                session=session,
+            )
+        assert len(statements) < BENCHMARK_RECORDS / 100
+        assert set(session.exec(select(Commands.call_count)).all()) == {3}
+
+
+@pytest.mark.benchmark
+def test_bulk_is_faster_than_per_record() -> None:
+    """Updating 10k records in bulk takes a fraction of updating them one by one.
+
+    The per-record path commits each record, which expires every record in the session,
+    so it is timed on a sample and extrapolated.
+    """
+    engine = make_engine()
+    with Session(engine) as session:
+        seed_commands(session, BENCHMARK_RECORDS)
+        commands = session.exec(select(Commands)).all()
+
+        start = time.perf_counter()
+        for command in commands[:PER_RECORD_SAMPLE]:
+            Commands(id=command.id, qual_name=command.qual_name, call_count=1).update(session)
+        per_record = (time.perf_counter() - start) / PER_RECORD_SAMPLE * BENCHMARK_RECORDS
+
+        start = time.perf_counter()
+        Commands.bulk_upsert(
+            (Commands(qual_name=f"command {i}", call_count=2) for i in range(BENCHMARK_RECORDS)),
+            keys=("qual_name",),
+            session=session,
+        )
+        upsert = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Commands.bulk_update(
+            ({"qual_name": f"command {i}", "call_count": 3} for i in range(BENCHMARK_RECORDS)),
+            keys=("qual_name",),
+            session=session,
+        )
+        update = time.perf_counter() - start
+
+        assert set(session.exec(select(Commands.call_count)).all()) == {3}
+    assert upsert < per_record / 5
+    assert update < per_record / 20
@@ -0,0 +1,16 @@
+"""Versioned schema migrations for the database.
+
+Run `python -m winter_dragon.database.migrations revision <message>` to generate a revision from the tables,
+and `python -m winter_dragon.database.migrations upgrade` to apply pending revisions.
+The bot applies pending revisions at startup.
+"""
+
+from winter_dragon.database.migrations.runner import MigrationError, MigrationRunner, Operations, Revision
+
+
+__all__ = [
+    "MigrationError",
+    "MigrationRunner",
+    "Operations",
+    "Revision",
+]
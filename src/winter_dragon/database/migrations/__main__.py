@@ -0,0 +1,54 @@
+"""Command line entry point for database migrations."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from herogold.log.logging import getLogger
+
+from winter_dragon.database import SQLModel
+from winter_dragon.database.constants import engine
+from winter_dragon.database.migrations.autogenerate import compare, next_revision, render_revision, write_revision
+from winter_dragon.database.migrations.runner import MigrationRunner
+
+
+logger = getLogger(__name__)
+
+
+def main() -> int:
+    """Generate or apply revisions."""
+    parser = argparse.ArgumentParser(prog="python -m winter_dragon.database.migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    revision = commands.add_parser("revision", help="Generate a revision from the tables missing in the database")
+    revision.add_argument("message")
+    commands.add_parser("upgrade", help="Apply every pending revision")
+    commands.add_parser("current", help="Show the revision the database is at")
+    args = parser.parse_args()
+
+    runner = MigrationRunner(engine)
+    match args.command:
+        case "upgrade":
+            runner.upgrade()
+        case "current":
+            logger.info(f"Database is at revision {runner.current()}, latest revision is {runner.head}")
+        case "revision":
+            if not runner.is_current():
+                logger.error("Apply pending revisions before generating a new one")
+                return 1
+            with engine.connect() as connection:
+                operations, unhandled = compare(connection, SQLModel.metadata)
+            for difference in unhandled:
+                logger.warning(f"Not generated: {difference}")
+            if not operations:
+                logger.info("Database matches the tables, no revision generated")
+                return 0
+            revision_id = next_revision(runner.head)
+            source = render_revision(revision_id, runner.head, args.message, operations)
+            path = write_revision(source, revision_id, args.message)
+            logger.info(f"Generated {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Module for generating revisions from the difference between the SQLModel tables and a database.
+
+Only additions are generated: new tables, new columns and new indexes.
+Anything the database has that the tables don't is reported, but dropping data is left to a hand-written revision.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sqlalchemy import inspect
+
+from winter_dragon.database.migrations.runner import version_table
+
+
+if TYPE_CHECKING:
+    from sqlalchemy import Connection, MetaData
+
+
+VERSIONS_DIR = Path(__file__).parent / "versions"
+REVISION_TEMPLATE = '''"""{message}"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "{revision}"
+down_revision = {down_revision}
+{transactional}
+
+def upgrade(ops: Operations) -> None:
+    """{message}"""
+{body}
+'''
+
+
+def compare(connection: Connection, metadata: MetaData) -> tuple[list[str], list[str]]:
+    """Compare the tables to a database.
+
+    Returns the operations that bring the database up to date, and the differences that are left unhandled.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names()) - {version_table.name}
+    operations: list[str] = []
+    unhandled: list[str] = []
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            operations.append(f'ops.create_table("{table.name}")')
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        operations.extend(
+            f'ops.add_column("{table.name}", "{column.name}")' for column in table.columns if column.name not in columns
+        )
+        unhandled.extend(f"column {table.name}.{name} is not defined" for name in sorted(columns - set(table.c.keys())))
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        operations.extend(
+            f'ops.create_index("{index.name}", concurrently=True)'
+            for index in sorted(table.indexes, key=lambda index: str(index.name))
+            if index.name not in indexes
+        )
+
+    unhandled.extend(f"table {name} is not defined" for name in sorted(existing_tables - set(metadata.tables)))
+    return operations, unhandled
+
+
+def render_revision(revision: str, down_revision: str | None, message: str, operations: list[str]) -> str:
+    """Render the source of a revision module."""
+    concurrent = any("concurrently=True" in operation for operation in operations)
+    return REVISION_TEMPLATE.format(
+        message=message if message.endswith((".", "?", "!")) else f"{message}.",
+        revision=revision,
+        down_revision=f'"{down_revision}"' if down_revision is not None else None,
+        transactional="transactional = False\n" if concurrent else "",
+        body="\n".join(f"    {operation}" for operation in operations) or "    return",
+    )
+
+
+def next_revision(head: str | None) -> str:
+    """Get the id following the latest revision."""
+    return f"{int(head or 0) + 1:04d}"
+
+
+def write_revision(source: str, revision: str, message: str, directory: Path = VERSIONS_DIR) -> Path:
+    """Write a revision module to the versions package."""
+    slug = "_".join("".join(char if char.isalnum() else " " for char in message.lower()).split())
+    path = directory / f"rev_{revision}_{slug}.py"
+    path.write_text(source, encoding="utf8")
+    return path
@@ -0,0 +1,252 @@
+"""Module for applying versioned schema revisions.
+
+Revisions live in the `versions` package, one module per revision, each defining:
+- `revision`: its id.
+- `down_revision`: the id of the revision it follows, or None for the first one.
+- `upgrade(ops)`: the schema changes, made through `Operations`.
+- `transactional` (optional): False for changes that can't run in a transaction, like concurrent index builds.
+
+The applied revision is stored in a single row of the `schema_version` table,
+so checking whether a database is up to date at startup is a single query.
+
+Revisions are not frozen: operations resolve tables, columns and indexes from the current SQLModel metadata,
+and skip anything that already exists. The first revision creates the current schema, not the schema of its time,
+so on a new database every later revision runs against tables that already have its changes. Revisions must therefore:
+- Only name tables, columns and indexes by what the models still define.
+  When a model drops or renames one, revisions that name it switch to `execute` with the old name.
+- Do nothing on a database created from the current models, and check the rows they change.
+  Data changes run on any database, with no rows to change on a new one.
+"""
+
+from __future__ import annotations
+
+import importlib
+import pkgutil
+from typing import TYPE_CHECKING, NamedTuple
+
+from herogold.log import LoggerMixin
+from sqlalchemy import Column, Index, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+    from types import ModuleType
+
+    from sqlalchemy import Connection, Engine
+
+
+VERSIONS_PACKAGE = "winter_dragon.database.migrations.versions"
+
+version_table = Table("schema_version", MetaData(), Column("revision", String(32), nullable=False))
+
+
+class MigrationError(RuntimeError):
+    """Raised when the revisions or the database version are inconsistent."""
+
+
+class Operations:
+    """Schema changes available to revisions, resolved against the current metadata, not frozen per revision."""
+
+    def __init__(self, connection: Connection, metadata: MetaData) -> None:
+        """Initialize the operations for a connection."""
+        self.connection = connection
+        self.metadata = metadata
+
+    def create_all(self) -> None:
+        """Create every table and index that doesn't exist yet."""
+        self.metadata.create_all(self.connection, checkfirst=True)
+
+    def create_table(self, table_name: str) -> None:
+        """Create a table, with its indexes, if it doesn't exist yet."""
+        self.metadata.tables[table_name].create(self.connection, checkfirst=True)
+
+    def add_column(self, table_name: str, column_name: str) -> None:
+        """Add a column to an existing table, if it doesn't have it yet."""
+        existing = {column["name"] for column in inspect(self.connection).get_columns(table_name)}
+        if column_name in existing:
+            return
+        column = self.metadata.tables[table_name].c[column_name]
+        ddl = CreateColumn(column).compile(dialect=self.connection.dialect)
+        self.execute(f"ALTER TABLE {self._quote(table_name)} ADD COLUMN {ddl}")
+
+    def create_index(
+        self,
+        index_name: str,
+        table_name: str | None = None,
+        columns: Sequence[str] = (),
+        *,
+        unique: bool = False,
+        concurrently: bool = False,
+    ) -> None:
+        """Create an index if it doesn't exist yet.
+
+        The index is looked up in the metadata by name, unless its table and columns are given.
+        Concurrent builds don't lock the table against writes on Postgres, but must run in a non-transactional revision.
+        """
+        if table_name is None:
+            index = self._find_index(index_name)
+            if index.table is None:
+                msg = f"Index {index_name} is not bound to a table"
+                raise MigrationError(msg)
+            table_name = index.table.name
+            columns = [column.name for column in index.columns]
+            unique = bool(index.unique)
+        # Build the index on a detached copy of the table, so the dialect options don't leak into the metadata.
+        table = self.metadata.tables[table_name]
+        detached = Table(table_name, MetaData(), *(Column(name, table.c[name].type) for name in columns))
+        Index(
+            index_name,
+            *(detached.c[name] for name in columns),
+            unique=unique,
+            postgresql_concurrently=concurrently,
+        ).create(self.connection, checkfirst=True)
+
+    def drop_index(self, index_name: str, table_name: str, *, concurrently: bool = False) -> None:
+        """Drop an index if it exists."""
+        existing = {index["name"] for index in inspect(self.connection).get_indexes(table_name)}
+        if index_name not in existing:
+            return
+        concurrent = " CONCURRENTLY" if concurrently and self.connection.dialect.name == "postgresql" else ""
+        self.execute(f"DROP INDEX{concurrent} {self._quote(index_name)}")
+
+    def execute(self, statement: str) -> None:
+        """Execute raw SQL."""
+        self.connection.execute(text(statement))
+
+    def _find_index(self, index_name: str) -> Index:
+        for table in self.metadata.tables.values():
+            for index in table.indexes:
+                if index.name == index_name:
+                    return index
+        msg = f"Index {index_name} is not defined on any table"
+        raise MigrationError(msg)
+
+    def _quote(self, name: str) -> str:
+        return self.connection.dialect.identifier_preparer.quote(name)
+
+
+class Revision(NamedTuple):
+    """A schema revision."""
+
+    revision: str
+    down_revision: str | None
+    description: str
+    upgrade: Callable[[Operations], None]
+    transactional: bool = True
+
+    @classmethod
+    def from_module(cls, module: ModuleType) -> Revision:
+        """Create a revision from a revision module."""
+        return cls(
+            module.revision,
+            module.down_revision,
+            (module.__doc__ or module.__name__).strip().splitlines()[0],
+            module.upgrade,
+            getattr(module, "transactional", True),
+        )
+
+
+def load_revisions(package: str = VERSIONS_PACKAGE) -> list[Revision]:
+    """Load every revision module in a package."""
+    versions = importlib.import_module(package)
+    return [
+        Revision.from_module(importlib.import_module(f"{package}.{module.name}"))
+        for module in pkgutil.iter_modules(versions.__path__)
+        if not module.name.startswith("_")
+    ]
+
+
+def order_revisions(revisions: Iterable[Revision]) -> list[Revision]:
+    """Order revisions from first to last, checking that they form a single chain."""
+    by_parent: dict[str | None, Revision] = {}
+    for revision in revisions:
+        if (other := by_parent.get(revision.down_revision)) is not None:
+            msg = f"Revisions {other.revision} and {revision.revision} both follow {revision.down_revision}"
+            raise MigrationError(msg)
+        by_parent[revision.down_revision] = revision
+
+    ordered: list[Revision] = []
+    parent = None
+    while (revision := by_parent.pop(parent, None)) is not None:
+        ordered.append(revision)
+        parent = revision.revision
+    if by_parent:
+        msg = f"Revisions not connected to the chain: {', '.join(revision.revision for revision in by_parent.values())}"
+        raise MigrationError(msg)
+    return ordered
+
+
+class MigrationRunner(LoggerMixin):
+    """Apply pending revisions to a database."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        revisions: Sequence[Revision] | None = None,
+        metadata: MetaData = SQLModel.metadata,
+    ) -> None:
+        """Initialize the runner with the revisions in the versions package, unless given."""
+        self.engine = engine
+        self.revisions = order_revisions(load_revisions() if revisions is None else revisions)
+        self.metadata = metadata
+
+    @property
+    def head(self) -> str | None:
+        """Get the id of the latest revision."""
+        return self.revisions[-1].revision if self.revisions else None
+
+    def current(self) -> str | None:
+        """Get the revision the database is at, or None if it was never migrated."""
+        try:
+            with self.engine.connect() as connection:
+                return connection.execute(select(version_table.c.revision)).scalar()
+        except DBAPIError:
+            return None
+
+    def is_current(self) -> bool:
+        """Check whether the database is at the latest revision."""
+        return self.current() == self.head
+
+    def pending(self, current: str | None = None) -> list[Revision]:
+        """Get the revisions that are not applied yet."""
+        if current is None:
+            return list(self.revisions)
+        ids = [revision.revision for revision in self.revisions]
+        if current not in ids:
+            msg = f"Database is at unknown revision {current}"
+            raise MigrationError(msg)
+        return self.revisions[ids.index(current) + 1 :]
+
+    def upgrade(self) -> list[Revision]:
+        """Apply every pending revision, in order. Returns the applied revisions."""
+        current = self.current()
+        if current == self.head:
+            self.logger.debug(f"Database is at revision {current}")
+            return []
+
+        version_table.create(self.engine, checkfirst=True)
+        pending = self.pending(current)
+        for revision in pending:
+            self.logger.info(f"Applying revision {revision.revision}: {revision.description}")
+            self._apply(revision)
+        return pending
+
+    def _apply(self, revision: Revision) -> None:
+        if revision.transactional:
+            with self.engine.begin() as connection:
+                revision.upgrade(Operations(connection, self.metadata))
+                self._set_version(connection, revision.revision)
+            return
+
+        with self.engine.connect() as connection:
+            revision.upgrade(Operations(connection.execution_options(isolation_level="AUTOCOMMIT"), self.metadata))
+        with self.engine.begin() as connection:
+            self._set_version(connection, revision.revision)
+
+    @staticmethod
+    def _set_version(connection: Connection, revision: str) -> None:
+        connection.execute(version_table.delete())
+        connection.execute(version_table.insert().values(revision=revision))
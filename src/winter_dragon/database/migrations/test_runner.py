@@ -0,0 +1,178 @@
+"""Tests for the migration runner, against throwaway SQLite databases."""
+
+from __future__ import annotations
+
+import importlib.util
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+from sqlalchemy import Column, Engine, Index, Integer, MetaData, String, Table, create_engine, event, inspect
+
+from winter_dragon.database.migrations.autogenerate import compare, next_revision, render_revision, write_revision
+from winter_dragon.database.migrations.runner import MigrationError, MigrationRunner, Operations, Revision, order_revisions
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+STARTUP_TABLES = 60
+STARTUP_RUNS = 5
+
+
+def make_metadata(*, nickname: bool = False, tables: int = 1) -> MetaData:
+    """Create a users table, optionally with a later nickname column and index, and some filler tables."""
+    metadata = MetaData()
+    columns = [Column("id", Integer, primary_key=True), Column("name", String)]
+    if nickname:
+        columns.append(Column("nickname", String, nullable=True))
+    users = Table("users", metadata, *columns)
+    if nickname:
+        Index("ix_users_nickname", users.c.nickname)
+    for i in range(1, tables):
+        Table(f"filler_{i}", metadata, Column("id", Integer, primary_key=True), Column("value", String))
+    return metadata
+
+
+def make_engine(tmp_path: Path) -> Engine:
+    """Create an engine for a new database file."""
+    return create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+
+
+def initial(ops: Operations) -> None:
+    """Create the initial schema."""
+    ops.create_all()
+
+
+def add_nickname(ops: Operations) -> None:
+    """Add nicknames."""
+    ops.add_column("users", "nickname")
+    ops.create_index("ix_users_nickname", concurrently=True)
+
+
+REVISIONS = [
+    Revision("0001", None, "initial", initial),
+    Revision("0002", "0001", "nickname", add_nickname, transactional=False),
+]
+
+
+def test_upgrade_new_database(tmp_path: Path) -> None:
+    """A new database is brought to the latest revision, after which upgrading does nothing."""
+    engine = make_engine(tmp_path)
+    runner = MigrationRunner(engine, REVISIONS, make_metadata(nickname=True))
+
+    assert runner.current() is None
+    assert [revision.revision for revision in runner.upgrade()] == ["0001", "0002"]
+    assert runner.is_current()
+    assert runner.upgrade() == []
+    assert {index["name"] for index in inspect(engine).get_indexes("users")} == {"ix_users_nickname"}
+
+
+def test_upgrade_existing_deployment(tmp_path: Path) -> None:
+    """A database created by create_all is adopted, and only gets what it is missing."""
+    engine = make_engine(tmp_path)
+    make_metadata().create_all(engine)
+
+    runner = MigrationRunner(engine, REVISIONS[:1], make_metadata(nickname=True))
+    runner.upgrade()
+    assert runner.current() == "0001"
+    assert "nickname" not in {column["name"] for column in inspect(engine).get_columns("users")}
+
+    runner = MigrationRunner(engine, REVISIONS, make_metadata(nickname=True))
+    assert [revision.revision for revision in runner.upgrade()] == ["0002"]
+    assert "nickname" in {column["name"] for column in inspect(engine).get_columns("users")}
+
+
+def test_revisions_form_a_chain() -> None:
+    """Branching or disconnected revisions are rejected."""
+    assert order_revisions(reversed(REVISIONS)) == REVISIONS
+    with pytest.raises(MigrationError):
+        order_revisions([*REVISIONS, Revision("0003", "0001", "branch", initial)])
+    with pytest.raises(MigrationError):
+        order_revisions([*REVISIONS, Revision("0004", "0003", "orphan", initial)])
+
+
+def test_unknown_database_revision(tmp_path: Path) -> None:
+    """A database at a revision the runner doesn't know is not touched."""
+    engine = make_engine(tmp_path)
+    MigrationRunner(engine, REVISIONS, make_metadata(nickname=True)).upgrade()
+
+    with pytest.raises(MigrationError):
+        MigrationRunner(engine, [Revision("0001", None, "other", initial)], make_metadata()).upgrade()
+
+
+def test_autogenerate(tmp_path: Path) -> None:
+    """A generated revision brings an outdated database up to date with the tables."""
+    engine = make_engine(tmp_path)
+    make_metadata().create_all(engine)
+    metadata = make_metadata(nickname=True, tables=2)
+
+    with engine.connect() as connection:
+        operations, unhandled = compare(connection, metadata)
+    assert operations == [
+        'ops.create_table("filler_1")',
+        'ops.add_column("users", "nickname")',
+        'ops.create_index("ix_users_nickname", concurrently=True)',
+    ]
+    assert unhandled == []
+
+    revision_id = next_revision("0001")
+    source = render_revision(revision_id, "0001", "Add nicknames", operations)
+    path = write_revision(source, revision_id, "Add nicknames", tmp_path)
+    assert path.name == "rev_0002_add_nicknames.py"
+    assert 'down_revision = "0001"' in source
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    assert spec is not None
+    assert spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    revision = Revision.from_module(module)
+    assert not revision.transactional
+    MigrationRunner(engine, [REVISIONS[0], revision], metadata).upgrade()
+    with engine.connect() as connection:
+        assert compare(connection, metadata) == ([], [])
+
+
+def count_statements(engine: Engine) -> list[str]:
+    """Collect the statements run on an engine from now on."""
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_startup_check_is_a_single_query(tmp_path: Path) -> None:
+    """Checking the version at startup reads the version row, instead of reflecting every table."""
+    engine = make_engine(tmp_path)
+    metadata = make_metadata(tables=STARTUP_TABLES)
+    runner = MigrationRunner(engine, REVISIONS[:1], metadata)
+    runner.upgrade()
+    statements = count_statements(engine)
+
+    assert runner.upgrade() == []
+    assert len(statements) == 1
+
+    metadata.create_all(engine, checkfirst=True)
+    assert len(statements) > STARTUP_TABLES
+
+
+@pytest.mark.benchmark
+def test_startup_check_is_cheaper_than_create_all(tmp_path: Path) -> None:
+    """Checking the version at startup skips reflecting every table."""
+    engine = make_engine(tmp_path)
+    metadata = make_metadata(tables=STARTUP_TABLES)
+    runner = MigrationRunner(engine, REVISIONS[:1], metadata)
+    runner.upgrade()
+
+    start = time.perf_counter()
+    for _ in range(STARTUP_RUNS):
+        metadata.create_all(engine, checkfirst=True)
+    create_all = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(STARTUP_RUNS):
+        assert runner.upgrade() == []
+    check = time.perf_counter() - start
+
+    assert check < create_all / 5
@@ -0,0 +1,5 @@
+"""Schema revisions, applied in order by the migration runner.
+
+Revisions resolve tables against the current models, not frozen copies.
+See `winter_dragon.database.migrations.runner` for the rules that follow from that.
+"""
@@ -0,0 +1,21 @@
+"""Create the initial schema.
+
+Existing deployments were created with `create_all`, so this adopts them without changes.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "0001"
+down_revision = None
+
+
+def upgrade(ops: Operations) -> None:
+    """Create every table that doesn't exist yet."""
+    ops.create_all()
@@ -0,0 +1,35 @@
+"""Index the columns hot queries filter and order on.
+
+Found by `python -m winter_dragon.database.query_audit`, which flagged each of these as a full table scan.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "0002"
+down_revision = "0001"
+transactional = False
+
+
+def upgrade(ops: Operations) -> None:
+    """Index the columns hot queries filter and order on."""
+    ops.create_index("ix_presence_user_id_date_time", concurrently=True)
+    ops.create_index("ix_steamsale_url", concurrently=True)
+    ops.create_index("ix_steamsaleproperties_steam_sale_id", concurrently=True)
+    ops.create_index("ix_channels_guild_id_name", concurrently=True)
+    ops.create_index("ix_channeltag_channel_id", concurrently=True)
+    ops.create_index("ix_commands_qual_name", concurrently=True)
+    ops.create_index("ix_disabledcommands_command_id_guild_id", concurrently=True)
+    ops.create_index("ix_messages_user_id", concurrently=True)
+    ops.create_index("ix_messages_channel_id", concurrently=True)
+    ops.create_index("ix_playersynergy_player1_id_player2_id_game_id", concurrently=True)
+    ops.create_index("ix_playersynergy_game_id_matches_as_teammates", concurrently=True)
+    ops.create_index("ix_playergamestats_user_id_game_id", concurrently=True)
+    ops.create_index("ix_playergamestats_game_id_skill_rating", concurrently=True)
+    ops.create_index("ix_gamematch_game_id_match_date", concurrently=True)
@@ -0,0 +1,27 @@
+"""Merge infractions duplicated by concurrent increments into the first row of each user, summing their counts.
+
+Runs in a transaction, so the counts are never summed without the duplicates being deleted.
+The unique index follows in the next revision, which can't run in a transaction.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "0003"
+down_revision = "0002"
+
+
+def upgrade(ops: Operations) -> None:
+    """Sum the counts of duplicated users into their first row, and delete the others."""
+    ops.execute(
+        "UPDATE infractions SET infraction_count = "
+        "(SELECT SUM(other.infraction_count) FROM infractions AS other WHERE other.user_id = infractions.user_id) "
+        "WHERE user_id IN (SELECT user_id FROM infractions GROUP BY user_id HAVING COUNT(*) > 1)",
+    )
+    ops.execute("DELETE FROM infractions WHERE id NOT IN (SELECT MIN(id) FROM infractions GROUP BY user_id)")
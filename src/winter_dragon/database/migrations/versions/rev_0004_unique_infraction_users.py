@@ -0,0 +1,22 @@
+"""Make infractions unique per user, so infraction counts can be incremented with an upsert.
+
+Duplicates were merged by the previous revision. The index is built concurrently, so writes continue meanwhile.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "0004"
+down_revision = "0003"
+transactional = False
+
+
+def upgrade(ops: Operations) -> None:
+    """Index infractions uniquely by user."""
+    ops.create_index("ix_infractions_user_id", concurrently=True)
@@ -0,0 +1,73 @@
+"""Key team compositions by the hash of their roster.
+
+Existing compositions are hashed from their players. Compositions of the same roster are merged into the first one,
+summing their results. Runs in a transaction, so the merged results are never written without the duplicates deleted.
+The unique index follows in the next revision, which can't run in a transaction.
+"""
+
+from __future__ import annotations
+
+from itertools import groupby
+from typing import TYPE_CHECKING
+
+from sqlalchemy import bindparam, delete, select, update
+
+from winter_dragon.database.tables.matchmaking.team_composition import roster_hash
+
+
+if TYPE_CHECKING:
+    from sqlalchemy import Row
+
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "0005"
+down_revision = "0004"
+
+
+def upgrade(ops: Operations) -> None:
+    """Hash the rosters of existing compositions, and merge compositions of the same roster."""
+    ops.add_column("teamcomposition", "roster_hash")
+    compositions = ops.metadata.tables["teamcomposition"]
+    players = ops.metadata.tables["teamcompositionplayer"]
+
+    rosters = {
+        composition_id: roster_hash(row.user_id for row in rows)
+        for composition_id, rows in groupby(
+            ops.connection.execute(
+                select(players.c.composition_id, players.c.user_id).order_by(players.c.composition_id),
+            ),
+            key=lambda row: row.composition_id,
+        )
+    }
+    groups: dict[tuple[int, str | None], list[Row]] = {}
+    for row in ops.connection.execute(select(compositions).order_by(compositions.c.id)):
+        groups.setdefault((row.game_id, rosters.get(row.id)), []).append(row)
+
+    merged: list[dict[str, object]] = []
+    duplicates: list[int] = []
+    for (_, key), rows in groups.items():
+        if key is None:
+            continue
+        times_played = sum(row.times_played for row in rows)
+        wins = sum(row.wins for row in rows)
+        merged.append(
+            {
+                "key_id": rows[0].id,
+                "roster_hash": key,
+                "times_played": times_played,
+                "wins": wins,
+                "losses": sum(row.losses for row in rows),
+                "win_rate": wins / times_played if times_played else 0.0,
+                "avg_team_score": (
+                    sum(row.avg_team_score * row.times_played for row in rows) / times_played if times_played else 0.0
+                ),
+            }
+        )
+        duplicates.extend(row.id for row in rows[1:])
+
+    if merged:
+        ops.connection.execute(update(compositions).where(compositions.c.id == bindparam("key_id")), merged)
+    if duplicates:
+        ops.connection.execute(delete(players).where(players.c.composition_id.in_(duplicates)))
+        ops.connection.execute(delete(compositions).where(compositions.c.id.in_(duplicates)))
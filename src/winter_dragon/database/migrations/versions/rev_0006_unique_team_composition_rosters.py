@@ -0,0 +1,22 @@
+"""Make team compositions unique per game and roster, so a composition is looked up by its roster hash.
+
+Duplicates were merged by the previous revision. The index is built concurrently, so writes continue meanwhile.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "0006"
+down_revision = "0005"
+transactional = False
+
+
+def upgrade(ops: Operations) -> None:
+    """Index team compositions uniquely by game and roster."""
+    ops.create_index("ix_teamcomposition_game_id_roster_hash", concurrently=True)
@@ -0,0 +1,43 @@
+"""Store the fire time of each tournament signup reminder, so reminders are sent on time instead of polled for.
+
+Reminders are scheduled for the existing signups of upcoming tournaments.
+Those already sent, according to the old flags of the signup, are marked as fired so they are not sent again.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from sqlalchemy import insert, select
+
+
+if TYPE_CHECKING:
+    from winter_dragon.database.migrations.runner import Operations
+
+
+revision = "0007"
+down_revision = "0006"
+
+ONE_DAY = timedelta(days=1)
+TWO_HOURS = timedelta(hours=2)
+
+
+def upgrade(ops: Operations) -> None:
+    """Create the reminder table, and schedule the reminders of existing signups."""
+    ops.create_table("tournamentsignupreminder")
+    events = ops.metadata.tables["tournamentsignupevent"]
+    reminders = ops.metadata.tables["tournamentsignupreminder"]
+
+    rows = [
+        {
+            "event_id": event.id,
+            "lead_seconds": int(lead.total_seconds()),
+            "fire_at": event.start_time - lead,
+            "fired_at": event.start_time - lead if sent else None,
+        }
+        for event in ops.connection.execute(select(events).where(events.c.start_time.is_not(None)))
+        for lead, sent in ((ONE_DAY, event.reminder_one_day_sent), (TWO_HOURS, event.reminder_two_hour_sent))
+    ]
+    if rows:
+        ops.connection.execute(insert(reminders), rows)
@@ -0,0 +1,448 @@
+"""Audit the query plans of the hot queries of the repository layer.
+
+The statements issued by a workload are captured from the engine and explained. Every table that is filtered
+but read by a sequential scan, or through an index missing some of the filtered columns, is flagged,
+with a composite index proposed for it:
+columns compared for equality first, then the first range-compared or ordered column.
+Proposals are rendered as a migration revision.
+
+Run `python -m winter_dragon.database.query_audit` to audit the hot queries against a throwaway SQLite database,
+or pass `--database` to audit the configured database. The report is written as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from herogold.log import LoggerMixin
+from sqlalchemy import Column, MetaData, create_engine, event, text
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, UnaryExpression
+from sqlalchemy.sql.selectable import Join
+from sqlmodel import Session, col, select
+
+from winter_dragon.database import SQLModel
+from winter_dragon.database.constants import engine as database_engine
+from winter_dragon.database.migrations.autogenerate import next_revision, render_revision, write_revision
+from winter_dragon.database.migrations.runner import MigrationRunner
+from winter_dragon.database.tables import Channels, Commands, Messages, Presence, SteamSale
+from winter_dragon.database.tables.channel import load_guild_tags
+from winter_dragon.database.tables.disabled_commands import DisabledCommands
+from winter_dragon.database.tables.matchmaking import (
+    GameMatch,
+    MatchPlayer,
+    PlayerGameStats,
+    PlayerSynergy,
+    TeamComposition,
+)
+from winter_dragon.database.tables.matchmaking.team_composition import roster_hash
+from winter_dragon.database.tables.steamsale import SteamSaleProperties
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Mapping
+
+    from sqlalchemy import Connection, Engine
+    from sqlalchemy.engine import ExecutionContext
+    from sqlalchemy.sql import ClauseElement
+
+
+type Workload = Mapping[str, Callable[[Session], object]]
+
+SAMPLE_ID = 1
+OTHER_SAMPLE_ID = 2
+SAMPLE_DATE = datetime(2024, 1, 1, tzinfo=UTC)
+EQUALITY_OPERATORS = (operators.eq, operators.in_op, operators.is_)
+RANGE_OPERATORS = (operators.gt, operators.ge, operators.lt, operators.le, operators.between_op)
+SQLITE_PLAN_PATTERN = re.compile(
+    r"^(?P<operation>SCAN|SEARCH) (?P<table>\w+)(?: AS \w+)?"
+    r"(?: USING (?:(?:COVERING )?INDEX (?P<index>\w+)|(?P<primary_key>INTEGER PRIMARY KEY)))?"
+    r"(?: \((?P<constraints>[^)]*)\))?",
+)
+SQLITE_CONSTRAINT_PATTERN = re.compile(r"(\w+)[=<>]")
+SQLITE_SORT = "USE TEMP B-TREE FOR ORDER BY"
+POSTGRES_INDEX_NODES = ("Index Scan", "Index Only Scan")
+PRIMARY_KEY = "PRIMARY KEY"
+
+
+class CapturedStatement(NamedTuple):
+    """A statement issued by a query of the workload."""
+
+    query: str
+    sql: str
+    parameters: Any
+    element: ClauseElement | None
+
+
+class TableAccess(NamedTuple):
+    """How a query plan reads a table."""
+
+    table: str
+    index: str | None
+    sequential_scan: bool
+    columns: tuple[str, ...] | None = None
+    """Columns the index is searched or ordered by, if the plan tells."""
+
+
+class Finding(NamedTuple):
+    """How a query reads a table, and the index proposed if it scans it."""
+
+    query: str
+    table: str
+    index: str | None
+    sequential_scan: bool
+    filtered_on: tuple[str, ...]
+    unindexed: tuple[str, ...]
+    proposed_index: str | None
+    statement: str
+
+    @property
+    def flagged(self) -> bool:
+        """Whether the table is filtered or ordered on columns its access doesn't use an index for."""
+        return bool(self.unindexed)
+
+
+class AuditReport(NamedTuple):
+    """The findings of an audit."""
+
+    findings: list[Finding]
+
+    @property
+    def flagged(self) -> list[Finding]:
+        """Get the findings of queries filtering or ordering on columns without an index."""
+        return [finding for finding in self.findings if finding.flagged]
+
+    def proposals(self) -> dict[str, tuple[str, tuple[str, ...]]]:
+        """Get the proposed indexes, by name, with their table and columns."""
+        return {
+            finding.proposed_index: (finding.table, finding.filtered_on)
+            for finding in self.flagged
+            if finding.proposed_index is not None
+        }
+
+    def to_json(self) -> str:
+        """Get the report as JSON."""
+        return json.dumps(
+            {
+                "flagged": len(self.flagged),
+                "findings": [finding._asdict() | {"flagged": finding.flagged} for finding in self.findings],
+                "proposals": {
+                    name: {"table": table, "columns": columns} for name, (table, columns) in self.proposals().items()
+                },
+            },
+            indent=2,
+        )
+
+    def render_revision(self, revision: str, down_revision: str | None, message: str) -> str:
+        """Render a revision creating the proposed indexes concurrently."""
+        operations = [
+            f'ops.create_index("{name}", "{table}", {json.dumps(list(columns))}, concurrently=True)'
+            for name, (table, columns) in self.proposals().items()
+        ]
+        return render_revision(revision, down_revision, message, operations)
+
+
+def index_name(table: str, columns: tuple[str, ...]) -> str:
+    """Get the conventional name of an index."""
+    return f"ix_{table}_{'_'.join(columns)}"
+
+
+class StatementColumns(NamedTuple):
+    """The columns of each table a statement compares or orders by."""
+
+    equality: dict[str, list[str]]
+    ranges: dict[str, list[str]]
+    order_by: dict[str, list[str]]
+    joins: dict[str, list[str]]
+
+
+def _add_column(columns: dict[str, list[str]], column: object) -> None:
+    if isinstance(column, Column) and column.table is not None:
+        names = columns.setdefault(column.table.name, [])
+        if column.name not in names:
+            names.append(column.name)
+
+
+def _join_columns(element: ClauseElement | None) -> dict[str, list[str]]:
+    columns: dict[str, list[str]] = {}
+    joins = [join for from_ in getattr(element, "get_final_froms", list)() for join in visitors.iterate(from_)]
+    for join in joins:
+        if isinstance(join, Join):
+            for node in visitors.iterate(join.onclause):
+                if isinstance(node, BinaryExpression) and node.operator in EQUALITY_OPERATORS:
+                    _add_column(columns, node.left)
+                    _add_column(columns, node.right)
+    return columns
+
+
+def statement_columns(element: ClauseElement | None) -> StatementColumns:
+    """Get the columns of each table a statement compares or orders by."""
+    columns = StatementColumns({}, {}, {}, _join_columns(element))
+    if (where := getattr(element, "whereclause", None)) is not None:
+        for node in visitors.iterate(where):
+            if isinstance(node, BinaryExpression):
+                if node.operator in EQUALITY_OPERATORS:
+                    _add_column(columns.equality, node.left)
+                elif node.operator in RANGE_OPERATORS:
+                    _add_column(columns.ranges, node.left)
+    for clause in getattr(element, "_order_by_clauses", ()):
+        _add_column(columns.order_by, clause.element if isinstance(clause, UnaryExpression) else clause)
+    return columns
+
+
+def filter_columns(element: ClauseElement | None) -> dict[str, tuple[str, ...]]:
+    """Get the columns a statement filters each table on, in the order an index on them should have.
+
+    Equality comparisons come first, then the first range comparison or ordering.
+    Join columns only count for tables that are not filtered otherwise, as those are looked up through the join.
+    """
+    columns = statement_columns(element)
+    filters: dict[str, tuple[str, ...]] = {}
+    for table in dict.fromkeys([*columns.equality, *columns.ranges, *columns.order_by, *columns.joins]):
+        ordering = [*columns.ranges.get(table, []), *columns.order_by.get(table, [])]
+        equality = columns.equality.get(table, []) or ([] if ordering else columns.joins.get(table, []))
+        filters[table] = (*equality, *[name for name in ordering if name not in equality][:1])
+    return filters
+
+
+def explain_sqlite(connection: Connection, statement: CapturedStatement) -> list[TableAccess]:
+    """Get how SQLite reads each table of a statement."""
+    details = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement.sql}", statement.parameters)]
+    order_by = statement_columns(statement.element).order_by if SQLITE_SORT not in details else {}
+    accesses: list[TableAccess] = []
+    for detail in details:
+        if not (match := SQLITE_PLAN_PATTERN.match(detail)):
+            continue
+        table = match["table"]
+        if match["primary_key"]:
+            accesses.append(TableAccess(table, PRIMARY_KEY, sequential_scan=False))
+        elif match["index"]:
+            # Without a sort step, rows come out of the index in the order the statement asks for.
+            columns = SQLITE_CONSTRAINT_PATTERN.findall(match["constraints"] or "")
+            ordered = [name for name in order_by.get(table, ()) if name not in columns]
+            accesses.append(TableAccess(table, match["index"], sequential_scan=False, columns=(*columns, *ordered)))
+        else:
+            accesses.append(TableAccess(table, None, sequential_scan=match["operation"] == "SCAN"))
+    return accesses
+
+
+def explain_postgres(connection: Connection, statement: CapturedStatement) -> list[TableAccess]:
+    """Get how Postgres reads each table of a statement.
+
+    Sequential scans are disabled while explaining, so small tables don't hide a missing index.
+    """
+    with connection.begin():
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement.sql}", statement.parameters).scalar()
+    accesses: list[TableAccess] = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", ()))
+        if node["Node Type"] == "Seq Scan":
+            accesses.append(TableAccess(node["Relation Name"], None, sequential_scan=True))
+        elif node["Node Type"] in POSTGRES_INDEX_NODES:
+            accesses.append(TableAccess(node["Relation Name"], node["Index Name"], sequential_scan=False))
+        elif node["Node Type"] == "Bitmap Heap Scan":
+            index = next((child["Index Name"] for child in node.get("Plans", ()) if "Index Name" in child), None)
+            accesses.append(TableAccess(node["Relation Name"], index, sequential_scan=False))
+    return accesses
+
+
+class QueryAudit(LoggerMixin):
+    """Capture the statements of a workload and audit their query plans."""
+
+    def __init__(self, engine: Engine) -> None:
+        """Initialize an audit of an engine."""
+        self.engine = engine
+        self.captured: list[CapturedStatement] = []
+
+    @contextmanager
+    def capture(self, query: str) -> Iterator[None]:
+        """Capture the statements issued within the block, as made by a query."""
+
+        def record(
+            _connection: Connection,
+            _cursor: object,
+            sql: str,
+            parameters: Any,  # noqa: ANN401
+            context: ExecutionContext | None,
+            _executemany: bool,  # noqa: FBT001
+        ) -> None:
+            compiled = getattr(context, "compiled", None)
+            self.captured.append(CapturedStatement(query, sql, parameters, getattr(compiled, "statement", None)))
+
+        event.listen(self.engine, "before_cursor_execute", record)
+        try:
+            yield
+        finally:
+            event.remove(self.engine, "before_cursor_execute", record)
+
+    def run(self, workload: Workload) -> AuditReport:
+        """Run every query of a workload, and audit the statements they issued."""
+        with Session(self.engine) as session:
+            for query, run in workload.items():
+                with self.capture(query):
+                    run(session)
+                session.rollback()
+        return self.report()
+
+    def report(self) -> AuditReport:
+        """Explain the captured statements."""
+        explain = explain_postgres if self.engine.dialect.name == "postgresql" else explain_sqlite
+        findings: list[Finding] = []
+        seen: set[tuple[str, str]] = set()
+        with self.engine.connect() as connection:
+            for statement in self.captured:
+                if (statement.query, statement.sql) in seen:
+                    continue
+                seen.add((statement.query, statement.sql))
+                filters = filter_columns(statement.element)
+                for access in explain(connection, statement):
+                    columns = filters.get(access.table, ())
+                    if access.sequential_scan:
+                        unindexed = columns
+                    elif access.columns is not None:
+                        unindexed = tuple(name for name in columns if name not in access.columns)
+                    else:
+                        unindexed = ()
+                    findings.append(
+                        Finding(
+                            statement.query,
+                            access.table,
+                            access.index,
+                            access.sequential_scan,
+                            columns,
+                            unindexed,
+                            index_name(access.table, columns) if unindexed else None,
+                            statement.sql,
+                        ),
+                    )
+        report = AuditReport(findings)
+        for finding in report.flagged:
+            self.logger.warning(
+                f"{finding.query} reads {finding.table} without an index on {finding.unindexed}, "
+                f"proposing {finding.proposed_index}",
+            )
+        return report
+
+
+def create_sqlite_schema(engine: Engine, metadata: MetaData) -> None:
+    """Create the tables on SQLite, for auditing without a Postgres server.
+
+    SQLite can't autoincrement part of a composite primary key, so those tables are created from a copy without it.
+    """
+    schema = MetaData()
+    for table in metadata.sorted_tables:
+        copy = table.to_metadata(schema)
+        if len(copy.primary_key.columns) > 1:
+            for column in copy.primary_key.columns:
+                column.autoincrement = False
+    schema.create_all(engine)
+
+
+def hot_queries() -> Workload:
+    """Get the queries the bot issues most, as issued by the code they are copied from."""
+    return {
+        # DatabaseManager.on_message
+        "messages_by_id": lambda session: session.exec(select(Messages).where(Messages.id == SAMPLE_ID)).first(),
+        # DatabaseManager.on_presence_update
+        "recent_presences": lambda session: session.exec(
+            select(Presence).where(Presence.user_id == SAMPLE_ID, col(Presence.date_time) >= SAMPLE_DATE),
+        ).all(),
+        # steam_scraper
+        "steam_sale_by_url": lambda session: session.exec(select(SteamSale).where(SteamSale.url == "url")).first(),
+        # SteamNotifier
+        "steam_sale_properties": lambda session: session.exec(
+            select(SteamSaleProperties).where(SteamSaleProperties.steam_sale_id == SAMPLE_ID),
+        ).all(),
+        # Stats.on_member_update
+        "peak_channel": lambda session: session.exec(
+            select(Channels).where(Channels.guild_id == SAMPLE_ID, Channels.name == "peak_channel"),
+        ).first(),
+        # Channels.tag_cache
+        "guild_tags": lambda session: load_guild_tags(session, SAMPLE_ID),
+        # CommandManager
+        "disabled_command": lambda session: session.exec(
+            select(DisabledCommands).where(DisabledCommands.command_id == SAMPLE_ID, DisabledCommands.guild_id == SAMPLE_ID),
+        ).first(),
+        # Cog.interaction_check
+        "command_by_name": lambda session: session.exec(select(Commands).where(Commands.qual_name == "name")).first(),
+        # MatchmakingSystem.update_synergies
+        "synergy_pair": lambda session: session.exec(
+            select(PlayerSynergy).where(
+                PlayerSynergy.player1_id == SAMPLE_ID,
+                PlayerSynergy.player2_id == OTHER_SAMPLE_ID,
+                PlayerSynergy.game_id == SAMPLE_ID,
+            ),
+        ).first(),
+        # MatchmakingSystem.print_synergy_data
+        "top_synergies": lambda session: session.exec(
+            select(PlayerSynergy)
+            .where(PlayerSynergy.game_id == SAMPLE_ID, col(PlayerSynergy.matches_as_teammates) > 0)
+            .order_by(col(PlayerSynergy.teammate_synergy).desc())
+            .limit(15),
+        ).all(),
+        # MatchmakingSystem.get_player_stats
+        "player_stats": lambda session: session.exec(
+            select(PlayerGameStats).where(PlayerGameStats.user_id == SAMPLE_ID, PlayerGameStats.game_id == SAMPLE_ID),
+        ).first(),
+        # MatchmakingSystem.print_player_stats
+        "skill_leaderboard": lambda session: session.exec(
+            select(PlayerGameStats)
+            .where(PlayerGameStats.game_id == SAMPLE_ID)
+            .order_by(col(PlayerGameStats.skill_rating).desc())
+            .limit(10),
+        ).all(),
+        # MatchmakingSystem.print_match_history
+        "recent_matches": lambda session: session.exec(
+            select(GameMatch).where(GameMatch.game_id == SAMPLE_ID).order_by(col(GameMatch.match_date).desc()).limit(10),
+        ).all(),
+        "match_players": lambda session: session.exec(select(MatchPlayer).where(MatchPlayer.match_id == SAMPLE_ID)).all(),
+        # CompositionIndex.lookup
+        "composition_lookup": lambda session: session.exec(
+            select(TeamComposition).where(
+                TeamComposition.game_id == SAMPLE_ID,
+                TeamComposition.roster_hash == roster_hash([SAMPLE_ID]),
+            ),
+        ).first(),
+    }
+
+
+def main() -> int:
+    """Audit the hot queries, and write the report and a revision for the proposed indexes."""
+    parser = argparse.ArgumentParser(prog="python -m winter_dragon.database.query_audit")
+    parser.add_argument("--database", action="store_true", help="Audit the configured database instead of a new SQLite one")
+    parser.add_argument("--revision", metavar="MESSAGE", help="Write a revision creating the proposed indexes")
+    parser.add_argument("--output", type=Path, help="Write the report to a file instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = database_engine
+        if not args.database:
+            engine = create_engine(f"sqlite:///{Path(directory) / 'audit.db'}")
+            create_sqlite_schema(engine, SQLModel.metadata)
+        report = QueryAudit(engine).run(hot_queries())
+
+    if args.output:
+        args.output.write_text(report.to_json(), encoding="utf8")
+    else:
+        sys.stdout.write(f"{report.to_json()}\n")
+
+    if args.revision and report.proposals():
+        head = MigrationRunner(database_engine).head
+        revision = next_revision(head)
+        write_revision(report.render_revision(revision, head, args.revision), revision, args.revision)
+    return 1 if report.flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,6 +21,7 @@ from .channel import Channels
 from .command import Commands
 from .commandgroup import CommandGroups
 from .disabled_commands import DisabledCommands
+from .forum_post import ForumPosts
 from .game import Games
 from .guild import Guilds
 from .hangman import Hangmen
@@ -38,10 +39,12 @@ from .steamsale import SteamSale
 from .steamuser import SteamUsers
 from .suggestion import Suggestions
 from .sync_ban import SyncBanGuild, SyncBanUser
+from .synced_command import SyncedCommand
 from .tournament_signup import (
     TournamentSignupConfig,
     TournamentSignupEvent,
     TournamentSignupParticipant,
+    TournamentSignupReminder,
 )
 from .user import Users
 from .welcome import Welcome
@@ -64,6 +67,7 @@ __all__ = [
     "CommandGroups",
     "Commands",
     "DisabledCommands",
+    "ForumPosts",
     "Games",
     "GuildAuditLog",
     "GuildCommands",
@@ -85,9 +89,11 @@ __all__ = [
     "Suggestions",
     "SyncBanGuild",
     "SyncBanUser",
+    "SyncedCommand",
     "TournamentSignupConfig",
     "TournamentSignupEvent",
     "TournamentSignupParticipant",
+    "TournamentSignupReminder",
     "UserRoles",
     "Users",
     "Welcome",
@@ -12,5 +12,7 @@ from winter_dragon.database.tables.channel import Channels
 class ChannelTag(SQLModel, table=True):
     """Association table linking channels to their tags."""
 
-    channel_id: int = Field(sa_column=Column(ForeignKey(get_foreign_key(Channels), ondelete="CASCADE"), primary_key=True))
+    channel_id: int = Field(
+        sa_column=Column(ForeignKey(get_foreign_key(Channels), ondelete="CASCADE"), primary_key=True, index=True),
+    )
     tag: Tags = Field(sa_column=Column(Enum(Tags), nullable=False))
@@ -1,10 +1,11 @@
 
 
+from collections.abc import Iterable
 from datetime import datetime
 from typing import Self
 
 from discord import AuditLogEntry
-from sqlmodel import Field
+from sqlmodel import Field, Session, col, select
 
 from winter_dragon.database.extension.model import DiscordID
 
@@ -17,15 +18,15 @@ class AuditLog(DiscordID, table=True):
     category: int  # AuditLogActionCategory
 
     @classmethod
-    def from_audit_log(cls, entry: AuditLogEntry) -> Self:
-        """Create an AuditLog instance from a Discord AuditLogEntry."""
+    def from_entry(cls, entry: AuditLogEntry) -> Self:
+        """Create an AuditLog instance from a Discord AuditLogEntry, without persisting it."""
         if entry.target is None:
             msg = f"Target should be AuditLogEntry.target type, but is {type(entry.target)}"
             raise ValueError(msg)
         if entry.category is None:
             msg = f"Category should be AuditLogEntry.category type, but is {type(entry.category)}"
             raise ValueError(msg)
-        audit = cls(
+        return cls(
             id=entry.id,
             action=entry.action.value,
             reason=entry.reason,
@@ -33,6 +34,26 @@ class AuditLog(DiscordID, table=True):
             target_id=str(entry.target.id),
             category=entry.category.value,
         )
+
+    @classmethod
+    def from_audit_log(cls, entry: AuditLogEntry) -> Self:
+        """Create an AuditLog instance from a Discord AuditLogEntry."""
+        audit = cls.from_entry(entry)
         cls.session.add(audit)
         cls.session.commit()
         return audit
+
+    @classmethod
+    def bulk_insert(cls, session: Session, audits: Iterable[Self]) -> int:
+        """Insert many audit logs in a single transaction, skipping ids that are already stored.
+
+        Returns the number of newly inserted rows.
+        """
+        pending = {audit.id: audit for audit in audits}
+        if not pending:
+            return 0
+        known = set(session.exec(select(cls.id).where(col(cls.id).in_(pending))).all())
+        new = [audit for id_, audit in pending.items() if id_ not in known]
+        session.add_all(new)
+        session.commit()
+        return len(new)
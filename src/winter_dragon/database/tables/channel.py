@@ -1,22 +1,60 @@
 
+from collections.abc import Callable, Iterable
+from typing import ClassVar
+
 from discord import AuditLogAction
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index
 from sqlmodel import Field, Session, col, select
 
 from winter_dragon.database.channel_types import Tags
 from winter_dragon.database.extension.model import DiscordID
 from winter_dragon.database.keys import get_foreign_key
 from winter_dragon.database.tables.guild import Guilds
+from winter_dragon.database.tag_cache import ChannelTagCache, GuildTags, TaggedChannel
+
+
+type LinksChangedListener = Callable[[int], None]
+
+
+def load_guild_tags(session: Session, guild_id: int) -> Iterable[tuple[Tags, int, str]]:
+    """Load every (tag, channel id, channel name) link of a guild in one query."""
+    from winter_dragon.database.tables.associations.channel_tags import ChannelTag
+
+    return session.exec(
+        select(ChannelTag.tag, Channels.id, Channels.name)
+        .join(Channels, col(ChannelTag.channel_id) == col(Channels.id))
+        .where(Channels.guild_id == guild_id),
+    ).all()
 
 
 class Channels(DiscordID, table=True):
+    __table_args__ = (Index("ix_channels_guild_id_name", "guild_id", "name"),)
+
     guild_id: int = Field(sa_column=Column(ForeignKey(get_foreign_key(Guilds))))
     name: str
 
+    links_changed_listeners: ClassVar[list[LinksChangedListener]] = []
+    tag_cache: ClassVar[ChannelTagCache] = ChannelTagCache(load_guild_tags)
+
+    @classmethod
+    def on_links_changed(cls, listener: LinksChangedListener) -> LinksChangedListener:
+        """Register a listener that is called with the guild id whenever tag or audit links change."""
+        cls.links_changed_listeners.append(listener)
+        return listener
+
+    @classmethod
+    def notify_links_changed(cls, guild_id: int) -> None:
+        """Notify listeners that the tag or audit links of a guild changed."""
+        cls.tag_cache.invalidate(guild_id)
+        for listener in cls.links_changed_listeners:
+            listener(guild_id)
+
     def link_tag(self, session: Session, tag: Tags) -> None:
         """Link this channel to a specific tag through the association table."""
         from winter_dragon.database.tables.associations.channel_tags import ChannelTag
 
+        if self.guild_id is not None and tag in self.tag_cache.tags_of(session, self.guild_id, self.id):
+            return
         if session.exec(
             select(ChannelTag).where(
                 ChannelTag.channel_id == self.id,
@@ -30,7 +68,9 @@ class Channels(DiscordID, table=True):
             tag=tag,
         )
         session.add(association)
+        guild_id = self.guild_id
         session.commit()
+        self.notify_links_changed(guild_id)
 
     def unlink_tag(self, session: Session, tag: Tags | None = None) -> None:
         """Remove tag associations from this channel.
@@ -51,12 +91,16 @@ class Channels(DiscordID, table=True):
             )
 
         session.exec(stmt)
+        guild_id = self.guild_id
         session.commit()
+        self.notify_links_changed(guild_id)
 
     def get_tags(self, session: Session) -> list[Tags]:
         """Get all tags associated with this channel."""
         from winter_dragon.database.tables.associations.channel_tags import ChannelTag
 
+        if self.guild_id is not None:
+            return self.tag_cache.tags_of(session, self.guild_id, self.id)
         associations = session.exec(select(ChannelTag).where(ChannelTag.channel_id == self.id)).all()
 
         return [assoc.tag for assoc in associations]
@@ -65,6 +109,8 @@ class Channels(DiscordID, table=True):
         """Check if this channel has a specific tag."""
         from winter_dragon.database.tables.associations.channel_tags import ChannelTag
 
+        if self.guild_id is not None:
+            return tag in self.tag_cache.tags_of(session, self.guild_id, self.id)
         return (
             session.exec(
                 select(ChannelTag).where(
@@ -96,16 +142,36 @@ class Channels(DiscordID, table=True):
 
     @staticmethod
     def get_by_tag(session: Session, tag: Tags, guild_id: int | None = None) -> list["Channels"]:
-        """Get all channels with a specific tag, optionally filtered by guild."""
-        from winter_dragon.database.tables.associations.channel_tags import ChannelTag
+        """Get all channels with a specific tag, optionally filtered by guild.
 
-        query = select(Channels).join(ChannelTag).where(ChannelTag.tag == tag)
+        Within a guild, the linked channels are resolved from the tag cache, but their rows are still queried.
+        Use `get_tagged` when only the id and name are needed.
+        """
+        from winter_dragon.database.tables.associations.channel_tags import ChannelTag
 
         if guild_id is not None:
-            query = query.where(Channels.guild_id == guild_id)
+            return Channels._get_by_ids(session, [channel.id for channel in Channels.tag_cache.get(session, guild_id, tag)])
 
+        query = select(Channels).join(ChannelTag).where(ChannelTag.tag == tag)
         return list(session.exec(query).all())
 
+    @staticmethod
+    def get_tagged(session: Session, guild_id: int, tag: Tags) -> tuple[TaggedChannel, ...]:
+        """Get the (id, name) of the channels of a guild linked to a tag, without loading the channels."""
+        return Channels.tag_cache.get(session, guild_id, tag)
+
+    @staticmethod
+    def resolve_tags(session: Session, guild_id: int, tags: Iterable[Tags]) -> GuildTags:
+        """Get the (id, name) of the channels linked to each of several tags in a guild, without loading the channels."""
+        return Channels.tag_cache.resolve(session, guild_id, tags)
+
+    @staticmethod
+    def _get_by_ids(session: Session, channel_ids: Iterable[int]) -> list["Channels"]:
+        channel_ids = list(channel_ids)
+        if not channel_ids:
+            return []
+        return list(session.exec(select(Channels).where(col(Channels.id).in_(channel_ids))).all())
+
     @staticmethod
     def get_by_tags(
         session: Session,
@@ -122,15 +188,18 @@ class Channels(DiscordID, table=True):
         if not tags:
             return []
 
+        if guild_id is not None:
+            resolved = [
+                {channel.id for channel in channels} for channels in Channels.resolve_tags(session, guild_id, tags).values()
+            ]
+            return Channels._get_by_ids(session, set.intersection(*resolved) if match_all else set.union(*resolved))
+
         from sqlalchemy import func
 
         from winter_dragon.database.tables.associations.channel_tags import ChannelTag
 
         stmt = select(col(ChannelTag.channel_id)).where(col(ChannelTag.tag).in_(tags))
 
-        if guild_id is not None:
-            stmt = stmt.join(Channels, col(ChannelTag.channel_id) == col(Channels.id)).where(col(Channels.guild_id) == guild_id)
-
         if match_all:
             stmt = stmt.group_by(col(ChannelTag.channel_id)).having(func.count(func.distinct(col(ChannelTag.tag))) == len(tags))
         else:
@@ -159,7 +228,9 @@ class Channels(DiscordID, table=True):
             audit_action=audit_action,
         )
         session.add(association)
+        guild_id = self.guild_id
         session.commit()
+        self.notify_links_changed(guild_id)
 
     def unlink_audit_action(self, session: Session, audit_action: AuditLogAction | None = None) -> None:
         """Remove audit action associations from this channel.
@@ -180,4 +251,6 @@ class Channels(DiscordID, table=True):
             )
 
         session.exec(stmt)
+        guild_id = self.guild_id
         session.commit()
+        self.notify_links_changed(guild_id)
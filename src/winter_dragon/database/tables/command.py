@@ -1,10 +1,18 @@
 
 
+from typing import ClassVar
+
 from sqlmodel import Field
 
+from winter_dragon.database.counters import Counter
 from winter_dragon.database.extension.model import SQLModel
 
 
 class Commands(SQLModel, table=True):
-    qual_name: str = Field()
+    qual_name: str = Field(index=True)
     call_count: int = Field()
+
+    calls: ClassVar[Counter]
+
+
+Commands.calls = Counter(Commands, "call_count", ("qual_name",))
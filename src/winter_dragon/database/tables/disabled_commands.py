@@ -1,5 +1,6 @@
 
 
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from winter_dragon.database.extension.model import SQLModel
@@ -11,6 +12,8 @@ from winter_dragon.database.tables.user import Users
 
 
 class DisabledCommands(SQLModel, table=True):
+    __table_args__ = (Index("ix_disabledcommands_command_id_guild_id", "command_id", "guild_id"),)
+
     command_id: int = Field(foreign_key=get_foreign_key(Commands), primary_key=True)
     user_id: int = Field(foreign_key=get_foreign_key(Users), nullable=True)
     channel_id: int = Field(foreign_key=get_foreign_key(Channels), nullable=True)
@@ -0,0 +1,14 @@
+
+
+from sqlalchemy import BigInteger
+from sqlmodel import Field
+
+from winter_dragon.database.extension.model import DiscordID
+
+
+class ForumPosts(DiscordID, table=True):
+    """Forum threads, indexed to find duplicate posts."""
+
+    guild_id: int = Field(sa_type=BigInteger, index=True)
+    forum_id: int = Field(sa_type=BigInteger, index=True)
+    title: str
@@ -1,29 +1,25 @@
 
 
-from typing import Self
+from typing import ClassVar, Self
 
 from sqlmodel import Field
 
+from winter_dragon.database.counters import Counter
 from winter_dragon.database.extension.model import SQLModel, select
 from winter_dragon.database.keys import get_foreign_key
 from winter_dragon.database.tables.user import Users
 
 
 class Infractions(SQLModel, table=True):
-    user_id: int = Field(foreign_key=get_foreign_key(Users), primary_key=True)
+    user_id: int = Field(foreign_key=get_foreign_key(Users), primary_key=True, index=True, unique=True)
     infraction_count: int = Field(default=0)
 
+    counter: ClassVar[Counter]
+
     @classmethod
     def add_infraction_count(cls, user_id: int, amount: int) -> None:
         """Add an infraction to a user, if it isn't in this table add it."""
-        infraction = cls.session.exec(select(cls).where(cls.user_id == user_id)).first()
-
-        if infraction is None:
-            infraction = cls(user_id=user_id, infraction_count=0)
-            cls.session.add(infraction)
-
-        infraction.infraction_count += amount
-        cls.session.commit()
+        cls.counter.increment(user_id, amount=amount)
 
     @classmethod
     def fetch_user(cls, id_: int) -> Self:
@@ -35,3 +31,6 @@ class Infractions(SQLModel, table=True):
         cls.session.add(inst)
         cls.session.commit()
         return inst
+
+
+Infractions.counter = Counter(Infractions, "infraction_count", ("user_id",), create=True)
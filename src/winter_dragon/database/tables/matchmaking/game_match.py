@@ -5,19 +5,22 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from winter_dragon.database.extension.model import SQLModel
 from winter_dragon.database.keys import get_foreign_key
 
 
-from sqlalchemy.orm import Mapped, relationship
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Mapped, relationship
 
     from winter_dragon.database.tables.game import Games
 else:
     from winter_dragon.database.tables import Games
 
-from winter_dragon.database.tables.matchmaking.match_player import MatchPlayer
+if TYPE_CHECKING:
+    from winter_dragon.database.tables.matchmaking.match_player import MatchPlayer
     from winter_dragon.database.tables.matchmaking.match_team import MatchTeam
 
 
@@ -27,6 +30,8 @@ class GameMatch(SQLModel, table=True):
     Stores core match information in 6NF - only facts about the match itself.
     """
 
+    __table_args__ = (Index("ix_gamematch_game_id_match_date", "game_id", "match_date"),)
+
     game_id: int = Field(foreign_key=get_foreign_key(Games), index=True)
     match_date: datetime = Field(default_factory=datetime.now, index=True)
     duration_seconds: int | None = Field(default=None)
@@ -34,6 +39,7 @@ class GameMatch(SQLModel, table=True):
     bracket_format: str | None = Field(default=None)  # e.g., "1v1", "2v2", "3v3", "ffa"
 
     # Relationships
+    if TYPE_CHECKING:
         game: Mapped[Games] = relationship()
         players: Mapped[list[MatchPlayer]] = relationship(back_populates="match")
         teams: Mapped[list[MatchTeam]] = relationship(back_populates="match")
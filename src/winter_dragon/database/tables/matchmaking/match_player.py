@@ -10,7 +10,8 @@ from winter_dragon.database.extension.model import SQLModel
 from winter_dragon.database.keys import get_foreign_key
 
 
-from sqlalchemy.orm import Mapped, relationship
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Mapped, relationship
 
     from winter_dragon.database.tables.matchmaking.game_match import GameMatch
     from winter_dragon.database.tables.user import Users
@@ -32,5 +33,6 @@ class MatchPlayer(SQLModel, table=True):
     won: bool = Field(default=False)
 
     # Relationships
+    if TYPE_CHECKING:
         match: Mapped[GameMatch] = relationship(back_populates="players")
         user: Mapped[Users] = relationship()
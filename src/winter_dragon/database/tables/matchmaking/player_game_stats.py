@@ -4,13 +4,15 @@
 
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from winter_dragon.database.extension.model import SQLModel
 from winter_dragon.database.keys import get_foreign_key
 
 
-from sqlalchemy.orm import Mapped, relationship
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Mapped, relationship
 
     from winter_dragon.database.tables.game import Games
     from winter_dragon.database.tables.user import Users
@@ -25,6 +27,11 @@ class PlayerGameStats(SQLModel, table=True):
     This is computed from match history but stored for performance.
     """
 
+    __table_args__ = (
+        Index("ix_playergamestats_user_id_game_id", "user_id", "game_id"),
+        Index("ix_playergamestats_game_id_skill_rating", "game_id", "skill_rating"),
+    )
+
     user_id: int = Field(foreign_key=get_foreign_key(Users), index=True)
     game_id: int = Field(foreign_key=get_foreign_key(Games), index=True)
 
@@ -37,5 +44,6 @@ class PlayerGameStats(SQLModel, table=True):
     skill_rating: float = Field(default=1000.0)  # ELO-like rating
 
     # Relationships
+    if TYPE_CHECKING:
         user: Mapped[Users] = relationship()
         game: Mapped[Games] = relationship()
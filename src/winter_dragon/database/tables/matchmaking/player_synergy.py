@@ -4,13 +4,15 @@
 
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from winter_dragon.database.extension.model import SQLModel
 from winter_dragon.database.keys import get_foreign_key
 
 
-from sqlalchemy.orm import Mapped, relationship
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Mapped, relationship
 
     from winter_dragon.database.tables.game import Games
     from winter_dragon.database.tables.user import Users
@@ -24,6 +26,11 @@ class PlayerSynergy(SQLModel, table=True):
     6NF: Only facts about the interaction between two specific players in a game.
     """
 
+    __table_args__ = (
+        Index("ix_playersynergy_player1_id_player2_id_game_id", "player1_id", "player2_id", "game_id"),
+        Index("ix_playersynergy_game_id_matches_as_teammates", "game_id", "matches_as_teammates"),
+    )
+
     player1_id: int = Field(foreign_key=get_foreign_key(Users), index=True)
     player2_id: int = Field(foreign_key=get_foreign_key(Users), index=True)
     game_id: int = Field(foreign_key=get_foreign_key(Games), index=True)
@@ -39,6 +46,7 @@ class PlayerSynergy(SQLModel, table=True):
     rivalry_factor: float = Field(default=0.0)  # How often player1 beats player2
 
     # Relationships
+    if TYPE_CHECKING:
         player1: Mapped[Users] = relationship(foreign_keys="PlayerSynergy.player1_id")
         player2: Mapped[Users] = relationship(foreign_keys="PlayerSynergy.player2_id")
         game: Mapped[Games] = relationship()
@@ -2,15 +2,20 @@
 
 
 
+import hashlib
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from winter_dragon.database.extension.model import SQLModel
 from winter_dragon.database.keys import get_foreign_key
 
 
-from sqlalchemy.orm import Mapped, relationship
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy.orm import Mapped, relationship
 
     from winter_dragon.database.tables.game import Games
     from winter_dragon.database.tables.user import Users
@@ -18,14 +23,27 @@ else:
     from winter_dragon.database.tables import Games
 
 
+ROSTER_HASH_LENGTH = 64
+
+
+def roster_hash(user_ids: "Iterable[int]") -> str:
+    """Get the canonical hash of a roster, the same for any order of its players."""
+    roster = ",".join(map(str, sorted(user_ids)))
+    return hashlib.sha256(roster.encode()).hexdigest()
+
+
 class TeamComposition(SQLModel, table=True):
     """Historical record of team compositions for future reference.
 
     6NF: Facts about a specific team composition that played together.
-    Players are linked via TeamCompositionPlayer association table.
+    Players are linked via TeamCompositionPlayer association table,
+    and the roster is identified by the hash of its sorted player IDs, unique per game.
     """
 
+    __table_args__ = (Index("ix_teamcomposition_game_id_roster_hash", "game_id", "roster_hash", unique=True),)
+
     game_id: int = Field(foreign_key=get_foreign_key(Games), index=True)
+    roster_hash: str | None = Field(default=None, max_length=ROSTER_HASH_LENGTH)
 
     # Statistics for this exact composition
     times_played: int = Field(default=0)
@@ -35,5 +53,6 @@ class TeamComposition(SQLModel, table=True):
     avg_team_score: float = Field(default=0.0)
 
     # Relationships
+    if TYPE_CHECKING:
         game: Mapped[Games] = relationship()
         players: Mapped[list[Users]] = relationship(secondary="team_composition_player", back_populates="team_compositions")
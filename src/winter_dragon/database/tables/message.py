@@ -11,5 +11,5 @@ from winter_dragon.database.tables.user import Users
 
 class Messages(DiscordID, table=True):
     content: str
-    user_id: int = Field(sa_column=Column(ForeignKey(get_foreign_key(Users), ondelete="CASCADE")))
-    channel_id: int = Field(sa_column=Column(ForeignKey(get_foreign_key(Channels)), nullable=True))
+    user_id: int = Field(sa_column=Column(ForeignKey(get_foreign_key(Users), ondelete="CASCADE"), index=True))
+    channel_id: int = Field(sa_column=Column(ForeignKey(get_foreign_key(Channels)), nullable=True, index=True))
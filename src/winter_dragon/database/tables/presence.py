@@ -2,7 +2,7 @@
 
 from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index
 from sqlmodel import Field
 
 from winter_dragon.database.extension.model import SQLModel, select
@@ -11,6 +11,8 @@ from winter_dragon.database.tables.user import Users
 
 
 class Presence(SQLModel, table=True):
+    __table_args__ = (Index("ix_presence_user_id_date_time", "user_id", "date_time"),)
+
     user_id: int = Field(sa_column=Column(ForeignKey(get_foreign_key(Users), ondelete="CASCADE")))
     status: str
     date_time: datetime
@@ -19,7 +19,7 @@ class SaleTypes(Enum):
 
 class SteamSale(SQLModel, table=True):
     title: str
-    url: str
+    url: str = Field(index=True)
     sale_percent: int
     final_price: float
     update_datetime: datetime
@@ -40,7 +40,7 @@ class SteamSale(SQLModel, table=True):
 class SteamSaleProperties(SQLModel, table=True):
     """associate sale types"""
 
-    steam_sale_id: int = Field(foreign_key=get_foreign_key(SteamSale))
+    steam_sale_id: int = Field(foreign_key=get_foreign_key(SteamSale), index=True)
     property: SaleTypes
 
 
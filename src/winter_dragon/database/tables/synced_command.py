@@ -0,0 +1,13 @@
+
+
+from sqlmodel import Field
+
+from winter_dragon.database.extension.model import SQLModel
+
+
+class SyncedCommand(SQLModel, table=True):
+    """Table to track the signatures of commands that have been synced with Discord."""
+
+    scope: str = Field(primary_key=True)  # "global" or a guild id
+    command_name: str = Field(primary_key=True)
+    signature: str
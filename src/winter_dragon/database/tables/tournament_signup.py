@@ -1,10 +1,8 @@
 """Database tables for tournament signup and registration."""
 
-
-
 from datetime import UTC, datetime
 
-from sqlalchemy import BigInteger
+from sqlalchemy import BigInteger, Index
 from sqlmodel import Field, SQLModel
 
 from winter_dragon.database.keys import get_foreign_key
@@ -46,3 +44,20 @@ class TournamentSignupParticipant(SQLModel, table=True):
     )
     user_id: int = Field(sa_type=BigInteger, index=True)
     joined_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class TournamentSignupReminder(SQLModel, table=True):
+    """A reminder of a tournament signup, fired once at a fixed time before the tournament starts."""
+
+    __table_args__ = (Index("ix_tournamentsignupreminder_event_id_lead_seconds", "event_id", "lead_seconds", unique=True),)
+
+    id: int | None = Field(default=None, primary_key=True, index=True)
+    event_id: int = Field(
+        foreign_key=get_foreign_key(TournamentSignupEvent),
+        sa_type=BigInteger,
+        nullable=False,
+        index=True,
+    )
+    lead_seconds: int = Field(description="How long before the tournament starts the reminder fires")
+    fire_at: datetime = Field(index=True)
+    fired_at: datetime | None = Field(default=None, description="When the reminder was sent or skipped")
@@ -0,0 +1,84 @@
+"""Module for resolving channel tags from memory.
+
+Keeps a per-guild map from tag to the channels linked to it, loaded with a single query the first time a guild is resolved.
+Entries are dropped whenever the links of a guild change, see `Channels.notify_links_changed`.
+"""
+
+import threading
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+from herogold.log import LoggerMixin
+from sqlmodel import Session
+
+from winter_dragon.database.channel_types import Tags
+
+
+class TaggedChannel(NamedTuple):
+    """A channel linked to a tag."""
+
+    id: int
+    name: str
+
+
+type GuildTags = dict[Tags, tuple[TaggedChannel, ...]]
+type TagLoader = Callable[[Session, int], Iterable[tuple[Tags, int, str]]]
+
+
+class ChannelTagCache(LoggerMixin):
+    """Per-guild cache of tag to channel links."""
+
+    def __init__(self, loader: TagLoader) -> None:
+        """Initialize an empty cache."""
+        self._loader = loader
+        self._guilds: dict[int, GuildTags] = {}
+        self._generations: dict[int, int] = {}
+        self._generation = 0
+        self._cleared_at = 0
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, guild_id: int, tag: Tags) -> tuple[TaggedChannel, ...]:
+        """Get the channels of a guild linked to a tag."""
+        return self._get_guild(session, guild_id).get(tag, ())
+
+    def resolve(self, session: Session, guild_id: int, tags: Iterable[Tags]) -> GuildTags:
+        """Get the channels of a guild linked to each of several tags at once."""
+        guild = self._get_guild(session, guild_id)
+        return {tag: guild.get(tag, ()) for tag in tags}
+
+    def tags_of(self, session: Session, guild_id: int, channel_id: int) -> list[Tags]:
+        """Get the tags a channel of a guild is linked to."""
+        return [
+            tag
+            for tag, channels in self._get_guild(session, guild_id).items()
+            if any(channel.id == channel_id for channel in channels)
+        ]
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        """Drop the links of a guild, or of every guild if no guild is given."""
+        with self._lock:
+            self._generation += 1
+            if guild_id is None:
+                self._guilds.clear()
+                self._generations.clear()
+                self._cleared_at = self._generation
+            else:
+                self._guilds.pop(guild_id, None)
+                self._generations[guild_id] = self._generation
+
+    def _get_guild(self, session: Session, guild_id: int) -> GuildTags:
+        if (guild := self._guilds.get(guild_id)) is not None:
+            return guild
+
+        with self._lock:
+            generation = self._generation
+        links: dict[Tags, list[TaggedChannel]] = {}
+        for tag, channel_id, name in self._loader(session, guild_id):
+            links.setdefault(tag, []).append(TaggedChannel(channel_id, name))
+        guild = {tag: tuple(channels) for tag, channels in links.items()}
+
+        with self._lock:
+            # Links that changed while loading may not be part of the result, so it's only used for this call.
+            if max(self._generations.get(guild_id, 0), self._cleared_at) <= generation:
+                self._guilds[guild_id] = guild
+        return guild
@@ -0,0 +1,283 @@
+"""Tests for atomic counters and buffering their increments, against SQLite databases and an in-memory Redis."""
+
+from __future__ import annotations
+
+import multiprocessing
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import Engine, Integer, MetaData, create_engine, event, text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+from winter_dragon.database.migrations.runner import Operations
+from winter_dragon.database.tables import Commands, Infractions, Users
+from winter_dragon.redis.counter_buffer import CounterBuffer
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+PROCESSES = 4
+INCREMENTS = 200
+BENCHMARK_KEYS = 5_000
+
+
+def make_engine(url: str = "sqlite://") -> Engine:
+    """Create a database with the users, commands and infractions tables.
+
+    SQLite only autoincrements a lone INTEGER primary key, so the tables are created from copies with one,
+    and composite primary keys leave their id empty, like SQLite allows.
+    """
+    engine = create_engine(url, connect_args={"timeout": 60}, poolclass=StaticPool if url == "sqlite://" else None)
+    schema = MetaData()
+    for model in (Users, Commands, Infractions):
+        table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+        table.c.id.type = Integer()
+        if len(table.primary_key.columns) > 1:
+            table.c.id.autoincrement = False
+            table.c.id.nullable = True
+    schema.create_all(engine)
+    return engine
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[list[str]]:
+    """Capture the SQL of the statements executed within the block."""
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:  # noqa: ANN401
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def increment_from_process(url: str) -> None:
+    """Increment an infraction and a command call from another process."""
+    engine = create_engine(url, connect_args={"timeout": 60})
+    with Session(engine) as session:
+        for _ in range(INCREMENTS):
+            Infractions.counter.increment(1, amount=2, session=session)
+            Commands.calls.increment("ping", session=session)
+    engine.dispose()
+
+
+class FakePipeline:
+    """Pipeline that queues commands for a fake Redis, and runs them on execute."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        """Initialize an empty pipeline."""
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...]]] = []
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Queue a command."""
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self) -> list[Any]:
+        """Run the queued commands."""
+        if not self.redis.available:
+            raise RedisConnectionError
+        return [getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """Redis that keeps hashes in memory, optionally failing every command."""
+
+    def __init__(self, *, available: bool = True) -> None:
+        """Initialize an empty Redis."""
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.available = available
+
+    def hincrby(self, name: str, key: str, amount: int) -> int:
+        """Increment a field of a hash."""
+        if not self.available:
+            raise RedisConnectionError
+        fields = self.hashes.setdefault(name, {})
+        value = int(fields.get(key.encode(), 0)) + amount
+        fields[key.encode()] = str(value).encode()
+        return value
+
+    def hgetall(self, name: str) -> dict[bytes, bytes]:
+        """Get the fields of a hash."""
+        return dict(self.hashes.get(name, {}))
+
+    def delete(self, name: str) -> int:
+        """Delete a hash."""
+        return int(self.hashes.pop(name, None) is not None)
+
+    def pipeline(self, *, transaction: bool = True) -> FakePipeline:  # noqa: ARG002
+        """Create a pipeline."""
+        return FakePipeline(self)
+
+
+def test_increment() -> None:
+    """Counters are incremented in SQL, creating rows only for counters that may."""
+    with Session(make_engine()) as session:
+        session.add(Commands(qual_name="ping", call_count=0))
+        session.commit()
+
+        assert Commands.calls.increment("ping", session=session) == 1
+        assert Commands.calls.increment("missing", session=session) == 0
+        Infractions.counter.increment(1, amount=3, session=session)
+        Infractions.counter.increment_many({(1,): 2, (2,): 1}, session=session)
+
+        assert session.exec(select(Commands.qual_name, Commands.call_count)).all() == [("ping", 1)]
+        counts = session.exec(select(Infractions.user_id, Infractions.infraction_count).order_by(Infractions.user_id))
+        assert counts.all() == [(1, 5), (2, 1)]
+
+
+def test_concurrent_increments(tmp_path: Path) -> None:
+    """No increment is lost when several processes increment the same counters."""
+    url = f"sqlite:///{tmp_path / 'counters.db'}"
+    engine = make_engine(url)
+    with Session(engine) as session:
+        session.add(Commands(qual_name="ping", call_count=0))
+        session.commit()
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=increment_from_process, args=(url,)) for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * PROCESSES
+
+    with Session(engine) as session:
+        assert session.exec(select(Infractions.infraction_count)).all() == [PROCESSES * INCREMENTS * 2]
+        assert session.exec(select(Commands.call_count)).all() == [PROCESSES * INCREMENTS]
+
+
+def test_buffer() -> None:
+    """Buffered increments are summed in memory without calling Redis, and written on flush even without Redis."""
+    with Session(make_engine()) as session:
+        session.add(Commands(qual_name="ping", call_count=0))
+        session.commit()
+        redis = FakeRedis()
+        buffer = CounterBuffer(redis, session)  # pyright: ignore[reportArgumentType]
+
+        redis.available = False
+        for _ in range(3):
+            buffer.add(Commands.calls, "ping")
+        buffer.add(Infractions.counter, 1, amount=4)
+        assert session.exec(select(Commands.call_count)).all() == [0]
+        redis.available = True
+        assert buffer.flush() == 2
+        assert redis.hashes == {}
+        assert session.exec(select(Commands.call_count)).all() == [3]
+        assert session.exec(select(Infractions.infraction_count)).all() == [4]
+
+        redis.hashes["counters:commands.call_count"] = {b'["ping"]': b"2"}
+        buffer.add(Commands.calls, "ping")
+        redis.available = False
+        assert buffer.flush() == 1
+        assert session.exec(select(Commands.call_count)).all() == [4]
+        redis.available = True
+        assert buffer.flush() == 1
+        assert session.exec(select(Commands.call_count)).all() == [6]
+
+
+def test_buffer_keeps_increments_that_fail() -> None:
+    """Increments that can't be written are buffered again for the next flush."""
+    redis = FakeRedis()
+    with Session(make_engine()) as session, Session(create_engine("sqlite://")) as empty:
+        buffer = CounterBuffer(redis, empty)  # pyright: ignore[reportArgumentType]
+        buffer.add(Infractions.counter, 1, amount=4)
+        assert buffer.flush() == 0
+        assert redis.hashes == {"counters:infractions.infraction_count": {b"[1]": b"4"}}
+
+        buffer.session = session
+        assert buffer.flush() == 1
+        assert redis.hashes == {}
+        assert session.exec(select(Infractions.infraction_count)).all() == [4]
+
+
+def test_buffer_survives_redis_outages() -> None:
+    """Flushing while Redis is down raises nothing, and increments that can't be written or buffered wait in memory."""
+    redis = FakeRedis()
+    with Session(make_engine()) as session, Session(create_engine("sqlite://")) as empty:
+        buffer = CounterBuffer(redis, empty)  # pyright: ignore[reportArgumentType]
+        buffer.add(Infractions.counter, 1, amount=4)
+        redis.available = False
+        assert buffer.flush() == 0
+        assert buffer.pending == {"infractions.infraction_count": {(1,): 4}}
+
+        buffer.add(Infractions.counter, 1, amount=2)
+        buffer.session = session
+        assert buffer.flush() == 1
+        assert buffer.pending == {}
+        assert session.exec(select(Infractions.infraction_count)).all() == [6]
+
+
+def test_merge_duplicate_infractions() -> None:
+    """Duplicated infractions are merged into the first row of each user, summing their counts."""
+    engine = make_engine()
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_infractions_user_id"))
+        connection.execute(
+            text("INSERT INTO infractions (id, user_id, infraction_count) VALUES (1, 1, 2), (2, 1, 3), (3, 2, 1), (4, 1, 1)"),
+        )
+
+    migration = import_module("winter_dragon.database.migrations.versions.rev_0003_merge_duplicate_infractions")
+    with engine.begin() as connection:
+        migration.upgrade(Operations(connection, MetaData()))
+
+    with Session(engine) as session:
+        rows = session.exec(select(Infractions.id, Infractions.user_id, Infractions.infraction_count).order_by(Infractions.id))
+        assert rows.all() == [(1, 1, 6), (3, 2, 1)]
+
+
+def read_modify_write(session: Session) -> None:
+    """Increment the infractions of every benchmark user the way counters were incremented before, reading each row."""
+    for user_id in range(BENCHMARK_KEYS):
+        infraction = session.exec(select(Infractions).where(Infractions.user_id == user_id)).first()
+        if infraction is None:
+            infraction = Infractions(user_id=user_id, infraction_count=0)
+            session.add(infraction)
+        infraction.infraction_count += 1
+        session.commit()
+
+
+def test_statements_per_increment() -> None:
+    """Reading and writing a counter takes two statements per increment, incrementing it in SQL one, and batching one."""
+    engine = make_engine()
+    with Session(engine) as session:
+        with count_statements(engine) as statements:
+            read_modify_write(session)
+        assert len(statements) == BENCHMARK_KEYS * 2
+
+        with count_statements(engine) as statements:
+            for user_id in range(BENCHMARK_KEYS):
+                Infractions.counter.increment(user_id, session=session)
+        assert len(statements) == BENCHMARK_KEYS
+
+        with count_statements(engine) as statements:
+            Infractions.counter.increment_many({(user_id,): 1 for user_id in range(BENCHMARK_KEYS)}, session=session)
+        assert len(statements) == 1
+
+        assert set(session.exec(select(Infractions.infraction_count)).all()) == {3}
+
+
+@pytest.mark.benchmark
+def test_throughput() -> None:
+    """Batching increments is far faster than reading and writing each counter."""
+    engine = make_engine()
+    with Session(engine) as session:
+        start = time.perf_counter()
+        read_modify_write(session)
+        unbatched = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Infractions.counter.increment_many({(user_id,): 1 for user_id in range(BENCHMARK_KEYS)}, session=session)
+        batched = time.perf_counter() - start
+    assert batched < unbatched / 10
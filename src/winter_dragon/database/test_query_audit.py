@@ -0,0 +1,123 @@
+"""Tests for the query plan audit, against in-memory SQLite databases."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Column, DateTime, Engine, Index, Integer, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.pool import StaticPool
+
+from winter_dragon.database import SQLModel
+from winter_dragon.database.migrations.autogenerate import write_revision
+from winter_dragon.database.migrations.runner import Operations, Revision
+from winter_dragon.database.query_audit import QueryAudit, create_sqlite_schema, filter_columns, hot_queries
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from sqlmodel import Session
+
+
+def make_engine() -> Engine:
+    """Create an engine for a new in-memory database, shared by every connection."""
+    return create_engine("sqlite://", poolclass=StaticPool)
+
+
+def make_metadata(*, indexed: bool = False) -> tuple[MetaData, Table]:
+    """Create an events table, optionally with an index on its user and date."""
+    metadata = MetaData()
+    events = Table(
+        "events",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer),
+        Column("name", String),
+        Column("date", DateTime),
+    )
+    if indexed:
+        Index("ix_events_user_id_date", events.c.user_id, events.c.date)
+    return metadata, events
+
+
+def recent_events(events: Table) -> dict[str, object]:
+    """Create a workload running the most recent events of a user."""
+
+    def run(session: Session) -> object:
+        return session.execute(
+            select(events.c.name).where(events.c.user_id == 1).order_by(events.c.date.desc()).limit(5),
+        ).all()
+
+    return {"recent_events": run}
+
+
+def test_filter_columns() -> None:
+    """Equality columns come first, then the first range or ordered column."""
+    _, events = make_metadata()
+    statement = select(events).where(events.c.date > 0, events.c.user_id == 1).order_by(events.c.name)
+    assert filter_columns(statement) == {"events": ("user_id", "date")}
+    assert filter_columns(select(events).order_by(events.c.name)) == {"events": ("name",)}
+
+
+def test_flags_sequential_scan(tmp_path: Path) -> None:
+    """A filtered table without an index is flagged, with an index proposed that makes the query use one."""
+    engine = make_engine()
+    metadata, events = make_metadata()
+    metadata.create_all(engine)
+
+    report = QueryAudit(engine).run(recent_events(events))
+    assert [(finding.table, finding.sequential_scan, finding.unindexed) for finding in report.flagged] == [
+        ("events", True, ("user_id", "date")),
+    ]
+    assert report.proposals() == {"ix_events_user_id_date": ("events", ("user_id", "date"))}
+    assert json.loads(report.to_json())["proposals"] == {
+        "ix_events_user_id_date": {"table": "events", "columns": ["user_id", "date"]},
+    }
+
+    source = report.render_revision("0002", "0001", "Index events")
+    path = write_revision(source, "0002", "Index events", tmp_path)
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    assert spec is not None
+    assert spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    revision = Revision.from_module(module)
+    assert not revision.transactional
+    with engine.connect() as connection:
+        revision.upgrade(Operations(connection.execution_options(isolation_level="AUTOCOMMIT"), metadata))
+
+    report = QueryAudit(engine).run(recent_events(events))
+    assert report.flagged == []
+    assert [finding.index for finding in report.findings] == ["ix_events_user_id_date"]
+
+
+def test_flags_partial_index() -> None:
+    """A table read through an index that misses some of the filtered columns is flagged."""
+    engine = make_engine()
+    metadata, events = make_metadata()
+    Index("ix_events_user_id", events.c.user_id)
+    metadata.create_all(engine)
+
+    report = QueryAudit(engine).run(recent_events(events))
+    assert [(finding.index, finding.unindexed) for finding in report.flagged] == [("ix_events_user_id", ("date",))]
+
+
+def audit_hot_queries(*dropped: str) -> list[tuple[str, str | None]]:
+    """Audit the hot queries against the tables, without some of their indexes."""
+    engine = make_engine()
+    create_sqlite_schema(engine, SQLModel.metadata)
+    with engine.begin() as connection:
+        for index in dropped:
+            connection.execute(text(f"DROP INDEX {index}"))
+    return [(finding.query, finding.proposed_index) for finding in QueryAudit(engine).run(hot_queries()).flagged]
+
+
+def test_hot_queries_use_indexes() -> None:
+    """None of the hot queries read a filtered table without an index, which breaks when one is dropped."""
+    assert audit_hot_queries() == []
+    assert audit_hot_queries("ix_playergamestats_game_id_skill_rating") == [
+        ("skill_leaderboard", "ix_playergamestats_game_id_skill_rating"),
+    ]
+    assert ("guild_tags", "ix_channeltag_channel_id") in audit_hot_queries("ix_channeltag_channel_id")
@@ -0,0 +1,212 @@
+"""Tests for the channel tag cache, against an in-memory table of links."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from sqlalchemy import Integer, MetaData, create_engine, event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session
+
+from winter_dragon.database.channel_types import Tags
+from winter_dragon.database.tables.associations.channel_tags import ChannelTag
+from winter_dragon.database.tables.channel import Channels
+from winter_dragon.database.tables.guild import Guilds
+from winter_dragon.database.tag_cache import ChannelTagCache, TaggedChannel
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+GUILD_ID = 1
+OTHER_GUILD_ID = 2
+CHANNELS = 50
+THREADS = 8
+OPERATIONS = 2_000
+LOOKUPS = 100_000
+MIN_LOOKUPS_PER_SECOND = 100_000
+SESSION = cast("Session", None)
+
+
+class MemoryLinks:
+    """ChannelTag rows kept in a set, with a loader counting its queries."""
+
+    def __init__(self, links: Iterable[tuple[int, Tags, int]] = ()) -> None:
+        """Initialize the table with (guild id, tag, channel id) rows."""
+        self.links = set(links)
+        self.loads = 0
+        self.lock = threading.Lock()
+        self.cache = ChannelTagCache(self.load)
+
+    def load(self, _session: Session, guild_id: int) -> list[tuple[Tags, int, str]]:
+        """Load every link of a guild."""
+        with self.lock:
+            self.loads += 1
+            links = [link for link in self.links if link[0] == guild_id]
+        return [(tag, channel_id, f"channel-{channel_id}") for _, tag, channel_id in links]
+
+    def link(self, guild_id: int, tag: Tags, channel_id: int) -> None:
+        """Link a channel to a tag, then invalidate like Channels.link_tag."""
+        with self.lock:
+            self.links.add((guild_id, tag, channel_id))
+        self.cache.invalidate(guild_id)
+
+    def unlink(self, guild_id: int, tag: Tags, channel_id: int) -> None:
+        """Unlink a channel from a tag, then invalidate like Channels.unlink_tag."""
+        with self.lock:
+            self.links.discard((guild_id, tag, channel_id))
+        self.cache.invalidate(guild_id)
+
+    def expected(self, guild_id: int, tag: Tags) -> set[int]:
+        """Get the channels linked to a tag, straight from the table."""
+        return {channel_id for guild, link_tag, channel_id in self.links if guild == guild_id and link_tag == tag}
+
+
+def test_loads_each_guild_once() -> None:
+    """Lookups hit memory after the first load of a guild."""
+    table = MemoryLinks([(GUILD_ID, Tags.LOGS, 10), (GUILD_ID, Tags.STATS, 11), (OTHER_GUILD_ID, Tags.LOGS, 20)])
+
+    assert table.cache.get(SESSION, GUILD_ID, Tags.LOGS) == (TaggedChannel(10, "channel-10"),)
+    assert table.cache.tags_of(SESSION, GUILD_ID, 11) == [Tags.STATS]
+    assert table.cache.resolve(SESSION, GUILD_ID, [Tags.LOGS, Tags.STATS, Tags.TICKETS]) == {
+        Tags.LOGS: (TaggedChannel(10, "channel-10"),),
+        Tags.STATS: (TaggedChannel(11, "channel-11"),),
+        Tags.TICKETS: (),
+    }
+    assert table.loads == 1
+
+    assert table.cache.get(SESSION, OTHER_GUILD_ID, Tags.LOGS) == (TaggedChannel(20, "channel-20"),)
+    assert table.loads == 2
+
+
+def test_invalidation() -> None:
+    """Changing the links of a guild only reloads that guild."""
+    table = MemoryLinks([(GUILD_ID, Tags.LOGS, 10), (OTHER_GUILD_ID, Tags.LOGS, 20)])
+    table.cache.get(SESSION, GUILD_ID, Tags.LOGS)
+    table.cache.get(SESSION, OTHER_GUILD_ID, Tags.LOGS)
+
+    table.unlink(GUILD_ID, Tags.LOGS, 10)
+    assert table.cache.get(SESSION, GUILD_ID, Tags.LOGS) == ()
+    assert table.cache.get(SESSION, OTHER_GUILD_ID, Tags.LOGS) == (TaggedChannel(20, "channel-20"),)
+    assert table.loads == 3
+
+    table.cache.invalidate()
+    table.cache.get(SESSION, OTHER_GUILD_ID, Tags.LOGS)
+    assert table.loads == 4
+
+
+def test_load_racing_an_invalidation_is_not_kept() -> None:
+    """A load that started before the links changed is returned, but not cached."""
+    table = MemoryLinks([(GUILD_ID, Tags.LOGS, 10)])
+    load = table.load
+
+    def slow_load(session: Session, guild_id: int) -> list[tuple[Tags, int, str]]:
+        links = load(session, guild_id)
+        table.link(GUILD_ID, Tags.LOGS, 11)
+        return links
+
+    table.cache._loader = slow_load  # noqa: SLF001
+    assert table.cache.get(SESSION, GUILD_ID, Tags.LOGS) == (TaggedChannel(10, "channel-10"),)
+    table.cache._loader = load  # noqa: SLF001
+    assert {channel.id for channel in table.cache.get(SESSION, GUILD_ID, Tags.LOGS)} == {10, 11}
+
+
+def test_concurrent_link_and_unlink() -> None:
+    """After concurrent links, unlinks and lookups settle, the cache matches the table."""
+    table = MemoryLinks()
+    tags = list(Tags)
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(OPERATIONS):
+            guild_id = rng.choice((GUILD_ID, OTHER_GUILD_ID))
+            tag = rng.choice(tags)
+            match rng.randrange(3):
+                case 0:
+                    table.link(guild_id, tag, rng.randrange(CHANNELS))
+                case 1:
+                    table.unlink(guild_id, tag, rng.randrange(CHANNELS))
+                case _:
+                    table.cache.get(SESSION, guild_id, tag)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for guild_id in (GUILD_ID, OTHER_GUILD_ID):
+        for tag in tags:
+            assert {channel.id for channel in table.cache.get(SESSION, guild_id, tag)} == table.expected(guild_id, tag)
+
+
+class CountingSession:
+    """Session of an in-memory database with the channel tag tables, counting the statements it runs."""
+
+    def __init__(self) -> None:
+        """Create the tables, with the ids as integers SQLite accepts."""
+        schema = MetaData()
+        for model in (Guilds, Channels, ChannelTag):
+            table = model.__table__.to_metadata(schema)  # pyright: ignore[reportAttributeAccessIssue]
+            table.c.id.type = Integer()
+            if len(table.primary_key.columns) > 1:
+                table.c.id.autoincrement = False
+                table.c.id.nullable = True
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        schema.create_all(engine)
+        self.queries = 0
+        event.listen(engine, "before_cursor_execute", self.count)
+        self.session = Session(engine)
+
+    def count(self, *_: object) -> None:
+        """Count a statement."""
+        self.queries += 1
+
+
+def make_tagged_guild() -> CountingSession:
+    """Create a guild with a channel linked to every tag, and reset the shared tag cache."""
+    database = CountingSession()
+    session = database.session
+    session.add(Guilds(id=GUILD_ID))
+    session.add_all(Channels(id=channel_id, guild_id=GUILD_ID, name=f"channel-{channel_id}") for channel_id in range(CHANNELS))
+    links = [(tag, channel_id) for tag in Tags for channel_id in range(CHANNELS)]
+    session.add_all(ChannelTag(id=i, channel_id=channel_id, tag=tag) for i, (tag, channel_id) in enumerate(links))
+    session.commit()
+    Channels.tag_cache.invalidate()
+    database.queries = 0
+    return database
+
+
+def test_get_tagged_queries_once() -> None:
+    """Lookups through the Channels API query the links of a guild once, and never load the channel rows."""
+    database = make_tagged_guild()
+
+    for _ in range(LOOKUPS // 1_000):
+        channels = Channels.get_tagged(database.session, GUILD_ID, Tags.STATS)
+    assert {channel.id for channel in channels} == set(range(CHANNELS))
+    assert database.queries == 1
+
+    Channels(id=0, guild_id=GUILD_ID, name="channel-0").unlink_tag(database.session, Tags.STATS)
+    queries = database.queries
+    assert 0 not in {channel.id for channel in Channels.get_tagged(database.session, GUILD_ID, Tags.STATS)}
+    assert database.queries == queries + 1
+
+
+@pytest.mark.benchmark
+def test_get_tagged_throughput() -> None:
+    """Warm lookups through the Channels API cost a dict lookup."""
+    database = make_tagged_guild()
+    Channels.get_tagged(database.session, GUILD_ID, Tags.LOGS)
+
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        Channels.get_tagged(database.session, GUILD_ID, Tags.STATS)
+    elapsed = time.perf_counter() - start
+
+    assert database.queries == 1
+    assert LOOKUPS / elapsed >= MIN_LOOKUPS_PER_SECOND
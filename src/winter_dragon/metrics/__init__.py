@@ -0,0 +1 @@
+"""Prometheus metrics of the bot and the workers."""
@@ -0,0 +1,168 @@
+"""HTTP endpoint exposing metrics to Prometheus.
+
+The bot and the workers each serve their metrics on a local port, in a background thread.
+Values computed when scraped, like the gateway latency and queue depths, come from collectors,
+so nothing polls them between scrapes. In multiprocess mode the endpoint sums the metrics of every process
+writing to PROMETHEUS_MULTIPROC_DIR, such as the worker processes and the work horses they fork.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from herogold.log import LoggerMixin
+from prometheus_client import REGISTRY, CollectorRegistry, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.registry import Collector
+
+from winter_dragon.config import Config
+
+
+if TYPE_CHECKING:
+    import threading
+    from collections.abc import Callable, Iterable, Iterator
+    from wsgiref.simple_server import WSGIServer
+
+    from prometheus_client import Metric
+
+
+MULTIPROCESS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+class MetricsConfig:
+    """Metrics endpoint settings.
+
+    Environment variables take precedence over config.ini values.
+    Useful for Docker deployments where the endpoint must listen on every interface for Prometheus to reach it.
+    """
+
+    _host = Config("127.0.0.1")
+    _port = Config(8000)
+    _worker_port = Config(8001)
+
+    @staticmethod
+    def get_host() -> str:
+        """Get the address the endpoint listens on, preferring environment variable over config."""
+        return os.getenv("METRICS_HOST") or MetricsConfig._host
+
+    @staticmethod
+    def get_port() -> int:
+        """Get the port of the bot's endpoint, preferring environment variable over config."""
+        env_port = os.getenv("METRICS_PORT")
+        return int(env_port) if env_port else MetricsConfig._port
+
+    @staticmethod
+    def get_worker_port() -> int:
+        """Get the port of the workers' endpoint, preferring environment variable over config."""
+        env_port = os.getenv("METRICS_WORKER_PORT")
+        return int(env_port) if env_port else MetricsConfig._worker_port
+
+
+def multiprocess_dir() -> Path | None:
+    """Get the directory processes write their metrics to, if multiprocess mode is enabled."""
+    path = os.getenv(MULTIPROCESS_DIR_ENV)
+    return Path(path) if path else None
+
+
+def clear_multiprocess_dir(path: Path) -> None:
+    """Remove the metrics of processes from a previous run."""
+    path.mkdir(parents=True, exist_ok=True)
+    for file in path.glob("*.db"):
+        file.unlink()
+
+
+def build_registry(path: Path | None = None) -> CollectorRegistry:
+    """Get the registry to serve, summing the metrics of every process in multiprocess mode."""
+    path = path or multiprocess_dir()
+    if path is None:
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(path))
+    return registry
+
+
+class GatewayLatencyCollector(Collector):
+    """Collects the latency of each gateway shard."""
+
+    def __init__(self, latencies: Callable[[], Iterable[tuple[int, float]]]) -> None:
+        """Initialize the collector with a function getting the latency of each shard."""
+        self.latencies = latencies
+
+    def collect(self) -> Iterator[Metric]:
+        """Get the latency of each shard."""
+        gauge = GaugeMetricFamily(
+            "winter_dragon_gateway_latency_seconds",
+            "Time between a gateway heartbeat and its acknowledgement.",
+            labels=["shard"],
+        )
+        for shard_id, latency in self.latencies():
+            gauge.add_metric([str(shard_id)], latency)
+        yield gauge
+
+
+class QueueDepthCollector(Collector, LoggerMixin):
+    """Collects the number of jobs waiting in each task queue."""
+
+    def __init__(self, queues: Iterable[str], length: Callable[[str], int]) -> None:
+        """Initialize the collector with the queues to watch, and a function getting their length."""
+        self.queues = list(queues)
+        self.length = length
+
+    def collect(self) -> Iterator[Metric]:
+        """Get the length of each queue, skipping queues that can't be read."""
+        gauge = GaugeMetricFamily(
+            "winter_dragon_queue_depth",
+            "Jobs waiting in a task queue.",
+            labels=["queue"],
+        )
+        for queue in self.queues:
+            try:
+                gauge.add_metric([queue], self.length(queue))
+            except Exception:
+                self.logger.exception(f"Failed to get the length of queue {queue}")
+        yield gauge
+
+
+class MetricsExporter(LoggerMixin):
+    """Serves metrics over HTTP, for Prometheus to scrape."""
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        registry: CollectorRegistry | None = None,
+        collectors: Iterable[Collector] = (),
+    ) -> None:
+        """Initialize the exporter. Port 0 picks any free port."""
+        self.host = host
+        self.port = port
+        self.registry = registry or build_registry()
+        self.collectors = list(collectors)
+        self._server: WSGIServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> int:
+        """Start serving metrics. Returns the port listened on."""
+        if self._server is not None:
+            return self.port
+        for collector in self.collectors:
+            self.registry.register(collector)
+        self._server, self._thread = start_http_server(self.port, addr=self.host, registry=self.registry)
+        self.port = self._server.server_port
+        self.logger.info(f"Serving metrics at http://{self.host}:{self.port}/metrics")
+        return self.port
+
+    def stop(self) -> None:
+        """Stop serving metrics."""
+        if self._server is None or self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = self._thread = None
+        for collector in self.collectors:
+            self.registry.unregister(collector)
@@ -0,0 +1,89 @@
+"""Metrics recorded by the bot and the workers.
+
+Every metric is labelled, so no value exists until one is recorded. In multiprocess mode,
+enabled by setting PROMETHEUS_MULTIPROC_DIR before a process starts, values are kept in files in that directory,
+and only processes recording a metric create files for it. The exporter sums them across processes.
+Recording a value is a dictionary lookup and a lock, cheap enough to do on every command and query.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, Engine, ExceptionContext
+
+
+QUERY_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"))
+"""Statement types labelled by their name, every other statement is labelled OTHER."""
+QUERY_START_KEY = "query_start"
+
+COMMAND_DURATION = Histogram(
+    "winter_dragon_command_duration_seconds",
+    "Time taken to run commands.",
+    ["command", "status"],
+)
+QUERY_DURATION = Histogram(
+    "winter_dragon_db_query_duration_seconds",
+    "Time taken to run database queries.",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+TASKS_ENQUEUED = Counter(
+    "winter_dragon_tasks_enqueued",
+    "Tasks enqueued for the workers.",
+    ["queue", "function"],
+)
+JOB_DURATION = Histogram(
+    "winter_dragon_job_duration_seconds",
+    "Time taken by workers to run jobs.",
+    ["function", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+
+def observe_command(command: str, seconds: float, *, failed: bool) -> None:
+    """Record a command invocation."""
+    COMMAND_DURATION.labels(command, "error" if failed else "ok").observe(seconds)
+
+
+def count_enqueued(queue: str, function: str) -> None:
+    """Record a task enqueued for the workers."""
+    TASKS_ENQUEUED.labels(queue, function).inc()
+
+
+def observe_job(function: str, status: str, seconds: float) -> None:
+    """Record a job run by a worker."""
+    JOB_DURATION.labels(function, status).observe(seconds)
+
+
+def query_operation(statement: str) -> str:
+    """Get the type of a SQL statement."""
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return operation if operation in QUERY_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every query run through an engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn: Connection, *_: Any) -> None:  # noqa: ANN401
+    conn.info.setdefault(QUERY_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Connection, _cursor: object, statement: str, *_: Any) -> None:  # noqa: ANN401
+    seconds = time.perf_counter() - conn.info[QUERY_START_KEY].pop()
+    QUERY_DURATION.labels(query_operation(statement)).observe(seconds)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    if context.connection is not None and (starts := context.connection.info.get(QUERY_START_KEY)):
+        starts.pop()
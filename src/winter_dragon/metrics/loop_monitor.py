@@ -0,0 +1,198 @@
+"""Detector of blocking calls on the event loop.
+
+A heartbeat coroutine wakes up at a fixed interval and records how late it was, the loop lag.
+A watchdog thread checks how long ago the heartbeat last ran. Once that passes the threshold, the loop is blocked,
+and the watchdog samples the stack of the loop's thread a few times while the block lasts.
+The innermost sampled frame in application code names the culprit and its class, usually a cog,
+and the name of the running task names the command, listener or loop it ran for.
+When the heartbeat runs again, the block is logged and recorded with those labels.
+
+The heartbeat costs one wake-up per interval, and the watchdog only reads a timestamp until the loop is blocked.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from herogold.log import LoggerMixin
+from prometheus_client import Histogram
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import FrameType
+
+
+UNKNOWN = "unknown"
+DEFAULT_TASK_NAME = re.compile(r"Task-\d+")
+"""Names asyncio gives unnamed tasks, which would make a label per task."""
+
+LOOP_LAG = Histogram(
+    "winter_dragon_event_loop_lag_seconds",
+    "How late the event loop ran a callback scheduled at a fixed interval.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+LOOP_BLOCKED = Histogram(
+    "winter_dragon_event_loop_blocked_seconds",
+    "Time the event loop was blocked past the threshold, by the class and task blocking it.",
+    ["owner", "task"],
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class StackSample(NamedTuple):
+    """A stack of the event loop's thread, taken while it was blocked."""
+
+    task: str
+    """Name of the task running, or unknown outside tasks."""
+    owner: str
+    """Class, or module outside classes, of the innermost application frame."""
+    culprit: str
+    """Innermost application frame, as its qualified name and location."""
+    stack: traceback.StackSummary
+
+
+class BlockReport(NamedTuple):
+    """The event loop being blocked past the threshold."""
+
+    seconds: float
+    samples: list[StackSample]
+
+    @property
+    def owner(self) -> str:
+        """Get the owner of the first sample, or unknown if the block ended before it was sampled."""
+        return self.samples[0].owner if self.samples else UNKNOWN
+
+    @property
+    def task(self) -> str:
+        """Get the task of the first sample, or unknown if the block ended before it was sampled."""
+        return self.samples[0].task if self.samples else UNKNOWN
+
+
+def task_label(task: asyncio.Task[object] | None) -> str:
+    """Get a label for a task, shared by every task running the same command, listener or loop."""
+    if task is None:
+        return UNKNOWN
+    name = task.get_name()
+    return "task" if DEFAULT_TASK_NAME.fullmatch(name) else name
+
+
+class LoopMonitor(LoggerMixin):
+    """Measures the lag of an event loop, and reports whatever blocks it."""
+
+    def __init__(
+        self,
+        *,
+        roots: Iterable[Path] = (),
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        max_samples: int = 3,
+        history: int = 50,
+    ) -> None:
+        """Initialize the monitor. Frames of files under the roots are application code, and can be culprits."""
+        self.roots = tuple(str(Path(root).resolve()) for root in roots)
+        self.interval = interval
+        """Seconds between heartbeats."""
+        self.threshold = threshold
+        """Seconds the heartbeat may be late before the loop counts as blocked."""
+        self.max_samples = max_samples
+        """Most stacks sampled per block."""
+        self.reports: deque[BlockReport] = deque(maxlen=history)
+        """Most recent blocks."""
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._last_beat = time.monotonic()
+        self._samples: list[tuple[float, StackSample]] = []
+        """Samples taken since the last heartbeat, with the heartbeat they were taken after."""
+        self._lock = threading.Lock()
+        self._heartbeat: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self._heartbeat is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._beat(), name="loop-monitor: heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor: watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        if self._heartbeat is None or self._watchdog is None:
+            return
+        self._stopped.set()
+        self._heartbeat.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._heartbeat
+        await asyncio.to_thread(self._watchdog.join)
+        self._heartbeat = self._watchdog = None
+
+    def sample(self) -> StackSample | None:
+        """Sample the stack of the event loop's thread."""
+        if self._loop_thread is None or (frame := sys._current_frames().get(self._loop_thread)) is None:  # noqa: SLF001
+            return None
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        culprit = self._culprit(frame)
+        if culprit is None:
+            owner = location = UNKNOWN
+        else:
+            qualname = culprit.f_code.co_qualname
+            owner = qualname.split(".")[0] if "." in qualname else Path(culprit.f_code.co_filename).stem
+            location = f"{qualname} ({culprit.f_code.co_filename}:{culprit.f_lineno})"
+        return StackSample(task_label(task), owner, location, traceback.extract_stack(frame))
+
+    def _culprit(self, frame: FrameType | None) -> FrameType | None:
+        while frame is not None:
+            if frame.f_code.co_filename.startswith(self.roots):
+                return frame
+            frame = frame.f_back
+        return None
+
+    async def _beat(self) -> None:
+        while True:
+            start = time.monotonic()
+            self._last_beat = start
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - start - self.interval)
+            LOOP_LAG.observe(lag)
+            with self._lock:
+                samples, self._samples = self._samples, []
+            if lag >= self.threshold:
+                self._report(BlockReport(lag, [sample for beat, sample in samples if beat == start]))
+
+    def _report(self, report: BlockReport) -> None:
+        self.reports.append(report)
+        LOOP_BLOCKED.labels(report.owner, report.task).observe(report.seconds)
+        if not report.samples:
+            self.logger.warning(f"Event loop blocked for {report.seconds:.3f}s, ending before it was sampled")
+            return
+        sample = report.samples[0]
+        stack = "".join(sample.stack.format())
+        self.logger.warning(f"Event loop blocked for {report.seconds:.3f}s by {sample.culprit} in {sample.task}\n{stack}")
+
+    def _watch(self) -> None:
+        wait = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(wait):
+            beat = self._last_beat
+            if time.monotonic() - beat - self.interval < self.threshold:
+                continue
+            with self._lock:
+                if len(self._samples) >= self.max_samples:
+                    continue
+            if (sample := self.sample()) is not None:
+                with self._lock:
+                    self._samples.append((beat, sample))
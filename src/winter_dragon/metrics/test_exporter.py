@@ -0,0 +1,169 @@
+"""Tests for the metrics exporter, scraping its endpoint, with an opt-in benchmark of the cost of timing commands."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+from typing import TYPE_CHECKING
+
+import pytest
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from winter_dragon.metrics.exporter import (
+    MULTIPROCESS_DIR_ENV,
+    GatewayLatencyCollector,
+    MetricsExporter,
+    QueueDepthCollector,
+    build_registry,
+    clear_multiprocess_dir,
+)
+from winter_dragon.metrics.instruments import count_enqueued, instrument_engine, observe_command, query_operation
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+WORKER_PROCESSES = 3
+JOBS_PER_WORKER = 20
+BENCHMARK_COMMANDS = 20_000
+OVERHEAD_BUDGET_SECONDS = 20e-6
+"""Most time timing a command may add to it."""
+
+
+def scrape(exporter: MetricsExporter) -> dict[tuple[str, tuple[tuple[str, str], ...]], float]:
+    """Get every sample served by an exporter, by name and labels."""
+    with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics", timeout=5) as response:
+        body = response.read().decode()
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(body)
+        for sample in family.samples
+    }
+
+
+def sample(name: str, **labels: str) -> float:
+    """Get a sample of the default registry, or zero if it wasn't recorded yet."""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_query_operation() -> None:
+    """Statements are labelled by their type, from a fixed set."""
+    assert query_operation("  select 1") == "SELECT"
+    assert query_operation("WITH x AS (SELECT 1) SELECT * FROM x") == "WITH"
+    assert query_operation("PRAGMA table_info(users)") == "OTHER"
+    assert query_operation("") == "OTHER"
+
+
+def test_scrape() -> None:
+    """Commands, queries, enqueued tasks, gateway latency and queue depths are served on the endpoint."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    selects = sample("winter_dragon_db_query_duration_seconds_count", operation="SELECT")
+    commands = sample("winter_dragon_command_duration_seconds_count", command="ping", status="error")
+    enqueued = sample("winter_dragon_tasks_enqueued_total", queue="default", function="scrape_steam")
+
+    with engine.connect() as connection:
+        for _ in range(3):
+            connection.execute(text("SELECT 1"))
+        with contextlib.suppress(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+        connection.execute(text("SELECT 2"))
+    observe_command("ping", 0.01, failed=True)
+    count_enqueued("default", "scrape_steam")
+
+    def length(queue: str) -> int:
+        if queue == "broken":
+            msg = "Redis is down"
+            raise ConnectionError(msg)
+        return len(queue)
+
+    exporter = MetricsExporter(
+        collectors=[
+            GatewayLatencyCollector(lambda: [(0, 0.05), (1, 0.1)]),
+            QueueDepthCollector(["default", "broken"], length),
+        ],
+    )
+    exporter.start()
+    try:
+        samples = scrape(exporter)
+    finally:
+        exporter.stop()
+
+    assert samples["winter_dragon_db_query_duration_seconds_count", (("operation", "SELECT"),)] == selects + 4
+    assert samples["winter_dragon_command_duration_seconds_count", (("command", "ping"), ("status", "error"))] == commands + 1
+    assert samples["winter_dragon_tasks_enqueued_total", (("function", "scrape_steam"), ("queue", "default"))] == enqueued + 1
+    assert samples["winter_dragon_gateway_latency_seconds", (("shard", "1"),)] == 0.1
+    assert samples["winter_dragon_queue_depth", (("queue", "default"),)] == len("default")
+    assert not any(labels == (("queue", "broken"),) for _, labels in samples)
+    assert all(collector not in REGISTRY._collector_to_names for collector in exporter.collectors)  # noqa: SLF001
+
+
+def test_multiprocess_workers(tmp_path: Path) -> None:
+    """Jobs timed in separate worker processes are summed on one endpoint."""
+    clear_multiprocess_dir(tmp_path)
+    script = textwrap.dedent(f"""
+        from winter_dragon.metrics.instruments import observe_job
+
+        for i in range({JOBS_PER_WORKER}):
+            observe_job("scrape_steam", "failed" if i % 4 == 0 else "finished", 0.25)
+    """)
+    env = {**os.environ, MULTIPROCESS_DIR_ENV: str(tmp_path), "PYTHONPATH": os.pathsep.join(sys.path)}
+    workers = [subprocess.Popen([sys.executable, "-c", script], env=env) for _ in range(WORKER_PROCESSES)]  # noqa: S603
+    assert all(worker.wait(timeout=60) == 0 for worker in workers)
+
+    exporter = MetricsExporter(registry=build_registry(tmp_path))
+    exporter.start()
+    try:
+        samples = scrape(exporter)
+    finally:
+        exporter.stop()
+
+    jobs = WORKER_PROCESSES * JOBS_PER_WORKER
+    count = "winter_dragon_job_duration_seconds_count"
+    assert samples[count, (("function", "scrape_steam"), ("status", "failed"))] == jobs // 4
+    assert samples[count, (("function", "scrape_steam"), ("status", "finished"))] == jobs - jobs // 4
+    assert (
+        samples["winter_dragon_job_duration_seconds_sum", (("function", "scrape_steam"), ("status", "finished"))]
+        == (jobs - jobs // 4) * 0.25
+    )
+
+
+def test_observe_command() -> None:
+    """Timing a command records one sample per invocation."""
+    labels = {"command": "counted", "status": "ok"}
+    commands = sample("winter_dragon_command_duration_seconds_count", **labels)
+    for _ in range(BENCHMARK_COMMANDS):
+        observe_command("counted", 0.0, failed=False)
+    assert sample("winter_dragon_command_duration_seconds_count", **labels) == commands + BENCHMARK_COMMANDS
+
+
+@pytest.mark.benchmark
+def test_command_overhead() -> None:
+    """Timing a command, as the command tree does for every invocation, costs a few microseconds."""
+
+    def invoke() -> None:
+        start = time.perf_counter()
+        observe_command("benchmark", time.perf_counter() - start, failed=False)
+
+    def bare() -> None:
+        start = time.perf_counter()
+        time.perf_counter() - start
+
+    def run(command: object) -> float:
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_COMMANDS):
+            command()  # pyright: ignore[reportCallIssue]
+        return time.perf_counter() - start
+
+    overhead = (min(run(invoke) for _ in range(3)) - min(run(bare) for _ in range(3))) / BENCHMARK_COMMANDS
+    print(f"Metrics overhead per command: {overhead * 1e6:.2f}µs")  # noqa: T201
+    assert overhead < OVERHEAD_BUDGET_SECONDS
@@ -0,0 +1,150 @@
+"""Tests for the loop monitor, against deliberately blocking fake handlers."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+
+from winter_dragon.metrics.loop_monitor import LoopMonitor, StackSample, task_label
+
+
+INTERVAL = 0.02
+THRESHOLD = 0.1
+BLOCK_SECONDS = 0.4
+SHORT_BLOCK_SECONDS = 0.03
+WORKLOAD_STEPS = 50_000
+OVERHEAD_BUDGET = 0.05
+"""Largest fraction of time monitoring may add to a busy event loop."""
+OVERHEAD_ROUNDS = 15
+
+
+def blocking_query() -> None:
+    """Query a database synchronously, like the cogs still using a sync session."""
+    time.sleep(BLOCK_SECONDS)
+
+
+class CountingMonitor(LoopMonitor):
+    """LoopMonitor counting the stacks it samples."""
+
+    def __init__(self) -> None:
+        """Initialize the monitor at the bot's default settings."""
+        super().__init__()
+        self.samples = 0
+
+    def sample(self) -> StackSample | None:
+        """Sample the stack of the event loop's thread, and count it."""
+        self.samples += 1
+        return super().sample()
+
+
+async def workload(monitor: LoopMonitor | None) -> float:
+    """Keep the event loop busy without blocking it, and get how long it took."""
+    if monitor is not None:
+        monitor.start()
+    start = time.perf_counter()
+    for step in range(WORKLOAD_STEPS):
+        sum(range(step % 100))
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    if monitor is not None:
+        await monitor.stop()
+    return elapsed
+
+
+class FakeCog:
+    """Cog with handlers blocking the loop, and one that doesn't."""
+
+    async def slow_command(self) -> None:
+        """Block the loop directly."""
+        time.sleep(BLOCK_SECONDS)  # noqa: ASYNC251
+
+    async def query_command(self) -> None:
+        """Block the loop through a helper."""
+        blocking_query()
+
+    async def on_message(self) -> None:
+        """Block the loop briefly, below the threshold."""
+        time.sleep(SHORT_BLOCK_SECONDS)  # noqa: ASYNC251
+
+    async def fetch_command(self) -> None:
+        """Wait without blocking the loop."""
+        await asyncio.sleep(BLOCK_SECONDS)
+
+
+def test_task_label() -> None:
+    """Tasks are labelled by name, except unnamed ones, which share a label."""
+
+    async def labels() -> list[str]:
+        named = asyncio.create_task(asyncio.sleep(0), name="command: ping")
+        unnamed = asyncio.create_task(asyncio.sleep(0))
+        await asyncio.gather(named, unnamed)
+        return [task_label(named), task_label(unnamed), task_label(None)]
+
+    assert asyncio.run(labels()) == ["command: ping", "task", "unknown"]
+
+
+def test_blocking_handlers() -> None:
+    """Blocks past the threshold are reported once each, with the command and code blocking the loop."""
+    monitor = LoopMonitor(roots=(Path(__file__).parent,), interval=INTERVAL, threshold=THRESHOLD)
+    cog = FakeCog()
+    blocked = REGISTRY.get_sample_value(
+        "winter_dragon_event_loop_blocked_seconds_count",
+        {"owner": "FakeCog", "task": "command: slow"},
+    )
+
+    async def run() -> None:
+        monitor.start()
+        for handler, name in (
+            (cog.slow_command, "command: slow"),
+            (cog.on_message, "discord.py: on_message"),
+            (cog.fetch_command, "command: fetch"),
+            (cog.query_command, "command: query"),
+        ):
+            await asyncio.sleep(INTERVAL * 3)
+            await asyncio.create_task(handler(), name=name)
+        await asyncio.sleep(INTERVAL * 3)
+        await monitor.stop()
+
+    asyncio.run(run())
+
+    slow, query = monitor.reports
+    assert slow.seconds > BLOCK_SECONDS - 2 * INTERVAL
+    assert (slow.owner, slow.task) == ("FakeCog", "command: slow")
+    assert 1 <= len(slow.samples) <= monitor.max_samples
+    assert slow.samples[0].culprit.startswith("FakeCog.slow_command (")
+    assert slow.samples[0].stack[-1].name == "slow_command"
+    assert (query.owner, query.task) == (Path(__file__).stem, "command: query")
+    assert query.samples[0].culprit.startswith("blocking_query (")
+    assert [frame.name for frame in query.samples[0].stack[-2:]] == ["query_command", "blocking_query"]
+    assert (
+        REGISTRY.get_sample_value(
+            "winter_dragon_event_loop_blocked_seconds_count",
+            {"owner": "FakeCog", "task": "command: slow"},
+        )
+        == (blocked or 0) + 1
+    )
+
+
+def test_busy_loop() -> None:
+    """A busy event loop that keeps yielding is never sampled nor reported."""
+    monitor = CountingMonitor()
+    asyncio.run(workload(monitor))
+    assert monitor.samples == 0
+    assert not monitor.reports
+
+
+@pytest.mark.benchmark
+def test_overhead() -> None:
+    """Monitoring a busy event loop, at the bot's default settings, slows it down by a few percent at most."""
+    bare: list[float] = []
+    monitored: list[float] = []
+    for _ in range(OVERHEAD_ROUNDS):
+        bare.append(asyncio.run(workload(None)))
+        monitored.append(asyncio.run(workload(LoopMonitor())))
+    overhead = min(monitored) / min(bare) - 1
+    print(f"Loop monitor overhead: {overhead:.2%}")  # noqa: T201
+    assert overhead < OVERHEAD_BUDGET
@@ -0,0 +1,96 @@
+"""Module for buffering counter increments in memory and Redis."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+from herogold.log import LoggerMixin
+from sqlalchemy.exc import SQLAlchemyError
+
+from redis.exceptions import RedisError
+from winter_dragon.redis.connection import RedisConnection
+
+
+if TYPE_CHECKING:
+    from sqlmodel import Session
+
+    from redis import Redis
+    from winter_dragon.database.counters import Counter
+
+
+class CounterBuffer(LoggerMixin):
+    """Buffer counter increments, and write them to the database in batches.
+
+    Increments are summed in memory, so adding one never waits on Redis or the database.
+    On flush they are written together with the increments buffered in Redis, a hash per counter
+    shared by every process using the same Redis and taken out atomically.
+    Increments that fail to be written are buffered in Redis again, or kept in memory while Redis is unavailable.
+    """
+
+    prefix = "counters"
+
+    def __init__(self, redis: Redis | None = None, session: Session | None = None) -> None:
+        """Initialize a buffer on a Redis connection, defaulting to the shared one."""
+        self._redis = redis
+        self.session = session
+        self.counters: dict[str, Counter] = {}
+        self.pending: dict[str, dict[tuple[Any, ...], int]] = {}
+        """Increments waiting for the next flush, by counter name."""
+
+    @property
+    def redis(self) -> Redis:
+        """Get the Redis connection."""
+        if self._redis is None:
+            self._redis = RedisConnection.get_connection()
+        return self._redis
+
+    def add(self, counter: Counter, *key: Any, amount: int = 1) -> None:  # noqa: ANN401
+        """Buffer an increment of the counter of a row, until the next flush."""
+        self.counters[counter.name] = counter
+        amounts = self.pending.setdefault(counter.name, {})
+        amounts[key] = amounts.get(key, 0) + amount
+
+    def flush(self) -> int:
+        """Write the buffered increments of every counter to the database. Returns the number of rows incremented."""
+        return sum(self.flush_counter(counter) for counter in list(self.counters.values()))
+
+    def flush_counter(self, counter: Counter) -> int:
+        """Write the buffered increments of a counter to the database. Returns the number of rows incremented.
+
+        When Redis is unavailable, increments left in Redis wait for the next flush,
+        and increments that fail to be written are kept in memory until then.
+        """
+        amounts = self.pending.pop(counter.name, {})
+        try:
+            pipeline = self.redis.pipeline(transaction=True)
+            pipeline.hgetall(self._hash(counter))
+            pipeline.delete(self._hash(counter))
+            buffered, _ = pipeline.execute()
+        except RedisError:
+            self.logger.warning(f"Unable to take the buffered increments of {counter.name} from Redis")
+            buffered = {}
+        for field, amount in buffered.items():
+            key = tuple(json.loads(field))
+            amounts[key] = amounts.get(key, 0) + int(amount)
+        if not amounts:
+            return 0
+        try:
+            return counter.increment_many(amounts, self.session)
+        except SQLAlchemyError:
+            self.logger.exception(f"Unable to write {len(amounts)} increments of {counter.name}, buffering them again")
+            self._restore(counter, amounts)
+            return 0
+
+    def _restore(self, counter: Counter, amounts: dict[tuple[Any, ...], int]) -> None:
+        try:
+            pipeline = self.redis.pipeline(transaction=True)
+            for key, amount in amounts.items():
+                pipeline.hincrby(self._hash(counter), json.dumps(key), amount)
+            pipeline.execute()
+        except RedisError:
+            self.logger.warning(f"Unable to buffer {len(amounts)} increments of {counter.name} again, keeping them in memory")
+            self.pending[counter.name] = amounts
+
+    def _hash(self, counter: Counter) -> str:
+        return f"{self.prefix}:{counter.name}"
@@ -9,6 +9,7 @@ from herogold.log.logging import getLogger
 from rq import Queue
 from rq.job import Job
 
+from winter_dragon.metrics.instruments import count_enqueued
 from winter_dragon.redis.connection import RedisConnection
 
 
@@ -87,6 +88,7 @@ class TaskQueue(LoggerMixin):
             job_id=job_id,
             **kwargs,
         )
+        count_enqueued(queue_name, func.__name__)
 
         logger.info(
             f"Enqueued task {func.__name__} to queue '{queue_name}' with job_id={job.id}",
@@ -9,10 +9,10 @@ from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
 from herogold.log.logging import getLogger
-from rq import Worker
 
 from winter_dragon.redis.connection import RedisConnection as RedisConnectionModule
 from winter_dragon.redis.queue import TaskQueue
+from winter_dragon.workers.worker import LoggingWorker, serve_worker_metrics
 
 
 # initialize a logger provided by herogold; it handles configuration
@@ -57,8 +57,10 @@ def main() -> None:
             TaskQueue.HIGH_PRIORITY_QUEUE,
         ]
 
+    serve_worker_metrics()
+
     try:
-        worker = Worker(queues, connection=redis_conn)
+        worker = LoggingWorker(queues, connection=redis_conn)
         logger.info(f"Starting RQ worker on queues: {', '.join(queues)}")
         worker.work()
     except KeyboardInterrupt:
@@ -18,6 +18,7 @@ import argparse
 import multiprocessing
 import os
 import sys
+import time
 import uuid
 from datetime import UTC, datetime
 
@@ -25,6 +26,14 @@ import rq
 from herogold.log import LoggerMixin
 from rq import Worker
 
+from winter_dragon.metrics.exporter import (
+    MULTIPROCESS_DIR_ENV,
+    MetricsConfig,
+    MetricsExporter,
+    clear_multiprocess_dir,
+    multiprocess_dir,
+)
+from winter_dragon.metrics.instruments import observe_job
 from winter_dragon.redis.connection import RedisConnection
 from winter_dragon.redis.queue import TaskQueue
 
@@ -32,8 +41,34 @@ from winter_dragon.redis.queue import TaskQueue
 logger = LoggerMixin().logger
 
 
+def serve_worker_metrics(processes: int = 1) -> MetricsExporter:
+    """Start serving the metrics of this worker and the processes it starts.
+
+    In multiprocess mode, the metrics left by a previous run are removed first.
+    """
+    if (path := multiprocess_dir()) is not None:
+        clear_multiprocess_dir(path)
+    elif processes > 1:
+        logger.warning(f"Set {MULTIPROCESS_DIR_ENV} to serve the metrics of every worker process")
+    exporter = MetricsExporter(host=MetricsConfig.get_host(), port=MetricsConfig.get_worker_port())
+    exporter.start()
+    return exporter
+
+
 class LoggingWorker(Worker):
-    """Custom Worker class that logs job lifecycle events."""
+    """Custom Worker class that logs job lifecycle events, and times jobs."""
+
+    def execute_job(self, job: rq.job.Job, queue: rq.Queue) -> None:
+        """Execute the job, and record how long it took.
+
+        Timed here, in the worker process, rather than in the work horse it forks,
+        so the metrics aren't spread over a file per work horse in multiprocess mode.
+        """
+        start = time.perf_counter()
+        super().execute_job(job, queue)
+        func_name = job.func_name.split(".")[-1] if job.func_name else "unknown"
+        status = job.get_status()
+        observe_job(func_name, status.value if status else "unknown", time.perf_counter() - start)
 
     def perform_job(self, job: rq.job.Job, queue: rq.Queue) -> bool:
         """Perform the job with logging."""
@@ -215,6 +250,8 @@ def main() -> None:
         else:
             sys.exit(1)
 
+    serve_worker_metrics(args.workers)
+
     # Start worker(s)
     if args.workers == 1:
         # Single worker